@@ -0,0 +1,32 @@
+"""Add updated_at to nfts for incremental metadata generation
+
+Revision ID: 5c1f0a9d7e21
+Revises: 2783eba0a18b
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c1f0a9d7e21'
+down_revision: Union[str, None] = '2783eba0a18b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # SQLite sabit olmayan varsayılanla sütun eklemeye izin vermediği için
+    # sütun boş eklenir ve mevcut satırlar created_at ile doldurulur.
+    op.add_column('nfts', sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True))
+    op.execute("UPDATE nfts SET updated_at = created_at WHERE updated_at IS NULL")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('nfts') as batch_op:
+        batch_op.drop_column('updated_at')
@@ -0,0 +1,33 @@
+"""Add composite indexes for keyset-paginated NFT catalog
+
+Revision ID: 8d3e6b2a4f10
+Revises: 5c1f0a9d7e21
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d3e6b2a4f10'
+down_revision: Union[str, None] = '5c1f0a9d7e21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Sıralama anahtarı + id ile keyset sayfalama indeks üzerinden ilerler
+    op.create_index('ix_nfts_catalog_price', 'nfts', ['is_active', 'price_stars', 'id'], unique=False)
+    op.create_index('ix_nfts_catalog_newest', 'nfts', ['is_active', 'created_at', 'id'], unique=False)
+    op.create_index('ix_nfts_catalog_category_price', 'nfts', ['category', 'price_stars', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_nfts_catalog_category_price', table_name='nfts')
+    op.drop_index('ix_nfts_catalog_newest', table_name='nfts')
+    op.drop_index('ix_nfts_catalog_price', table_name='nfts')
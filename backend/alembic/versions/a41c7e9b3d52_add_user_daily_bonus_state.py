@@ -0,0 +1,46 @@
+"""Denormalize daily bonus state onto users
+
+Revision ID: a41c7e9b3d52
+Revises: 8d3e6b2a4f10
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a41c7e9b3d52'
+down_revision: Union[str, None] = '8d3e6b2a4f10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('last_daily_bonus_at', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('users', sa.Column('daily_bonus_streak', sa.Integer(), nullable=False, server_default='0'))
+    # Mevcut durum talep geçmişinden bir kez doldurulur
+    op.execute(
+        """
+        UPDATE users SET
+            last_daily_bonus_at = (
+                SELECT MAX(c.claim_date) FROM daily_bonus_claims c WHERE c.user_id = users.id
+            ),
+            daily_bonus_streak = COALESCE((
+                SELECT c.day_streak FROM daily_bonus_claims c
+                WHERE c.user_id = users.id
+                ORDER BY c.claim_date DESC, c.id DESC
+                LIMIT 1
+            ), 0)
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('daily_bonus_streak')
+        batch_op.drop_column('last_daily_bonus_at')
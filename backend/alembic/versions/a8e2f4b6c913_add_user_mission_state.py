@@ -0,0 +1,47 @@
+"""Add user_mission_state summary table
+
+Revision ID: a8e2f4b6c913
+Revises: d6c4a8f1e2b7
+Create Date: 2026-10-19 23:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a8e2f4b6c913'
+down_revision: Union[str, None] = 'd6c4a8f1e2b7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'user_mission_state',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('mission_id', sa.Integer(), nullable=False),
+        sa.Column('last_completed_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('completion_count', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['mission_id'], ['missions.id']),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('user_id', 'mission_id'),
+    )
+    # Durum satırları mevcut tamamlama geçmişinden bir kez doldurulur
+    op.execute(
+        """
+        INSERT INTO user_mission_state (user_id, mission_id, last_completed_at, completion_count)
+        SELECT user_id, mission_id, MAX(completed_at), COUNT(*)
+        FROM user_missions
+        WHERE completed_at IS NOT NULL
+        GROUP BY user_id, mission_id
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('user_mission_state')
@@ -0,0 +1,47 @@
+"""Backfill persisted user levels from XP
+
+Revision ID: b3d9e7a5c184
+Revises: f2b8d4c6a913
+Create Date: 2026-10-19 21:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3d9e7a5c184'
+down_revision: Union[str, None] = 'f2b8d4c6a913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # users.level XP değişikliklerinde hiç güncellenmiyordu; bu revizyondaki eşik
+    # tablosuyla (levels.py) bir kez doldurulur. Sonraki eşik değişiklikleri için
+    # `python levels.py --recompute` kullanılır.
+    op.execute(
+        """
+        UPDATE users SET level = CASE
+            WHEN COALESCE(xp, 0) < 100 THEN 1
+            WHEN xp < 300 THEN 2
+            WHEN xp < 600 THEN 3
+            WHEN xp < 1000 THEN 4
+            WHEN xp < 1500 THEN 5
+            WHEN xp < 2500 THEN 6
+            WHEN xp < 4000 THEN 7
+            WHEN xp < 6000 THEN 8
+            WHEN xp < 9000 THEN 9
+            ELSE 10 + (xp - 9000) / 5000
+        END
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Veri düzeltmesi; geri alınacak şema değişikliği yok
+    pass
@@ -0,0 +1,46 @@
+"""Add broadcasts table for Telegram notifications
+
+Revision ID: b9d3e6a1f482
+Revises: e8b1d5f3a274
+Create Date: 2026-10-20 02:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b9d3e6a1f482'
+down_revision: Union[str, None] = 'e8b1d5f3a274'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'broadcasts',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('kind', sa.String(), nullable=False),
+        sa.Column('audience', sa.String(), nullable=False),
+        sa.Column('text', sa.String(), nullable=False),
+        sa.Column('status', sa.Enum('PENDING', 'RUNNING', 'DONE', 'CANCELLED', name='broadcaststatus'), nullable=False),
+        sa.Column('cursor_user_id', sa.Integer(), nullable=False),
+        sa.Column('sent_count', sa.Integer(), nullable=False),
+        sa.Column('failed_count', sa.Integer(), nullable=False),
+        sa.Column('lease_until', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(op.f('ix_broadcasts_id'), 'broadcasts', ['id'], unique=False)
+    op.create_index('ix_broadcasts_status_id', 'broadcasts', ['status', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_broadcasts_status_id', table_name='broadcasts')
+    op.drop_index(op.f('ix_broadcasts_id'), table_name='broadcasts')
+    op.drop_table('broadcasts')
@@ -0,0 +1,71 @@
+"""Add invite closure table and materialized invite counts
+
+Revision ID: c4f7a9e2d851
+Revises: a8e2f4b6c913
+Create Date: 2026-10-20 00:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4f7a9e2d851'
+down_revision: Union[str, None] = 'a8e2f4b6c913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('invite_subtree_size', sa.Integer(), nullable=False, server_default='0'))
+    op.create_index(op.f('ix_users_inviter_id'), 'users', ['inviter_id'], unique=False)
+    op.create_index(op.f('ix_users_invited_users_count'), 'users', ['invited_users_count'], unique=False)
+    op.create_index(op.f('ix_users_invite_subtree_size'), 'users', ['invite_subtree_size'], unique=False)
+    op.create_table(
+        'invite_closure',
+        sa.Column('ancestor_id', sa.Integer(), nullable=False),
+        sa.Column('descendant_id', sa.Integer(), nullable=False),
+        sa.Column('depth', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['ancestor_id'], ['users.id']),
+        sa.ForeignKeyConstraint(['descendant_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('ancestor_id', 'descendant_id'),
+    )
+    op.create_index(op.f('ix_invite_closure_descendant_id'), 'invite_closure', ['descendant_id'], unique=False)
+    op.create_index('ix_invite_closure_ancestor_depth', 'invite_closure', ['ancestor_id', 'depth'], unique=False)
+    # Kapanış tablosu mevcut inviter_id zincirlerinden özyinelemeli CTE ile bir kez
+    # doldurulur (derinlik sınırı bozuk veride döngüye karşı); sayaçlar buradan hesaplanır
+    op.execute(
+        """
+        INSERT INTO invite_closure (ancestor_id, descendant_id, depth)
+        WITH RECURSIVE tree(ancestor_id, descendant_id, depth) AS (
+            SELECT inviter_id, id, 1 FROM users WHERE inviter_id IS NOT NULL
+            UNION ALL
+            SELECT tree.ancestor_id, users.id, tree.depth + 1
+            FROM tree JOIN users ON users.inviter_id = tree.descendant_id
+            WHERE tree.depth < 1000
+        )
+        SELECT ancestor_id, descendant_id, MIN(depth) FROM tree GROUP BY ancestor_id, descendant_id
+        """
+    )
+    op.execute(
+        """
+        UPDATE users SET
+            invited_users_count = (SELECT COUNT(*) FROM invite_closure c WHERE c.ancestor_id = users.id AND c.depth = 1),
+            invite_subtree_size = (SELECT COUNT(*) FROM invite_closure c WHERE c.ancestor_id = users.id)
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_invite_closure_ancestor_depth', table_name='invite_closure')
+    op.drop_index(op.f('ix_invite_closure_descendant_id'), table_name='invite_closure')
+    op.drop_table('invite_closure')
+    op.drop_index(op.f('ix_users_invite_subtree_size'), table_name='users')
+    op.drop_index(op.f('ix_users_invited_users_count'), table_name='users')
+    op.drop_index(op.f('ix_users_inviter_id'), table_name='users')
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('invite_subtree_size')
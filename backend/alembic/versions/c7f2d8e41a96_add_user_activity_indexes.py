@@ -0,0 +1,43 @@
+"""Add last_mission_at and activity indexes for the daily reset job
+
+Revision ID: c7f2d8e41a96
+Revises: a41c7e9b3d52
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7f2d8e41a96'
+down_revision: Union[str, None] = 'a41c7e9b3d52'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('last_mission_at', sa.DateTime(timezone=True), nullable=True))
+    # Son görev zamanı görev loglarından bir kez doldurulur
+    op.execute(
+        """
+        UPDATE users SET last_mission_at = (
+            SELECT MAX(l.completion_time) FROM user_mission_logs l WHERE l.user_id = users.id
+        )
+        """
+    )
+    op.create_index(op.f('ix_users_last_mission_at'), 'users', ['last_mission_at'], unique=False)
+    op.create_index(op.f('ix_users_last_login_date'), 'users', ['last_login_date'], unique=False)
+    op.create_index(op.f('ix_users_last_daily_bonus_at'), 'users', ['last_daily_bonus_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_users_last_daily_bonus_at'), table_name='users')
+    op.drop_index(op.f('ix_users_last_login_date'), table_name='users')
+    op.drop_index(op.f('ix_users_last_mission_at'), table_name='users')
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('last_mission_at')
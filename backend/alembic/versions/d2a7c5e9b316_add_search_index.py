@@ -0,0 +1,41 @@
+"""Add full-text search index for missions, NFTs and badges
+
+Revision ID: d2a7c5e9b316
+Revises: b9d3e6a1f482
+Create Date: 2026-10-20 03:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# Dizin tablosu, trigger'lar ve ilk doldurma lehçeye göre search.py'de üretilir
+# (SQLite: FTS5, PostgreSQL: tsvector + GIN); ifadeler tekrar çalıştırılabilir.
+import search
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2a7c5e9b316'
+down_revision: Union[str, None] = 'b9d3e6a1f482'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    search.install(op.get_bind())
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    for table, *_ in search.SOURCES:
+        if bind.dialect.name == "postgresql":
+            op.execute(f"DROP TRIGGER IF EXISTS search_{table} ON {table}")
+            op.execute(f"DROP FUNCTION IF EXISTS search_index_{table}()")
+        else:
+            for suffix in ("ai", "au", "ad"):
+                op.execute(f"DROP TRIGGER IF EXISTS search_{table}_{suffix}")
+    op.execute("DROP TABLE IF EXISTS search_index")
+    if bind.dialect.name == "postgresql":
+        op.execute("DROP FUNCTION IF EXISTS search_fold(text)")
@@ -0,0 +1,43 @@
+"""Add pending_credits table for coalesced XP/Stars credits
+
+Revision ID: d6c4a8f1e2b7
+Revises: b3d9e7a5c184
+Create Date: 2026-10-19 22:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd6c4a8f1e2b7'
+down_revision: Union[str, None] = 'b3d9e7a5c184'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'pending_credits',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('xp', sa.Integer(), nullable=False),
+        sa.Column('stars', sa.Integer(), nullable=False),
+        sa.Column('reason', sa.String(), nullable=False),
+        sa.Column('description', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(op.f('ix_pending_credits_id'), 'pending_credits', ['id'], unique=False)
+    op.create_index(op.f('ix_pending_credits_user_id'), 'pending_credits', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_pending_credits_user_id'), table_name='pending_credits')
+    op.drop_index(op.f('ix_pending_credits_id'), table_name='pending_credits')
+    op.drop_table('pending_credits')
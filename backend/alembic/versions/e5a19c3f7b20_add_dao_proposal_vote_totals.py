@@ -0,0 +1,41 @@
+"""Add vote power totals to dao_proposals
+
+Revision ID: e5a19c3f7b20
+Revises: c7f2d8e41a96
+Create Date: 2026-10-19 19:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a19c3f7b20'
+down_revision: Union[str, None] = 'c7f2d8e41a96'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('dao_proposals', sa.Column('total_yes_power', sa.Integer(), nullable=True, server_default='0'))
+    op.add_column('dao_proposals', sa.Column('total_no_power', sa.Integer(), nullable=True, server_default='0'))
+    # Toplamlar mevcut oylardan bir kez doldurulur
+    op.execute(
+        """
+        UPDATE dao_proposals SET
+            total_yes_power = COALESCE((SELECT SUM(v.vote_power) FROM dao_votes v
+                                        WHERE v.proposal_id = dao_proposals.id AND v.choice = TRUE), 0),
+            total_no_power = COALESCE((SELECT SUM(v.vote_power) FROM dao_votes v
+                                       WHERE v.proposal_id = dao_proposals.id AND v.choice = FALSE), 0)
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('dao_proposals') as batch_op:
+        batch_op.drop_column('total_no_power')
+        batch_op.drop_column('total_yes_power')
@@ -0,0 +1,39 @@
+"""Add invite_rewards payout ledger
+
+Revision ID: e8b1d5f3a274
+Revises: c4f7a9e2d851
+Create Date: 2026-10-20 01:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8b1d5f3a274'
+down_revision: Union[str, None] = 'c4f7a9e2d851'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'invite_rewards',
+        sa.Column('inviter_id', sa.Integer(), nullable=False),
+        sa.Column('invitee_id', sa.Integer(), nullable=False),
+        sa.Column('stars', sa.Integer(), nullable=False),
+        sa.Column('paid_at', sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(['invitee_id'], ['users.id']),
+        sa.ForeignKeyConstraint(['inviter_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('inviter_id', 'invitee_id'),
+    )
+    op.create_index(op.f('ix_invite_rewards_invitee_id'), 'invite_rewards', ['invitee_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_invite_rewards_invitee_id'), table_name='invite_rewards')
+    op.drop_table('invite_rewards')
@@ -0,0 +1,45 @@
+"""Add task_outbox table for the background task queue
+
+Revision ID: f2b8d4c6a913
+Revises: e5a19c3f7b20
+Create Date: 2026-10-19 20:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2b8d4c6a913'
+down_revision: Union[str, None] = 'e5a19c3f7b20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'task_outbox',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('task', sa.String(), nullable=False),
+        sa.Column('payload', sa.String(), nullable=False),
+        sa.Column('status', sa.Enum('PENDING', 'RUNNING', 'FAILED', name='taskstatus'), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('max_attempts', sa.Integer(), nullable=False),
+        sa.Column('available_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('last_error', sa.String(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(op.f('ix_task_outbox_id'), 'task_outbox', ['id'], unique=False)
+    op.create_index('ix_task_outbox_status_available_at', 'task_outbox', ['status', 'available_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_task_outbox_status_available_at', table_name='task_outbox')
+    op.drop_index(op.f('ix_task_outbox_id'), table_name='task_outbox')
+    op.drop_table('task_outbox')
+    sa.Enum(name='taskstatus').drop(op.get_bind(), checkfirst=True)
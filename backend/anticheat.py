@@ -0,0 +1,447 @@
+# anticheat.py - Görev tamamlama ve Stars hızına dayalı hile tespiti
+#
+# Gerçek zamanlı mod (uygulama içinde):
+# - Commit edilen görev tamamlama (user_missions) ve Stars kazanım
+#   (star_transactions) satırları oturum olaylarından akış olarak alınır;
+#   user_mission_logs tablosu okunmaz. Aynı commit'te aynı zaman damgasıyla
+#   yazılan tamamlamalar (toplu tamamlama partisi) tek olay sayılır. Sunucunun
+#   kendiliğinden verdiği Stars (SYSTEM_STAR_REASONS: davet ödülü vb.) sayılmaz.
+# - Her kullanıcı için son tamamlama zamanları ve Stars kazanımları sabit
+#   boyutlu halka tamponlarda (array) tutulur. Kayan pencere sayaçları
+#   (dakika/saat) ve ardışık tamamlamalar arasındaki sürelerin ortalaması ve
+#   değişim katsayısı (std/ortalama) bu tampondan hesaplanır. Çok düzenli
+#   aralıklar (düşük değişim katsayısı) otomasyona işarettir.
+# - Eşiği aşan kullanıcı işaretlenir (log + anticheat_flags_total metriği).
+#   ANTICHEAT_MODE=throttle ise işaretli kullanıcının görev tamamlamaları
+#   ANTICHEAT_THROTTLE_SECONDS boyunca 429 ile reddedilir.
+# - Durum süreç içidir; her worker kendi trafiğini izler.
+#
+# Toplu mod (geçmiş kayıtlar):
+#   python anticheat.py [--days 7] [--limit 50] [--chunk-users 5000]
+# user_mission_logs kullanıcı aralıkları halinde okunur, aynı kurallar NumPy ile
+# vektörel (searchsorted/reduceat) uygulanır ve işaretlenen kullanıcılar JSON
+# satırları olarak yazdırılır. NumPy yoksa aynı hesap bisect ile yapılır.
+#
+# Ortam değişkenleri:
+#   ANTICHEAT_ENABLED=1                 0 ise olaylar işlenmez
+#   ANTICHEAT_MODE=flag                 flag (yalnızca işaretle) | throttle
+#   ANTICHEAT_MAX_PER_MINUTE=6          dakikada en fazla görev tamamlama
+#   ANTICHEAT_MAX_PER_HOUR=40           saatte en fazla görev tamamlama
+#   ANTICHEAT_MAX_STARS_PER_HOUR=1000   saatte en fazla Stars kazanımı
+#   ANTICHEAT_THROTTLE_SECONDS=300      throttle modunda engelleme süresi
+
+import argparse
+import json
+import logging
+import math
+import os
+import sys
+import threading
+import time
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+try:
+    import numpy as np
+except ImportError:  # numpy opsiyonel; sadece toplu modu hızlandırır
+    np = None
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+ENABLED = os.getenv("ANTICHEAT_ENABLED", "1") not in ("0", "false", "False")
+MODE = os.getenv("ANTICHEAT_MODE", "flag")
+MAX_PER_MINUTE = int(os.getenv("ANTICHEAT_MAX_PER_MINUTE", "6"))
+MAX_PER_HOUR = int(os.getenv("ANTICHEAT_MAX_PER_HOUR", "40"))
+MAX_STARS_PER_HOUR = int(os.getenv("ANTICHEAT_MAX_STARS_PER_HOUR", "1000"))
+THROTTLE_SECONDS = float(os.getenv("ANTICHEAT_THROTTLE_SECONDS", "300"))
+
+# Aralık istatistiği için gereken en az ardışık aralık sayısı ve eşikler:
+# ortalaması ROBOTIC_MAX_MEAN_GAP saniyeden kısa, değişim katsayısı
+# ROBOTIC_MAX_CV'den küçük aralıklar "robotik" sayılır
+MIN_GAPS = 8
+ROBOTIC_MAX_CV = 0.1
+ROBOTIC_MAX_MEAN_GAP = 300.0
+
+# Halka tampon boyutları (saatlik sayaç MAX_PER_HOUR'dan büyük tamponla doğru sayar)
+COMPLETION_RING = 64
+STARS_RING = 32
+# Aralık istatistiğinde kullanılan son tamamlama sayısı
+GAP_SAMPLE = 16
+# Bellekte izlenen en fazla kullanıcı (LRU)
+MAX_TRACKED_USERS = 100_000
+
+# Sunucunun kullanıcı eyleminden bağımsız verdiği Stars (davet ödülü, kayıt
+# bonusu, yönetici yüklemesi) Stars hız kuralına sayılmaz
+SYSTEM_STAR_REASONS = frozenset({"invite_reward", "signup_bonus", "admin_grant"})
+
+_PENDING_KEY = "anticheat_pending"
+
+
+@dataclass(frozen=True)
+class Features:
+    """Bir kullanıcının hız özellikleri (gerçek zamanlı ve toplu modda ortak)"""
+    per_minute: int
+    per_hour: int
+    gap_count: int = 0
+    mean_gap: float = 0.0
+    gap_cv: float = 0.0
+    stars_per_hour: int = 0
+
+
+def reasons_for(features: Features) -> List[str]:
+    """Eşiği aşan kuralların adları (boşsa kullanıcı temiz)"""
+    reasons = []
+    if features.per_minute > MAX_PER_MINUTE:
+        reasons.append("burst_minute")
+    if features.per_hour > MAX_PER_HOUR:
+        reasons.append("burst_hour")
+    if (features.gap_count >= MIN_GAPS and features.mean_gap < ROBOTIC_MAX_MEAN_GAP
+            and features.gap_cv < ROBOTIC_MAX_CV):
+        reasons.append("robotic_interval")
+    if features.stars_per_hour > MAX_STARS_PER_HOUR:
+        reasons.append("stars_hour")
+    return reasons
+
+
+def _gap_stats(times: Sequence[float]) -> Tuple[int, float, float]:
+    """Sıralı zamanlar arasındaki aralıkların (sayı, ortalama, değişim katsayısı)"""
+    gaps = [b - a for a, b in zip(times, times[1:])]
+    if not gaps:
+        return 0, 0.0, 0.0
+    mean = sum(gaps) / len(gaps)
+    if mean <= 0:
+        # Hepsi aynı anda: aralık bilgisi yok, düzenli aralık sayılmaz
+        return 0, 0.0, 0.0
+    std = math.sqrt(sum((gap - mean) ** 2 for gap in gaps) / len(gaps))
+    return len(gaps), mean, std / mean
+
+
+class UserWindow:
+    """Tek kullanıcının halka tamponları (tamamlama zamanları ve Stars kazanımları)"""
+
+    __slots__ = ("times", "count", "stars_times", "stars_amounts", "stars_count")
+
+    def __init__(self):
+        self.times = array("d", bytes(8 * COMPLETION_RING))
+        self.count = 0
+        self.stars_times = array("d", bytes(8 * STARS_RING))
+        self.stars_amounts = array("l", bytes(array("l").itemsize * STARS_RING))
+        self.stars_count = 0
+
+    def add_completion(self, at: float) -> None:
+        self.times[self.count % COMPLETION_RING] = at
+        self.count += 1
+
+    def add_stars(self, at: float, amount: int) -> None:
+        index = self.stars_count % STARS_RING
+        self.stars_times[index] = at
+        self.stars_amounts[index] = amount
+        self.stars_count += 1
+
+    def features(self, now: float) -> Features:
+        filled = min(self.count, COMPLETION_RING)
+        times = self.times[:filled]
+        per_minute = sum(1 for at in times if at > now - 60)
+        per_hour = sum(1 for at in times if at > now - 3600)
+        recent = sorted(times)[-GAP_SAMPLE:]
+        gap_count, mean_gap, gap_cv = _gap_stats(recent)
+        stars_filled = min(self.stars_count, STARS_RING)
+        stars_per_hour = sum(
+            amount for at, amount in zip(self.stars_times[:stars_filled], self.stars_amounts[:stars_filled])
+            if at > now - 3600
+        )
+        return Features(per_minute, per_hour, gap_count, mean_gap, gap_cv, stars_per_hour)
+
+
+@dataclass
+class Flag:
+    user_id: int
+    reasons: List[str]
+    features: Features
+    flagged_at: float
+    blocked_until: float = 0.0
+    count: int = 1
+
+
+class Detector:
+    """Kullanıcı başına kayan pencere durumunu tutan akış dedektörü"""
+
+    def __init__(self, mode: str = MODE, max_users: int = MAX_TRACKED_USERS,
+                 throttle_seconds: float = THROTTLE_SECONDS):
+        self.mode = mode
+        self.max_users = max_users
+        self.throttle_seconds = throttle_seconds
+        self._lock = threading.Lock()
+        self._windows: "OrderedDict[int, UserWindow]" = OrderedDict()
+        self.flags: Dict[int, Flag] = {}
+
+    def _window(self, user_id: int) -> UserWindow:
+        window = self._windows.get(user_id)
+        if window is None:
+            window = self._windows[user_id] = UserWindow()
+            if len(self._windows) > self.max_users:
+                self._windows.popitem(last=False)
+        else:
+            self._windows.move_to_end(user_id)
+        return window
+
+    def record(self, completions: Iterable[Tuple[int, float]] = (),
+               stars: Iterable[Tuple[int, float, int]] = (), now: Optional[float] = None) -> List[Flag]:
+        """Olayları işler; bu çağrıda işaretlenen kullanıcıları döndürür"""
+        now = time.time() if now is None else now
+        touched = set()
+        with self._lock:
+            for user_id, at in completions:
+                self._window(user_id).add_completion(at)
+                touched.add(user_id)
+            for user_id, at, amount in stars:
+                self._window(user_id).add_stars(at, amount)
+                touched.add(user_id)
+            flagged = []
+            for user_id in touched:
+                features = self._windows[user_id].features(now) if user_id in self._windows else None
+                reasons = reasons_for(features) if features else []
+                if reasons:
+                    flagged.append(self._flag(user_id, reasons, features, now))
+        for flag in flagged:
+            for reason in flag.reasons:
+                metrics.ANTICHEAT_FLAGS.inc(labels=(reason,))
+            logger.warning("Suspicious mission velocity", extra={
+                "user_id": flag.user_id, "reasons": flag.reasons, "mode": self.mode,
+                "per_minute": flag.features.per_minute, "per_hour": flag.features.per_hour,
+                "gap_cv": round(flag.features.gap_cv, 3),
+            })
+        return flagged
+
+    def _flag(self, user_id: int, reasons: List[str], features: Features, now: float) -> Flag:
+        flag = self.flags.get(user_id)
+        if flag is None:
+            flag = self.flags[user_id] = Flag(user_id, reasons, features, now)
+        else:
+            flag.reasons, flag.features, flag.flagged_at = reasons, features, now
+            flag.count += 1
+        if self.mode == "throttle":
+            flag.blocked_until = now + self.throttle_seconds
+        return flag
+
+    def retry_after(self, user_id: int, now: Optional[float] = None) -> float:
+        """Kullanıcı engelliyse kalan saniye, değilse 0 (tek sözlük okuması)"""
+        flag = self.flags.get(user_id)
+        if flag is None or not flag.blocked_until:
+            return 0.0
+        remaining = flag.blocked_until - (time.time() if now is None else now)
+        return remaining if remaining > 0 else 0.0
+
+    def clear(self) -> None:
+        with self._lock:
+            self._windows.clear()
+            self.flags.clear()
+
+
+detector = Detector()
+
+
+def enforce(user_id: int) -> None:
+    """Throttle modunda engellenen kullanıcının görev tamamlamasını 429 ile reddeder"""
+    wait = detector.retry_after(user_id)
+    if wait:
+        retry_after = max(1, int(wait + 0.999))
+        raise HTTPException(
+            status_code=429,
+            detail=f"Olağandışı görev hızı tespit edildi. Lütfen {retry_after} saniye sonra tekrar deneyin.",
+            headers={"Retry-After": str(retry_after)},
+        )
+
+
+def _timestamp(value: Optional[datetime], default: float) -> float:
+    if value is None:
+        return default
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def instrument_sessions() -> None:
+    """
+    Commit edilen görev tamamlama ve Stars kazanım satırlarını dedektöre verir.
+    Flush'ta eklenen satırlar oturumda bekletilir; rollback olursa işlenmez.
+    Toplu tamamlama tüm öğeleri aynı sunucu zamanıyla yazar; bu satırlar tek
+    tamamlama olarak verilir, aksi halde meşru bir parti dakika sınırını aşardı.
+    """
+    import models
+
+    @event.listens_for(Session, "after_flush")
+    def _collect(session, flush_context):
+        if not ENABLED:
+            return
+        # Zaman sütunları server_default ise flush sonrası yüklü değildir; __dict__
+        # okuması sorgu tetiklemez, değer yoksa commit zamanı kullanılır
+        for obj in session.new:
+            if isinstance(obj, models.UserMission):
+                session.info.setdefault(_PENDING_KEY, []).append(
+                    ("mission", obj.user_id, obj.__dict__.get("completed_at"), 0))
+            elif (isinstance(obj, models.StarTransaction) and (obj.amount or 0) > 0
+                  and obj.reason not in SYSTEM_STAR_REASONS):
+                session.info.setdefault(_PENDING_KEY, []).append(
+                    ("stars", obj.user_id, obj.__dict__.get("created_at"), obj.amount))
+
+    @event.listens_for(Session, "after_commit")
+    def _publish(session):
+        pending = session.info.pop(_PENDING_KEY, None)
+        if not pending:
+            return
+        now = time.time()
+        completions = []
+        seen = set()
+        for kind, user_id, at, _ in pending:
+            if kind != "mission":
+                continue
+            if at is not None:
+                if (user_id, at) in seen:
+                    continue
+                seen.add((user_id, at))
+            completions.append((user_id, _timestamp(at, now)))
+        detector.record(
+            completions=completions,
+            stars=[(user_id, _timestamp(at, now), amount) for kind, user_id, at, amount in pending if kind == "stars"],
+            now=now,
+        )
+
+    @event.listens_for(Session, "after_rollback")
+    def _discard(session):
+        session.info.pop(_PENDING_KEY, None)
+
+
+instrument_sessions()
+
+
+# --- Toplu mod -------------------------------------------------------------
+
+def _features_numpy(user_ids, times) -> Dict[int, Features]:
+    """Kullanıcıya ve zamana göre sıralı diziler için vektörel özellik hesabı"""
+    starts = np.flatnonzero(np.r_[True, user_ids[1:] != user_ids[:-1]])
+    group = np.repeat(np.arange(len(starts)), np.diff(np.r_[starts, len(user_ids)]))
+    # Grup indeksini zamana ekleyerek tek bir sıralı anahtar elde edilir;
+    # searchsorted pencere başlangıcını grup sınırını aşmadan bulur. Pencereler
+    # gerçek zamanlı moddaki gibi (t - pencere, t] aralığıdır.
+    relative = times - times.min()
+    span = relative.max() + 3601.0
+    key = group * span + relative
+    index = np.arange(len(key))
+    per_minute = np.maximum.reduceat(index - np.searchsorted(key, key - 60, side="right") + 1, starts)
+    per_hour = np.maximum.reduceat(index - np.searchsorted(key, key - 3600, side="right") + 1, starts)
+
+    gaps = np.diff(times)
+    same_user = group[1:] == group[:-1]
+    gap_group = group[1:][same_user]
+    gaps = gaps[same_user]
+    gap_count = np.bincount(gap_group, minlength=len(starts))
+    total = np.bincount(gap_group, weights=gaps, minlength=len(starts))
+    squares = np.bincount(gap_group, weights=gaps * gaps, minlength=len(starts))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = np.where(gap_count > 0, total / np.maximum(gap_count, 1), 0.0)
+        std = np.sqrt(np.maximum(np.where(gap_count > 0, squares / np.maximum(gap_count, 1), 0.0) - mean ** 2, 0.0))
+        cv = np.where(mean > 0, std / np.where(mean > 0, mean, 1.0), 0.0)
+    # Aralıkların hepsi sıfırsa (aynı anda) aralık bilgisi yoktur; _gap_stats ile aynı
+    gap_count = np.where(mean > 0, gap_count, 0)
+
+    suspicious = (per_minute > MAX_PER_MINUTE) | (per_hour > MAX_PER_HOUR) | (
+        (gap_count >= MIN_GAPS) & (mean < ROBOTIC_MAX_MEAN_GAP) & (cv < ROBOTIC_MAX_CV)
+    )
+    return {
+        int(user_ids[starts[i]]): Features(int(per_minute[i]), int(per_hour[i]), int(gap_count[i]),
+                                           float(mean[i]), float(cv[i]))
+        for i in np.flatnonzero(suspicious)
+    }
+
+
+def _features_python(rows: Sequence[Tuple[int, float]]) -> Dict[int, Features]:
+    result = {}
+    start = 0
+    while start < len(rows):
+        user_id = rows[start][0]
+        end = start
+        while end < len(rows) and rows[end][0] == user_id:
+            end += 1
+        times = [at for _, at in rows[start:end]]
+        per_minute = max(i - bisect_right(times, at - 60, hi=i) + 1 for i, at in enumerate(times))
+        per_hour = max(i - bisect_right(times, at - 3600, hi=i) + 1 for i, at in enumerate(times))
+        features = Features(per_minute, per_hour, *_gap_stats(times))
+        if reasons_for(features):
+            result[user_id] = features
+        start = end
+    return result
+
+
+def score_history(db: Session, since: datetime, chunk_users: int = 5000) -> List[Flag]:
+    """user_mission_logs kayıtlarını kullanıcı aralıkları halinde tarar ve şüphelileri döndürür"""
+    from models import UserMissionLog
+
+    flags: List[Flag] = []
+    last_user_id = 0
+    while True:
+        upper = db.execute(
+            select(UserMissionLog.user_id)
+            .where(UserMissionLog.user_id > last_user_id, UserMissionLog.completion_time >= since)
+            .group_by(UserMissionLog.user_id)
+            .order_by(UserMissionLog.user_id)
+            .offset(chunk_users - 1)
+            .limit(1)
+        ).scalar()
+        query = (
+            select(UserMissionLog.user_id, UserMissionLog.completion_time)
+            .where(UserMissionLog.user_id > last_user_id, UserMissionLog.completion_time >= since)
+            .order_by(UserMissionLog.user_id, UserMissionLog.completion_time)
+        )
+        if upper is not None:
+            query = query.where(UserMissionLog.user_id <= upper)
+        rows = [(user_id, _timestamp(at, 0.0)) for user_id, at in db.execute(query)]
+        if rows:
+            if np is not None:
+                user_ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+                times = np.fromiter((row[1] for row in rows), dtype=np.float64, count=len(rows))
+                suspicious = _features_numpy(user_ids, times)
+            else:
+                suspicious = _features_python(rows)
+            flags.extend(Flag(user_id, reasons_for(features), features, rows[-1][1])
+                         for user_id, features in suspicious.items())
+        if upper is None:
+            break
+        last_user_id = upper
+    flags.sort(key=lambda flag: (-len(flag.reasons), -flag.features.per_minute, flag.user_id))
+    return flags
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Geçmiş görev kayıtlarında şüpheli hızları puanlar")
+    parser.add_argument("--days", type=float, default=7, help="taranacak gün sayısı")
+    parser.add_argument("--limit", type=int, default=50, help="yazdırılacak en fazla kullanıcı")
+    parser.add_argument("--chunk-users", type=int, default=5000, help="tek seferde okunan kullanıcı sayısı")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    from database import SessionLocal
+
+    started = time.perf_counter()
+    since = datetime.now(timezone.utc) - timedelta(days=args.days)
+    with SessionLocal() as db:
+        flags = score_history(db, since, chunk_users=args.chunk_users)
+    for flag in flags[:args.limit]:
+        print(json.dumps({"user_id": flag.user_id, "reasons": flag.reasons, **asdict(flag.features)}))
+    logger.info(f"{len(flags)} şüpheli kullanıcı ({time.perf_counter() - started:.2f} sn, "
+                f"{'numpy' if np is not None else 'bisect'})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
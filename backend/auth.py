@@ -1,5 +1,6 @@
 # backend/auth.py
 import hmac
+import logging
 import hashlib
 import json
 from urllib.parse import unquote
@@ -11,7 +12,7 @@ from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from pydantic import ValidationError
 
-import crud, models, schemas
+import crud, metrics, models, schemas
 from database import get_db
 from sqlalchemy.orm import Session
 import os
@@ -19,6 +20,8 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "1440"))
@@ -32,7 +35,8 @@ DEV_FALLBACK_TELEGRAM_ID = int(os.getenv("DEV_FALLBACK_TELEGRAM_ID", "12345678")
 def validate_init_data(init_data: str, bot_token: str = BOT_TOKEN) -> Optional[schemas.InitData]:
     """Validates the initData string from Telegram WebApp."""
     if not bot_token:
-        print("Error: BOT_TOKEN is not set.")
+        logger.error("BOT_TOKEN is not set.")
+        metrics.AUTH_INIT_DATA_VALIDATIONS.inc(labels=("no_bot_token",))
         return None
 
     try:
@@ -48,7 +52,8 @@ def validate_init_data(init_data: str, bot_token: str = BOT_TOKEN) -> Optional[s
 
         received_hash = parsed_data.pop('hash', None)
         if not received_hash:
-            print("Validation Error: No hash found in initData")
+            logger.warning("initData validation failed: no hash", extra={"reason": "no_hash"})
+            metrics.AUTH_INIT_DATA_VALIDATIONS.inc(labels=("no_hash",))
             return None
 
         data_check_string_parts = []
@@ -66,21 +71,23 @@ def validate_init_data(init_data: str, bot_token: str = BOT_TOKEN) -> Optional[s
                 auth_date = datetime.fromtimestamp(init_data_model.auth_date, tz=timezone.utc)
                 # Zaman aşımı kontrolü daha kısa tutulabilir (örn: 5 dakika)
                 if datetime.now(tz=timezone.utc) - auth_date > timedelta(minutes=60):
-                     print("Validation Error: initData is too old (over 60 minutes)")
+                     logger.warning("initData validation failed: older than 60 minutes", extra={"reason": "expired"})
+                     metrics.AUTH_INIT_DATA_VALIDATIONS.inc(labels=("expired",))
                      return None
+                metrics.AUTH_INIT_DATA_VALIDATIONS.inc(labels=("ok",))
                 return init_data_model
             except ValidationError as e:
-                 print(f"Validation Error: Pydantic parsing failed - {e}")
+                 logger.warning("initData validation failed: parsing error", extra={"reason": "invalid", "error": str(e)})
+                 metrics.AUTH_INIT_DATA_VALIDATIONS.inc(labels=("invalid",))
                  return None
         else:
-            print("Validation Error: Hash mismatch")
+            logger.warning("initData validation failed: hash mismatch", extra={"reason": "hash_mismatch"})
+            metrics.AUTH_INIT_DATA_VALIDATIONS.inc(labels=("hash_mismatch",))
             # Güvenlik için hashleri loglamamak daha iyi olabilir.
-            # print(f"Received Hash: {received_hash}")
-            # print(f"Calculated Hash: {calculated_hash}")
-            # print(f"Data Check String:\n{data_check_string}")
             return None
     except Exception as e:
-        print(f"Validation Error: An unexpected error occurred - {e}")
+        logger.exception("initData validation failed: unexpected error")
+        metrics.AUTH_INIT_DATA_VALIDATIONS.inc(labels=("error",))
         return None
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
@@ -108,24 +115,25 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
 
     # --- DEVELOPMENT MODE OVERRIDE ---
     if token == "fake-dev-token-123":
-        print("--- DEVELOPMENT: Using fallback user --- ")
+        logger.debug("Using development fallback user")
+        metrics.AUTH_TOKEN_VALIDATIONS.inc(labels=("dev_fallback",))
         user = crud.get_user_by_telegram_id(db, telegram_id=DEV_FALLBACK_TELEGRAM_ID)
         if user is None:
-            print(f"--- DEVELOPMENT: Fallback user {DEV_FALLBACK_TELEGRAM_ID} not found, creating... ---")
+            logger.info("Development fallback user not found, creating", extra={"telegram_id": DEV_FALLBACK_TELEGRAM_ID})
             # Geliştirme kullanıcısını basitçe oluştur (gerçek user şeması farklı olabilir)
             dev_user_data = schemas.UserCreate(telegram_id=DEV_FALLBACK_TELEGRAM_ID, username="dev_tester")
             user = crud.create_user(db=db, user=dev_user_data)
             if user:
-                print(f"--- DEVELOPMENT: Created fallback user {DEV_FALLBACK_TELEGRAM_ID} ---")
+                logger.info("Created development fallback user", extra={"telegram_id": DEV_FALLBACK_TELEGRAM_ID})
             else:
-                print(f"--- DEVELOPMENT: Failed to create fallback user {DEV_FALLBACK_TELEGRAM_ID} ---")
+                logger.error("Failed to create development fallback user", extra={"telegram_id": DEV_FALLBACK_TELEGRAM_ID})
                 raise HTTPException(status_code=500, detail="Could not create dev fallback user")
         return user
     # --- END DEVELOPMENT MODE OVERRIDE ---
 
     # Normal Token Validation
     if not SECRET_KEY:
-         print("CRITICAL ERROR: SECRET_KEY is not set for JWT validation!")
+         logger.critical("SECRET_KEY is not set for JWT validation!")
          raise credentials_exception # Veya 500 Internal Server Error
 
     try:
@@ -136,17 +144,21 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
         telegram_id = int(telegram_id_str) # Integer'a çevir
         token_data = schemas.TokenData(telegram_id=telegram_id)
     except JWTError:
-        print("JWTError during token decode") # Debug
+        logger.info("JWT rejected: decode error", extra={"reason": "invalid"})
+        metrics.AUTH_TOKEN_VALIDATIONS.inc(labels=("invalid",))
         raise credentials_exception
     except (ValidationError, ValueError):
-         print("ValidationError or ValueError during token processing") # Debug
+         logger.info("JWT rejected: invalid payload", extra={"reason": "invalid"})
+         metrics.AUTH_TOKEN_VALIDATIONS.inc(labels=("invalid",))
          raise credentials_exception
 
     user = crud.get_user_by_telegram_id(db, telegram_id=token_data.telegram_id)
     if user is None:
         # Kullanıcı token'da var ama DB'de yoksa (silinmiş olabilir)
-        print(f"User with telegram_id {token_data.telegram_id} from token not found in DB") # Debug
+        logger.info("JWT rejected: user not found", extra={"reason": "unknown_user", "telegram_id": token_data.telegram_id})
+        metrics.AUTH_TOKEN_VALIDATIONS.inc(labels=("unknown_user",))
         raise credentials_exception
+    metrics.AUTH_TOKEN_VALIDATIONS.inc(labels=("ok",))
     return user
 
 async def get_current_active_user(current_user: models.User = Depends(get_current_user)) -> models.User:
@@ -163,9 +175,9 @@ api_key_header_auth = APIKeyHeader(name=API_KEY_NAME, auto_error=False)
 
 async def verify_admin_api_key(api_key: str = Depends(api_key_header_auth)):
     if not ADMIN_API_KEY:
-        print("CRITICAL: ADMIN_API_KEY not set in environment variables!")
+        logger.critical("ADMIN_API_KEY not set in environment variables!")
         raise HTTPException(status_code=500, detail="Admin API Key not configured")
     if not api_key or not hmac.compare_digest(api_key, ADMIN_API_KEY):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or missing Admin API Key")
-    print("Admin authenticated via API Key.")
+    logger.info("Admin authenticated via API key")
     return True # Başarılı yetkilendirme 
\ No newline at end of file
@@ -0,0 +1,144 @@
+"""
+Mini App açılışı (cold start) kıyaslaması.
+
+Bugünkü açılışta ardışık yapılan altı isteğin (/profile, /wallet, /missions,
+/nfts/list, /api/badges, /vip/vip/vip-benefits) toplam süresini tek /bootstrap
+isteğiyle karşılaştırır. Etkileşime hazır olma süresi (time-to-interactive)
+round trip'lerin toplamı olarak hesaplanır: her istek için sunucu süresi + RTT.
+
+Varsayılan olarak geçici bir SQLite veritabanı tohumlanır ve uygulama süreç
+içinde (TestClient) ölçülür. --base-url verilirse çalışan bir sunucu ölçülür.
+
+Kullanım:
+    python -m bench.cold_start
+    python -m bench.cold_start --iterations 50 --rtt-ms 120
+    python -m bench.cold_start --base-url http://localhost:8000 --uid 12345678
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+DEV_TOKEN = "fake-dev-token-123"
+
+
+def fanout_paths(uid: str) -> List[str]:
+    return [
+        f"/profile/{uid}",
+        f"/wallet/{uid}",
+        f"/missions/{uid}",
+        "/nfts/list",
+        "/api/badges",
+        "/vip/vip/vip-benefits",
+    ]
+
+
+def seed(db, telegram_id: int, missions: int = 40, badges: int = 10, owned_nfts: int = 5):
+    """Ölçüm için tipik bir kullanıcı ve katalog oluşturur"""
+    import models
+
+    user = models.User(telegram_id=telegram_id, username="bench_user", first_name="Bench", xp=420, stars=300)
+    db.add(user)
+    db.flush()
+    nfts = [
+        models.NFT(name=f"Bench NFT {i}", description="bench", image_url=f"/assets/nft/{i}.png",
+                   category=models.NFTCategory.WATCHER, price_stars=100 + i, total_supply=100, is_active=True)
+        for i in range(max(owned_nfts, 1))
+    ]
+    db.add_all(nfts)
+    db.flush()
+    mission_rows = [
+        models.Mission(title=f"Görev {i}", description="bench", xp_reward=10 + i, cooldown_hours=24 if i % 2 else 0,
+                       required_level=1 + i % 3, is_vip=i % 7 == 0,
+                       required_nft_id=nfts[i % len(nfts)].id if i % 5 == 0 else None)
+        for i in range(missions)
+    ]
+    badge_rows = [models.Badge(name=f"Rozet {i}", description="bench", image_url=f"/badges/{i}.png") for i in range(badges)]
+    db.add_all(mission_rows + badge_rows)
+    db.flush()
+    db.add_all([models.UserNFT(user_id=user.id, nft_id=nft.id, purchase_price_stars=nft.price_stars) for nft in nfts[:owned_nfts]])
+    db.add_all([models.UserMission(user_id=user.id, mission_id=m.id) for m in mission_rows[::3]])
+    db.add_all([models.UserBadge(user_id=user.id, badge_id=b.id) for b in badge_rows[::2]])
+    db.add_all([models.MissionStoryLog(user_id=user.id, mission_id=m.id, story_text="bench") for m in mission_rows[:10]])
+    db.commit()
+
+
+def _timed(request: Callable[[], object], iterations: int) -> Dict[str, float]:
+    samples, size = [], 0
+    for _ in range(iterations):
+        start = time.perf_counter()
+        response = request()
+        samples.append((time.perf_counter() - start) * 1000)
+        # Sıkıştırılmış boyut: istemciler içeriği açtıktan sonra da Content-Length korunur
+        size = int(response.headers.get("content-length", len(response.content)))
+    return {"median_ms": statistics.median(samples), "p95_ms": sorted(samples)[int(len(samples) * 0.95) - 1], "bytes": size}
+
+
+def run(get: Callable[[str], object], uid: str, iterations: int, rtt_ms: float) -> Dict:
+    # Önbellekleri ısıt; ölçülen, sunucunun sıcak hali + ağ gecikmesidir
+    for path in fanout_paths(uid) + ["/bootstrap"]:
+        get(path)
+
+    fanout = {path: _timed(lambda p=path: get(p), iterations) for path in fanout_paths(uid)}
+    bootstrap = _timed(lambda: get("/bootstrap"), iterations)
+
+    fanout_tti = sum(r["median_ms"] + rtt_ms for r in fanout.values())
+    bootstrap_tti = bootstrap["median_ms"] + rtt_ms
+    return {
+        "iterations": iterations,
+        "rtt_ms": rtt_ms,
+        "fanout": fanout,
+        "bootstrap": bootstrap,
+        "fanout_tti_ms": round(fanout_tti, 2),
+        "fanout_bytes": sum(r["bytes"] for r in fanout.values()),
+        "bootstrap_tti_ms": round(bootstrap_tti, 2),
+        "speedup": round(fanout_tti / bootstrap_tti, 2) if bootstrap_tti else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Açılış isteklerini /bootstrap ile karşılaştırır")
+    parser.add_argument("--iterations", type=int, default=30)
+    parser.add_argument("--rtt-ms", type=float, default=80.0, help="İstek başına eklenen ağ gecikmesi (mobil ağ varsayımı)")
+    parser.add_argument("--base-url", default=None, help="Çalışan sunucu adresi; verilmezse süreç içinde ölçülür")
+    parser.add_argument("--uid", default=None, help="--base-url ile kullanılacak kullanıcı (telegram_id)")
+    parser.add_argument("--token", default=DEV_TOKEN, help="/bootstrap için Bearer token")
+    args = parser.parse_args()
+
+    headers = {"Authorization": f"Bearer {args.token}", "Accept-Encoding": "gzip, br"}
+
+    if args.base_url:
+        import requests
+
+        session = requests.Session()
+        session.headers.update(headers)
+        uid = args.uid or os.getenv("DEV_FALLBACK_TELEGRAM_ID", "12345678")
+        result = run(lambda path: session.get(args.base_url.rstrip("/") + path), uid, args.iterations, args.rtt_ms)
+    else:
+        tmp_dir = tempfile.mkdtemp(prefix="bench-cold-start-")
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}"
+
+        from fastapi.testclient import TestClient
+        import auth
+        import models
+        from database import SessionLocal, engine
+        from main import app
+
+        models.Base.metadata.create_all(bind=engine)
+        with SessionLocal() as db:
+            seed(db, auth.DEV_FALLBACK_TELEGRAM_ID)
+        client = TestClient(app, headers=headers)
+        result = run(client.get, str(auth.DEV_FALLBACK_TELEGRAM_ID), args.iterations, args.rtt_ms)
+
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,406 @@
+"""
+API yük testi: temel akışların throughput'u ve p50/p95/p99 gecikmeleri.
+
+Akışlar: login (imzalı Telegram initData ile), profil, görev listesi, görev
+tamamlama, NFT satın alma, DAO oyu ve liderlik tablosu. Her sanal kullanıcı önce
+giriş yapar, sonra ağırlıklı rastgele akışlar çalıştırır.
+
+İki mod vardır:
+- Süreç içi (varsayılan): geçici bir SQLite veritabanı tohumlanır, uygulama
+  httpx.ASGITransport üzerinden ağ olmadan çağrılır (--concurrency eşzamanlı görev).
+- Çok süreçli: --base-url ile çalışan bir sunucuya veya --serve ile bu betiğin
+  başlattığı uvicorn'a karşı --processes adet süreç yük üretir.
+
+Sonuçlar bench/results/ altına (veya --output) JSON olarak yazılır; --compare
+ile önceki bir sonuçla p95 farkları raporlanır.
+
+Kullanım:
+    python -m bench.load --duration 20 --users 2000
+    python -m bench.load --serve --workers 4 --processes 8 --duration 30
+    python -m bench.load --base-url http://localhost:8000 --processes 8 --universe universe.json
+    python -m bench.load --compare bench/results/onceki.json
+"""
+import argparse
+import asyncio
+import hashlib
+import hmac
+import json
+import multiprocessing
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import quote
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from bench.universe import add_scale_arguments, scale_from_args  # noqa: E402
+
+RESULTS_DIR = os.path.join(BACKEND_DIR, "bench", "results")
+
+# Yük testi için kullanılan sabit anahtarlar (sadece geçici veritabanlarında)
+BENCH_BOT_TOKEN = "bench-bot-token"
+BENCH_SECRET_KEY = "bench-secret-key"
+
+# Akış adı -> ağırlık
+FLOW_WEIGHTS = {
+    "profile": 3,
+    "missions": 3,
+    "complete_mission": 3,
+    "leaderboard": 2,
+    "buy_nft": 1,
+    "vote": 1,
+}
+
+
+def sign_init_data(telegram_id: int, bot_token: str) -> str:
+    """Telegram WebApp'in ürettiği biçimde imzalı initData"""
+    fields = {
+        "auth_date": str(int(time.time())),
+        "query_id": f"bench{telegram_id}",
+        "user": json.dumps({"id": telegram_id, "first_name": "Bench", "username": f"bench_{telegram_id}"},
+                           separators=(",", ":")),
+    }
+    data_check_string = "\n".join(f"{k}={v}" for k, v in sorted(fields.items()))
+    secret = hmac.new(b"WebAppData", bot_token.encode(), hashlib.sha256).digest()
+    fields["hash"] = hmac.new(secret, data_check_string.encode(), hashlib.sha256).hexdigest()
+    return "&".join(f"{k}={quote(v)}" for k, v in fields.items())
+
+
+class VirtualUser:
+    """Bir sanal kullanıcının durumu: token ve sıradaki NFT/teklif"""
+
+    def __init__(self, index: int, universe: Dict[str, Any], rng: random.Random):
+        self.telegram_id = universe["telegram_id_base"] + index
+        self.universe = universe
+        self.rng = rng
+        self.token: Optional[str] = None
+        # Kullanıcılar NFT'leri farklı yerlerden almaya başlar; aynı NFT'yi iki kez almazlar
+        self._nft_cursor = index
+        self._proposal_cursor = universe["first_open_proposal"]
+
+    def headers(self) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {self.token}"} if self.token else {}
+
+    def login_request(self, bot_token: str) -> Tuple[str, str, Optional[dict]]:
+        return "POST", "/users/login", {"initData": sign_init_data(self.telegram_id, bot_token)}
+
+    def request_for(self, flow: str) -> Tuple[str, str, Optional[dict]]:
+        if flow == "profile":
+            return "GET", f"/profile/{self.telegram_id}", None
+        if flow == "missions":
+            return "GET", f"/users/missions/{self.telegram_id}", None
+        if flow == "complete_mission":
+            return "POST", "/missions/gorev-tamamla", {"mission_id": self.rng.choice(self.universe["mission_ids"])}
+        if flow == "leaderboard":
+            return "GET", "/leaderboard/leaderboard/xp", None
+        if flow == "buy_nft":
+            nft_ids = self.universe["nft_ids"]
+            nft_id = nft_ids[self._nft_cursor % len(nft_ids)]
+            self._nft_cursor += 1
+            return "POST", "/nfts/buy", {"nft_id": nft_id}
+        if flow == "vote":
+            proposal_ids = self.universe["proposal_ids"]
+            proposal_id = proposal_ids[self._proposal_cursor % len(proposal_ids)]
+            self._proposal_cursor += 1
+            return "POST", "/dao/vote", {"proposal_id": proposal_id, "choice": self.rng.random() < 0.5}
+        raise ValueError(f"Bilinmeyen akış: {flow}")
+
+
+def choose_flow(rng: random.Random) -> str:
+    return rng.choices(list(FLOW_WEIGHTS), weights=list(FLOW_WEIGHTS.values()))[0]
+
+
+class Recorder:
+    """Akış başına gecikme örnekleri ve durum kodları"""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = {}
+        self.statuses: Dict[str, Dict[str, int]] = {}
+
+    def record(self, flow: str, seconds: float, status: int) -> None:
+        self.samples.setdefault(flow, []).append(seconds)
+        counts = self.statuses.setdefault(flow, {})
+        counts[str(status)] = counts.get(str(status), 0) + 1
+
+    def merge(self, other: "Recorder") -> None:
+        for flow, samples in other.samples.items():
+            self.samples.setdefault(flow, []).extend(samples)
+        for flow, counts in other.statuses.items():
+            mine = self.statuses.setdefault(flow, {})
+            for status, n in counts.items():
+                mine[status] = mine.get(status, 0) + n
+
+
+def percentile(sorted_samples: List[float], p: float) -> float:
+    """En yakın sıra (nearest-rank) yöntemiyle yüzdelik"""
+    if not sorted_samples:
+        return 0.0
+    rank = max(1, int(round(p / 100 * len(sorted_samples) + 0.5)))
+    return sorted_samples[min(rank, len(sorted_samples)) - 1]
+
+
+def summarize(recorder: Recorder, elapsed: float) -> Dict[str, Any]:
+    endpoints = {}
+    total = 0
+    for flow in sorted(recorder.samples):
+        samples = sorted(recorder.samples[flow])
+        statuses = recorder.statuses.get(flow, {})
+        errors = sum(n for status, n in statuses.items() if not status.startswith("2"))
+        total += len(samples)
+        endpoints[flow] = {
+            "requests": len(samples),
+            "errors": errors,
+            "statuses": statuses,
+            "throughput_rps": round(len(samples) / elapsed, 2),
+            "mean_ms": round(sum(samples) / len(samples) * 1000, 3),
+            "p50_ms": round(percentile(samples, 50) * 1000, 3),
+            "p95_ms": round(percentile(samples, 95) * 1000, 3),
+            "p99_ms": round(percentile(samples, 99) * 1000, 3),
+            "max_ms": round(samples[-1] * 1000, 3),
+        }
+    return {"elapsed_seconds": round(elapsed, 3), "total_requests": total,
+            "throughput_rps": round(total / elapsed, 2), "endpoints": endpoints}
+
+
+# --- Süreç içi mod ---------------------------------------------------------
+
+async def _run_in_process(universe: Dict[str, Any], args: argparse.Namespace) -> Tuple[Recorder, float]:
+    import httpx
+
+    from main import app
+
+    recorder = Recorder()
+    deadline_box: List[float] = []
+    transport = httpx.ASGITransport(app=app)
+
+    async def virtual_user_loop(vu: VirtualUser, client: "httpx.AsyncClient"):
+        async def call(flow: str, request: Tuple[str, str, Optional[dict]]):
+            method, path, body = request
+            started = time.perf_counter()
+            response = await client.request(method, path, json=body, headers=vu.headers())
+            recorder.record(flow, time.perf_counter() - started, response.status_code)
+            return response
+
+        response = await call("login", vu.login_request(args.bot_token))
+        if response.status_code == 200:
+            vu.token = response.json()["access_token"]
+        while time.perf_counter() < deadline_box[0]:
+            flow = choose_flow(vu.rng)
+            await call(flow, vu.request_for(flow))
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        rng = random.Random(args.seed)
+        users = [VirtualUser(i, universe, random.Random(rng.random()))
+                 for i in rng.sample(range(universe["users"]), min(args.concurrency, universe["users"]))]
+        started = time.perf_counter()
+        deadline_box.append(started + args.duration)
+        await asyncio.gather(*(virtual_user_loop(vu, client) for vu in users))
+        return recorder, time.perf_counter() - started
+
+
+# --- Çok süreçli mod -------------------------------------------------------
+
+def _process_worker(payload: Tuple[int, Dict[str, Any], Dict[str, Any]]) -> Tuple[Dict, Dict, float]:
+    """Bir yük süreci: kendine düşen sanal kullanıcılarla sırayla istek gönderir"""
+    import httpx
+
+    worker_index, universe, options = payload
+    rng = random.Random(options["seed"] * 1000 + worker_index)
+    recorder = Recorder()
+    indexes = range(worker_index, universe["users"], options["processes"])
+    users = [VirtualUser(i, universe, random.Random(rng.random()))
+             for i in rng.sample(list(indexes), min(options["users_per_process"], len(indexes)))]
+
+    with httpx.Client(base_url=options["base_url"], timeout=30) as client:
+        def call(vu: VirtualUser, flow: str, request: Tuple[str, str, Optional[dict]]):
+            method, path, body = request
+            started = time.perf_counter()
+            try:
+                response = client.request(method, path, json=body, headers=vu.headers())
+                status = response.status_code
+            except httpx.HTTPError:
+                response, status = None, 599
+            recorder.record(flow, time.perf_counter() - started, status)
+            return response
+
+        for vu in users:
+            response = call(vu, "login", vu.login_request(options["bot_token"]))
+            if response is not None and response.status_code == 200:
+                vu.token = response.json()["access_token"]
+        deadline = options["deadline"]
+        measured_from = time.time()
+        while time.time() < deadline:
+            vu = rng.choice(users)
+            flow = choose_flow(vu.rng)
+            call(vu, flow, vu.request_for(flow))
+    return recorder.samples, recorder.statuses, max(deadline - measured_from, 0.001)
+
+
+def _run_multi_process(universe: Dict[str, Any], base_url: str, args: argparse.Namespace) -> Tuple[Recorder, float]:
+    options = {
+        "base_url": base_url,
+        "bot_token": args.bot_token,
+        "seed": args.seed,
+        "processes": args.processes,
+        "users_per_process": max(1, args.concurrency // args.processes),
+        # Tüm süreçler girişten sonra aynı mutlak zamanda durur
+        "deadline": time.time() + args.duration,
+    }
+    with multiprocessing.get_context("spawn").Pool(args.processes) as pool:
+        results = pool.map(_process_worker, [(i, universe, options) for i in range(args.processes)])
+    recorder = Recorder()
+    for samples, statuses, _ in results:
+        partial = Recorder()
+        partial.samples, partial.statuses = samples, statuses
+        recorder.merge(partial)
+    # Süreç başlatma ve giriş süresi throughput'a katılmaz: en uzun ölçüm penceresi esas alınır
+    return recorder, max(window for _, _, window in results)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _start_server(env: Dict[str, str], workers: int) -> Tuple[subprocess.Popen, str]:
+    import httpx
+
+    port = _free_port()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            if httpx.get(f"{base_url}/health", timeout=1).status_code == 200:
+                return process, base_url
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("uvicorn başlatılamadı")
+
+
+# --- Ortak -----------------------------------------------------------------
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current: Dict[str, Any], previous: Dict[str, Any]) -> Dict[str, Dict[str, float]]:
+    """Akış başına p95 ve throughput farkı (yüzde)"""
+    deltas = {}
+    for flow, stats in current["endpoints"].items():
+        old = previous.get("endpoints", {}).get(flow)
+        if not old:
+            continue
+        deltas[flow] = {
+            "p95_ms": stats["p95_ms"],
+            "p95_change_percent": round((stats["p95_ms"] - old["p95_ms"]) / old["p95_ms"] * 100, 1)
+            if old["p95_ms"] else None,
+            "throughput_change_percent": round(
+                (stats["throughput_rps"] - old["throughput_rps"]) / old["throughput_rps"] * 100, 1)
+            if old["throughput_rps"] else None,
+        }
+    return deltas
+
+
+def _prepare_database(args: argparse.Namespace) -> Dict[str, Any]:
+    """Geçici veritabanını tohumlar (veya --universe ile verilen evren dosyasını okur)"""
+    if args.universe:
+        with open(args.universe, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    import models
+    from bench.universe import seed_universe
+    from database import SessionLocal, engine
+
+    models.Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        return seed_universe(db, **scale_from_args(args))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API akışları için yük testi")
+    parser.add_argument("--duration", type=float, default=10, help="Ölçüm süresi (saniye)")
+    parser.add_argument("--concurrency", type=int, default=16, help="Eşzamanlı sanal kullanıcı sayısı")
+    parser.add_argument("--processes", type=int, default=0, help="Çok süreçli mod için yük süreci sayısı")
+    parser.add_argument("--base-url", help="Çalışan sunucu adresi (verilmezse süreç içi ölçülür)")
+    parser.add_argument("--serve", action="store_true", help="Tohumlanan veritabanıyla uvicorn başlat")
+    parser.add_argument("--workers", type=int, default=2, help="--serve için uvicorn worker sayısı")
+    parser.add_argument("--universe", help="Önceden tohumlanmış evrenin JSON özeti (bench.universe çıktısı)")
+    parser.add_argument("--bot-token", default=os.getenv("BOT_TOKEN", BENCH_BOT_TOKEN))
+    parser.add_argument("--output", help="Sonuç dosyası (varsayılan bench/results/<zaman>-<commit>.json)")
+    parser.add_argument("--compare", help="Karşılaştırılacak önceki sonuç dosyası")
+    add_scale_arguments(parser)
+    args = parser.parse_args()
+
+    if not args.base_url and not args.universe:
+        tmp_dir = tempfile.mkdtemp(prefix="bench-load-")
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}"
+    os.environ["BOT_TOKEN"] = args.bot_token
+    os.environ.setdefault("SECRET_KEY", BENCH_SECRET_KEY)
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    # Tüm sanal kullanıcılar aynı IP'den gelir; istek sınırı ölçümü bozmasın
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "0")
+
+    universe = _prepare_database(args) if not args.base_url or args.universe else None
+    if universe is None:
+        parser.error("--base-url ile birlikte --universe verilmelidir")
+
+    server = None
+    try:
+        if args.serve:
+            server, base_url = _start_server(dict(os.environ), args.workers)
+        else:
+            base_url = args.base_url
+        if base_url:
+            mode = f"multi-process ({max(args.processes, 1)} süreç)"
+            args.processes = max(args.processes, 1)
+            recorder, elapsed = _run_multi_process(universe, base_url, args)
+        else:
+            mode = "in-process"
+            recorder, elapsed = asyncio.run(_run_in_process(universe, args))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    result = {
+        "commit": _git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "mode": mode,
+        "config": {"duration": args.duration, "concurrency": args.concurrency, "processes": args.processes,
+                   "workers": args.workers if args.serve else None, "scale": scale_from_args(args)},
+        **summarize(recorder, elapsed),
+    }
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            result["compared_to"] = {"file": args.compare, "endpoints": compare(result, json.load(f))}
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{result['commit'] or 'nocommit'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2, ensure_ascii=False)
+
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+    print(f"Sonuç kaydedildi: {output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
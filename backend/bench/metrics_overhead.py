@@ -0,0 +1,99 @@
+"""
+Metrik toplamanın görev tamamlama yolundaki ek maliyeti.
+
+POST /missions/gorev-tamamla isteği metrikler açık ve kapalıyken (metrics.ENABLED)
+dönüşümlü turlarda ölçülür; turların medyan süreleri karşılaştırılır. Ayrıca
+toplayıcıların tek başına maliyeti (çağrı başına ns) raporlanır.
+
+Hedef: görev tamamlama yolunda %2'nin altında ek süre.
+
+Kullanım:
+    python -m bench.metrics_overhead
+    python -m bench.metrics_overhead --rounds 20 --requests 200
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+DEV_TOKEN = "fake-dev-token-123"
+
+
+def _collector_ns(fn, iterations: int = 200_000) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Metrik toplamanın görev tamamlama maliyetini ölçer")
+    parser.add_argument("--rounds", type=int, default=10, help="Açık/kapalı tur sayısı (her biri)")
+    parser.add_argument("--requests", type=int, default=100, help="Tur başına istek sayısı")
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp(prefix="bench-metrics-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}"
+
+    from fastapi.testclient import TestClient
+
+    import auth
+    import metrics
+    import models
+    from database import SessionLocal, engine
+    from main import app
+
+    models.Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        db.add(models.User(telegram_id=auth.DEV_FALLBACK_TELEGRAM_ID, username="bench_user"))
+        mission = models.Mission(title="Tekrarlanabilir görev", description="bench", xp_reward=10,
+                                 mission_type=models.MissionType.MESSAGE, cooldown_hours=0, is_active=True)
+        db.add(mission)
+        db.commit()
+        mission_id = mission.id
+
+    client = TestClient(app)
+    headers = {"Authorization": f"Bearer {DEV_TOKEN}"}
+
+    def run_round(enabled: bool) -> float:
+        metrics.ENABLED = enabled
+        samples = []
+        for _ in range(args.requests):
+            start = time.perf_counter()
+            response = client.post("/missions/gorev-tamamla", json={"mission_id": mission_id}, headers=headers)
+            samples.append(time.perf_counter() - start)
+            assert response.status_code == 200, response.text
+        return statistics.median(samples) * 1000
+
+    run_round(True)  # Isınma
+    on, off = [], []
+    for i in range(args.rounds):
+        # Sıra etkisini dengelemek için turlar dönüşümlü başlar
+        order = (True, False) if i % 2 == 0 else (False, True)
+        for enabled in order:
+            (on if enabled else off).append(run_round(enabled))
+    metrics.ENABLED = True
+
+    on_ms, off_ms = statistics.median(on), statistics.median(off)
+    histogram = metrics.Histogram("bench_seconds", "bench", ("method", "route", "status"))
+    counter = metrics.Counter("bench_total", "bench", ("type",))
+    print(json.dumps({
+        "rounds": args.rounds,
+        "requests_per_round": args.requests,
+        "mission_completion_ms": {"metrics_on": round(on_ms, 3), "metrics_off": round(off_ms, 3)},
+        "overhead_percent": round((on_ms - off_ms) / off_ms * 100, 2),
+        "collector_ns": {
+            "histogram_observe": round(_collector_ns(lambda: histogram.observe(0.01, ("POST", "/x", "200"))), 1),
+            "counter_inc": round(_collector_ns(lambda: counter.inc(5, ("debit",))), 1),
+        },
+    }, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Tam metin arama gecikmesi (search.py).
+
+Geçici bir SQLite veritabanına --documents kadar görev, NFT ve rozet yazılır
+(trigger'lar dizini doldurur). Kelimeler Türkçe hecelerden üretilir ve Zipf
+dağılımıyla seçilir; sorgu karışımı tek kelime, iki kelime, önek ("kal") ve
+Türkçe harfleri ASCII/büyük harfle yazılmış aramalardan oluşur. Her sorgu
+search_documents ile (ilk sayfa, 20 sonuç) ölçülür.
+
+Hedef: 100k belgede p95 < 10 ms.
+
+Kullanım:
+    python -m bench.search
+    python -m bench.search --documents 20000 --queries 500
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from itertools import accumulate
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+SYLLABLES = ["ka", "şı", "ğa", "lı", "ör", "üz", "çe", "ın", "is", "ta", "ne", "bu", "ği", "şe", "mü",
+             "ol", "ya", "dü", "rı", "ço", "ge", "an", "ık", "se", "te", "ma", "ür", "ağ", "ye", "zı"]
+ASCII = str.maketrans("ıİğĞşŞçÇöÖüÜ", "iIgGsScCoOuU")
+
+
+def _vocabulary(rng: random.Random, size: int):
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choices(SYLLABLES, k=rng.randint(2, 4))))
+    # Sıklık sırası alfabetik olmasın (yaygın kelimeler aynı öneki paylaşmasın)
+    words = sorted(words)
+    rng.shuffle(words)
+    return words
+
+
+def _percentile(samples, fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tam metin arama gecikmesini ölçer")
+    parser.add_argument("--documents", type=int, default=100_000, help="Toplam belge sayısı")
+    parser.add_argument("--queries", type=int, default=1000, help="Ölçülen sorgu sayısı")
+    parser.add_argument("--vocabulary", type=int, default=20_000, help="Farklı kelime sayısı")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp(prefix="bench-search-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}"
+
+    from sqlalchemy import insert
+
+    import models
+    import search
+    from database import SessionLocal, engine
+
+    rng = random.Random(args.seed)
+    vocabulary = _vocabulary(rng, args.vocabulary)
+    weights = list(accumulate(1 / rank for rank in range(1, len(vocabulary) + 1)))
+
+    def sentence(count: int) -> str:
+        return " ".join(rng.choices(vocabulary, cum_weights=weights, k=count)).capitalize()
+
+    models.Base.metadata.create_all(bind=engine)
+    started = time.perf_counter()
+    missions = int(args.documents * 0.6)
+    badges = max(1, args.documents // 20)
+    nfts = args.documents - missions - badges
+    with engine.begin() as connection:
+        connection.execute(insert(models.Mission), [
+            {"title": sentence(rng.randint(2, 5)), "description": sentence(rng.randint(15, 40)), "xp_reward": 10,
+             "is_active": rng.random() > 0.05, "is_vip": rng.random() < 0.1}
+            for _ in range(missions)
+        ])
+        connection.execute(insert(models.NFT), [
+            {"name": sentence(rng.randint(1, 3)), "description": sentence(rng.randint(10, 30)), "price_stars": 100,
+             "category": models.NFTCategory.GENERAL, "is_active": True}
+            for _ in range(nfts)
+        ])
+        connection.execute(insert(models.Badge), [
+            {"name": f"{sentence(2)} {i}", "description": sentence(rng.randint(5, 15)), "image_url": "/b.png"}
+            for i in range(badges)
+        ])
+        connection.exec_driver_sql("INSERT INTO search_index (search_index) VALUES ('optimize')")
+    load_seconds = time.perf_counter() - started
+
+    # Aranan kelimeler çok yaygın olmayan (ilk 20 dışı) sözcüklerden seçilir
+    searchable = vocabulary[20:5000]
+    mixes = {
+        "one_word": lambda: rng.choice(searchable),
+        "two_words": lambda: f"{rng.choice(searchable)} {rng.choice(searchable)}",
+        "prefix": lambda: rng.choice(searchable)[:3],
+        "ascii_upper": lambda: rng.choice(searchable).translate(ASCII).upper(),
+        "common_word": lambda: rng.choice(vocabulary[:20]),
+    }
+    samples = {name: [] for name in mixes}
+    with SessionLocal() as db:
+        search.search_documents(db, "isinma")  # Isınma
+        for i in range(args.queries):
+            name = list(mixes)[i % len(mixes)]
+            query = mixes[name]()
+            start = time.perf_counter()
+            search.search_documents(db, query, audiences=("public", "vip"))
+            samples[name].append((time.perf_counter() - start) * 1000)
+
+    everything = [value for values in samples.values() for value in values]
+    summary = lambda values: {
+        "p50_ms": round(statistics.median(values), 3),
+        "p95_ms": round(_percentile(values, 0.95), 3),
+        "max_ms": round(max(values), 3),
+    }
+    print(json.dumps({
+        "documents": args.documents,
+        "load_seconds": round(load_seconds, 1),
+        "queries": args.queries,
+        "all": summary(everything),
+        "by_kind": {name: summary(values) for name, values in samples.items()},
+    }, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Yanıt serileştirme CPU kıyaslaması.
+
+En büyük beş yanıt (/bootstrap, /nfts/, /profile/{uid}, /users/missions/{uid},
+/nft/list) için endpoint'in döndürdüğü ham içerik bir kez üretilir, ardından
+yalnızca serileştirme adımı farklı yollarla ölçülür (yanıt başına CPU süresi):
+
+- legacy:     doğrulama + Python dict'e dökme + json.dumps (eski JSONResponse yolu)
+- dump_json:  doğrulama + pydantic-core ile doğrudan JSON (response_model yolu)
+- orjson:     doğrulama + Python dict'e dökme + orjson (FastJSONResponse yolu)
+
+Ayrıca sıkıştırılmamış, gzip ve brotli boyutları raporlanır.
+
+Kullanım:
+    python -m bench.serialization
+    python -m bench.serialization --iterations 500 --missions 200
+"""
+import argparse
+import asyncio
+import gzip
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+
+def _cpu_us(fn: Callable[[], Any], iterations: int) -> float:
+    start = time.process_time()
+    for _ in range(iterations):
+        fn()
+    return (time.process_time() - start) / iterations * 1_000_000
+
+
+def collect_payloads(db, user) -> Dict[str, tuple]:
+    """Her endpoint için (ham içerik, response_model) ikilisi"""
+    from fastapi import Response
+
+    import nft_metadata
+    import schemas
+    from routers import bootstrap, nfts, users
+
+    uid = str(user.telegram_id)
+    return {
+        "/bootstrap": (asyncio.run(bootstrap.get_bootstrap(current_user=user, db=db)), schemas.BootstrapResponse),
+        "/nfts/": (
+            nfts.read_nfts(response=Response(), category=None, min_price=None, max_price=None,
+                           sort="price", cursor=None, skip=0, limit=100, db=db),
+            List[schemas.NFT],
+        ),
+        "/profile/{uid}": (asyncio.run(users.get_user_profile(uid, db)), schemas.UserProfileDetail),
+        "/users/missions/{uid}": (asyncio.run(users.get_user_missions(uid, db)), List[Dict[str, Any]]),
+        "/nft/list": (nft_metadata.store.all(), List[schemas.NFTMetadata]),
+    }
+
+
+def measure(content: Any, model: Any, iterations: int) -> Dict[str, Any]:
+    from pydantic import TypeAdapter
+
+    import responses
+
+    adapter = TypeAdapter(model)
+
+    def legacy():
+        value = adapter.validate_python(content, from_attributes=True)
+        return json.dumps(adapter.dump_python(value, mode="json"), ensure_ascii=False).encode("utf-8")
+
+    def dump_json():
+        return adapter.dump_json(adapter.validate_python(content, from_attributes=True))
+
+    def fast():
+        return responses.dumps(adapter.dump_python(adapter.validate_python(content, from_attributes=True)))
+
+    body = dump_json()
+    result = {
+        "legacy_us": round(_cpu_us(legacy, iterations), 1),
+        "dump_json_us": round(_cpu_us(dump_json, iterations), 1),
+        "orjson_us": round(_cpu_us(fast, iterations), 1),
+        "bytes": len(body),
+        "gzip_bytes": len(gzip.compress(body, compresslevel=6)),
+    }
+    try:
+        import brotli
+        result["br_bytes"] = len(brotli.compress(body, quality=4))
+    except ImportError:
+        result["br_bytes"] = None
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Yanıt serileştirme CPU maliyetini ölçer")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--missions", type=int, default=100, help="Tohumlanacak görev sayısı")
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp(prefix="bench-serialization-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}"
+
+    import auth
+    import models
+    from bench.cold_start import seed
+    from database import SessionLocal, engine
+
+    models.Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        seed(db, auth.DEV_FALLBACK_TELEGRAM_ID, missions=args.missions, owned_nfts=20)
+        user = db.query(models.User).filter(models.User.telegram_id == auth.DEV_FALLBACK_TELEGRAM_ID).one()
+        payloads = collect_payloads(db, user)
+        results = {path: measure(content, model, args.iterations) for path, (content, model) in payloads.items()}
+
+    print(json.dumps({"iterations": args.iterations, "endpoints": results}, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,361 @@
+"""
+Yük testleri ve ölçek denemeleri için sentetik evren.
+
+Verilen ölçekte kullanıcı, görev, NFT, DAO teklifi, görev tamamlama, Stars işlemi
+ve oy kayıtları oluşturur. Milyonlarca satır için tasarlanmıştır:
+
+- Satırlar kullanıcı parçaları (chunk) halinde ayrı süreçlerde üretilir; ana süreç
+  yalnızca SQLAlchemy Core ile büyük partiler halinde executemany INSERT yapar.
+- Her parçanın rastgele üreteci (seed, parça no) ile tohumlanır; aynı --seed ile
+  süreç sayısından bağımsız olarak birebir aynı veri üretilir. Böylece farklı
+  commit'lerdeki ölçümler karşılaştırılabilir.
+- Yükleme süresince büyük tabloların benzersiz olmayan indeksleri kaldırılır ve
+  sonda yeniden oluşturulur; SQLite'ta senkron yazma kapatılır.
+
+Dağılımlar gerçek kullanıma yakındır: kullanıcı başına tamamlama sayısı log-normal
+(çoğu kullanıcı az, küçük bir kısım çok görev yapar), görev popülerliği Zipf,
+kayıt ve tamamlama zamanları yakın geçmişe yoğunlaşır. XP ve seviye tamamlanan
+görevlerin ödüllerinden, Stars bakiyesi ise işlemlerin toplamından hesaplanır.
+
+Kullanım:
+    python -m bench.universe --database-url sqlite:///./bench.db --users 1000000 --workers 8
+"""
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+# Sentetik kullanıcıların Telegram ID'leri bu değerden başlar
+TELEGRAM_ID_BASE = 1_000_000
+
+DEFAULT_SCALE = {
+    "users": 1000,
+    "missions": 50,
+    "nfts": 200,
+    "proposals": 50,
+    "completions_per_user": 5,
+    "star_transactions_per_user": 3,
+    "votes_per_user": 2,
+}
+
+# Yük testinde satın alma akışının bakiyesi tükenmesin diye her kullanıcıya verilen başlangıç Stars'ı
+INITIAL_STARS = 1_000_000
+# Kayıt ve etkinlik zamanlarının yayıldığı geçmiş (gün)
+HISTORY_DAYS = 365
+# Oylamaya açılmış ilk tekliflere katılım oranı
+VOTE_TURNOUT = 0.6
+# Tek executemany çağrısındaki satır sayısı
+INSERT_BATCH_SIZE = 20_000
+# Bir süreç görevinde üretilen kullanıcı sayısı
+USERS_PER_CHUNK = 5_000
+
+# Toplu yükleme sırasında indeksleri ertelenen tablolar
+BULK_TABLES = ("users", "user_missions", "user_mission_logs", "user_mission_state", "star_transactions", "dao_votes")
+
+
+def _chunks(rows: List[Any], size: int) -> Iterable[List[Any]]:
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+def _bulk_insert(db, model_or_table, rows: List[Dict[str, Any]], chunk_size: int = INSERT_BATCH_SIZE) -> None:
+    from sqlalchemy import insert
+    for chunk in _chunks(rows, chunk_size):
+        db.execute(insert(model_or_table), chunk)
+
+
+def _recent_offset(rng: random.Random, span_seconds: float) -> float:
+    """[0, span) aralığında, küçük değerlere (yakın geçmişe) yoğunlaşan bir süre"""
+    return span_seconds * rng.random() ** 2
+
+
+def _generate_user_chunk(task: Tuple[int, int, int, Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Bir kullanıcı parçasının tüm satırlarını üretir (ayrı süreçte çalışır).
+    Kullanıcı ID'leri önceden belirlendiği için ilişkili satırlar veritabanına
+    dokunmadan üretilebilir.
+    """
+    from levels import level_for_xp
+    from models import TransactionType
+
+    chunk_index, first_index, count, ctx = task
+    rng = random.Random(f"{ctx['seed']}:{chunk_index}")
+    now: datetime = ctx["now"]
+    history = HISTORY_DAYS * 86400
+    mission_ids, mission_rewards = ctx["mission_ids"], ctx["mission_rewards"]
+    mission_weights = ctx["mission_cum_weights"]
+    voted_proposals, proposal_bias = ctx["voted_proposals"], ctx["proposal_bias"]
+
+    # Log-normal: ortalaması completions_per_user olacak şekilde mu seçilir
+    sigma = 1.2
+    completions_mean = ctx["completions_per_user"]
+    mu = math.log(completions_mean) - sigma ** 2 / 2 if completions_mean > 0 else None
+    transactions_mean = ctx["star_transactions_per_user"]
+
+    rows: Dict[str, List[Dict[str, Any]]] = {name: [] for name in BULK_TABLES}
+    for index in range(first_index, first_index + count):
+        user_id = ctx["user_id_offset"] + index
+        created_at = now - timedelta(seconds=_recent_offset(rng, history))
+        active_seconds = max((now - created_at).total_seconds(), 1.0)
+
+        completions = min(int(rng.lognormvariate(mu, sigma)), 50 * completions_mean) if mu is not None else 0
+        xp = 0
+        last_mission_at = None
+        states: Dict[int, Dict[str, Any]] = {}
+        for mission_index in rng.choices(range(len(mission_ids)), cum_weights=mission_weights, k=completions):
+            completed_at = now - timedelta(seconds=_recent_offset(rng, active_seconds))
+            mission_id = mission_ids[mission_index]
+            xp += mission_rewards[mission_index]
+            if last_mission_at is None or completed_at > last_mission_at:
+                last_mission_at = completed_at
+            rows["user_missions"].append({"user_id": user_id, "mission_id": mission_id, "completed_at": completed_at})
+            rows["user_mission_logs"].append({"user_id": user_id, "mission_id": mission_id,
+                                              "completion_time": completed_at})
+            state = states.get(mission_id)
+            if state is None:
+                states[mission_id] = {"user_id": user_id, "mission_id": mission_id,
+                                      "last_completed_at": completed_at, "completion_count": 1}
+            else:
+                state["completion_count"] += 1
+                state["last_completed_at"] = max(state["last_completed_at"], completed_at)
+        rows["user_mission_state"].extend(states.values())
+
+        stars = INITIAL_STARS
+        rows["star_transactions"].append({
+            "user_id": user_id, "amount": INITIAL_STARS, "transaction_type": TransactionType.CREDIT,
+            "reason": "signup_bonus", "description": "Sentetik başlangıç bakiyesi", "created_at": created_at,
+        })
+        for _ in range(int(rng.expovariate(1 / transactions_mean)) if transactions_mean > 0 else 0):
+            at = now - timedelta(seconds=_recent_offset(rng, active_seconds))
+            if rng.random() < 0.7:
+                amount = rng.choice((5, 10, 15, 20, 30, 50))
+                rows["star_transactions"].append({
+                    "user_id": user_id, "amount": amount, "transaction_type": TransactionType.CREDIT,
+                    "reason": "daily_bonus", "description": None, "created_at": at,
+                })
+            else:
+                amount = -rng.choice((10, 25, 50, 100, 250))
+                rows["star_transactions"].append({
+                    "user_id": user_id, "amount": amount, "transaction_type": TransactionType.DEBIT,
+                    "reason": "nft_purchase", "description": None, "created_at": at,
+                })
+            stars += amount
+
+        for proposal_id in voted_proposals:
+            if rng.random() < VOTE_TURNOUT:
+                rows["dao_votes"].append({
+                    "user_id": user_id, "proposal_id": proposal_id, "vote_power": 1,
+                    "choice": rng.random() < proposal_bias[proposal_id],
+                    "voted_at": now - timedelta(seconds=_recent_offset(rng, active_seconds)),
+                })
+
+        last_login = now - timedelta(seconds=_recent_offset(rng, min(active_seconds, 30 * 86400)))
+        rows["users"].append({
+            "id": user_id, "telegram_id": TELEGRAM_ID_BASE + index, "username": f"bench_{index}",
+            "first_name": f"Bench {index}", "xp": xp, "level": level_for_xp(xp), "stars": stars,
+            "stars_enabled": True, "created_at": created_at, "last_login_date": last_login,
+            "consecutive_login_days": rng.choice((0, 0, 1, 1, 2, 3, 5, 7)),
+            "mission_streak": 0, "last_mission_at": last_mission_at, "daily_bonus_streak": 0,
+        })
+    return rows
+
+
+class _DeferredIndexes:
+    """Toplu yükleme süresince benzersiz olmayan indeksleri kaldırır, çıkışta yeniden kurar"""
+
+    def __init__(self, connection, tables):
+        self.connection = connection
+        self.indexes = [index for table in tables for index in table.indexes if not index.unique]
+
+    def __enter__(self):
+        for index in self.indexes:
+            index.drop(self.connection, checkfirst=True)
+        return self
+
+    def __exit__(self, *exc):
+        for index in self.indexes:
+            index.create(self.connection, checkfirst=True)
+        return False
+
+
+def seed_universe(db, users: int = DEFAULT_SCALE["users"], missions: int = DEFAULT_SCALE["missions"],
+                  nfts: int = DEFAULT_SCALE["nfts"], proposals: int = DEFAULT_SCALE["proposals"],
+                  completions_per_user: int = DEFAULT_SCALE["completions_per_user"],
+                  star_transactions_per_user: int = DEFAULT_SCALE["star_transactions_per_user"],
+                  votes_per_user: int = DEFAULT_SCALE["votes_per_user"], seed: int = 42,
+                  workers: int = 1, progress=None) -> Dict[str, Any]:
+    """
+    Evreni oluşturur ve yük üreticisinin ihtiyaç duyduğu kimlikleri (görev, NFT,
+    teklif ID'leri ve ilk oylanmamış teklif sırası) döndürür.
+
+    Tüm görevler tekrarlanabilir (cooldown 0, seviye 1) olduğundan tamamlama akışı
+    her istekte yazma yolunu çalıştırır. Kullanıcılar yalnızca ilk `votes_per_user`
+    teklife oy vermiş olabilir; sonrakiler yük testinin oy akışına bırakılır.
+    `workers` > 1 ise satır üretimi o kadar süreçte paralel yapılır.
+    """
+    import models
+    from sqlalchemy import func, select, update
+
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    categories = list(models.NFTCategory)
+    mission_types = list(models.MissionType)
+    rows_inserted: Dict[str, int] = {}
+
+    # SQLite'ta senkron yazma seviyesi yalnızca işlem başlamadan değiştirilebilir
+    connection = db.connection()
+    if connection.dialect.name == "sqlite":
+        connection.exec_driver_sql("PRAGMA synchronous=OFF")
+        connection.exec_driver_sql("PRAGMA cache_size=-262144")
+
+    def insert(table, rows):
+        _bulk_insert(db, table, rows)
+        rows_inserted[table.name] = rows_inserted.get(table.name, 0) + len(rows)
+
+    mission_rows = [
+        {"title": f"Sentetik görev {i}", "description": "bench", "xp_reward": rng.choice((10, 20, 25, 50, 100)),
+         "mission_type": mission_types[i % len(mission_types)], "cooldown_hours": 0,
+         "required_level": 1, "is_active": True, "is_vip": False}
+        for i in range(missions)
+    ]
+    insert(models.Mission.__table__, mission_rows)
+    insert(models.NFT.__table__, [
+        {"name": f"Sentetik NFT {i}", "description": "bench", "image_url": f"/assets/nft/{i}.png",
+         "category": categories[i % len(categories)], "price_stars": 10 + i % 100,
+         "total_supply": 1_000_000, "is_active": True}
+        for i in range(nfts)
+    ])
+    insert(models.DAOProposal.__table__, [
+        {"title": f"Sentetik teklif {i}", "description": "bench", "status": models.ProposalStatus.ACTIVE,
+         "end_date": now + timedelta(days=365), "total_yes_power": 0, "total_no_power": 0}
+        for i in range(proposals)
+    ])
+
+    mission_ids = db.execute(select(models.Mission.id).where(models.Mission.description == "bench")
+                             .order_by(models.Mission.id)).scalars().all()
+    nft_ids = db.execute(select(models.NFT.id).where(models.NFT.description == "bench")
+                         .order_by(models.NFT.id)).scalars().all()
+    proposal_ids = db.execute(select(models.DAOProposal.id).where(models.DAOProposal.description == "bench")
+                              .order_by(models.DAOProposal.id)).scalars().all()
+    voted = list(proposal_ids[:votes_per_user])
+
+    # Görev popülerliği Zipf dağılımına uyar: k. görev 1/k ağırlık alır
+    cum_weights, total = [], 0.0
+    for rank in range(1, len(mission_ids) + 1):
+        total += 1 / rank
+        cum_weights.append(total)
+
+    ctx = {
+        "seed": seed,
+        "now": now,
+        "user_id_offset": (db.execute(select(func.max(models.User.id))).scalar() or 0) + 1,
+        "mission_ids": list(mission_ids),
+        "mission_rewards": [row["xp_reward"] for row in mission_rows],
+        "mission_cum_weights": cum_weights,
+        "voted_proposals": voted,
+        "proposal_bias": {proposal_id: rng.uniform(0.2, 0.8) for proposal_id in voted},
+        "completions_per_user": completions_per_user,
+        "star_transactions_per_user": star_transactions_per_user,
+    }
+    tasks = [(chunk_index, first, min(USERS_PER_CHUNK, users - first), ctx)
+             for chunk_index, first in enumerate(range(0, users, USERS_PER_CHUNK))]
+
+    tables = {name: models.Base.metadata.tables[name] for name in BULK_TABLES}
+
+    with _DeferredIndexes(connection, tables.values()):
+        if workers > 1 and len(tasks) > 1:
+            pool = multiprocessing.get_context("fork" if sys.platform == "linux" else "spawn").Pool(workers)
+            produced = pool.imap(_generate_user_chunk, tasks)
+        else:
+            pool, produced = None, map(_generate_user_chunk, tasks)
+        try:
+            # Parçalar sırayla eklenir: ana süreç yazarken diğer süreçler sonrakileri üretir
+            for done, chunk_rows in enumerate(produced, start=1):
+                for name in BULK_TABLES:
+                    insert(tables[name], chunk_rows[name])
+                if progress:
+                    progress(done, len(tasks), rows_inserted)
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+
+    # Teklif toplamlarını eklenen oylardan tek sorguda hesapla
+    for total_column, choice in ((models.DAOProposal.total_yes_power, True),
+                                 (models.DAOProposal.total_no_power, False)):
+        db.execute(
+            update(models.DAOProposal)
+            .where(models.DAOProposal.id.in_(voted))
+            .values({total_column: select(func.coalesce(func.sum(models.DAOVote.vote_power), 0))
+                     .where(models.DAOVote.proposal_id == models.DAOProposal.id, models.DAOVote.choice == choice)
+                     .scalar_subquery()})
+        )
+    db.commit()
+
+    return {
+        "users": users,
+        "telegram_id_base": TELEGRAM_ID_BASE,
+        "mission_ids": list(mission_ids),
+        "nft_ids": list(nft_ids),
+        "proposal_ids": list(proposal_ids),
+        "first_open_proposal": len(voted),
+        "rows": rows_inserted,
+    }
+
+
+def add_scale_arguments(parser: argparse.ArgumentParser) -> None:
+    for name, default in DEFAULT_SCALE.items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=int, default=default)
+    parser.add_argument("--seed", type=int, default=42)
+
+
+def scale_from_args(args: argparse.Namespace) -> Dict[str, int]:
+    return {name: getattr(args, name) for name in DEFAULT_SCALE} | {"seed": args.seed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Yük testi için sentetik veri üretir")
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL", "sqlite:///./bench.db"))
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Satır üreten süreç sayısı")
+    parser.add_argument("--output", help="Yük testine (--universe) verilecek evren özetinin yazılacağı dosya")
+    add_scale_arguments(parser)
+    args = parser.parse_args()
+
+    os.environ["DATABASE_URL"] = args.database_url
+    import models
+    from database import SessionLocal, engine
+
+    def progress(done, total, rows):
+        print(f"\r{done}/{total} parça, {sum(rows.values()):,} satır", end="", file=sys.stderr, flush=True)
+
+    models.Base.metadata.create_all(bind=engine)
+    started = time.perf_counter()
+    with SessionLocal() as db:
+        universe = seed_universe(db, workers=args.workers, progress=progress, **scale_from_args(args))
+    seconds = time.perf_counter() - started
+    print(file=sys.stderr)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(universe, f)
+    total_rows = sum(universe["rows"].values())
+    print(json.dumps({
+        "database_url": args.database_url,
+        "seconds": round(seconds, 2),
+        "rows_per_second": round(total_rows / seconds),
+        "total_rows": total_rows,
+        **{k: v for k, v in universe.items() if not k.endswith("_ids")},
+    }, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,454 @@
+# broadcast.py - Telegram toplu bildirim gönderimi (DAO önerisi, günlük bonus, NFT drop)
+#
+# İstek işleyicileri kullanıcı başına mesaj göndermez; yalnızca broadcasts
+# tablosuna bir satır ekler (create_broadcast). Gönderimi bu modüldeki worker
+# yapar:
+#
+# - Hedef kitle tek indeksli sorguyla seçilir ve users.id sırasıyla
+#   (WHERE <kitle> AND id > :imleç ORDER BY id LIMIT :parça) parça parça okunur;
+#   tüm liste hiçbir zaman belleğe alınmaz.
+# - Her parça BROADCAST_CONCURRENCY eşzamanlı istekle gönderilir. Ortak jeton
+#   kovası (ratelimit.py deposu) saniyedeki mesajı BROADCAST_RATE ile sınırlar;
+#   Telegram 429 + retry_after döndürürse tüm gönderim o süre kadar durur.
+#   Sınırın worker'lar arasında paylaşılması için RATE_LIMIT_URL=redis://...
+#   gerekir: memory:// ile her uvicorn worker'ı kendi kovasını tutar ve toplam
+#   hız BROADCAST_RATE x worker sayısı olur (bu durumda BROADCAST_RATE'i worker
+#   sayısına bölün). Depoya erişilemezse süreç içi kovayla devam edilir.
+# - 5xx ve ağ hataları üstel bekleme (jitter'lı) ile BROADCAST_MAX_ATTEMPTS kez
+#   denenir; 400/403 (sohbet yok, bot engellenmiş) kalıcı hatadır, sayılır geçilir.
+# - Her parçadan sonra imleç (cursor_user_id) ve sayaçlar kaydedilir, kira
+#   (lease_until) uzatılır. Süreç çökerse kira dolunca başka bir worker yayını
+#   kaldığı yerden devralır; tamamlanan parçalar yeniden gönderilmez. Parça
+#   ortasında durdurulursa (kapanış, hata) sırayla tamamlanan önek kaydedilir;
+#   kapanışta yolda olan en fazla BROADCAST_CONCURRENCY mesaj yeniden gidebilir.
+#
+# Ortam değişkenleri:
+#   BROADCAST_ENABLED=1          0 ise uygulama içinde worker başlamaz (BOT_TOKEN da gerekir)
+#   TELEGRAM_API_URL=https://api.telegram.org   yerel deneme için telegram_stub.py adresi
+#   BROADCAST_RATE=25            saniyedeki en fazla mesaj (Telegram genel sınırı ~30/sn);
+#                                memory:// deposunda worker başınadır
+#   BROADCAST_CONCURRENCY=10     eşzamanlı istek sayısı
+#   BROADCAST_CHUNK_SIZE=500     tek sorguda okunan alıcı sayısı
+#   BROADCAST_MAX_ATTEMPTS=5     geçici hatalarda mesaj başına en fazla deneme
+#   BROADCAST_LEASE=120          kira süresi (saniye); dolarsa yayın devralınır
+#   BROADCAST_INTERVAL=5         bekleyen yayın kontrol aralığı (saniye)
+#
+# Elle çalıştırma (bekleyen tüm yayınlar):
+#   python broadcast.py run
+#   python broadcast.py create --kind custom --audience vip --text "Merhaba"
+
+import argparse
+import asyncio
+import logging
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import httpx
+from sqlalchemy import or_, select, update
+from sqlalchemy.orm import Session
+
+import metrics
+from crud.daily_bonus import DAILY_BONUS_COOLDOWN
+from database import SessionLocal
+from models import Broadcast, BroadcastStatus, User
+from ratelimit import MemoryStore, Policy, RateLimitStore, store_from_url
+
+logger = logging.getLogger(__name__)
+
+ENABLED = os.getenv("BROADCAST_ENABLED", "1") not in ("0", "false", "False")
+BOT_TOKEN = os.getenv("BOT_TOKEN")
+TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL", "https://api.telegram.org")
+RATE = float(os.getenv("BROADCAST_RATE", "25"))
+CONCURRENCY = int(os.getenv("BROADCAST_CONCURRENCY", "10"))
+CHUNK_SIZE = int(os.getenv("BROADCAST_CHUNK_SIZE", "500"))
+MAX_ATTEMPTS = int(os.getenv("BROADCAST_MAX_ATTEMPTS", "5"))
+LEASE_SECONDS = float(os.getenv("BROADCAST_LEASE", "120"))
+INTERVAL = float(os.getenv("BROADCAST_INTERVAL", "5"))
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 30.0
+
+AUDIENCES = ("all", "vip", "active", "daily_bonus_ready")
+ACTIVE_WINDOW = timedelta(days=7)
+APP_URL = os.getenv("PRODUCTION_URL", "https://arayisevreni.vercel.app")
+
+DAILY_BONUS_TEXT = "🎁 Günlük bonusun hazır! Serini korumak için bugün almayı unutma."
+
+
+def proposal_opened_text(proposal_id: int, title: str) -> str:
+    return f"🗳 Yeni DAO önerisi oylamada: {title}\n{APP_URL}/dao/{proposal_id}"
+
+
+def nft_drop_text(nft_id: int, name: str) -> str:
+    return f"✨ Yeni NFT yayında: {name}\n{APP_URL}/nfts/{nft_id}"
+
+
+class SendError(Exception):
+    """Gönderim hatası. permanent ise tekrar denenmez; retry_after Telegram'ın istediği bekleme"""
+
+    def __init__(self, message: str, status: Optional[int] = None, retry_after: Optional[float] = None,
+                 permanent: bool = False):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+        self.permanent = permanent
+
+
+class TelegramSender:
+    """Telegram Bot API sendMessage istemcisi (transport ile telegram_stub.py'ye bağlanabilir)"""
+
+    def __init__(self, token: str, base_url: str = TELEGRAM_API_URL,
+                 transport: Optional[httpx.AsyncBaseTransport] = None, timeout: float = 10.0):
+        self.token = token
+        self._client = httpx.AsyncClient(base_url=base_url, transport=transport, timeout=timeout)
+
+    async def send(self, chat_id: int, text: str) -> None:
+        try:
+            response = await self._client.post(
+                f"/bot{self.token}/sendMessage",
+                json={"chat_id": chat_id, "text": text, "disable_web_page_preview": True},
+            )
+        except httpx.HTTPError as e:
+            raise SendError(f"Ağ hatası: {e}") from e
+        if response.status_code == 200:
+            return
+        try:
+            body = response.json()
+        except ValueError:
+            body = {}
+        description = body.get("description") or response.text
+        if response.status_code == 429:
+            retry_after = (body.get("parameters") or {}).get("retry_after", 1)
+            raise SendError(description, status=429, retry_after=float(retry_after))
+        # 400 (sohbet bulunamadı) ve 403 (bot engellenmiş) tekrar denemekle düzelmez
+        raise SendError(description, status=response.status_code, permanent=response.status_code in (400, 403))
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+
+class Limiter:
+    """
+    Tüm gönderimlerin paylaştığı jeton kovası; 429'da herkes birlikte bekler.
+    Depo çağrıları (Redis ağ gidiş-dönüşü) olay döngüsünü bloklamamak için
+    iş parçacığında yapılır; depo hata verirse süreç içi kovaya düşülür.
+    """
+
+    def __init__(self, rate: float = RATE, store: Optional[RateLimitStore] = None, key: str = "broadcast"):
+        self.policy = Policy(limit=max(1, int(rate)), period=max(1, int(rate)) / rate)
+        self.store = store or store_from_url(os.getenv("RATE_LIMIT_URL", "memory://"))
+        self.key = key
+        self._fallback = self.store if isinstance(self.store, MemoryStore) else MemoryStore(maxsize=1)
+        self._paused_until = 0.0
+
+    def pause(self, seconds: float) -> None:
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    async def acquire(self) -> None:
+        while True:
+            paused = self._paused_until - time.monotonic()
+            if paused > 0:
+                await asyncio.sleep(paused)
+                continue
+            try:
+                wait = await asyncio.to_thread(self.store.hit, self.key, self.policy)
+            except Exception:
+                # Paylaşılan depo erişilemezse gönderim durmaz, bu sürecin hızıyla sınırlanır
+                logger.warning("Broadcast rate limit store unavailable", exc_info=True)
+                wait = self._fallback.hit(self.key, self.policy)
+            if not wait:
+                return
+            await asyncio.sleep(wait)
+
+
+def create_broadcast(db: Session, kind: str, text: str, audience: str = "all",
+                     now: Optional[datetime] = None) -> Broadcast:
+    """Yayını kuyruğa ekler (gönderimi worker yapar)"""
+    if audience not in AUDIENCES:
+        raise ValueError(f"Geçersiz hedef kitle: {audience}")
+    broadcast = Broadcast(kind=kind, audience=audience, text=text, status=BroadcastStatus.PENDING,
+                          cursor_user_id=0, sent_count=0, failed_count=0,
+                          created_at=now or datetime.now(timezone.utc))
+    db.add(broadcast)
+    db.commit()
+    db.refresh(broadcast)
+    return broadcast
+
+
+def cancel_broadcast(db: Session, broadcast_id: int) -> bool:
+    """Bitmemiş yayını iptal eder; çalışan worker sonraki parçada durur"""
+    result = db.execute(
+        update(Broadcast)
+        .where(Broadcast.id == broadcast_id,
+               Broadcast.status.in_((BroadcastStatus.PENDING, BroadcastStatus.RUNNING)))
+        .values(status=BroadcastStatus.CANCELLED, finished_at=datetime.now(timezone.utc))
+    )
+    db.commit()
+    return bool(result.rowcount)
+
+
+def audience_filter(audience: str, now: datetime) -> list:
+    """Hedef kitle koşulu (users tablosundaki indeksli sütunlar üzerinden)"""
+    if audience == "all":
+        return []
+    if audience == "vip":
+        return [User.has_vip_access.is_(True)]
+    if audience == "active":
+        return [User.last_login_date >= now - ACTIVE_WINDOW]
+    if audience == "daily_bonus_ready":
+        return [or_(User.last_daily_bonus_at.is_(None), User.last_daily_bonus_at <= now - DAILY_BONUS_COOLDOWN)]
+    raise ValueError(f"Geçersiz hedef kitle: {audience}")
+
+
+def fetch_recipients(db: Session, audience: str, after_id: int, limit: int,
+                     now: Optional[datetime] = None) -> List[Tuple[int, int]]:
+    """İmleçten sonraki en fazla `limit` alıcı: [(user_id, telegram_id), ...]"""
+    now = now or datetime.now(timezone.utc)
+    return [tuple(row) for row in db.execute(
+        select(User.id, User.telegram_id)
+        .where(User.id > after_id, *audience_filter(audience, now))
+        .order_by(User.id)
+        .limit(limit)
+    )]
+
+
+def _fetch(session_factory, audience: str, after_id: int, limit: int, now: datetime) -> List[Tuple[int, int]]:
+    with session_factory() as db:
+        return fetch_recipients(db, audience, after_id, limit, now)
+
+
+def claim(session_factory, now: Optional[datetime] = None) -> Optional[int]:
+    """
+    Sıradaki bekleyen (ya da kirası dolmuş) yayını alır. Koşullu UPDATE sayesinde
+    aynı yayını iki worker birden alamaz.
+    """
+    now = now or datetime.now(timezone.utc)
+    claimable = or_(
+        Broadcast.status == BroadcastStatus.PENDING,
+        (Broadcast.status == BroadcastStatus.RUNNING) & (Broadcast.lease_until < now),
+    )
+    with session_factory() as db:
+        for broadcast_id in db.execute(select(Broadcast.id).where(claimable).order_by(Broadcast.id).limit(5)).scalars():
+            result = db.execute(
+                update(Broadcast)
+                .where(Broadcast.id == broadcast_id, claimable)
+                .values(status=BroadcastStatus.RUNNING, lease_until=now + timedelta(seconds=LEASE_SECONDS))
+                .execution_options(synchronize_session=False)
+            )
+            if result.rowcount:
+                db.commit()
+                return broadcast_id
+        db.commit()
+    return None
+
+
+def _checkpoint(session_factory, broadcast_id: int, cursor: int, new_cursor: int, sent: int, failed: int,
+                done: bool = False) -> bool:
+    """
+    İlerlemeyi kaydeder. İmleç hâlâ bizim bıraktığımız yerdeyse yazar; yayın iptal
+    edildiyse ya da kira dolup başka worker devraldıysa False döner.
+    """
+    now = datetime.now(timezone.utc)
+    values = {
+        "cursor_user_id": new_cursor,
+        "sent_count": Broadcast.sent_count + sent,
+        "failed_count": Broadcast.failed_count + failed,
+        "lease_until": now + timedelta(seconds=LEASE_SECONDS),
+    }
+    if done:
+        values.update(status=BroadcastStatus.DONE, finished_at=now, lease_until=None)
+    with session_factory() as db:
+        result = db.execute(
+            update(Broadcast)
+            .where(Broadcast.id == broadcast_id, Broadcast.status == BroadcastStatus.RUNNING,
+                   Broadcast.cursor_user_id == cursor)
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+    return bool(result.rowcount)
+
+
+async def _send_one(sender, limiter: Limiter, chat_id: int, text: str) -> bool:
+    """Mesajı gönderir; gönderildiyse True, kalıcı hata ya da denemeler tükendiyse False"""
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        await limiter.acquire()
+        try:
+            await sender.send(chat_id, text)
+            return True
+        except SendError as e:
+            if e.permanent or attempt == MAX_ATTEMPTS:
+                logger.info("Broadcast message failed", extra={"chat_id": chat_id, "status": e.status,
+                                                                "attempts": attempt, "error": str(e)})
+                return False
+            if e.retry_after is not None:
+                limiter.pause(e.retry_after)
+                continue
+            await asyncio.sleep(min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (attempt - 1)) * random.uniform(0.5, 1.0))
+    return False
+
+
+def _completed_prefix(outcomes: Sequence[Optional[bool]]) -> int:
+    for index, outcome in enumerate(outcomes):
+        if outcome is None:
+            return index
+    return len(outcomes)
+
+
+async def run_broadcast(broadcast_id: int, sender, session_factory=None, limiter: Optional[Limiter] = None,
+                        chunk_size: int = CHUNK_SIZE, concurrency: int = CONCURRENCY) -> Dict[str, int]:
+    """Alınmış (RUNNING) yayını imlecinden itibaren sonuna kadar gönderir; bu çalışmanın sayaçlarını döndürür"""
+    session_factory = session_factory or SessionLocal
+    limiter = limiter or Limiter()
+    totals = {"sent": 0, "failed": 0}
+    with session_factory() as db:
+        item = db.get(Broadcast, broadcast_id)
+        audience, text, cursor = item.audience, item.text, item.cursor_user_id
+    started = datetime.now(timezone.utc)
+    while True:
+        recipients = await asyncio.to_thread(_fetch, session_factory, audience, cursor, chunk_size, started)
+        if not recipients:
+            await asyncio.to_thread(_checkpoint, session_factory, broadcast_id, cursor, cursor, 0, 0, True)
+            logger.info("Broadcast finished", extra={"broadcast_id": broadcast_id, **totals})
+            return totals
+
+        semaphore = asyncio.Semaphore(concurrency)
+        abort = asyncio.Event()
+        outcomes: List[Optional[bool]] = [None] * len(recipients)
+
+        async def deliver(index: int, chat_id: int) -> None:
+            async with semaphore:
+                if abort.is_set():
+                    return
+                try:
+                    outcomes[index] = await _send_one(sender, limiter, chat_id, text)
+                except Exception:
+                    # Yeni gönderim başlatılmaz; yoldakiler biter ki sonuçları kaybolmasın
+                    abort.set()
+                    raise
+
+        jobs = [asyncio.create_task(deliver(i, chat_id)) for i, (_, chat_id) in enumerate(recipients)]
+        try:
+            await asyncio.gather(*jobs)
+        except Exception:
+            await asyncio.gather(*jobs, return_exceptions=True)
+            raise
+        finally:
+            for job in jobs:
+                job.cancel()
+            done = _completed_prefix(outcomes)
+            sent, failed = outcomes[:done].count(True), outcomes[:done].count(False)
+            metrics.BROADCAST_MESSAGES.inc(sent, labels=("sent",))
+            metrics.BROADCAST_MESSAGES.inc(failed, labels=("failed",))
+            totals["sent"] += sent
+            totals["failed"] += failed
+            new_cursor = recipients[done - 1][0] if done else cursor
+            # Kapanışta iptal edilmiş olsak da ilerleme kaydedilmeli; işlem kısa ve senkron
+            still_ours = _checkpoint(session_factory, broadcast_id, cursor, new_cursor, sent, failed)
+            cursor = new_cursor
+        if not still_ours:
+            logger.info("Broadcast stopped (cancelled or taken over)", extra={"broadcast_id": broadcast_id, **totals})
+            return totals
+
+
+async def run_pending(sender, session_factory=None, limiter: Optional[Limiter] = None, **kwargs) -> int:
+    """Bekleyen tüm yayınları sırayla gönderir; işlenen yayın sayısını döndürür"""
+    session_factory = session_factory or SessionLocal
+    processed = 0
+    while (broadcast_id := await asyncio.to_thread(claim, session_factory)) is not None:
+        await run_broadcast(broadcast_id, sender, session_factory, limiter, **kwargs)
+        processed += 1
+    return processed
+
+
+class BroadcastWorker:
+    """Bekleyen yayınları düzenli aralıklarla gönderen olay döngüsü işi"""
+
+    def __init__(self, interval: float = INTERVAL):
+        self.interval = interval
+        self.session_factory = SessionLocal
+        self.sender = None
+        self._stop: Optional[asyncio.Event] = None
+        self._runner: Optional[asyncio.Task] = None
+
+    async def start(self, sender=None, session_factory=None) -> None:
+        if self._runner is not None:
+            return
+        if session_factory is not None:
+            self.session_factory = session_factory
+        self.sender = sender or TelegramSender(BOT_TOKEN)
+        self._stop = asyncio.Event()
+        self._runner = asyncio.create_task(self._run())
+        logger.info("Broadcast worker started", extra={"interval": self.interval, "rate": RATE})
+
+    async def _run(self) -> None:
+        limiter = Limiter()
+        if isinstance(limiter.store, MemoryStore):
+            logger.warning("Broadcast rate limit is per worker (RATE_LIMIT_URL=memory://); "
+                           "use redis:// to share BROADCAST_RATE across workers")
+        while True:
+            try:
+                await run_pending(self.sender, self.session_factory, limiter)
+            except Exception:
+                logger.exception("Broadcast run failed")
+            try:
+                await asyncio.wait_for(self._stop.wait(), self.interval)
+                return
+            except asyncio.TimeoutError:
+                pass
+
+    async def stop(self) -> None:
+        if self._runner is None:
+            return
+        # Gönderim ortasında olabilir: iptal edilen parçanın tamamlanan öneki kaydedilir
+        self._stop.set()
+        self._runner.cancel()
+        await asyncio.gather(self._runner, return_exceptions=True)
+        self._runner = None
+        if isinstance(self.sender, TelegramSender):
+            await self.sender.aclose()
+        logger.info("Broadcast worker stopped")
+
+
+broadcast_worker = BroadcastWorker()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Telegram toplu bildirimleri")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("run", help="bekleyen tüm yayınları gönderir")
+    create = commands.add_parser("create", help="yayını kuyruğa ekler")
+    create.add_argument("--kind", default="custom")
+    create.add_argument("--audience", choices=AUDIENCES, default="all")
+    create.add_argument("--text", required=True)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    if args.command == "create":
+        with SessionLocal() as db:
+            broadcast = create_broadcast(db, args.kind, args.text, args.audience)
+        logger.info(f"Yayın #{broadcast.id} kuyruğa eklendi")
+        return 0
+
+    if not BOT_TOKEN:
+        logger.error("BOT_TOKEN tanımlı değil")
+        return 1
+
+    async def run() -> int:
+        sender = TelegramSender(BOT_TOKEN)
+        try:
+            return await run_pending(sender)
+        finally:
+            await sender.aclose()
+
+    started = time.perf_counter()
+    processed = asyncio.run(run())
+    logger.info(f"{processed} yayın gönderildi ({time.perf_counter() - started:.2f} sn)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
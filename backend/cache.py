@@ -0,0 +1,450 @@
+# cache.py - Uygulama genelinde kullanılan önbellek katmanı
+#
+# Tek bir arayüz (Cache) arkasında değiştirilebilir backend'ler:
+# - LocalLRUBackend:  süreç içi LRU (varsayılan, testler ve tek worker için)
+# - SQLiteBackend:    aynı makinedeki worker'ların paylaştığı dosya tabanlı önbellek
+# - RedisBackend:     birden çok makine için paylaşılan önbellek (redis paketi gerekir)
+#
+# Backend CACHE_URL ortam değişkeniyle seçilir:
+#   memory://?maxsize=2048
+#   sqlite:///var/cache/arayis.db
+#   redis://localhost:6379/0
+#
+# Özellikler: TTL, etiket (tag) ile toplu geçersiz kılma, get_or_set üzerinden
+# single-flight (aynı anahtar için tek yükleme) ve isabet/gecikme istatistikleri.
+
+import abc
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+try:
+    import redis
+except ImportError:  # redis opsiyonel; sadece RedisBackend için gerekir
+    redis = None
+
+# Önbellekte None değeri ile "kayıt yok" ayrımı için kullanılır
+MISSING = object()
+
+
+class CacheBackend(abc.ABC):
+    """Backend arayüzü. Değerler backend'e Python nesnesi olarak verilir."""
+
+    @abc.abstractmethod
+    def get(self, key: str) -> Any:
+        """Kayıt varsa değerini, yoksa ya da süresi dolmuşsa MISSING döndürür"""
+
+    @abc.abstractmethod
+    def set(self, key: str, value: Any, ttl: Optional[float] = None, tags: Iterable[str] = ()) -> None:
+        ...
+
+    @abc.abstractmethod
+    def add(self, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        """Anahtar yoksa yazar ve True döner (single-flight kilidi için)"""
+
+    @abc.abstractmethod
+    def delete(self, key: str) -> bool:
+        ...
+
+    @abc.abstractmethod
+    def invalidate_tags(self, tags: Iterable[str]) -> int:
+        """Etiketlerden herhangi birini taşıyan kayıtları siler, silinen sayıyı döner"""
+
+    @abc.abstractmethod
+    def clear(self) -> None:
+        ...
+
+
+class LocalLRUBackend(CacheBackend):
+    """Süreç içi, boyut sınırlı LRU önbellek"""
+
+    def __init__(self, maxsize: int = 2048):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._data: "OrderedDict[str, Tuple[Any, Optional[float], Tuple[str, ...]]]" = OrderedDict()
+        self._tags: Dict[str, set] = {}
+
+    def _remove(self, key: str) -> bool:
+        entry = self._data.pop(key, None)
+        if entry is None:
+            return False
+        for tag in entry[2]:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+        return True
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return MISSING
+            value, expires_at, _ = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                self._remove(key)
+                return MISSING
+            self._data.move_to_end(key)
+            return value
+
+    def _set(self, key: str, value: Any, ttl: Optional[float], tags: Tuple[str, ...]) -> None:
+        # Kilit çağıran tarafından tutulur
+        self._remove(key)
+        self._data[key] = (value, time.monotonic() + ttl if ttl else None, tags)
+        for tag in tags:
+            self._tags.setdefault(tag, set()).add(key)
+        while len(self._data) > self.maxsize:
+            self._remove(next(iter(self._data)))
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None, tags: Iterable[str] = ()) -> None:
+        tags = tuple(tags)
+        with self._lock:
+            self._set(key, value, ttl, tags)
+
+    def add(self, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        # Kontrol ve yazma aynı kilit altında: iki iş parçacığı birden True alamaz
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and (entry[1] is None or entry[1] > time.monotonic()):
+                return False
+            self._set(key, value, ttl, ())
+        return True
+
+    def delete(self, key: str) -> bool:
+        with self._lock:
+            return self._remove(key)
+
+    def invalidate_tags(self, tags: Iterable[str]) -> int:
+        removed = 0
+        with self._lock:
+            for tag in tags:
+                for key in list(self._tags.get(tag, ())):
+                    removed += self._remove(key)
+        return removed
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._tags.clear()
+
+
+class SQLiteBackend(CacheBackend):
+    """
+    Aynı makinedeki worker'ların paylaştığı dosya tabanlı önbellek.
+    WAL modunda çalışır; değerler pickle ile saklanır. Sadece uygulamanın
+    kendi yazdığı (güvenilir) veriler için kullanılmalıdır.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache_entries ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache_tags ("
+                "tag TEXT NOT NULL, key TEXT NOT NULL, PRIMARY KEY (tag, key))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_cache_tags_key ON cache_tags (key)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Any:
+        row = self._connect().execute(
+            "SELECT value, expires_at FROM cache_entries WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return MISSING
+        value, expires_at = row
+        if expires_at is not None and expires_at <= time.time():
+            self.delete(key)
+            return MISSING
+        return pickle.loads(value)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None, tags: Iterable[str] = ()) -> None:
+        expires_at = time.time() + ttl if ttl else None
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "INSERT OR REPLACE INTO cache_entries (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, payload, expires_at)
+            )
+            conn.execute("DELETE FROM cache_tags WHERE key = ?", (key,))
+            conn.executemany("INSERT OR IGNORE INTO cache_tags (tag, key) VALUES (?, ?)", [(t, key) for t in tags])
+
+    def add(self, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        now = time.time()
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM cache_entries WHERE key = ? AND expires_at <= ?", (key, now))
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO cache_entries (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, pickle.dumps(value), now + ttl if ttl else None)
+            )
+            return cursor.rowcount == 1
+
+    def delete(self, key: str) -> bool:
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM cache_tags WHERE key = ?", (key,))
+            return conn.execute("DELETE FROM cache_entries WHERE key = ?", (key,)).rowcount == 1
+
+    def invalidate_tags(self, tags: Iterable[str]) -> int:
+        tags = list(tags)
+        if not tags:
+            return 0
+        placeholders = ",".join("?" * len(tags))
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            keys = [row[0] for row in conn.execute(
+                f"SELECT DISTINCT key FROM cache_tags WHERE tag IN ({placeholders})", tags
+            )]
+            conn.executemany("DELETE FROM cache_entries WHERE key = ?", [(k,) for k in keys])
+            conn.executemany("DELETE FROM cache_tags WHERE key = ?", [(k,) for k in keys])
+        return len(keys)
+
+    def clear(self) -> None:
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM cache_entries")
+            conn.execute("DELETE FROM cache_tags")
+
+
+class RedisBackend(CacheBackend):
+    """Redis üzerinde paylaşılan önbellek; etiketler Redis set'lerinde tutulur"""
+
+    def __init__(self, url: str, prefix: str = "arayis:"):
+        if redis is None:
+            raise RuntimeError("RedisBackend için 'redis' paketi kurulu olmalı (pip install redis)")
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}{key}"
+
+    def _tag_key(self, tag: str) -> str:
+        return f"{self.prefix}tag:{tag}"
+
+    def get(self, key: str) -> Any:
+        payload = self.client.get(self._key(key))
+        return MISSING if payload is None else pickle.loads(payload)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None, tags: Iterable[str] = ()) -> None:
+        pipe = self.client.pipeline()
+        pipe.set(self._key(key), pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL),
+                 px=int(ttl * 1000) if ttl else None)
+        for tag in tags:
+            pipe.sadd(self._tag_key(tag), key)
+        pipe.execute()
+
+    def add(self, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        return bool(self.client.set(self._key(key), pickle.dumps(value), nx=True,
+                                    px=int(ttl * 1000) if ttl else None))
+
+    def delete(self, key: str) -> bool:
+        return self.client.delete(self._key(key)) == 1
+
+    def invalidate_tags(self, tags: Iterable[str]) -> int:
+        removed = 0
+        for tag in tags:
+            keys = [k.decode() if isinstance(k, bytes) else k for k in self.client.smembers(self._tag_key(tag))]
+            if keys:
+                removed += self.client.delete(*[self._key(k) for k in keys])
+            self.client.delete(self._tag_key(tag))
+        return removed
+
+    def clear(self) -> None:
+        for key in self.client.scan_iter(f"{self.prefix}*"):
+            self.client.delete(key)
+
+
+class CacheStats:
+    """İsabet oranı ve backend gecikmesi sayaçları"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self.sets = 0
+        self.deletes = 0
+        self.invalidations = 0
+        self.loads = 0
+        self.load_waits = 0
+        self.get_seconds = 0.0
+        self.set_seconds = 0.0
+        self.load_seconds = 0.0
+
+    def record(self, **increments) -> None:
+        with self._lock:
+            for name, amount in increments.items():
+                setattr(self, name, getattr(self, name) + amount)
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "sets": self.sets,
+                "deletes": self.deletes,
+                "invalidations": self.invalidations,
+                "loads": self.loads,
+                "load_waits": self.load_waits,
+                "avg_get_ms": round(self.get_seconds / lookups * 1000, 4) if lookups else 0.0,
+                "avg_set_ms": round(self.set_seconds / self.sets * 1000, 4) if self.sets else 0.0,
+                "avg_load_ms": round(self.load_seconds / self.loads * 1000, 4) if self.loads else 0.0,
+            }
+
+
+class Cache:
+    """
+    Backend'den bağımsız önbellek arayüzü.
+
+    get_or_set aynı anahtar için eşzamanlı yüklemeleri tek yüklemeye indirir
+    (single-flight): süreç içinde anahtar başına kilitle, worker'lar arasında
+    backend'e yazılan kısa ömürlü bir kilit kaydıyla.
+    """
+
+    # Paylaşılan kilit kaydının ömrü ve bekleyenlerin kontrol aralığı (saniye)
+    LOCK_TTL = 10.0
+    LOCK_POLL_INTERVAL = 0.02
+
+    def __init__(self, backend: CacheBackend, namespace: str = ""):
+        self.backend = backend
+        self.namespace = namespace
+        self.stats = CacheStats()
+        self._flight_lock = threading.Lock()
+        self._flights: Dict[str, list] = {}
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}{key}"
+
+    def get(self, key: str, default: Any = None) -> Any:
+        started = time.perf_counter()
+        value = self.backend.get(self._key(key))
+        elapsed = time.perf_counter() - started
+        if value is MISSING:
+            self.stats.record(misses=1, get_seconds=elapsed)
+            return default
+        self.stats.record(hits=1, get_seconds=elapsed)
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None, tags: Iterable[str] = ()) -> None:
+        started = time.perf_counter()
+        self.backend.set(self._key(key), value, ttl=ttl, tags=tuple(tags))
+        self.stats.record(sets=1, set_seconds=time.perf_counter() - started)
+
+    def delete(self, key: str) -> bool:
+        self.stats.record(deletes=1)
+        return self.backend.delete(self._key(key))
+
+    def invalidate_tags(self, *tags: str) -> int:
+        """Verilen etiketleri taşıyan tüm kayıtları siler"""
+        self.stats.record(invalidations=1)
+        return self.backend.invalidate_tags(tags)
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+    def _acquire_local(self, key: str) -> threading.Lock:
+        with self._flight_lock:
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = self._flights[key] = [threading.Lock(), 0]
+            flight[1] += 1
+            return flight[0]
+
+    def _release_local(self, key: str) -> None:
+        with self._flight_lock:
+            flight = self._flights[key]
+            flight[1] -= 1
+            if flight[1] == 0:
+                del self._flights[key]
+
+    def get_or_set(self, key: str, loader: Callable[[], Any], ttl: Optional[float] = None,
+                   tags: Iterable[str] = ()) -> Any:
+        """
+        Kayıt varsa döndürür; yoksa loader'ı çağırıp sonucu yazar.
+        Aynı anda aynı anahtarı isteyenlerden yalnızca biri loader'ı çalıştırır.
+        """
+        value = self.get(key, MISSING)
+        if value is not MISSING:
+            return value
+
+        local_lock = self._acquire_local(key)
+        try:
+            with local_lock:
+                # Kilidi beklerken başka bir thread yüklemiş olabilir
+                value = self.backend.get(self._key(key))
+                if value is not MISSING:
+                    self.stats.record(load_waits=1)
+                    return value
+                return self._load_shared(key, loader, ttl, tuple(tags))
+        finally:
+            self._release_local(key)
+
+    def _load_shared(self, key: str, loader: Callable[[], Any], ttl: Optional[float], tags: Tuple[str, ...]) -> Any:
+        lock_key = self._key(f"lock:{key}")
+        deadline = time.monotonic() + self.LOCK_TTL
+        # Başka bir worker yüklüyorsa sonucunu bekle; kilit süresi dolarsa kendimiz yükleriz
+        while not self.backend.add(lock_key, os.getpid(), ttl=self.LOCK_TTL):
+            if time.monotonic() >= deadline:
+                break
+            time.sleep(self.LOCK_POLL_INTERVAL)
+            value = self.backend.get(self._key(key))
+            if value is not MISSING:
+                self.stats.record(load_waits=1)
+                return value
+        try:
+            started = time.perf_counter()
+            value = loader()
+            self.stats.record(loads=1, load_seconds=time.perf_counter() - started)
+            self.set(key, value, ttl=ttl, tags=tags)
+            return value
+        finally:
+            self.backend.delete(lock_key)
+
+
+def backend_from_url(url: str) -> CacheBackend:
+    """CACHE_URL değerinden backend oluşturur"""
+    parsed = urlparse(url)
+    if parsed.scheme in ("", "memory"):
+        maxsize = int(parse_qs(parsed.query).get("maxsize", ["2048"])[0])
+        return LocalLRUBackend(maxsize=maxsize)
+    if parsed.scheme == "sqlite":
+        path = url[len("sqlite:///"):] if url.startswith("sqlite:///") else parsed.path
+        return SQLiteBackend(path)
+    if parsed.scheme in ("redis", "rediss", "unix"):
+        return RedisBackend(url)
+    raise ValueError(f"Desteklenmeyen CACHE_URL: {url}")
+
+
+# Uygulama genelinde paylaşılan önbellek
+cache = Cache(backend_from_url(os.getenv("CACHE_URL", "memory://")))
@@ -0,0 +1,104 @@
+# catalog.py - Tüm kullanıcılar için ortak (kullanıcıya bağlı olmayan) katalog verileri
+#
+# Rozet listesi, VIP avantajları, aktif görevler ve NFT metadata'sı her kullanıcı için aynıdır.
+# /bootstrap bu verileri tek bir anlık görüntü (snapshot) halinde önbellekten sunar.
+# Anlık görüntü ve rozet listesi paylaşılan önbellekte (cache.py) tutulur; böylece
+# birden çok worker aynı veriyi yeniden üretmez.
+
+import json
+import os
+from typing import Any, Dict, List
+
+import crud
+from cache import cache
+import nft_metadata
+from database import SessionLocal
+
+BADGES_PATH = os.path.join(nft_metadata.DATA_DIR, "badges_data.json")
+
+# Ortak anlık görüntü en fazla bu süre (saniye) önbellekte tutulur
+SNAPSHOT_TTL = int(os.getenv("CATALOG_SNAPSHOT_TTL", "60"))
+# Rozet dosyası nadiren değişir; okunan liste bu süre (saniye) önbellekte tutulur
+BADGES_TTL = int(os.getenv("CATALOG_BADGES_TTL", "300"))
+
+SNAPSHOT_CACHE_KEY = "catalog:snapshot"
+BADGES_CACHE_KEY = "catalog:badges"
+# Rozet listesinden türeyen önbellek kayıtlarının etiketi
+BADGES_TAG = "badges"
+
+VIP_BENEFITS: List[Dict[str, Any]] = [
+    {
+        "id": 1,
+        "title": "Özel Görevler",
+        "description": "Sadece VIP kullanıcılara özel görevlere erişim",
+        "icon": "crown"
+    },
+    {
+        "id": 2,
+        "title": "Premium NFT'ler",
+        "description": "Özel NFT koleksiyonlarına erişim",
+        "icon": "gem"
+    },
+    {
+        "id": 3,
+        "title": "Artırılmış Ödüller",
+        "description": "Tüm görevlerden %20 daha fazla XP ve Stars",
+        "icon": "trending-up"
+    },
+    {
+        "id": 4,
+        "title": "DAO Premium Oy",
+        "description": "Topluluk oylamalarında 5x oy gücü",
+        "icon": "vote"
+    },
+    {
+        "id": 5,
+        "title": "Öncelikli Destek",
+        "description": "Sorularınız için öncelikli destek hattı",
+        "icon": "headset"
+    }
+]
+
+
+def load_badges(path: str = BADGES_PATH) -> List[Dict[str, Any]]:
+    """Rozet verilerini okur; dosya yoksa FileNotFoundError fırlatır"""
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def get_badges() -> List[Dict[str, Any]]:
+    """Önbellekli rozet listesi; dosya yoksa boş liste"""
+    def _load():
+        try:
+            return load_badges()
+        except FileNotFoundError:
+            return []
+    return cache.get_or_set(BADGES_CACHE_KEY, _load, ttl=BADGES_TTL, tags=(BADGES_TAG,))
+
+
+def _build_snapshot() -> Dict[str, Any]:
+    with SessionLocal() as db:
+        missions = crud.get_active_missions_catalog(db)
+    return {
+        "nfts": nft_metadata.store.public_list(),
+        "missions": missions,
+        "badges": get_badges(),
+        "vip_benefits": VIP_BENEFITS,
+    }
+
+
+def get_shared_snapshot() -> Dict[str, Any]:
+    """
+    Ortak katalog verilerinin (NFT metadata, aktif görevler, rozetler, VIP avantajları) önbellekli
+    anlık görüntüsü. Süre dolduğunda yalnızca bir istek (tüm worker'lar arasında) yeniden
+    oluşturur, diğerleri onun sonucunu bekler.
+    """
+    return cache.get_or_set(
+        SNAPSHOT_CACHE_KEY, _build_snapshot, ttl=SNAPSHOT_TTL,
+        tags=(crud.MISSIONS_TAG, crud.NFT_CATALOG_TAG, BADGES_TAG)
+    )
+
+
+def invalidate_snapshot() -> None:
+    """Ortak anlık görüntüyü bir sonraki istekte yeniden oluşturulmak üzere geçersiz kılar"""
+    cache.delete(SNAPSHOT_CACHE_KEY)
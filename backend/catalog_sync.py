@@ -0,0 +1,359 @@
+"""
+Katalog senkronizasyonu (görevler, NFT'ler, rozetler).
+
+Bildirimsel bir spec dosyasını (JSON veya YAML) veritabanıyla karşılaştırır ve
+farkı toplu upsert ile uygular:
+
+- Tablo başına tek SELECT ile mevcut satırlar okunur; her spec satırı
+  "eklenecek", "güncellenecek" veya "değişmedi" olarak sınıflanır. Veritabanında
+  olup spec'te olmayan satırlar yalnızca raporlanır, silinmez.
+- Değişen satırlar dialect'e uygun `INSERT ... ON CONFLICT DO UPDATE`
+  (PostgreSQL/SQLite) veya `ON DUPLICATE KEY UPDATE` (MySQL) ile partiler halinde
+  yazılır. Katalog boyutundaki tablolarda bu tablo başına tek istek demektir.
+- Tüm dosyalar tek işlemde uygulanır; aynı spec'i tekrar çalıştırmak hiçbir şeyi
+  değiştirmez.
+
+Spec biçimi:
+    {"table": "missions", "key": "id", "rows": [{"id": 1, "title": "...", ...}]}
+Düz bir satır listesi de verilebilir; o durumda --table gerekir. Satırlardaki
+anahtarlar modeldeki sütun adlarıdır. Bir sütun bazı satırlarda yoksa o satırlar
+için sütunun varsayılanı (yoksa NULL) yazılır; hiçbir satırda olmayan sütunlara
+güncellemede dokunulmaz. Yeni satır ekleyen spec'ler varsayılanı olmayan zorunlu
+(NOT NULL) sütunları içermelidir. Bu sütunları içermeyen, yalnızca mevcut
+satırları güncelleyen spec'ler upsert yerine anahtara göre toplu UPDATE ile
+yazılır (INSERT adayı NOT NULL kısıtına takılacağından). onupdate'i olan
+sütunlar (nfts.updated_at) her iki yolda da yenilenir.
+
+Kullanım:
+    python catalog_sync.py data/catalog/missions.json data/catalog/nfts.json --dry-run
+    python catalog_sync.py data/badges_data.json --table badges
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import DateTime, Enum as SQLEnum, Table, bindparam, func, select, update
+from sqlalchemy.orm import Session
+
+try:
+    import yaml
+except ImportError:  # YAML opsiyonel; sadece .yaml/.yml spec'ler için gerekir
+    yaml = None
+
+import crud
+import models
+from database import SessionLocal
+
+logger = logging.getLogger("catalog_sync")
+
+CATALOG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "catalog")
+
+# Tek upsert ifadesindeki satır sayısı (SQLite'ın bağlı parametre sınırının altında kalır)
+UPSERT_BATCH_SIZE = 500
+
+# Tablo değiştiğinde temizlenecek önbellekler
+INVALIDATORS: Dict[str, List[Callable[[], None]]] = {
+    "missions": [crud.invalidate_missions_catalog],
+    "nfts": [crud.invalidate_catalog_counts, crud.invalidate_streak_rewards],
+}
+
+
+class CatalogSpec:
+    """Doğrulanmış ve sütun tiplerine dönüştürülmüş spec"""
+
+    def __init__(self, table: Table, key: List[str], rows: List[Dict[str, Any]], source: str = ""):
+        self.table = table
+        self.key = key
+        self.rows = rows
+        self.source = source
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self.rows[0]) if self.rows else list(self.key)
+
+    @property
+    def update_columns(self) -> List[str]:
+        return [name for name in self.columns if name not in self.key]
+
+    def key_of(self, row: Dict[str, Any]) -> Tuple:
+        return tuple(row[name] for name in self.key)
+
+    @property
+    def missing_required(self) -> List[str]:
+        """Spec'te olmayan, varsayılanı da olmayan zorunlu sütunlar (yeni satır eklenemez)"""
+        return [column.name for column in self.table.columns
+                if column.name not in self.columns and not column.nullable and not column.primary_key
+                and column.default is None and column.server_default is None]
+
+    @property
+    def touched_columns(self) -> Dict[str, Any]:
+        """Spec'te olmayan ama güncellemede yenilenmesi gereken sütunlar (onupdate)"""
+        return {column.name: column.onupdate.arg for column in self.table.columns
+                if column.onupdate is not None and column.name not in self.columns
+                and (column.onupdate.is_clause_element or column.onupdate.is_scalar)}
+
+
+class CatalogDiff:
+    """Spec ile veritabanı arasındaki fark"""
+
+    def __init__(self, spec: CatalogSpec):
+        self.spec = spec
+        self.inserts: List[Dict[str, Any]] = []
+        self.updates: List[Tuple[Dict[str, Any], Dict[str, Tuple[Any, Any]]]] = []
+        self.unchanged = 0
+        self.extra: List[Tuple] = []
+
+    @property
+    def changed_rows(self) -> List[Dict[str, Any]]:
+        return self.inserts + [row for row, _ in self.updates]
+
+    def summary(self, applied: bool = False) -> str:
+        inserted, updated = ("eklendi", "güncellendi") if applied else ("eklenecek", "güncellenecek")
+        return (f"{self.spec.table.name}: {len(self.inserts)} {inserted}, {len(self.updates)} {updated}, "
+                f"{self.unchanged} değişmedi, {len(self.extra)} spec dışında")
+
+    def lines(self) -> List[str]:
+        """Kuru çalıştırmada basılan satır satır fark"""
+        def label(row):
+            key = ", ".join(str(v) for v in self.spec.key_of(row))
+            name = row.get("title") or row.get("name")
+            return f"{key} {name}" if name else key
+
+        lines = [self.summary()]
+        lines += [f"  + {label(row)}" for row in self.inserts]
+        for row, changes in self.updates:
+            lines.append(f"  ~ {label(row)}")
+            lines += [f"      {column}: {_display(old)!r} -> {_display(new)!r}" for column, (old, new) in changes.items()]
+        lines += [f"  ? {', '.join(str(v) for v in key)} (veritabanında var, spec'te yok)" for key in self.extra]
+        return lines
+
+
+def _display(value: Any) -> Any:
+    return value.value if hasattr(value, "value") else value
+
+
+def _coerce(column, value: Any) -> Any:
+    """Spec değerini sütunun Python tipine çevirir (enum adı/değeri, ISO tarih)"""
+    if value is None:
+        return None
+    if isinstance(column.type, SQLEnum) and column.type.enum_class is not None:
+        enum_class = column.type.enum_class
+        if isinstance(value, enum_class):
+            return value
+        try:
+            return enum_class(value)
+        except ValueError:
+            try:
+                return enum_class[value]
+            except KeyError:
+                raise ValueError(f"{column.table.name}.{column.name}: geçersiz değer {value!r}") from None
+    if isinstance(column.type, DateTime) and isinstance(value, str):
+        return datetime.fromisoformat(value)
+    return value
+
+
+def _column_default(column) -> Any:
+    if column.default is not None and column.default.is_scalar:
+        return column.default.arg
+    if not column.nullable and column.server_default is None and not column.primary_key:
+        raise ValueError(f"{column.table.name}.{column.name} zorunlu ama bazı satırlarda eksik")
+    return None
+
+
+def _read_file(path: str) -> Any:
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith((".yaml", ".yml")):
+            if yaml is None:
+                raise RuntimeError("YAML spec'ler için 'PyYAML' paketi kurulu olmalı (pip install pyyaml)")
+            return yaml.safe_load(f)
+        return json.load(f)
+
+
+def load_spec(path: str, table: Optional[str] = None, key: Optional[Sequence[str]] = None) -> CatalogSpec:
+    """Spec dosyasını okur, sütunları doğrular ve satırları tek biçime getirir"""
+    data = _read_file(path)
+    if isinstance(data, list):
+        data = {"rows": data}
+    table_name = table or data.get("table")
+    if not table_name:
+        raise ValueError(f"{path}: tablo adı yok (spec'e 'table' ekleyin veya --table verin)")
+    if table_name not in models.Base.metadata.tables:
+        raise ValueError(f"{path}: bilinmeyen tablo {table_name!r}")
+    sa_table = models.Base.metadata.tables[table_name]
+
+    key_names = list(key or ([data["key"]] if isinstance(data.get("key"), str) else data.get("key") or
+                             [column.name for column in sa_table.primary_key]))
+    unique_sets = [{column.name for column in sa_table.primary_key}]
+    unique_sets += [{column.name for column in index.columns} for index in sa_table.indexes if index.unique]
+    if set(key_names) not in unique_sets:
+        raise ValueError(f"{path}: {key_names} için benzersiz indeks yok; upsert anahtarı olamaz")
+
+    raw_rows = data.get("rows") or []
+    used = []
+    for row in raw_rows:
+        unknown = set(row) - set(sa_table.c.keys())
+        if unknown:
+            raise ValueError(f"{path}: {table_name} tablosunda olmayan sütunlar: {sorted(unknown)}")
+        missing_key = [name for name in key_names if row.get(name) is None]
+        if missing_key:
+            raise ValueError(f"{path}: anahtar sütunu eksik satır: {row}")
+        used += [name for name in row if name not in used]
+
+    defaults = {name: _column_default(sa_table.c[name]) for name in used
+                if any(name not in row for row in raw_rows)}
+    rows, seen = [], set()
+    for row in raw_rows:
+        normalized = {name: _coerce(sa_table.c[name], row[name] if name in row else defaults[name]) for name in used}
+        row_key = tuple(normalized[name] for name in key_names)
+        if row_key in seen:
+            raise ValueError(f"{path}: tekrarlanan anahtar {row_key}")
+        seen.add(row_key)
+        rows.append(normalized)
+    return CatalogSpec(sa_table, key_names, rows, source=path)
+
+
+def compute_diff(db: Session, spec: CatalogSpec) -> CatalogDiff:
+    """Tablonun spec'teki sütunlarını tek sorguda okur ve farkı çıkarır"""
+    diff = CatalogDiff(spec)
+    existing = {
+        tuple(row[:len(spec.key)]): dict(zip(spec.update_columns, row[len(spec.key):]))
+        for row in db.execute(select(*[spec.table.c[name] for name in spec.key + spec.update_columns])).all()
+    }
+    spec_keys = set()
+    for row in spec.rows:
+        row_key = spec.key_of(row)
+        spec_keys.add(row_key)
+        current = existing.get(row_key)
+        if current is None:
+            diff.inserts.append(row)
+            continue
+        changes = {name: (current[name], row[name]) for name in spec.update_columns if current[name] != row[name]}
+        if changes:
+            diff.updates.append((row, changes))
+        else:
+            diff.unchanged += 1
+    diff.extra = sorted(row_key for row_key in existing if row_key not in spec_keys)
+    if diff.inserts and spec.missing_required:
+        raise ValueError(f"{spec.source or spec.table.name}: yeni satırlar için zorunlu sütunlar spec'te yok: "
+                         f"{spec.missing_required}")
+    return diff
+
+
+def _upsert_statement(dialect_name: str, spec: CatalogSpec, rows: List[Dict[str, Any]]):
+    if dialect_name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect_name in ("mysql", "mariadb"):
+        from sqlalchemy.dialects.mysql import insert
+        stmt = insert(spec.table).values(rows)
+        updates = {name: stmt.inserted[name] for name in spec.update_columns} or {spec.key[0]: stmt.inserted[spec.key[0]]}
+        return stmt.on_duplicate_key_update({**updates, **spec.touched_columns})
+    else:
+        raise NotImplementedError(f"{dialect_name} için upsert desteklenmiyor")
+
+    stmt = insert(spec.table).values(rows)
+    if not spec.update_columns:
+        return stmt.on_conflict_do_nothing(index_elements=spec.key)
+    # ON CONFLICT DO UPDATE sütunların onupdate değerlerini uygulamaz; açıkça eklenir
+    return stmt.on_conflict_do_update(
+        index_elements=spec.key,
+        set_={**{name: stmt.excluded[name] for name in spec.update_columns}, **spec.touched_columns},
+    )
+
+
+def _update_statement(spec: CatalogSpec):
+    """Anahtara göre toplu UPDATE (executemany); onupdate sütunlarını Core kendisi uygular"""
+    return (
+        update(spec.table)
+        .where(*[spec.table.c[name] == bindparam(f"key_{name}") for name in spec.key])
+        .values({name: bindparam(name) for name in spec.update_columns})
+    )
+
+
+def apply_diff(db: Session, diff: CatalogDiff, batch_size: int = UPSERT_BATCH_SIZE) -> int:
+    """Eklenecek ve güncellenecek satırları toplu upsert ile yazar (commit etmez)"""
+    rows = diff.changed_rows
+    spec = diff.spec
+    dialect_name = db.get_bind().dialect.name
+    if spec.missing_required:
+        # compute_diff ekleme olmadığını doğruladı; yalnızca güncellemeler yazılır
+        if diff.updates and spec.update_columns:
+            db.execute(_update_statement(spec), [
+                {**{name: row[name] for name in spec.update_columns},
+                 **{f"key_{name}": row[name] for name in spec.key}}
+                for row, _ in diff.updates
+            ])
+        return len(rows)
+    for start in range(0, len(rows), batch_size):
+        db.execute(_upsert_statement(dialect_name, spec, rows[start:start + batch_size]))
+
+    # Açık ID ile eklenen satırlardan sonra PostgreSQL dizisini ileri al
+    if diff.inserts and dialect_name == "postgresql" and spec.key == ["id"] and spec.table.c.id.autoincrement:
+        db.execute(select(func.setval(func.pg_get_serial_sequence(spec.table.name, "id"),
+                                      select(func.max(spec.table.c.id)).scalar_subquery())))
+    return len(rows)
+
+
+def sync_catalog(db: Session, specs: Sequence[CatalogSpec], dry_run: bool = False,
+                 batch_size: int = UPSERT_BATCH_SIZE) -> List[CatalogDiff]:
+    """Tüm spec'lerin farkını çıkarır; kuru çalıştırma değilse tek işlemde uygular"""
+    diffs = [compute_diff(db, spec) for spec in specs]
+    if dry_run:
+        db.rollback()
+        return diffs
+    try:
+        for diff in diffs:
+            apply_diff(db, diff, batch_size=batch_size)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    for diff in diffs:
+        if diff.changed_rows:
+            for invalidate in INVALIDATORS.get(diff.spec.table.name, []):
+                invalidate()
+    return diffs
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Katalog spec dosyalarını veritabanına senkronlar")
+    parser.add_argument("specs", nargs="+", help="JSON/YAML spec dosyaları (sırayla uygulanır)")
+    parser.add_argument("--table", help="Düz liste biçimindeki spec'ler için tablo adı")
+    parser.add_argument("--key", help="Upsert anahtarı (virgülle ayrılmış sütunlar, varsayılan birincil anahtar)")
+    parser.add_argument("--dry-run", action="store_true", help="Sadece farkı yazdır, veritabanını değiştirme")
+    parser.add_argument("--batch-size", type=int, default=UPSERT_BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    try:
+        specs = [load_spec(path, table=args.table, key=args.key.split(",") if args.key else None)
+                 for path in args.specs]
+    except (OSError, ValueError, RuntimeError) as e:
+        logger.error(f"Spec okunamadı: {e}")
+        return 2
+
+    db = SessionLocal()
+    try:
+        diffs = sync_catalog(db, specs, dry_run=args.dry_run, batch_size=args.batch_size)
+    except Exception as e:
+        logger.exception(f"Katalog senkronizasyonu başarısız: {e}")
+        return 1
+    finally:
+        db.close()
+
+    for diff in diffs:
+        if args.dry_run:
+            print("\n".join(diff.lines()))
+        else:
+            logger.info(diff.summary(applied=True))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
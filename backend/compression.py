@@ -0,0 +1,140 @@
+# compression.py - Brotli/GZip yanıt sıkıştırma middleware'i
+#
+# İstemcinin Accept-Encoding başlığına göre br (brotli kuruluysa) veya gzip seçer.
+# Eşik değerinden küçük yanıtlar, zaten sıkıştırılmış içerikler ve medya dosyaları
+# olduğu gibi gönderilir. Akış (streaming) yanıtlar parça parça sıkıştırılır.
+
+import zlib
+from typing import List, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # brotli opsiyonel; yoksa sadece gzip kullanılır
+    brotli = None
+
+# Sıkıştırmanın fayda sağlamadığı içerik türleri
+EXCLUDED_CONTENT_TYPES = ("image/", "video/", "audio/", "font/woff", "application/zip",
+                          "application/gzip", "text/event-stream")
+
+
+def _accepted_encodings(accept_encoding: str) -> List[str]:
+    """Accept-Encoding başlığından q=0 olmayan kodlamaları döndürür"""
+    encodings = []
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name.strip() and quality > 0:
+            encodings.append(name.strip())
+    return encodings
+
+
+class CompressionMiddleware:
+    def __init__(self, app: ASGIApp, minimum_size: int = 1000, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    def select_encoding(self, accept_encoding: str) -> Optional[str]:
+        accepted = _accepted_encodings(accept_encoding)
+        if brotli is not None and "br" in accepted:
+            return "br"
+        if "gzip" in accepted:
+            return "gzip"
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = self.select_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        responder = _CompressingResponder(self, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressingResponder:
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self._send = send
+        self.start_message: Optional[Message] = None
+        self.passthrough = False
+        self.started = False
+        self.compressor = None
+
+    def _compress(self, body: bytes, finish: bool) -> bytes:
+        if self.compressor is None:
+            if self.encoding == "br":
+                self.compressor = brotli.Compressor(quality=self.middleware.brotli_quality)
+            else:
+                self.compressor = zlib.compressobj(self.middleware.gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        if self.encoding == "br":
+            data = self.compressor.process(body)
+            return data + (self.compressor.finish() if finish else self.compressor.flush())
+        data = self.compressor.compress(body)
+        return data + self.compressor.flush(zlib.Z_FINISH if finish else zlib.Z_SYNC_FLUSH)
+
+    async def send(self, message: Message) -> None:
+        message_type = message["type"]
+        if message_type == "http.response.start":
+            # Başlıklar, ilk gövde parçası görülüp sıkıştırma kararı verilene kadar bekletilir
+            headers = Headers(raw=message["headers"])
+            content_type = headers.get("content-type", "").lower()
+            self.passthrough = (
+                "content-encoding" in headers
+                or message["status"] in (204, 206, 304)
+                or content_type.startswith(EXCLUDED_CONTENT_TYPES)
+            )
+            if self.passthrough:
+                await self._send(message)
+            else:
+                self.start_message = message
+            return
+
+        if message_type != "http.response.body" or self.passthrough:
+            if self.start_message is not None and not self.started:
+                self.started = True
+                await self._send(self.start_message)
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if not self.started:
+            self.started = True
+            headers = MutableHeaders(raw=self.start_message["headers"])
+            headers.add_vary_header("Accept-Encoding")
+            if len(body) < self.middleware.minimum_size and not more_body:
+                # Küçük yanıtlar sıkıştırılmaz
+                self.passthrough = True
+                await self._send(self.start_message)
+                await self._send(message)
+                return
+            headers["Content-Encoding"] = self.encoding
+            if more_body:
+                del headers["Content-Length"]
+            body = self._compress(body, finish=not more_body)
+            if not more_body:
+                headers["Content-Length"] = str(len(body))
+            await self._send(self.start_message)
+            await self._send({"type": "http.response.body", "body": body, "more_body": more_body})
+            return
+
+        await self._send({
+            "type": "http.response.body",
+            "body": self._compress(body, finish=not more_body),
+            "more_body": more_body,
+        })
@@ -13,6 +13,7 @@ from datetime import datetime
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from database import SessionLocal, engine
 import models
+import levels
 from schemas import UserCreate
 import crud
 
@@ -39,8 +40,7 @@ def create_test_user(telegram_id: int, username: str = "test_user"):
         print(f"✅ Yeni kullanıcı oluşturuldu: {new_user.telegram_id} ({new_user.username})")
         
         # Kullanıcı profil bilgilerini doğrudan ayarla
-        new_user.xp = 750
-        new_user.level = 5
+        levels.set_xp(new_user, 750)
         new_user.stars = 1000
         new_user.stars_enabled = True
         new_user.has_vip_access = True
@@ -1,2 +1,11 @@
 # CRUD paketi
-from crud.nfts import * 
\ No newline at end of file
+# crud.py paketle aynı adı taşıdığı için hiç yüklenmiyordu; içeriği crud/core.py'ye taşındı.
+# NFT fonksiyonlarının güncel sürümleri crud/nfts.py'dedir ve core'dakileri ezer.
+from crud.activity import *
+from crud.core import *
+from crud.nfts import *
+from crud.bootstrap import *
+from crud.daily_bonus import *
+from crud.leaderboard import *
+from crud.dao import *
+from crud.invites import *
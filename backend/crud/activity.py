@@ -0,0 +1,176 @@
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+
+from sqlalchemy import or_, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from crud.daily_bonus import DAILY_BONUS_STREAK_WINDOW
+from models import Mission, User, UserMissionState
+
+logger = logging.getLogger(__name__)
+
+# Son görevden bu süre geçtiyse görev serisi kopmuş sayılır
+MISSION_STREAK_WINDOW = timedelta(days=2)
+
+# Sıfırlama işinin her UPDATE'te dokunduğu en fazla satır sayısı
+RESET_CHUNK_SIZE = 5000
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    # SQLite zaman damgalarını saat dilimi olmadan (UTC) döndürür
+    if value is None or value.tzinfo:
+        return value
+    return value.replace(tzinfo=timezone.utc)
+
+def _start_of_day(now: datetime) -> datetime:
+    return now.replace(hour=0, minute=0, second=0, microsecond=0)
+
+def record_mission_activity(user: User, now: Optional[datetime] = None) -> int:
+    """
+    Görev tamamlamada seriyi günceller. Kopmuş seriler gece çalışan sıfırlama işi
+    (daily_reset.py) tarafından sıfırlandığı için burada görev geçmişi okunmaz.
+    """
+    now = now or datetime.now(timezone.utc)
+    user.mission_streak = (user.mission_streak or 0) + 1
+    user.last_mission_at = now
+    return user.mission_streak
+
+def record_mission_completion(db: Session, user_id: int, mission_id: int, now: Optional[datetime] = None,
+                              count: int = 1) -> None:
+    """
+    Kullanıcı-görev durum satırını tek upsert ile günceller (commit etmez).
+    Görev tamamlama kaydıyla aynı işlemde çağrılmalıdır. `now` sunucu zamanı
+    olmalıdır (cooldown'lar buna göre hesaplanır); toplu tamamlamada `count`
+    aynı görevin kaç kez tamamlandığıdır.
+    """
+    now = now or datetime.now(timezone.utc)
+    dialect = db.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        insert = sqlite.insert if dialect == "sqlite" else postgresql.insert
+        stmt = insert(UserMissionState).values(
+            user_id=user_id, mission_id=mission_id, last_completed_at=now, completion_count=count
+        )
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[UserMissionState.user_id, UserMissionState.mission_id],
+            set_={"last_completed_at": stmt.excluded.last_completed_at,
+                  "completion_count": UserMissionState.completion_count + count},
+        ))
+        return
+    result = db.execute(
+        update(UserMissionState)
+        .where(UserMissionState.user_id == user_id, UserMissionState.mission_id == mission_id)
+        .values(last_completed_at=now, completion_count=UserMissionState.completion_count + count)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 0:
+        db.add(UserMissionState(user_id=user_id, mission_id=mission_id, last_completed_at=now, completion_count=count))
+
+def get_mission_state(db: Session, user_id: int, mission_id: int) -> Optional[UserMissionState]:
+    """Kullanıcının bir görevdeki durumu (hiç tamamlamadıysa None)"""
+    return db.get(UserMissionState, (user_id, mission_id))
+
+def get_mission_states(db: Session, user_id: int) -> Dict[int, UserMissionState]:
+    """Kullanıcının tamamladığı tüm görevlerin durumu: {mission_id: durum}"""
+    states = db.execute(select(UserMissionState).where(UserMissionState.user_id == user_id)).scalars()
+    return {state.mission_id: state for state in states}
+
+def mission_available_at(state: Optional[UserMissionState], cooldown_hours: int) -> Optional[datetime]:
+    """
+    Görevin tekrar yapılabileceği an. Hiç tamamlanmadıysa None (hemen yapılabilir);
+    cooldown_hours 0 olan görevler tekrar edilemez (datetime.max).
+    """
+    if state is None:
+        return None
+    if not cooldown_hours:
+        return datetime.max.replace(tzinfo=timezone.utc)
+    return _as_utc(state.last_completed_at) + timedelta(hours=cooldown_hours)
+
+def get_mission_cooldowns(db: Session, user: User, now: Optional[datetime] = None) -> Dict[int, datetime]:
+    """
+    Kullanıcının erişebildiği (aktif, seviyesi yeten, VIP değilse VIP olmayan)
+    görevlerden cooldown'u devam edenler için {mission_id: bitiş zamanı}.
+    Kullanıcının durum satırları görev tablosuyla birleştirilerek tek sorguda okunur.
+    """
+    now = now or datetime.now(timezone.utc)
+    visible = [Mission.is_active == True, Mission.cooldown_hours > 0, Mission.required_level <= user.level]
+    if not user.has_vip_access:
+        visible.append(Mission.is_vip == False)
+    rows = db.execute(
+        select(UserMissionState.mission_id, UserMissionState.last_completed_at, Mission.cooldown_hours)
+        .join(Mission, Mission.id == UserMissionState.mission_id)
+        .where(UserMissionState.user_id == user.id, *visible)
+    ).all()
+    cooldowns = {}
+    for mission_id, last_completed_at, cooldown_hours in rows:
+        ends_at = _as_utc(last_completed_at) + timedelta(hours=cooldown_hours)
+        if ends_at > now:
+            cooldowns[mission_id] = ends_at
+    return cooldowns
+
+def record_login_activity(user: User, now: Optional[datetime] = None) -> int:
+    """
+    Girişte son giriş zamanını ve ardışık giriş gününü günceller (commit etmez).
+    Gün içindeki tekrar girişler sayacı artırmaz; kopmuş seriler gece işinde
+    sıfırlanır. Görevler sırasız çalışabildiğinden kayıtlı girişten eski bir
+    giriş hiçbir şeyi değiştirmez. Güncel ardışık giriş gününü döndürür.
+    """
+    now = now or datetime.now(timezone.utc)
+    last_login = _as_utc(user.last_login_date)
+    if last_login is not None and now <= last_login:
+        return user.consecutive_login_days or 0
+    if last_login is None or last_login < _start_of_day(now):
+        user.consecutive_login_days = (user.consecutive_login_days or 0) + 1
+    user.last_login_date = now
+    return user.consecutive_login_days
+
+def _reset_in_chunks(db: Session, counter, condition, chunk_size: int) -> int:
+    """
+    `counter` sütununu koşula uyan ve sıfır olmayan satırlarda parça parça sıfırlar.
+    Her parça ayrı commit edilir; sıfırlanmış satırlar koşuldan düştüğü için
+    iş yarıda kesilse de yeniden çalıştırmak güvenlidir.
+    """
+    total = 0
+    while True:
+        chunk = select(User.id).where(counter != 0, condition).limit(chunk_size).scalar_subquery()
+        result = db.execute(
+            update(User).where(User.id.in_(chunk)).values({counter: 0}).execution_options(synchronize_session=False)
+        )
+        db.commit()
+        total += result.rowcount
+        if result.rowcount < chunk_size:
+            return total
+
+def reset_lapsed_counters(db: Session, now: Optional[datetime] = None,
+                          chunk_size: int = RESET_CHUNK_SIZE) -> Dict[str, int]:
+    """
+    Kopmuş görev serilerini, ardışık giriş günlerini ve günlük bonus serilerini
+    tüm kullanıcılar için küme tabanlı UPDATE'lerle sıfırlar.
+    Sütun başına dokunulan satır sayısını ve toplam süreyi döndürür.
+    """
+    now = now or datetime.now(timezone.utc)
+    started = time.perf_counter()
+    # Dün ve bugün hiç giriş yapmayanların ardışık giriş serisi kopmuştur
+    login_cutoff = _start_of_day(now) - timedelta(days=1)
+
+    touched = {
+        "mission_streak": _reset_in_chunks(
+            db, User.mission_streak,
+            or_(User.last_mission_at.is_(None), User.last_mission_at < now - MISSION_STREAK_WINDOW),
+            chunk_size
+        ),
+        "consecutive_login_days": _reset_in_chunks(
+            db, User.consecutive_login_days,
+            or_(User.last_login_date.is_(None), User.last_login_date < login_cutoff),
+            chunk_size
+        ),
+        "daily_bonus_streak": _reset_in_chunks(
+            db, User.daily_bonus_streak,
+            or_(User.last_daily_bonus_at.is_(None), User.last_daily_bonus_at < now - DAILY_BONUS_STREAK_WINDOW),
+            chunk_size
+        ),
+    }
+    duration = time.perf_counter() - started
+    logger.info("Günlük sıfırlama tamamlandı: %s (%.2f sn)", touched, duration)
+    return {**touched, "duration_seconds": round(duration, 3)}
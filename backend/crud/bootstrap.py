@@ -0,0 +1,62 @@
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session, selectinload
+
+import xp_buffer
+from cache import cache
+from models import Mission, User, UserBadge, UserNFT
+
+# Görev kataloğundan türeyen önbellek kayıtlarının ortak etiketi
+MISSIONS_TAG = "missions"
+
+def invalidate_missions_catalog() -> None:
+    """Görev eklenip güncellendiğinde görev kataloğuna bağlı önbellek kayıtlarını temizler"""
+    cache.invalidate_tags(MISSIONS_TAG)
+
+def get_user_for_bootstrap(db: Session, user_id: int) -> Optional[User]:
+    """
+    Kullanıcıyı /bootstrap için gereken tüm ilişkileriyle (rozetler, tamamlanan
+    görevler, NFT'ler, görev hikayeleri) tek seferde yükler. selectinload ile
+    ilişki başına bir sorgu çalışır; satır sayısından bağımsız olarak N+1 oluşmaz.
+    """
+    query = (
+        select(User)
+        .where(User.id == user_id)
+        .options(
+            selectinload(User.badges).selectinload(UserBadge.badge),
+            selectinload(User.completed_missions),
+            selectinload(User.nfts).selectinload(UserNFT.nft),
+            selectinload(User.mission_stories),
+        )
+        # Kullanıcı kimlik doğrulamada aynı oturuma zaten yüklenmiş olabilir
+        .execution_options(populate_existing=True)
+    )
+    user = db.execute(query).scalars().first()
+    # Bekleyen XP/Stars kazanımları yanıta yansıtılır
+    return xp_buffer.overlay(db, user) if user else None
+
+def get_active_missions_catalog(db: Session) -> List[Dict[str, Any]]:
+    """Aktif görevlerin kullanıcıdan bağımsız listesi (gerekli NFT adıyla birlikte)"""
+    missions = db.execute(
+        select(Mission)
+        .where(Mission.is_active == True)
+        .options(selectinload(Mission.required_nft))
+        .order_by(Mission.id)
+    ).scalars().all()
+    return [
+        {
+            "id": mission.id,
+            "title": mission.title,
+            "description": mission.description,
+            "xp_reward": mission.xp_reward,
+            "mission_type": mission.mission_type,
+            "category": mission.mission_type.lower() if mission.mission_type else None,
+            "cooldown_hours": mission.cooldown_hours,
+            "required_level": mission.required_level,
+            "is_vip": mission.is_vip,
+            "required_nft_id": mission.required_nft_id,
+            "required_nft_name": mission.required_nft.name if mission.required_nft else None,
+        }
+        for mission in missions
+    ]
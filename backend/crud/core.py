@@ -2,11 +2,17 @@
 # (Örn: Kullanıcı oluştur, görev getir, NFT al vb.)
 # Şimdilik boş bırakıyoruz, endpoint'leri yazdıkça dolduracağız.
 
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 import models, schemas  # Kullanılmaya başlandığında importlar eklenecek
-from typing import Optional, List
+import levels
+import search
+import xp_buffer
+from typing import Dict, List, Optional, Set
 from sqlalchemy import func, desc
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from crud.activity import _as_utc, get_mission_states, record_mission_activity, record_mission_completion
+from crud.bootstrap import invalidate_missions_catalog
+from crud.invites import register_invite
 
 # Kullanıcı işlemleri
 def get_user(db: Session, user_id: int):
@@ -37,10 +43,16 @@ def create_user(db: Session, user_data: schemas.UserCreate):
         stars_enabled=True,
         has_vip_access=False,
         consecutive_login_days=1,
-        mission_streak=0
+        last_login_date=datetime.now(timezone.utc),
+        mission_streak=0,
+        inviter_id=user_data.inviter_id
     )
     
     db.add(new_user)
+    if new_user.inviter_id:
+        # Davet ağacı ve davet edenin sayaçları kullanıcıyla aynı işlemde güncellenir
+        db.flush()
+        register_invite(db, user_id=new_user.id, inviter_id=new_user.inviter_id)
     db.commit()
     db.refresh(new_user)
     
@@ -104,13 +116,18 @@ def get_user_profile(db: Session, user_id: int):
     user = get_user(db, user_id)
     if not user:
         return None
-    return schemas.UserProfile.from_orm(user)
+    return schemas.UserProfile.model_validate(xp_buffer.overlay(db, user))
 
 def get_user_wallet(db: Session, user_id: int):
     """Kullanıcının cüzdan bilgilerini getirir"""
-    user = get_user(db, user_id)
+    # NFT'ler ve detayları selectinload ile toplam üç sorguda yüklenir
+    user = db.query(models.User)\
+             .options(selectinload(models.User.nfts).selectinload(models.UserNFT.nft))\
+             .filter(models.User.id == user_id)\
+             .first()
     if not user:
         return None
+    xp_buffer.overlay(db, user)
     
     user_nfts_schema = []
     if user.nfts:
@@ -139,6 +156,14 @@ def get_mission(db: Session, mission_id: int):
     """Belirli bir görevi ID'ye göre getirir"""
     return db.query(models.Mission).filter(models.Mission.id == mission_id).first()
 
+def resolve_mission_type(category: str) -> Optional[models.MissionType]:
+    """Kategori adını (FLIRT, flirt) ya da değerini (flört, FLÖRT, flort) MissionType'a çevirir"""
+    key = search.fold(category.strip())
+    for mission_type in models.MissionType:
+        if key in (search.fold(mission_type.name), search.fold(mission_type.value)):
+            return mission_type
+    return None
+
 def get_missions_for_user(db: Session, user: models.User, category: Optional[str] = None):
     """Kullanıcının erişebileceği görevleri listeler"""
     query = db.query(models.Mission).filter(
@@ -150,9 +175,12 @@ def get_missions_for_user(db: Session, user: models.User, category: Optional[str
     if not user.has_vip_access:
         query = query.filter(models.Mission.is_vip == False)
     
-    # Kategori filtresi varsa uygula
+    # Kategori filtresi varsa uygula (sütunda fonksiyon yok; eşitlik indeks kullanabilir)
     if category:
-        query = query.filter(func.lower(models.Mission.mission_type) == func.lower(category))
+        mission_type = resolve_mission_type(category)
+        if mission_type is None:
+            return []
+        query = query.filter(models.Mission.mission_type == mission_type)
     
     return query.all()
 
@@ -191,6 +219,7 @@ def create_mission_admin(db: Session, mission_data: schemas.AdminCreateMissionRe
     db.add(new_mission)
     db.commit()
     db.refresh(new_mission)
+    invalidate_missions_catalog()
     return new_mission
 
 def update_mission_admin(db: Session, mission_id: int, update_data: schemas.AdminUpdateMissionRequest):
@@ -209,21 +238,21 @@ def update_mission_admin(db: Session, mission_id: int, update_data: schemas.Admi
     
     db.commit()
     db.refresh(mission)
+    invalidate_missions_catalog()
     return mission
 
+def mission_streak_bonus(xp_reward: int, streak: int) -> int:
+    """Seri bonusu: seri günü başına %5, en fazla %50"""
+    return int(xp_reward * 0.05 * min(streak, 10)) if streak > 0 else 0
+
 def complete_mission_logic(db: Session, user: models.User, mission: models.Mission):
     """Görev tamamlama mantığını işler ve ödülleri verir"""
-    # Kazanılacak XP miktarı
-    xp_gained = mission.xp_reward
+    # Kazanılacak XP miktarı ve seri bonusu
+    streak_bonus = mission_streak_bonus(mission.xp_reward, user.mission_streak or 0)
+    xp_gained = mission.xp_reward + streak_bonus
     
-    # Streak bonusu (opsiyonel)
-    streak_bonus = 0
-    if user.mission_streak > 0:
-        streak_bonus = int(xp_gained * 0.05 * min(user.mission_streak, 10))
-        xp_gained += streak_bonus
-    
-    # Kullanıcı XP'sini güncelle
-    user.xp += xp_gained
+    # Kullanıcı XP'si (birleştirme açıksa arka planda toplu yazılır)
+    xp_buffer.credit(db, user, xp=xp_gained, reason="mission_completion")
     
     # Görev tamamlama kaydı
     user_mission = models.UserMission(
@@ -239,98 +268,150 @@ def complete_mission_logic(db: Session, user: models.User, mission: models.Missi
     
     db.add(user_mission)
     db.add(mission_log)
+    record_mission_completion(db, user_id=user.id, mission_id=mission.id)
     
-    # Streak'i güncelle
-    last_log = db.query(models.UserMissionLog)\
-                .filter(models.UserMissionLog.user_id == user.id)\
-                .order_by(desc(models.UserMissionLog.completion_time))\
-                .first()
-                
-    now = datetime.now()
-    if last_log:
-        # Son 24 saat içinde görev yapılmışsa streak devam ediyor
-        if now - last_log.completion_time < timedelta(days=1):
-            user.mission_streak += 1
-        else:
-            # 48 saatten fazla süre geçmişse streak sıfırlanır
-            if now - last_log.completion_time > timedelta(days=2):
-                user.mission_streak = 1
-    else:
-        user.mission_streak = 1
-    
-    # Rozet kazanımını kontrol et
-    earned_badge = None
-    available_badges = db.query(models.Badge)\
-                        .filter(
-                            models.Badge.is_active == True,
-                            models.Badge.required_mission_id == mission.id
-                        )\
-                        .all()
-    
-    if available_badges:
-        for badge in available_badges:
-            # Kullanıcı bu rozeti zaten almış mı?
-            existing_badge = db.query(models.UserBadge)\
-                            .filter(
-                                models.UserBadge.user_id == user.id,
-                                models.UserBadge.badge_id == badge.id
-                            )\
-                            .first()
-            
-            if not existing_badge:
-                # Rozeti ver
-                user_badge = models.UserBadge(
-                    user_id=user.id,
-                    badge_id=badge.id
-                )
-                db.add(user_badge)
-                earned_badge = badge
-                break  # İlk uygun rozeti ver ve döngüden çık
+    # Streak'i güncelle (kopmuş seriler gece sıfırlama işinde sıfırlanır)
+    record_mission_activity(user)
+    
+    # Rozet kazanımı yanıtı bekletmemek için arka planda değerlendirilir
+    import tasks
+    tasks.enqueue(db, "award_mission_badges", user_id=user.id, mission_id=mission.id)
     
     # Değişiklikleri kaydet
     db.commit()
     db.refresh(user)
-    
-    # XP seviyesine göre seviyeyi güncelle
-    new_level = calculate_level_from_xp(user.xp)
+    xp_buffer.overlay(db, user)
     
     # Yanıt hazırla
     response = schemas.CompleteMissionResponse(
         message=f"Tebrikler! {mission.title} görevini tamamladın.",
         new_xp=user.xp,
-        new_level=new_level
+        new_level=user.level
     )
     
     if streak_bonus > 0:
         response.streak_bonus_xp = streak_bonus
     
-    if earned_badge:
-        response.earned_badge = schemas.Badge.from_orm(earned_badge)
-    
     return response
 
-def calculate_level_from_xp(xp: int) -> int:
-    """XP miktarından seviye hesaplar"""
-    if xp < 100:
-        return 1
-    elif xp < 300:
-        return 2
-    elif xp < 600:
-        return 3
-    elif xp < 1000:
-        return 4
-    elif xp < 1500:
-        return 5
-    elif xp < 2500:
-        return 6
-    elif xp < 4000:
-        return 7
-    elif xp < 6000:
-        return 8
-    elif xp < 9000:
-        return 9
-    else:
-        return 10 + (xp - 9000) // 5000
+# Toplu tamamlamada kabul edilen en eski istemci zamanı (çevrimdışı tekrar oynatma)
+BATCH_REPLAY_WINDOW = timedelta(hours=24)
+
+def _batch_rejection(mission: Optional[models.Mission], user: models.User, level: int, nft_ids: Set[int],
+                     last_completed_at: Optional[datetime], at: datetime, now: datetime) -> Optional[str]:
+    """
+    Toplu tamamlamadaki bir öğenin reddedilme nedeni (uygunsa None). İstemci
+    zamanı (`at`) yalnızca eskilik kontrolünde kullanılır; cooldown sunucu
+    zamanına (`now`) göre denetlenir, aksi halde geriye tarihli zamanlarla
+    cooldown'lar atlanabilirdi.
+    """
+    if mission is None or not mission.is_active:
+        return "Görev bulunamadı."
+    if at < now - BATCH_REPLAY_WINDOW:
+        return "Tamamlama zamanı çok eski."
+    if mission.required_level > level:
+        return "Bu görevi yapmak için yeterli seviyede değilsiniz."
+    if mission.is_vip and not user.has_vip_access:
+        return "Bu görev sadece VIP kullanıcılar içindir."
+    if mission.required_nft_id and mission.required_nft_id not in nft_ids:
+        return "Bu görevi yapmak için gerekli NFT'ye sahip değilsiniz."
+    if last_completed_at is not None:
+        if not mission.cooldown_hours:
+            return "Bu görev daha önce tamamlandı ve tekrar edilemez."
+        if now < last_completed_at + timedelta(hours=mission.cooldown_hours):
+            return "Bu görevi henüz tekrar yapamazsınız."
+    return None
+
+def complete_missions_batch(db: Session, user: models.User, items: List[schemas.BatchCompleteMissionItem],
+                            now: Optional[datetime] = None) -> schemas.BatchCompleteMissionResponse:
+    """
+    Birden çok görev tamamlamasını tek işlemde uygular. Görevler, kullanıcının
+    görev durumları ve NFT'leri bir kez yüklenir; öğeler istemci zamanına göre
+    sırayla bu anlık görüntü üzerinde doğrulanır. Kabul edilen her öğe sonraki
+    öğelerin seviye, seri ve cooldown kontrollerine yansır; reddedilen öğe
+    diğerlerini etkilemez. Sonuçlar istek sırasıyla döner.
+
+    İstemci zamanı doğrulanamaz: yalnızca sıralama ve eskilik kontrolü için
+    kullanılır. Cooldown sunucu zamanına göre denetlenir (cooldown'lu bir görev
+    bir partide en fazla bir kez tamamlanır) ve tüm kayıtlar sunucu zamanıyla
+    yazılır; hız dedektörü aynı zamanlı bu kayıtları tek tamamlama olarak sayar
+    (bkz. anticheat.instrument_sessions), böylece meşru çevrimdışı tekrar
+    oynatma dakika ve aralık kurallarına takılmaz.
+    """
+    now = now or datetime.now(timezone.utc)
+    missions = {
+        mission.id: mission
+        for mission in db.query(models.Mission).filter(models.Mission.id.in_({item.mission_id for item in items}))
+    }
+    last_completed = {
+        mission_id: _as_utc(state.last_completed_at)
+        for mission_id, state in get_mission_states(db, user.id).items()
+    }
+    nft_ids = {nft_id for (nft_id,) in db.query(models.UserNFT.nft_id).filter(models.UserNFT.user_id == user.id)}
+    xp_buffer.overlay(db, user)
+
+    # İstemci zamanı gelecekteyse sunucu zamanı kullanılır
+    completed_at = [min(_as_utc(item.client_timestamp), now) if item.client_timestamp else now for item in items]
+    results: List[Optional[schemas.BatchCompleteMissionItemResult]] = [None] * len(items)
+    xp = user.xp or 0
+    total_xp = 0
+    completions: Dict[int, int] = {}
+    for index in sorted(range(len(items)), key=lambda i: completed_at[i]):
+        mission_id, at = items[index].mission_id, completed_at[index]
+        mission = missions.get(mission_id)
+        reason = _batch_rejection(mission, user, levels.level_for_xp(xp), nft_ids,
+                                  last_completed.get(mission_id), at, now)
+        if reason:
+            results[index] = schemas.BatchCompleteMissionItemResult(mission_id=mission_id, completed=False,
+                                                                    detail=reason)
+            continue
+
+        streak_bonus = mission_streak_bonus(mission.xp_reward, user.mission_streak or 0)
+        xp_gained = mission.xp_reward + streak_bonus
+        xp += xp_gained
+        total_xp += xp_gained
+        last_completed[mission_id] = now
+        completions[mission_id] = completions.get(mission_id, 0) + 1
+        db.add(models.UserMission(user_id=user.id, mission_id=mission_id, completed_at=now))
+        db.add(models.UserMissionLog(user_id=user.id, mission_id=mission_id, completion_time=now))
+        record_mission_activity(user, now=now)
+        results[index] = schemas.BatchCompleteMissionItemResult(
+            mission_id=mission_id, completed=True, xp_gained=xp_gained, streak_bonus_xp=streak_bonus,
+            completed_at=now
+        )
+
+    if completions:
+        import tasks
+        xp_buffer.credit(db, user, xp=total_xp, reason="mission_completion")
+        for mission_id, count in completions.items():
+            record_mission_completion(db, user_id=user.id, mission_id=mission_id, now=now, count=count)
+            tasks.enqueue(db, "award_mission_badges", user_id=user.id, mission_id=mission_id)
+        db.commit()
+        db.refresh(user)
+        xp_buffer.overlay(db, user)
+
+    return schemas.BatchCompleteMissionResponse(
+        results=results,
+        completed_count=sum(completions.values()),
+        new_xp=user.xp or 0,
+        new_level=user.level or 1,
+        streak=user.mission_streak or 0,
+    )
+
+def award_mission_badges(db: Session, user_id: int, mission_id: int) -> List[models.Badge]:
+    """
+    Görevi tamamlayan kullanıcıya, o göreve bağlı ve henüz sahip olmadığı aktif
+    rozetleri verir (commit etmez). Tekrar çalıştırmak güvenlidir.
+    """
+    owned = db.query(models.UserBadge.badge_id).filter(models.UserBadge.user_id == user_id)
+    badges = db.query(models.Badge).filter(
+        models.Badge.is_active == True,
+        models.Badge.required_mission_id == mission_id,
+        models.Badge.id.not_in(owned),
+    ).all()
+    for badge in badges:
+        db.add(models.UserBadge(user_id=user_id, badge_id=badge.id))
+    return badges
 
 # Rozet işlemleri
 def get_badge(db: Session, badge_id: int):
@@ -413,7 +494,8 @@ def get_user_nfts(db: Session, user_id: int):
 
 def buy_nft(db: Session, user: models.User, nft: models.NFT):
     """Kullanıcı için NFT satın alma işlemi"""
-    # Yıldız bakiyesi kontrolü
+    # Yıldız bakiyesi kontrolü (bekleyen kazanımlar önce uygulanır)
+    xp_buffer.settle(db, user)
     if user.stars < nft.price_stars:
         raise ValueError(f"Yetersiz yıldız bakiyesi. Gereken: {nft.price_stars}, Mevcut: {user.stars}")
     
@@ -456,9 +538,19 @@ def update_user_admin(db: Session, telegram_id: int, update_data: schemas.AdminU
     if not user:
         return None
     
-    # Gelen verileri güncelle
-    for field, value in update_data.model_dump(exclude_unset=True).items():
+    # Mutlak XP/Stars değerleri bekleyen kazanımların üzerine yazılmasın
+    xp_buffer.settle(db, user)
+    # Gelen verileri güncelle; seviye XP'den türetilir
+    updates = update_data.model_dump(exclude_unset=True)
+    level = updates.pop("level", None)
+    xp = updates.pop("xp", None)
+    for field, value in updates.items():
         setattr(user, field, value)
+    if xp is not None:
+        levels.set_xp(user, xp)
+    elif level is not None:
+        # Yalnızca seviye verildiyse XP o seviyenin alt sınırına çekilir
+        levels.set_xp(user, levels.xp_for_level(level))
     
     db.commit()
     db.refresh(user)
@@ -474,11 +566,14 @@ def get_user_badges(db: Session, user_id: int):
     """
     Kullanıcının rozetlerini getirir
     """
-    user_badges = db.query(models.UserBadge).filter(models.UserBadge.user_id == user_id).all()
+    # Rozet bilgisi join ile tek sorguda gelir (rozet başına ayrı sorgu yok)
+    rows = db.query(models.UserBadge, models.Badge)\
+             .join(models.Badge, models.Badge.id == models.UserBadge.badge_id)\
+             .filter(models.UserBadge.user_id == user_id)\
+             .all()
     badges = []
     
-    for ub in user_badges:
-        badge = db.query(models.Badge).filter(models.Badge.id == ub.badge_id).first()
+    for ub, badge in rows:
         if badge:
             badges.append({
                 "badge_id": badge.id,
@@ -508,7 +603,7 @@ def get_user_mission_stories(db: Session, user_id: int):
     """
     Kullanıcının görev hikayelerini getirir
     """
-    stories = db.query(models.MissionStory).filter(models.MissionStory.user_id == user_id).all()
+    stories = db.query(models.MissionStoryLog).filter(models.MissionStoryLog.user_id == user_id).all()
     mission_stories = []
     
     for story in stories:
@@ -0,0 +1,154 @@
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+
+from sqlalchemy import or_, select, update
+from sqlalchemy.orm import Session
+
+import levels
+import schemas
+from cache import cache
+from crud.nfts import NFT_CATALOG_TAG
+from models import DailyBonusClaim, NFT, StarTransaction, TransactionType, User, UserNFT
+
+# Günlük bonus kuralları
+DAILY_BONUS_BASE_XP = 50
+DAILY_BONUS_BASE_STARS = 10
+DAILY_BONUS_COOLDOWN = timedelta(days=1)
+# Son talepten bu süre sonra talep edilmezse seri sıfırlanır
+DAILY_BONUS_STREAK_WINDOW = timedelta(days=2)
+
+# Seri günü -> ödül NFT ID'si. Nadirlik seriyle birlikte artar (common -> legendary).
+# DAILY_BONUS_STREAK_NFTS="7:1,14:3,30:5,60:7,90:8" ile değiştirilebilir.
+DEFAULT_STREAK_REWARD_NFT_IDS = {7: 1, 14: 3, 30: 5, 60: 7, 90: 8}
+
+def _parse_streak_reward_ids(value: Optional[str]) -> Dict[int, int]:
+    if not value:
+        return dict(DEFAULT_STREAK_REWARD_NFT_IDS)
+    mapping = {}
+    for pair in value.split(","):
+        day, _, nft_id = pair.partition(":")
+        mapping[int(day)] = int(nft_id)
+    return mapping
+
+STREAK_REWARD_NFT_IDS = _parse_streak_reward_ids(os.getenv("DAILY_BONUS_STREAK_NFTS"))
+
+STREAK_REWARDS_CACHE_KEY = "daily_bonus:streak_rewards"
+
+def _load_streak_rewards(db: Session) -> Dict[int, schemas.NFT]:
+    """Ödül NFT'lerini tek sorguyla okuyup seri gününe göre eşler"""
+    nft_ids = set(STREAK_REWARD_NFT_IDS.values())
+    rows = db.execute(select(NFT).where(NFT.id.in_(nft_ids), NFT.is_active == True)).scalars().all()
+    by_id = {nft.id: schemas.NFT.model_validate(nft) for nft in rows}
+    return {day: by_id[nft_id] for day, nft_id in STREAK_REWARD_NFT_IDS.items() if nft_id in by_id}
+
+def get_streak_reward_nft(db: Session, streak_day: int) -> Optional[schemas.NFT]:
+    """Seri gününe ait ödül NFT'si; eşleme önbellekten okunur, NFT'ler değişince yeniden yüklenir"""
+    rewards = cache.get_or_set(
+        STREAK_REWARDS_CACHE_KEY, lambda: _load_streak_rewards(db), tags=(NFT_CATALOG_TAG,)
+    )
+    return rewards.get(streak_day)
+
+def invalidate_streak_rewards():
+    """Ödül eşlemesini bir sonraki kullanımda yeniden yükletir"""
+    cache.delete(STREAK_REWARDS_CACHE_KEY)
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    # SQLite zaman damgalarını saat dilimi olmadan (UTC) döndürür
+    if value is None or value.tzinfo:
+        return value
+    return value.replace(tzinfo=timezone.utc)
+
+def _effective_streak(user: User, now: datetime) -> int:
+    """Seri penceresi geçmişse 0, değilse kullanıcıdaki seri"""
+    last_claim = _as_utc(user.last_daily_bonus_at)
+    if last_claim is None or now > last_claim + DAILY_BONUS_STREAK_WINDOW:
+        return 0
+    return user.daily_bonus_streak or 0
+
+def calculate_daily_bonus_rewards(current_streak: int):
+    """(xp, stars) ödülü; her 5 günlük seride %20 artar"""
+    multiplier = 1 + (current_streak // 5) * 0.2
+    return int(DAILY_BONUS_BASE_XP * multiplier), int(DAILY_BONUS_BASE_STARS * multiplier)
+
+def get_daily_bonus_status(db: Session, user: User) -> schemas.DailyBonusStatus:
+    """
+    Günlük bonus durumu. Son talep zamanı ve seri kullanıcı satırında tutulduğu için
+    talep geçmişi taranmaz; ödül NFT'si önceden yüklenmiş eşlemeden okunur.
+    """
+    now = datetime.now(timezone.utc)
+    last_claim = _as_utc(user.last_daily_bonus_at)
+    next_claim_at = last_claim + DAILY_BONUS_COOLDOWN if last_claim else None
+    can_claim = next_claim_at is None or now >= next_claim_at
+    current_streak = _effective_streak(user, now)
+
+    if not can_claim:
+        return schemas.DailyBonusStatus(
+            can_claim=False,
+            current_streak=current_streak,
+            time_until_next_claim_seconds=int((next_claim_at - now).total_seconds())
+        )
+
+    xp_reward, stars_reward = calculate_daily_bonus_rewards(current_streak)
+    return schemas.DailyBonusStatus(
+        can_claim=True,
+        current_streak=current_streak,
+        today_reward_xp=xp_reward,
+        today_reward_stars=stars_reward,
+        streak_reward_nft=get_streak_reward_nft(db, current_streak + 1)
+    )
+
+def claim_daily_bonus(db: Session, user: User) -> schemas.ClaimDailyBonusResponse:
+    """
+    Günlük bonusu tek transaction içinde verir. Kullanıcı satırı koşullu UPDATE ile
+    güncellenir; aynı anda gelen iki talepten yalnızca biri başarılı olur.
+    Talep uygun değilse ValueError fırlatır.
+    """
+    now = datetime.now(timezone.utc)
+    current_streak = _effective_streak(user, now)
+    new_streak = current_streak + 1
+    xp_reward, stars_reward = calculate_daily_bonus_rewards(current_streak)
+
+    result = db.execute(
+        update(User)
+        .where(
+            User.id == user.id,
+            or_(User.last_daily_bonus_at.is_(None), User.last_daily_bonus_at <= now - DAILY_BONUS_COOLDOWN)
+        )
+        .values(
+            last_daily_bonus_at=now,
+            daily_bonus_streak=new_streak,
+            xp=User.xp + xp_reward,
+            level=levels.level_expression(User.xp + xp_reward),
+            stars=User.stars + stars_reward
+        )
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 0:
+        db.rollback()
+        raise ValueError("Günlük bonusu henüz talep edemezsiniz. Lütfen daha sonra tekrar deneyin.")
+
+    # Geçmiş kaydı denetim amaçlı tutulur; durum hesabında okunmaz
+    db.add(DailyBonusClaim(user_id=user.id, claim_date=now, day_streak=new_streak))
+    db.add(StarTransaction(
+        user_id=user.id,
+        amount=stars_reward,
+        transaction_type=TransactionType.CREDIT,
+        reason="daily_bonus",
+        description=f"{new_streak}. gün günlük bonus"
+    ))
+
+    claimed_nft = get_streak_reward_nft(db, new_streak)
+    if claimed_nft:
+        db.add(UserNFT(user_id=user.id, nft_id=claimed_nft.id, purchase_price_stars=0))
+
+    db.commit()
+    db.refresh(user)
+
+    return schemas.ClaimDailyBonusResponse(
+        message=f"Günlük bonus başarıyla alındı! {new_streak} günlük seri devam ediyor.",
+        claimed_xp=xp_reward,
+        claimed_stars=stars_reward,
+        claimed_nft=claimed_nft,
+        new_streak=new_streak
+    )
@@ -0,0 +1,21 @@
+from typing import List, Optional
+
+from sqlalchemy.orm import Session
+
+from models import DAOProposal, DAOVote, ProposalStatus
+
+# DAO router'ının kullandığı sorgular (crud paketinde hiç tanımlı değildi)
+
+def get_dao_proposals(db: Session, status: Optional[ProposalStatus] = None,
+                      skip: int = 0, limit: int = 100) -> List[DAOProposal]:
+    """Teklifleri en yeniden eskiye listeler; isteğe bağlı durum filtresi"""
+    query = db.query(DAOProposal)
+    if status is not None:
+        query = query.filter(DAOProposal.status == status)
+    return query.order_by(DAOProposal.created_at.desc(), DAOProposal.id.desc()).offset(skip).limit(limit).all()
+
+def get_dao_proposal(db: Session, proposal_id: int) -> Optional[DAOProposal]:
+    return db.get(DAOProposal, proposal_id)
+
+def get_user_vote(db: Session, user_id: int, proposal_id: int) -> Optional[DAOVote]:
+    return db.query(DAOVote).filter(DAOVote.user_id == user_id, DAOVote.proposal_id == proposal_id).first()
@@ -0,0 +1,100 @@
+import os
+from typing import Dict, List, Optional
+
+from sqlalchemy import case, func, insert, literal, select, text, union_all, update
+from sqlalchemy.orm import Session
+
+import schemas
+from models import InviteClosure, User
+
+# Her başarılı davet için davet edene verilen Stars (ödeme: invite_rewards.py)
+INVITE_REWARD_STARS = int(os.getenv("INVITE_REWARD_STARS", "25"))
+INVITE_LINK_TEMPLATE = "https://t.me/ArayisBot?start=invite_{user_id}"
+
+# Bozuk veride (döngü) özyinelemeli CTE'nin sonsuza gitmemesi için derinlik sınırı
+MAX_INVITE_DEPTH = 1000
+
+def register_invite(db: Session, user_id: int, inviter_id: int) -> None:
+    """
+    Yeni kullanıcıyı davet ağacına ekler (commit etmez). Kapanış satırları davet
+    edenin ata satırlarından tek INSERT ... SELECT ile kopyalanır; davet edenin
+    doğrudan sayacı ve tüm ataların alt ağaç boyutu tek UPDATE ile artırılır.
+    Kullanıcı satırıyla aynı işlemde çağrılmalıdır.
+    """
+    ancestors = union_all(
+        select(literal(inviter_id), literal(user_id), literal(1)),
+        select(InviteClosure.ancestor_id, literal(user_id), InviteClosure.depth + 1)
+        .where(InviteClosure.descendant_id == inviter_id),
+    )
+    db.execute(insert(InviteClosure).from_select(["ancestor_id", "descendant_id", "depth"], ancestors))
+    db.execute(
+        update(User)
+        .where(User.id.in_(select(InviteClosure.ancestor_id).where(InviteClosure.descendant_id == user_id)))
+        .values(
+            invite_subtree_size=User.invite_subtree_size + 1,
+            invited_users_count=func.coalesce(User.invited_users_count, 0) + case((User.id == inviter_id, 1), else_=0),
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+def get_invitees_at_depth(db: Session, user_id: int, depth: int = 1, limit: int = 100,
+                          offset: int = 0) -> List[User]:
+    """Kullanıcının `depth`. dereceden davetlileri (1 = doğrudan davet ettikleri)"""
+    return db.execute(
+        select(User)
+        .join(InviteClosure, InviteClosure.descendant_id == User.id)
+        .where(InviteClosure.ancestor_id == user_id, InviteClosure.depth == depth)
+        .order_by(User.id)
+        .offset(offset)
+        .limit(limit)
+    ).scalars().all()
+
+def get_invite_depth_counts(db: Session, user_id: int, max_depth: Optional[int] = None) -> Dict[int, int]:
+    """Derece başına davetli sayısı: {1: doğrudan, 2: davetlilerin davetlileri, ...}"""
+    query = (
+        select(InviteClosure.depth, func.count())
+        .where(InviteClosure.ancestor_id == user_id)
+        .group_by(InviteClosure.depth)
+        .order_by(InviteClosure.depth)
+    )
+    if max_depth is not None:
+        query = query.where(InviteClosure.depth <= max_depth)
+    return dict(db.execute(query).all())
+
+def get_invite_info(user: User) -> schemas.InviteInfoResponse:
+    """Davet linki ve sayaçlar (kullanıcı satırındaki kalıcı değerlerden, sorgusuz)"""
+    return schemas.InviteInfoResponse(
+        invite_link=INVITE_LINK_TEMPLATE.format(user_id=user.id),
+        successful_invites=user.invited_users_count or 0,
+        reward_per_invite_stars=INVITE_REWARD_STARS,
+        network_size=user.invite_subtree_size or 0,
+    )
+
+def rebuild_invite_closure(db: Session) -> int:
+    """
+    Kapanış tablosunu ve sayaçları users.inviter_id'den özyinelemeli CTE ile
+    baştan kurar (commit etmez). Geçiş (migration) ve onarım için; normal akışta
+    register_invite artımlı günceller. Eklenen kapanış satırı sayısını döndürür.
+    """
+    db.execute(text("DELETE FROM invite_closure"))
+    inserted = db.execute(text(
+        """
+        INSERT INTO invite_closure (ancestor_id, descendant_id, depth)
+        WITH RECURSIVE tree(ancestor_id, descendant_id, depth) AS (
+            SELECT inviter_id, id, 1 FROM users WHERE inviter_id IS NOT NULL
+            UNION ALL
+            SELECT tree.ancestor_id, users.id, tree.depth + 1
+            FROM tree JOIN users ON users.inviter_id = tree.descendant_id
+            WHERE tree.depth < :max_depth
+        )
+        SELECT ancestor_id, descendant_id, MIN(depth) FROM tree GROUP BY ancestor_id, descendant_id
+        """
+    ), {"max_depth": MAX_INVITE_DEPTH}).rowcount
+    db.execute(text(
+        """
+        UPDATE users SET
+            invited_users_count = (SELECT COUNT(*) FROM invite_closure c WHERE c.ancestor_id = users.id AND c.depth = 1),
+            invite_subtree_size = (SELECT COUNT(*) FROM invite_closure c WHERE c.ancestor_id = users.id)
+        """
+    ))
+    return inserted
@@ -0,0 +1,96 @@
+from typing import List, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+import schemas
+from cache import cache
+from models import StarTransaction, TransactionType, User, UserBadge, UserMission
+
+# İlk N listesi bu süre (saniye) boyunca önbellekten sunulur
+LEADERBOARD_TTL = 30
+LEADERBOARD_TAG = "leaderboard"
+
+def _score_subquery(category: str):
+    """Kategoriye göre (user_id, value) alt sorgusu; geçersiz kategoride ValueError"""
+    if category == "xp":
+        return select(User.id.label("user_id"), User.xp.label("value")).subquery()
+    if category == "stars":
+        return select(User.id.label("user_id"), User.stars.label("value")).subquery()
+    if category == "invites":
+        return select(User.id.label("user_id"), User.invited_users_count.label("value")).subquery()
+    if category == "invite_network":
+        # Kalıcı alt ağaç boyutu; sıralama için ağaç dolaşılmaz
+        return select(User.id.label("user_id"), User.invite_subtree_size.label("value")).subquery()
+    if category == "missions_completed":
+        return (
+            select(UserMission.user_id, func.count(UserMission.id).label("value"))
+            .group_by(UserMission.user_id)
+            .subquery()
+        )
+    if category == "badges":
+        return (
+            select(UserBadge.user_id, func.count(UserBadge.id).label("value"))
+            .group_by(UserBadge.user_id)
+            .subquery()
+        )
+    if category == "stars_spent":
+        return (
+            select(StarTransaction.user_id, func.sum(func.abs(StarTransaction.amount)).label("value"))
+            .where(StarTransaction.transaction_type == TransactionType.DEBIT)
+            .group_by(StarTransaction.user_id)
+            .subquery()
+        )
+    raise ValueError(f"Geçersiz liderlik kategorisi: {category}")
+
+def _load_leaderboard(db: Session, category: str, limit: int) -> List[schemas.LeaderboardEntry]:
+    scores = _score_subquery(category)
+    rows = db.execute(
+        select(scores.c.user_id, User.username, scores.c.value)
+        .join(User, User.id == scores.c.user_id)
+        .where(scores.c.value > 0)
+        .order_by(scores.c.value.desc(), scores.c.user_id)
+        .limit(limit)
+    ).all()
+    return [
+        schemas.LeaderboardEntry(rank=rank, user_id=user_id, username=username, value=int(value or 0))
+        for rank, (user_id, username, value) in enumerate(rows, start=1)
+    ]
+
+def get_leaderboard(db: Session, category: str, limit: int = 20) -> List[schemas.LeaderboardEntry]:
+    """Kategorideki ilk `limit` kullanıcı; sonuç LEADERBOARD_TTL saniye önbellekte tutulur"""
+    entries = cache.get_or_set(
+        f"leaderboard:{category}:{limit}",
+        lambda: _load_leaderboard(db, category, limit),
+        ttl=LEADERBOARD_TTL,
+        tags=(LEADERBOARD_TAG,)
+    )
+    # Çağıranlar listeye ekleme yapabildiği için önbellekteki liste kopyalanır
+    return list(entries)
+
+def get_user_leaderboard_rank(db: Session, user_id: int, category: str) -> Optional[Tuple[int, int]]:
+    """
+    Kullanıcının kategorideki (sıra, değer) ikilisi; sıra kendisinden yüksek puanlı
+    kullanıcı sayısı + 1'dir. Puanı yoksa None.
+    """
+    scores = _score_subquery(category)
+    own_value = db.execute(
+        select(scores.c.value).where(scores.c.user_id == user_id)
+    ).scalar_one_or_none()
+    if not own_value:
+        return None
+    higher = db.execute(
+        select(func.count())
+        .select_from(scores)
+        .where(scores.c.value > own_value)
+    ).scalar_one()
+    return higher + 1, int(own_value)
+
+def get_user_count(db: Session) -> int:
+    """Toplam kullanıcı sayısı"""
+    return cache.get_or_set(
+        "leaderboard:user_count",
+        lambda: db.execute(select(func.count(User.id))).scalar_one(),
+        ttl=LEADERBOARD_TTL,
+        tags=(LEADERBOARD_TAG,)
+    )
@@ -1,10 +1,122 @@
+import base64
+import json
+import os
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import DateTime, String, cast, func, literal, select, tuple_
 from sqlalchemy.orm import Session
 
-from models import NFT, UserNFT
+from cache import cache
+from models import NFT, NFTCategory, UserNFT
 from schemas import NFTCreate
 
-def get_all_nfts(db: Session):
-    return db.query(NFT).filter(NFT.is_active == True).all()
+# Katalog sıralamaları: ad -> (sıralama sütunu, azalan mı?)
+# Her sıralama (sütun, id) ikilisi üzerinde keyset sayfalama yapar. Zaman
+# sütunlarında imlece veritabanındaki ham metin yazılır ve karşılaştırmada aynen
+# kullanılır: SQLite func.now() değerini saniye hassasiyetinde saklar, datetime
+# olarak bağlanan değer ise mikrosaniyeli metne çevrilip farklı sıralanır.
+CATALOG_SORTS = {
+    "price": (NFT.price_stars, False),
+    "newest": (NFT.created_at, True),
+}
+
+# Toplam sayı sorgusu filtre başına bu süre (saniye) boyunca önbellekte tutulur
+CATALOG_COUNT_TTL = 60
+# Katalog türevi önbellek kayıtlarının ortak etiketi
+NFT_CATALOG_TAG = "nft_catalog"
+# VIP erişimi açan kullanıcıya hediye edilen NFT (ayarlanmamışsa hediye verilmez)
+VIP_NFT_ID = int(os.getenv("VIP_NFT_ID", "0")) or None
+
+def _is_temporal(column) -> bool:
+    return isinstance(column.type, DateTime)
+
+def encode_catalog_cursor(sort_value, nft_id: int) -> str:
+    """Son öğenin (sıralama değeri, id) ikilisini URL güvenli bir imlece çevirir"""
+    raw = json.dumps([sort_value, nft_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_catalog_cursor(cursor: str, sort: str) -> Tuple:
+    """İmleci çözer; bozuk imleçlerde ValueError fırlatır"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, nft_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if _is_temporal(CATALOG_SORTS[sort][0]):
+            datetime.fromisoformat(sort_value)  # yalnızca doğrulama; ham metin olarak karşılaştırılır
+        return sort_value, int(nft_id)
+    except Exception:
+        raise ValueError("Geçersiz sayfalama imleci.")
+
+def _catalog_filters(category: Optional[NFTCategory] = None, min_price: Optional[int] = None,
+                     max_price: Optional[int] = None, active_only: bool = True) -> List:
+    filters = []
+    if active_only:
+        filters.append(NFT.is_active == True)
+    if category is not None:
+        filters.append(NFT.category == category)
+    if min_price is not None:
+        filters.append(NFT.price_stars >= min_price)
+    if max_price is not None:
+        filters.append(NFT.price_stars <= max_price)
+    return filters
+
+def get_nft_catalog(db: Session, category: Optional[NFTCategory] = None, min_price: Optional[int] = None,
+                    max_price: Optional[int] = None, active_only: bool = True, sort: str = "price",
+                    cursor: Optional[str] = None, limit: int = 20) -> Tuple[List[NFT], Optional[str]]:
+    """
+    NFT kataloğunu (sıralama sütunu, id) üzerinde keyset sayfalama ile listeler.
+    OFFSET kullanılmadığı için her sayfa, katalog ne kadar derin olursa olsun,
+    indeks üzerinde aynı maliyetle okunur. (öğeler, sonraki_imleç) döndürür.
+    """
+    if sort not in CATALOG_SORTS:
+        raise ValueError(f"Geçersiz sıralama. Geçerli değerler: {list(CATALOG_SORTS)}")
+    sort_column, descending = CATALOG_SORTS[sort]
+
+    temporal = _is_temporal(sort_column)
+    cursor_column = cast(sort_column, String) if temporal else sort_column
+    query = select(NFT, cursor_column.label("cursor_value")).where(
+        *_catalog_filters(category, min_price, max_price, active_only)
+    )
+    if cursor:
+        last_value, last_id = decode_catalog_cursor(cursor, sort)
+        key = tuple_(sort_column, NFT.id)
+        bound = tuple_(literal(last_value, String) if temporal else last_value, last_id)
+        query = query.where(key < bound if descending else key > bound)
+    if descending:
+        query = query.order_by(sort_column.desc(), NFT.id.desc())
+    else:
+        query = query.order_by(sort_column.asc(), NFT.id.asc())
+
+    # Bir fazla satır okunarak sonraki sayfanın varlığı ek sorgu olmadan anlaşılır
+    rows = db.execute(query.limit(limit + 1)).all()
+    items = [row.NFT for row in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        next_cursor = encode_catalog_cursor(rows[limit - 1].cursor_value, items[-1].id)
+    return items, next_cursor
+
+def count_nfts(db: Session, category: Optional[NFTCategory] = None, min_price: Optional[int] = None,
+               max_price: Optional[int] = None, active_only: bool = True) -> int:
+    """Filtreye uyan NFT sayısı; sonuç CATALOG_COUNT_TTL saniye önbellekte tutulur"""
+    key = f"nft_count:{category.value if category else '-'}:{min_price}:{max_price}:{int(active_only)}"
+    return cache.get_or_set(
+        key,
+        lambda: db.execute(
+            select(func.count(NFT.id)).where(*_catalog_filters(category, min_price, max_price, active_only))
+        ).scalar_one(),
+        ttl=CATALOG_COUNT_TTL,
+        tags=(NFT_CATALOG_TAG,)
+    )
+
+def invalidate_catalog_counts():
+    """NFT eklenip güncellendiğinde katalogdan türeyen tüm önbellek kayıtlarını temizler"""
+    cache.invalidate_tags(NFT_CATALOG_TAG)
+
+def get_all_nfts(db: Session, category: Optional[NFTCategory] = None, skip: int = 0,
+                 limit: int = 100, active_only: bool = True):
+    """Eski offset tabanlı listeleme (yeni kod get_nft_catalog kullanmalı)"""
+    query = db.query(NFT).filter(*_catalog_filters(category=category, active_only=active_only))
+    return query.order_by(NFT.id).offset(skip).limit(limit).all()
 
 def get_nft(db: Session, nft_id: int):
     return db.query(NFT).filter(NFT.id == nft_id).first()
@@ -12,11 +124,18 @@ def get_nft(db: Session, nft_id: int):
 def get_user_nfts(db: Session, user_id: int):
     return db.query(UserNFT).filter(UserNFT.user_id == user_id).all()
 
+def get_user_nft_categories(db: Session, user_id: int) -> List[NFTCategory]:
+    """Kullanıcının sahip olduğu her NFT'nin kategorisi (aynı NFT birden çok kez sayılır)"""
+    return db.execute(
+        select(NFT.category).join(UserNFT, UserNFT.nft_id == NFT.id).where(UserNFT.user_id == user_id)
+    ).scalars().all()
+
 def create_nft(db: Session, nft: NFTCreate):
     db_nft = NFT(**nft.dict())
     db.add(db_nft)
     db.commit()
     db.refresh(db_nft)
+    invalidate_catalog_counts()
     return db_nft
 
 def update_nft(db: Session, nft_id: int, nft_data: dict):
@@ -26,6 +145,7 @@ def update_nft(db: Session, nft_id: int, nft_data: dict):
             setattr(db_nft, key, value)
         db.commit()
         db.refresh(db_nft)
+        invalidate_catalog_counts()
     return db_nft
 
 def add_nft_to_user(db: Session, user_id: int, nft_id: int, purchase_price_stars: int):
@@ -42,6 +162,21 @@ def add_nft_to_user(db: Session, user_id: int, nft_id: int, purchase_price_stars
     db.refresh(user_nft)
     return user_nft
 
+def grant_vip_nft(db: Session, user_id: int) -> Optional[UserNFT]:
+    """
+    VIP erişimi açan kullanıcıya VIP_NFT_ID hediye NFT'sini ücretsiz verir (commit etmez).
+    Hediye ayarlanmamışsa, NFT yoksa/pasifse ya da kullanıcı zaten sahipse bir şey
+    yapmaz; tekrar çalıştırmak güvenlidir.
+    """
+    if VIP_NFT_ID is None:
+        return None
+    nft = get_nft(db, VIP_NFT_ID)
+    if nft is None or not nft.is_active or user_owns_nft(db, user_id, nft.id):
+        return None
+    user_nft = UserNFT(user_id=user_id, nft_id=nft.id, purchase_price_stars=0)
+    db.add(user_nft)
+    return user_nft
+
 def user_owns_nft(db: Session, user_id: int, nft_id: int):
     return db.query(UserNFT).filter(
         UserNFT.user_id == user_id, 
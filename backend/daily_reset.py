@@ -0,0 +1,64 @@
+"""
+Günlük sıfırlama işi.
+
+Kopmuş görev serilerini (mission_streak), ardışık giriş günlerini
+(consecutive_login_days) ve günlük bonus serilerini (daily_bonus_streak) tüm
+kullanıcılar için toplu olarak sıfırlar. İstek işleyicileri bu değerleri
+yeniden hesaplamadan okur.
+
+- Her sayaç, kendi son etkinlik sütunundaki indeks üzerinden parça parça
+  (varsayılan 5000 satır) UPDATE edilir ve her parça ayrı commit edilir.
+- Sadece sıfır olmayan sayaçlara dokunulur; iş yarıda kesilse de tekrar
+  çalıştırmak güvenlidir.
+
+Gece yarısından hemen sonra (UTC) cron ile çalıştırılmalıdır:
+    5 0 * * * cd /app/backend && python daily_reset.py
+
+--notify-daily-bonus ile sıfırlamadan sonra bonusu alınabilir kullanıcılara
+Telegram bildirimi kuyruğa eklenir (gönderim: broadcast.py).
+
+Kullanım:
+    python daily_reset.py
+    python daily_reset.py --chunk-size 1000
+    python daily_reset.py --notify-daily-bonus
+"""
+import argparse
+import logging
+
+from database import SessionLocal
+import broadcast
+import crud
+
+logger = logging.getLogger("daily_reset")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Kopmuş seri ve giriş sayaçlarını sıfırlar")
+    parser.add_argument("--chunk-size", type=int, default=crud.RESET_CHUNK_SIZE,
+                        help="Her UPDATE'te en fazla kaç satırın sıfırlanacağı")
+    parser.add_argument("--notify-daily-bonus", action="store_true",
+                        help="Bonusu hazır kullanıcılara Telegram bildirimi kuyruğa ekler")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    db = SessionLocal()
+    try:
+        summary = crud.reset_lapsed_counters(db, chunk_size=args.chunk_size)
+        logger.info(
+            "Sıfırlanan satırlar: görev serisi=%d, ardışık giriş=%d, bonus serisi=%d (%.2f sn)",
+            summary["mission_streak"], summary["consecutive_login_days"],
+            summary["daily_bonus_streak"], summary["duration_seconds"]
+        )
+        if args.notify_daily_bonus:
+            item = broadcast.create_broadcast(db, "daily_bonus", broadcast.DAILY_BONUS_TEXT, "daily_bonus_ready")
+            logger.info("Günlük bonus bildirimi kuyruğa eklendi (yayın #%d)", item.id)
+    except Exception as e:
+        logger.exception(f"Günlük sıfırlama başarısız: {e}")
+        raise SystemExit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
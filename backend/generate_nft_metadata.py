@@ -1,85 +1,164 @@
+"""
+NFT metadata üretici.
+
+`nfts` tablosunu tek doğruluk kaynağı olarak kullanır ve yalnızca değişen NFT'lerin
+metadata dosyalarını yeniden yazar:
+- `updated_at` filigranı (manifest'teki `watermark`) ile sadece son üretimden sonra
+  güncellenen satırlar okunur (filigrandan WATERMARK_MARGIN önceki satırlar dahil;
+  SQLite zamanı saniye hassasiyetinde metin olarak sakladığından aynı saniyede
+  güncellenen satırlar kaçmasın diye),
+- içerik özeti (SHA-256) değişmeyen dosyalar tekrar yazılmaz,
+- dosyalar atomik olarak (geçici dosya + os.replace) yazılır,
+- büyük koleksiyonlarda üretim bir process pool üzerinde paralel çalışır.
+
+Kullanım:
+    python generate_nft_metadata.py            # artımlı üretim
+    python generate_nft_metadata.py --full     # tüm NFT'leri yeniden değerlendir
+    python generate_nft_metadata.py --workers 8
+"""
+import argparse
+import os
+from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple
+
+from sqlalchemy import or_, select
+
 from database import SessionLocal
 from models import NFT
-import json
-import os
+import nft_metadata
+
+# Bu sayının üzerindeki değişiklikler process pool ile işlenir
+PARALLEL_THRESHOLD = 500
+CHUNK_SIZE = 250
+# Filigranla aynı saniyedeki satırlar yeniden okunur; içerik özeti değişmeyenleri yazmaz
+WATERMARK_MARGIN = timedelta(seconds=1)
+
+NFT_COLUMNS = (
+    NFT.id, NFT.name, NFT.description, NFT.image_url, NFT.video_url,
+    NFT.category, NFT.price_stars, NFT.updated_at
+)
+
+
+def _render_chunk(rows: List[Dict], known_hashes: Dict[str, str], metadata_dir: str) -> List[Tuple[int, str, Dict, bool]]:
+    """
+    Bir grup NFT satırı için metadata üretir ve içeriği değişenleri diske yazar.
+    Dönen her eleman: (nft_id, hash, metadata, yazıldı_mı)
+    """
+    results = []
+    for row in rows:
+        metadata = nft_metadata.build_metadata(row)
+        digest = nft_metadata.content_hash(metadata)
+        path = nft_metadata.metadata_file_path(row["id"], metadata_dir)
+        changed = known_hashes.get(str(row["id"])) != digest or not os.path.exists(path)
+        if changed:
+            nft_metadata.write_json_atomic(path, metadata)
+        results.append((row["id"], digest, metadata, changed))
+    return results
+
+
+def _render(rows: List[Dict], known_hashes: Dict[str, str], metadata_dir: str, workers: int):
+    if len(rows) < PARALLEL_THRESHOLD or workers <= 1:
+        return _render_chunk(rows, known_hashes, metadata_dir)
+
+    chunks = [rows[i:i + CHUNK_SIZE] for i in range(0, len(rows), CHUNK_SIZE)]
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(_render_chunk, chunk, {str(r["id"]): known_hashes.get(str(r["id"])) for r in chunk}, metadata_dir)
+            for chunk in chunks
+        ]
+        for future in futures:
+            results.extend(future.result())
+    return results
+
+
+def generate(db, full: bool = False, workers: int = None,
+             metadata_dir: str = nft_metadata.METADATA_DIR,
+             catalog_path: str = nft_metadata.CATALOG_PATH,
+             manifest_path: str = nft_metadata.MANIFEST_PATH) -> Dict[str, int]:
+    """Metadata dosyalarını artımlı olarak üretir ve bir özet döndürür"""
+    workers = workers or os.cpu_count() or 1
+    manifest = nft_metadata.load_manifest(manifest_path)
+    known_hashes: Dict[str, str] = manifest.get("hashes", {})
+    # --full: filigran yok sayılır, tüm satırlar okunur; içerik özeti yine de yazımı önler
+    watermark = None if full else manifest.get("watermark")
+
+    # Silinen NFT'leri yakalamak için sadece ID listesi okunur
+    current_ids = set(db.execute(select(NFT.id)).scalars().all())
+
+    query = select(*NFT_COLUMNS)
+    if watermark:
+        watermark_dt = datetime.fromisoformat(watermark) - WATERMARK_MARGIN
+        known_ids = [int(i) for i in known_hashes]
+        query = query.where(or_(
+            NFT.updated_at >= watermark_dt,
+            NFT.updated_at.is_(None),
+            NFT.id.not_in(known_ids)
+        ))
+    rows = []
+    for row in db.execute(query).mappings():
+        row = dict(row)
+        row["updated_at"] = row["updated_at"].isoformat() if row["updated_at"] else None
+        rows.append(row)
+
+    results = _render(rows, known_hashes, metadata_dir, workers)
+    written = [r for r in results if r[3]]
+
+    previous_ids = {int(i) for i in known_hashes}
+    if watermark is None:
+        # Tam taramada manifest'te olmayan eski dosyalar da temizlenir
+        previous_ids |= nft_metadata.existing_metadata_ids(metadata_dir)
+    removed_ids = previous_ids - current_ids
+    for nft_id in removed_ids:
+        path = nft_metadata.metadata_file_path(nft_id, metadata_dir)
+        if os.path.exists(path):
+            os.remove(path)
+
+    catalog_missing = not os.path.exists(catalog_path)
+    if written or removed_ids or catalog_missing or full:
+        # Katalog dosyası: mevcut katalog + değişen kayıtlar - silinen kayıtlar
+        catalog = {} if full else {item["id"]: item for item in nft_metadata.load_catalog(catalog_path)}
+        for nft_id, _, metadata, _ in results:
+            catalog[nft_id] = metadata
+        for nft_id in removed_ids:
+            catalog.pop(nft_id, None)
+        missing_ids = current_ids - set(catalog)
+        if missing_ids:
+            # Katalog ile manifest uyumsuzsa eksik kayıtlar tam üretimle tamamlanır
+            return generate(db, full=True, workers=workers, metadata_dir=metadata_dir,
+                            catalog_path=catalog_path, manifest_path=manifest_path)
+        nft_metadata.write_json_atomic(catalog_path, [catalog[i] for i in sorted(catalog)])
+
+    for nft_id, digest, _, _ in results:
+        known_hashes[str(nft_id)] = digest
+    for nft_id in removed_ids:
+        known_hashes.pop(str(nft_id), None)
+    timestamps = [r["updated_at"] for r in rows if r["updated_at"]]
+    new_watermark = max(timestamps + ([watermark] if watermark else [])) if timestamps or watermark else None
+    nft_metadata.write_json_atomic(manifest_path, {"watermark": new_watermark, "hashes": known_hashes})
+
+    return {"scanned": len(rows), "written": len(written), "removed": len(removed_ids), "total": len(current_ids)}
+
 
 def main():
+    parser = argparse.ArgumentParser(description="NFT metadata dosyalarını veritabanından üretir")
+    parser.add_argument("--full", action="store_true", help="updated_at filigranını yok say ve tüm NFT'leri yeniden değerlendir")
+    parser.add_argument("--workers", type=int, default=None, help="Paralel üretim için process sayısı")
+    args = parser.parse_args()
+
     db = SessionLocal()
     try:
-        # NFT'leri veritabanından çek
-        nfts = db.query(NFT).all()
-        print(f"Toplam {len(nfts)} NFT bulundu.")
-
-        # Metadata dizin yapısını oluştur
-        metadata_dir = os.path.join("data", "nft_metadata")
-        os.makedirs(metadata_dir, exist_ok=True)
-
-        # Tüm NFT'leri içeren bir JSON dosyası oluştur
-        all_nfts_metadata = []
-
-        for nft in nfts:
-            # Tekil NFT metadata JSON yapısı
-            nft_metadata = {
-                "id": nft.id,
-                "name": nft.name,
-                "category": nft.category.value,
-                "level": 1,  # Başlangıç seviyesi
-                "video": nft.video_url,
-                "image": nft.image_url,
-                "description": nft.description,
-                "price": nft.price_stars,
-                "rarity": get_rarity_for_nft(nft.id),
-                "benefits": get_benefits_for_nft(nft.id)
-            }
-            
-            # Tek tek NFT metadata dosyası
-            nft_file_path = os.path.join(metadata_dir, f"nft_{nft.id}.json")
-            with open(nft_file_path, "w") as f:
-                json.dump(nft_metadata, f, indent=2, ensure_ascii=False)
-            
-            # Genel listeye ekle
-            all_nfts_metadata.append(nft_metadata)
-            print(f"NFT {nft.id} - {nft.name} için metadata oluşturuldu.")
-        
-        # Tüm NFT'leri içeren metadata dosyası
-        all_nfts_file_path = os.path.join("data", "nfts.json")
-        with open(all_nfts_file_path, "w") as f:
-            json.dump(all_nfts_metadata, f, indent=2, ensure_ascii=False)
-        
-        print(f"Tüm NFT'ler için metadata dosyası oluşturuldu: {all_nfts_file_path}")
-        
+        summary = generate(db, full=args.full, workers=args.workers)
+        print(
+            f"Toplam {summary['total']} NFT: {summary['scanned']} incelendi, "
+            f"{summary['written']} dosya yazıldı, {summary['removed']} dosya silindi."
+        )
     except Exception as e:
         print(f"Hata: {e}")
     finally:
         db.close()
 
-def get_rarity_for_nft(nft_id):
-    """NFT'nin nadirlik derecesini belirler"""
-    rarities = {
-        1: "common",      # Gözcü
-        2: "common",      # Savaşçı
-        3: "uncommon",    # Kahin
-        4: "uncommon",    # Hacker
-        5: "rare",        # Koruyucu
-        6: "rare",        # Flörtör
-        7: "epic",        # Şehir
-        8: "legendary"    # DAO Üyesi
-    }
-    return rarities.get(nft_id, "common")
-
-def get_benefits_for_nft(nft_id):
-    """NFT'nin sağladığı faydaları belirler"""
-    benefits = {
-        1: ["Görevleri görebilir ve izleyebilir", "Günlük %5 daha fazla yıldız"],
-        2: ["Zorlu görevlerin kilidini açar", "Günlük %10 daha fazla yıldız"],
-        3: ["Gelecekteki görevleri önceden görebilir", "DAO oylamalarında %5 daha fazla oy gücü"],
-        4: ["Sistem etkileşiminiz %20 daha güçlü", "Her gün ekstra XP kazanımı"],
-        5: ["Diğer kullanıcıları koruyabilir", "Özel alan görevlerine erişim"],
-        6: ["Flört yetenekleriniz %30 daha etkili", "Özel eşleşme görünürlüğü"],
-        7: ["Sanal şehirde mülk sahibi olun", "Bölgesel etkinliklerde ayrıcalıklar"],
-        8: ["DAO'da premium oy hakkı", "Özel içeriklere erişim", "Topluluğu yönetme yetkisi"]
-    }
-    return benefits.get(nft_id, ["Temel NFT faydaları"])
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
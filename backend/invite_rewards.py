@@ -0,0 +1,203 @@
+# invite_rewards.py - Davet ödüllerini arka planda toplu ödeyen iş
+#
+# Davetlinin ilk girişinde ödeme yapmak giriş yoluna yazma eklerdi; bunun yerine
+# bu iş düzenli aralıklarla ödül koşulunu sağlayan (ör. seviye 2'ye ulaşmış)
+# ve henüz ödenmemiş davetlileri bulur ve davet edenlere Stars verir:
+#
+# - Her parti tek işlemdir: çiftler invite_rewards tablosuna
+#   INSERT ... ON CONFLICT DO NOTHING RETURNING ile eklenir, yalnızca eklenen
+#   çiftler ödenir. Birden çok worker ya da tekrar çalışma aynı daveti iki kez
+#   ödeyemez.
+# - Stars ve defter kayıtları xp_buffer.apply_credits ile davet eden başına tek
+#   toplu UPDATE ve toplu INSERT olarak yazılır.
+# - Kısma: bir çalışmada en fazla INVITE_PAYOUT_MAX_BATCHES parti işlenir ve
+#   partiler arasında INVITE_PAYOUT_PAUSE saniye beklenir. Viral bir kayıt
+#   dalgasında birikim sonraki çalışmalara yayılır, API'nin DB zamanı korunur.
+#
+# Ortam değişkenleri:
+#   INVITE_REWARDS_ENABLED=1          0 ise uygulama içinde iş başlamaz
+#   INVITE_REWARD_STARS=25            davet başına Stars (crud/invites.py)
+#   INVITE_REWARD_MIN_LEVEL=2         davetlinin ulaşması gereken seviye
+#   INVITE_REWARD_MIN_MISSIONS=0      davetlinin tamamlaması gereken görev sayısı
+#   INVITE_REWARD_MIN_AGE_HOURS=0     davetli hesabının en az yaşı (saat)
+#   INVITE_PAYOUT_INTERVAL=30         çalışma aralığı (saniye)
+#   INVITE_PAYOUT_BATCH=200           tek işlemde ödenen en fazla davet
+#   INVITE_PAYOUT_MAX_BATCHES=10      tek çalışmadaki en fazla parti
+#   INVITE_PAYOUT_PAUSE=0.5           partiler arası bekleme (saniye)
+#
+# Elle çalıştırma (bekleyenlerin tamamı, aynı kısma ile):
+#   python invite_rewards.py [--max-batches N]
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Sequence, Tuple
+
+from sqlalchemy import exists, func, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+import metrics
+import xp_buffer
+from crud.invites import INVITE_REWARD_STARS
+from database import SessionLocal
+from models import InviteReward, User, UserMissionState
+
+logger = logging.getLogger(__name__)
+
+ENABLED = os.getenv("INVITE_REWARDS_ENABLED", "1") not in ("0", "false", "False")
+MIN_LEVEL = int(os.getenv("INVITE_REWARD_MIN_LEVEL", "2"))
+MIN_MISSIONS = int(os.getenv("INVITE_REWARD_MIN_MISSIONS", "0"))
+MIN_AGE_HOURS = float(os.getenv("INVITE_REWARD_MIN_AGE_HOURS", "0"))
+PAYOUT_INTERVAL = float(os.getenv("INVITE_PAYOUT_INTERVAL", "30"))
+PAYOUT_BATCH = int(os.getenv("INVITE_PAYOUT_BATCH", "200"))
+PAYOUT_MAX_BATCHES = int(os.getenv("INVITE_PAYOUT_MAX_BATCHES", "10"))
+PAYOUT_PAUSE = float(os.getenv("INVITE_PAYOUT_PAUSE", "0.5"))
+
+
+def find_qualifying(db: Session, limit: int, now: Optional[datetime] = None) -> List[Tuple[int, int]]:
+    """Ödül koşulunu sağlayan ve henüz ödenmemiş (davet eden, davetli) çiftleri"""
+    now = now or datetime.now(timezone.utc)
+    query = (
+        select(User.inviter_id, User.id)
+        .where(
+            User.inviter_id.is_not(None),
+            User.level >= MIN_LEVEL,
+            ~exists().where(InviteReward.invitee_id == User.id),
+        )
+        .order_by(User.id)
+        .limit(limit)
+    )
+    if MIN_AGE_HOURS:
+        query = query.where(User.created_at <= now - timedelta(hours=MIN_AGE_HOURS))
+    if MIN_MISSIONS:
+        completed = (
+            select(func.coalesce(func.sum(UserMissionState.completion_count), 0))
+            .where(UserMissionState.user_id == User.id)
+            .scalar_subquery()
+        )
+        query = query.where(completed >= MIN_MISSIONS)
+    return [tuple(row) for row in db.execute(query)]
+
+
+def _claim(db: Session, pairs: Sequence[Tuple[int, int]], now: datetime) -> List[Tuple[int, int]]:
+    """Çiftleri ödendi olarak kaydeder; yalnızca bu çağrıda eklenenleri döndürür"""
+    values = [
+        {"inviter_id": inviter_id, "invitee_id": invitee_id, "stars": INVITE_REWARD_STARS, "paid_at": now}
+        for inviter_id, invitee_id in pairs
+    ]
+    dialect = db.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        insert_ = sqlite.insert if dialect == "sqlite" else postgresql.insert
+        rows = db.execute(
+            insert_(InviteReward).values(values).on_conflict_do_nothing()
+            .returning(InviteReward.inviter_id, InviteReward.invitee_id)
+        ).all()
+        return [tuple(row) for row in rows]
+    # Diğer veritabanlarında çakışma işlemi geri alır; çiftler sonraki çalışmada yeniden denenir
+    db.execute(insert(InviteReward), values)
+    return list(pairs)
+
+
+def pay_batch(session_factory=None, limit: Optional[int] = None, now: Optional[datetime] = None) -> int:
+    """En fazla `limit` (varsayılan PAYOUT_BATCH) daveti tek işlemde öder; ödenen davet sayısını döndürür"""
+    session_factory = session_factory or payout_worker.session_factory
+    limit = limit or PAYOUT_BATCH
+    now = now or datetime.now(timezone.utc)
+    with session_factory() as db:
+        pairs = find_qualifying(db, limit, now)
+        if not pairs:
+            return 0
+        paid = _claim(db, pairs, now)
+        xp_buffer.apply_credits(db, [
+            (inviter_id, 0, INVITE_REWARD_STARS, "invite_reward", f"Davet ödülü (kullanıcı #{invitee_id})")
+            for inviter_id, invitee_id in paid
+        ])
+        db.commit()
+    metrics.INVITE_REWARDS_PAID.inc(len(paid))
+    return len(paid)
+
+
+def run_once(session_factory=None, max_batches: Optional[int] = PAYOUT_MAX_BATCHES,
+             pause: float = PAYOUT_PAUSE) -> int:
+    """Bekleyenleri partiler halinde, aralarda bekleyerek öder (senkron; CLI için)"""
+    total = batches = 0
+    while max_batches is None or batches < max_batches:
+        paid = pay_batch(session_factory)
+        total += paid
+        batches += 1
+        if paid < PAYOUT_BATCH:
+            break
+        time.sleep(pause)
+    return total
+
+
+class PayoutWorker:
+    """Davet ödüllerini düzenli aralıklarla ödeyen olay döngüsü işi"""
+
+    def __init__(self, interval: float = PAYOUT_INTERVAL, max_batches: int = PAYOUT_MAX_BATCHES,
+                 pause: float = PAYOUT_PAUSE):
+        self.interval = interval
+        self.max_batches = max_batches
+        self.pause = pause
+        self.session_factory = SessionLocal
+        self._stop: Optional[asyncio.Event] = None
+        self._runner: Optional[asyncio.Task] = None
+
+    async def start(self, session_factory=None) -> None:
+        if self._runner is not None:
+            return
+        if session_factory is not None:
+            self.session_factory = session_factory
+        self._stop = asyncio.Event()
+        self._runner = asyncio.create_task(self._run())
+        logger.info("Invite payout worker started", extra={"interval": self.interval})
+
+    async def _wait(self, seconds: float) -> bool:
+        """`seconds` kadar bekler; durdurulduysa True"""
+        try:
+            await asyncio.wait_for(self._stop.wait(), seconds)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def _run(self) -> None:
+        while not await self._wait(self.interval):
+            for _ in range(self.max_batches):
+                try:
+                    paid = await asyncio.to_thread(pay_batch, self.session_factory)
+                except Exception:
+                    logger.exception("Invite payout failed")
+                    break
+                if paid < PAYOUT_BATCH or await self._wait(self.pause):
+                    break
+
+    async def stop(self) -> None:
+        if self._runner is None:
+            return
+        self._stop.set()
+        await asyncio.gather(self._runner, return_exceptions=True)
+        self._runner = None
+        logger.info("Invite payout worker stopped")
+
+
+payout_worker = PayoutWorker()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Koşulu sağlayan davetler için davet edenlere Stars öder")
+    parser.add_argument("--max-batches", type=int, default=None, help="en fazla parti (varsayılan: hepsi)")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    started = time.perf_counter()
+    paid = run_once(max_batches=args.max_batches)
+    logger.info(f"{paid} davet ödülü ödendi ({time.perf_counter() - started:.2f} sn)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
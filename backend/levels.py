@@ -0,0 +1,179 @@
+# levels.py - XP -> seviye hesabının tek kaynağı
+#
+# Seviyeler eşik tablosuyla tanımlanır: LEVEL_THRESHOLDS[i], (i + 1). seviyenin
+# minimum XP'sidir. Tablonun sonundan sonra her XP_PER_LEVEL_AFTER_TABLE XP bir
+# seviye daha verir. Tek kullanıcı için arama bisect ile yapılır.
+#
+# User.level kalıcıdır ve her XP değişikliğinde bu modülle güncellenir:
+# - ORM üzerinden: apply_xp(user, amount)
+# - Toplu/koşullu UPDATE'lerde: level_expression(User.xp + amount)
+#
+# Eşikler değişirse mevcut kullanıcılar toplu olarak yeniden hesaplanır:
+#   python levels.py --recompute [--dry-run] [--chunk-size 100000]
+# XP sütunu id sırasıyla parçalar halinde okunur, seviyeler NumPy searchsorted
+# ile vektörel hesaplanır ve yalnızca değişen satırlar toplu UPDATE ile yazılır.
+# NumPy kurulu değilse aynı hesap bisect ile yapılır (daha yavaş).
+
+import argparse
+import logging
+import sys
+import time
+from bisect import bisect_right
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import bindparam, case, select
+from sqlalchemy.orm import Session
+
+try:
+    import numpy as np
+except ImportError:  # numpy opsiyonel; sadece toplu yeniden hesaplamayı hızlandırır
+    np = None
+
+from models import User
+
+logger = logging.getLogger(__name__)
+
+# Seviye 1..10'un minimum XP değerleri
+LEVEL_THRESHOLDS: Tuple[int, ...] = (0, 100, 300, 600, 1000, 1500, 2500, 4000, 6000, 9000)
+# Tablodaki son seviyeden sonra her seviye için gereken XP
+XP_PER_LEVEL_AFTER_TABLE = 5000
+
+RECOMPUTE_CHUNK_SIZE = 100_000
+
+
+def level_for_xp(xp: int) -> int:
+    """XP miktarından seviye hesaplar (en düşük seviye 1)"""
+    last = LEVEL_THRESHOLDS[-1]
+    if xp >= last:
+        return len(LEVEL_THRESHOLDS) + (xp - last) // XP_PER_LEVEL_AFTER_TABLE
+    return max(bisect_right(LEVEL_THRESHOLDS, xp), 1)
+
+
+def xp_for_level(level: int) -> int:
+    """Seviyeye ulaşmak için gereken minimum XP"""
+    if level <= 1:
+        return 0
+    if level <= len(LEVEL_THRESHOLDS):
+        return LEVEL_THRESHOLDS[level - 1]
+    return LEVEL_THRESHOLDS[-1] + (level - len(LEVEL_THRESHOLDS)) * XP_PER_LEVEL_AFTER_TABLE
+
+
+def apply_xp(user, amount: int) -> Tuple[int, int]:
+    """Kullanıcıya XP ekler ve kalıcı seviyeyi günceller. (eski, yeni) seviyeyi döndürür."""
+    old_level = level_for_xp(user.xp or 0)
+    user.xp = (user.xp or 0) + amount
+    user.level = level_for_xp(user.xp)
+    return old_level, user.level
+
+
+def set_xp(user, xp: int) -> None:
+    """XP'yi doğrudan ayarlar (admin) ve seviyeyi eşitler"""
+    user.xp = xp
+    user.level = level_for_xp(xp)
+
+
+def level_expression(xp):
+    """
+    level_for_xp'nin SQL karşılığı; UPDATE ... SET level = ... içinde kullanılır.
+    `xp` bir sütun ya da ifade olabilir (örn. User.xp + 50).
+    """
+    last = LEVEL_THRESHOLDS[-1]
+    whens = [(xp < threshold, level) for level, threshold in enumerate(LEVEL_THRESHOLDS[1:], start=1)]
+    return case(*whens, else_=len(LEVEL_THRESHOLDS) + (xp - last) // XP_PER_LEVEL_AFTER_TABLE)
+
+
+def levels_for_xp_array(xp_values: Sequence[int]) -> List[int]:
+    """XP dizisinin seviyeleri; NumPy varsa vektörel hesaplanır"""
+    if np is None:
+        return [level_for_xp(xp) for xp in xp_values]
+    return _levels_numpy(np.asarray(xp_values, dtype=np.int64)).tolist()
+
+
+def _levels_numpy(xp):
+    thresholds = np.asarray(LEVEL_THRESHOLDS, dtype=np.int64)
+    last = thresholds[-1]
+    levels = np.maximum(np.searchsorted(thresholds, xp, side="right"), 1)
+    beyond = xp >= last
+    levels[beyond] = len(thresholds) + (xp[beyond] - last) // XP_PER_LEVEL_AFTER_TABLE
+    return levels
+
+
+def _changed_in_chunk(rows) -> List[Dict[str, int]]:
+    """Bir parçadaki (id, xp, level) satırlarından seviyesi değişenler"""
+    if np is None:
+        return [{"b_id": user_id, "b_level": new}
+                for user_id, xp, level in rows
+                if (new := level_for_xp(xp or 0)) != level]
+    ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+    xp = np.fromiter((row[1] or 0 for row in rows), dtype=np.int64, count=len(rows))
+    current = np.fromiter((row[2] if row[2] is not None else 0 for row in rows), dtype=np.int64, count=len(rows))
+    levels = _levels_numpy(xp)
+    changed = np.nonzero(levels != current)[0]
+    return [{"b_id": user_id, "b_level": level}
+            for user_id, level in zip(ids[changed].tolist(), levels[changed].tolist())]
+
+
+def recompute_levels(db: Session, chunk_size: int = RECOMPUTE_CHUNK_SIZE, dry_run: bool = False) -> Dict[str, int]:
+    """
+    Tüm kullanıcıların kalıcı seviyesini eşik tablosuna göre yeniden hesaplar.
+    Kullanıcılar id sırasıyla `chunk_size`'lık parçalar halinde okunur; her parça
+    ayrı commit edilir. {"scanned": ..., "changed": ...} döndürür.
+    """
+    users = User.__table__
+    statement = (
+        users.update()
+        .where(users.c.id == bindparam("b_id"))
+        .values(level=bindparam("b_level"))
+    )
+    scanned = changed = 0
+    last_id = 0
+    while True:
+        rows = db.execute(
+            select(users.c.id, users.c.xp, users.c.level)
+            .where(users.c.id > last_id)
+            .order_by(users.c.id)
+            .limit(chunk_size)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        scanned += len(rows)
+        updates = _changed_in_chunk(rows)
+        changed += len(updates)
+        if updates and not dry_run:
+            db.connection().execute(statement, updates)
+            db.commit()
+    if dry_run:
+        db.rollback()
+    return {"scanned": scanned, "changed": changed}
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Kullanıcı seviyelerini eşik tablosuna göre yeniden hesaplar")
+    parser.add_argument("--recompute", action="store_true", help="Tüm kullanıcıların seviyesini yeniden hesapla")
+    parser.add_argument("--dry-run", action="store_true", help="Sadece kaç kullanıcının değişeceğini say")
+    parser.add_argument("--chunk-size", type=int, default=RECOMPUTE_CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    if not args.recompute:
+        for level in range(1, len(LEVEL_THRESHOLDS) + 3):
+            print(f"Seviye {level:>3}: {xp_for_level(level):>7} XP")
+        return 0
+
+    from database import SessionLocal
+
+    started = time.perf_counter()
+    with SessionLocal() as db:
+        result = recompute_levels(db, chunk_size=args.chunk_size, dry_run=args.dry_run)
+    logger.info(
+        f"{result['scanned']} kullanıcı tarandı, {result['changed']} kullanıcının seviyesi "
+        f"{'değişecek' if args.dry_run else 'güncellendi'} ({time.perf_counter() - started:.2f} sn, "
+        f"{'numpy' if np is not None else 'bisect'})"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
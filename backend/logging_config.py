@@ -0,0 +1,220 @@
+# logging_config.py - JSON formatlı, kuyruk tabanlı uygulama logları
+#
+# İstek thread'leri log kaydını yalnızca bir kuyruğa bırakır; stdout'a yazma işini
+# arka plandaki QueueListener thread'i yapar. Her satır tek bir JSON nesnesidir ve
+# isteğin korelasyon kimliğini (request_id) taşır.
+#
+# Ortam değişkenleri:
+#   LOG_LEVEL=INFO                               kök seviye
+#   LOG_LEVELS=auth=WARNING,query_profiler=INFO  modül başına seviye
+#   LOG_SAMPLING=query_profiler=0.1              WARNING altı kayıtlarda örnekleme oranı
+#   LOG_FORMAT=json|text                         geliştirmede okunabilir çıktı için text
+
+import atexit
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional, Tuple
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+import responses
+
+REQUEST_ID_HEADER = "X-Request-ID"
+
+# İstek başına üretilen (veya istemciden gelen) korelasyon kimliği
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+# Her istekte yazılan INFO logları varsayılan olarak örneklenir
+DEFAULT_SAMPLING = "query_profiler=0.1"
+
+# LogRecord'un standart alanları; bunların dışındakiler `extra` ile gelmiştir
+_RESERVED_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+
+def _parse_mapping(value: Optional[str]) -> Dict[str, str]:
+    mapping = {}
+    for pair in (value or "").split(","):
+        name, sep, setting = pair.partition("=")
+        if sep and name.strip():
+            mapping[name.strip()] = setting.strip()
+    return mapping
+
+
+class JsonFormatter(logging.Formatter):
+    """Kaydı tek satırlık JSON nesnesine çevirir; `extra` alanları olduğu gibi eklenir"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RESERVED_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        return responses.dumps(entry).decode("utf-8")
+
+
+class RequestIdFilter(logging.Filter):
+    """Kayda aktif isteğin request_id'sini ekler (kayıt kuyruğa girmeden önce)"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        request_id = request_id_var.get()
+        if request_id is not None and not hasattr(record, "request_id"):
+            record.request_id = request_id
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    WARNING altındaki yüksek frekanslı kayıtları örnekler. Oran 0.1 ise aynı
+    logger ve mesaj şablonundan her 10 kayıttan biri geçer; geçen kayda
+    `sample_every` alanı eklenir. Tek bir çağrı için `extra={"sample_rate": 0.01}`
+    verilebilir. WARNING ve üstü asla örneklenmez.
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = rates
+        self._counts: Dict[Tuple[str, str], int] = {}
+
+    def _rate_for(self, record: logging.LogRecord) -> float:
+        rate = getattr(record, "sample_rate", None)
+        if rate is not None:
+            return rate
+        name = record.name
+        while name:
+            if name in self.rates:
+                return self.rates[name]
+            name = name.rpartition(".")[0]
+        return 1.0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self._rate_for(record)
+        if rate >= 1.0:
+            return True
+        if rate <= 0:
+            return False
+        every = max(1, round(1 / rate))
+        key = (record.name, str(record.msg))
+        # Yarışta sayaç bir iki kayıt kayabilir; örnekleme için önemli değil
+        count = self._counts.get(key, 0)
+        self._counts[key] = count + 1
+        if count % every:
+            return False
+        record.sample_every = every
+        return True
+
+
+class _NonBlockingQueueHandler(QueueHandler):
+    """
+    Mesajı ve istisna metnini kuyruğa koymadan önce hazırlar; listener thread'i
+    yalnızca JSON'a çevirip yazar. Kuyruk sınırsız olduğundan put bloklamaz.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+_listener: Optional[QueueListener] = None
+_setup_lock = threading.Lock()
+
+
+def setup_logging(level: Optional[str] = None, stream=None) -> None:
+    """
+    Kök logger'a kuyruk handler'ı kurar ve yazıcı thread'i başlatır.
+    Birden fazla çağrılırsa yalnızca ilki etkilidir.
+    """
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            return
+
+        output = logging.StreamHandler(stream or sys.stdout)
+        if os.getenv("LOG_FORMAT", "json") == "text":
+            output.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s",
+                                                  defaults={"request_id": "-"}))
+        else:
+            output.setFormatter(JsonFormatter())
+
+        log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+        handler = _NonBlockingQueueHandler(log_queue)
+        handler.addFilter(RequestIdFilter())
+        sampling = {name: float(rate) for name, rate in
+                    _parse_mapping(os.getenv("LOG_SAMPLING", DEFAULT_SAMPLING)).items()}
+        if sampling:
+            handler.addFilter(SamplingFilter(sampling))
+
+        root = logging.getLogger()
+        for existing in list(root.handlers):
+            root.removeHandler(existing)
+        root.addHandler(handler)
+        root.setLevel(level or os.getenv("LOG_LEVEL", "INFO"))
+        for name, module_level in _parse_mapping(os.getenv("LOG_LEVELS")).items():
+            logging.getLogger(name).setLevel(module_level.upper())
+
+        _listener = QueueListener(log_queue, output, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown_logging)
+
+
+def shutdown_logging() -> None:
+    """Kuyrukta bekleyen kayıtları yazıp yazıcı thread'i durdurur"""
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+class RequestIdMiddleware:
+    """
+    Gelen X-Request-ID başlığını kullanır (yoksa üretir), istek boyunca loglara
+    ekler ve yanıtta geri döndürür.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        incoming = None
+        for name, value in scope.get("headers", ()):
+            if name == b"x-request-id":
+                incoming = value.decode("latin-1")[:64]
+                break
+        request_id = incoming or uuid.uuid4().hex
+        token = request_id_var.set(request_id)
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message)[REQUEST_ID_HEADER] = request_id
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_id_var.reset(token)
@@ -14,13 +14,14 @@ import logging
 from datetime import datetime, timedelta
 from typing import Optional, List, Any, Dict
 
-# Logger konfigürasyonu
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
-
 # Ortam değişkenlerini yükle
 load_dotenv()
 
+# Logger konfigürasyonu (JSON satırları, kuyruk üzerinden arka plan thread'inde yazılır)
+from logging_config import RequestIdMiddleware, setup_logging
+setup_logging()
+logger = logging.getLogger(__name__)
+
 # Local importlar
 import models, schemas, crud
 from database import SessionLocal, engine, get_db
@@ -31,21 +32,46 @@ import routers.dao as dao
 import routers.admin as admin
 import routers.vip as vip
 import routers.leaderboard as leaderboard
+import routers.bootstrap as bootstrap
+import routers.search as search_router
 import auth
+import nft_metadata
+import catalog
+from compression import CompressionMiddleware
+from query_profiler import QueryCounterMiddleware
+from ratelimit import RateLimitMiddleware
+import metrics
+import tasks
+import xp_buffer
+import invite_rewards
+import broadcast
+from responses import FastJSONResponse
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Uygulama başlarken veritabanı tablolarını oluştur (Alembic yoksa)
     # Dikkat: Bu yöntem basit geliştirmeler için uygundur, production'da Alembic kullanılmalı.
     try:
-        print("Veritabanı tabloları oluşturuluyor (Alembic yoksa)...")
+        logger.info("Veritabanı tabloları oluşturuluyor (Alembic yoksa)...")
         models.Base.metadata.create_all(bind=engine)
-        print("Veritabanı tabloları başarıyla kontrol edildi/oluşturuldu.")
+        logger.info("Veritabanı tabloları başarıyla kontrol edildi/oluşturuldu.")
     except Exception as e:
-        print(f"Veritabanı oluşturulurken HATA: {e}")
+        logger.exception(f"Veritabanı oluşturulurken HATA: {e}")
+    if tasks.ENABLED:
+        await tasks.queue.start()
+    if xp_buffer.ENABLED:
+        await xp_buffer.flusher.start()
+    if invite_rewards.ENABLED:
+        await invite_rewards.payout_worker.start()
+    if broadcast.ENABLED and broadcast.BOT_TOKEN:
+        await broadcast.broadcast_worker.start()
     yield
     # Uygulama kapanırken yapılacaklar (varsa)
-    print("Uygulama kapanıyor.")
+    await broadcast.broadcast_worker.stop()
+    await invite_rewards.payout_worker.stop()
+    await xp_buffer.flusher.stop()
+    await tasks.queue.stop()
+    logger.info("Uygulama kapanıyor.")
 
 app = FastAPI(
     title="Arayış Evreni API",
@@ -74,6 +100,9 @@ origins = [
     "*",  # Geliştirme için tüm originlere izin ver. Production'da kaldırılmalı!
 ]
 
+# Kötüye kullanıma açık endpoint'lerde istek sınırı (CORS'un içinde; 429 yanıtları da CORS başlığı alır)
+app.add_middleware(RateLimitMiddleware)
+
 # Geliştirme aşamasında tüm domainlerden istek kabul et
 app.add_middleware(
     CORSMiddleware,
@@ -83,32 +112,47 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 1 KB üzerindeki yanıtları istemcinin desteklediği kodlamayla (br/gzip) sıkıştır
+app.add_middleware(CompressionMiddleware, minimum_size=1000)
+
+# İstek başına sorgu sayısı, DB süresi ve N+1 uyarısı; Server-Timing başlığı production'da kapalı
+app.add_middleware(QueryCounterMiddleware, server_timing=os.getenv("ENVIRONMENT") != "production")
+
+# Route başına gecikme histogramı ve eşzamanlı istek sayısı (/metrics)
+app.add_middleware(metrics.MetricsMiddleware)
+
+# En dışta: her isteğe korelasyon kimliği (X-Request-ID) atar, tüm log satırlarına ekler
+app.add_middleware(RequestIdMiddleware)
+
 # Router'ları ekle
 app.include_router(users.router, prefix="/users", tags=["users"])
 app.include_router(missions.router, prefix="/missions", tags=["missions"])
 app.include_router(nfts.router, prefix="/nfts", tags=["nfts"])
+app.include_router(nfts.metadata_router, prefix="/nft", tags=["NFT Metadata"])  # Eski /nft metadata yolları
 app.include_router(vip.router, prefix="/vip", tags=["vip"])
 app.include_router(dao.router, prefix="/dao", tags=["dao"])
 app.include_router(leaderboard.router, prefix="/leaderboard", tags=["leaderboard"])
 app.include_router(admin.router, prefix="/admin", tags=["admin"])
+app.include_router(bootstrap.router, tags=["bootstrap"])
+app.include_router(search_router.router, tags=["search"])
 
 # Frontend ile uyumlu olmak için doğrudan endpoint'ler
-@app.get("/profile/{uid}", tags=["Users"])
+@app.get("/profile/{uid}", response_model=schemas.UserProfileDetail, tags=["Users"])
 async def get_profile(uid: str, db: Session = Depends(get_db)):
     """
     Kullanıcı profil bilgisini uid (telegram_id veya username) ile getirir.
     """
     return await users.get_user_profile(uid, db)
 
-@app.get("/wallet/{uid}", tags=["Users"])
+@app.get("/wallet/{uid}", response_model=schemas.UserWallet, tags=["Users"])
 async def get_wallet(uid: str, db: Session = Depends(get_db)):
     """Frontend ile uyumlu olmak için cüzdan endpoint'i"""
     try:
         return await users.get_user_wallet(uid, db)
     except:
-        return {"error": "Cüzdan bilgisi bulunamadı", "uid": uid}
+        return FastJSONResponse({"error": "Cüzdan bilgisi bulunamadı", "uid": uid})
 
-@app.get("/missions/{uid}", tags=["Missions"])
+@app.get("/missions/{uid}", response_model=List[Dict[str, Any]], tags=["Missions"])
 async def get_missions(uid: str, db: Session = Depends(get_db)):
     """
     Demo kullanıcısı için görev listesini döndürür.
@@ -243,6 +287,12 @@ async def root():
 async def health_check():
     return {"status": "healthy", "version": "1.0.0"}
 
+# Prometheus metrikleri; kuyruk göstergeleri veritabanı okuduğundan (senkron)
+# işleyici olay döngüsünde değil thread pool'da çalışır
+@app.get("/metrics", include_in_schema=False)
+def get_metrics():
+    return Response(content=metrics.render(), media_type=metrics.CONTENT_TYPE)
+
 # Endpoint for badges data
 @app.get("/api/badges", response_model=List[schemas.Badge])
 async def get_badges():
@@ -250,28 +300,15 @@ async def get_badges():
     Rozet verilerini döndüren endpoint
     """
     try:
-        badge_data_path = "backend/data/badges_data.json"
-        
-        # Dosya var mı kontrol et
-        if not os.path.exists(badge_data_path):
-            # Dosya yoksa alternatifleri kontrol et
-            for alt_path in ["data/badges_data.json", "./data/badges_data.json", "../data/badges_data.json"]:
-                if os.path.exists(alt_path):
-                    badge_data_path = alt_path
-                    break
-            else:
-                # Hiçbir dosya yoksa hata döndür
-                raise HTTPException(
-                    status_code=404,
-                    detail=f"Rozet verileri bulunamadı. Aranan dosya: {badge_data_path}"
-                )
-        
-        # Rozet verilerini oku
-        with open(badge_data_path, "r", encoding="utf-8") as f:
-            badge_data = json.load(f)
-            
-        return badge_data
-        
+        badges = catalog.get_badges()
+        if not badges and not os.path.exists(catalog.BADGES_PATH):
+            raise FileNotFoundError(catalog.BADGES_PATH)
+        return badges
+    except FileNotFoundError:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Rozet verileri bulunamadı. Aranan dosya: {catalog.BADGES_PATH}"
+        )
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -282,36 +319,18 @@ async def get_badges():
 @app.get("/api/nft-metadata")
 async def get_all_nft_metadata():
     """Tüm NFT'lerin metadata bilgilerini döndürür"""
-    try:
-        metadata_path = os.path.join("data", "nfts.json")
-        with open(metadata_path, "r") as f:
-            metadata = json.load(f)
-        return metadata
-    except Exception as e:
-        return JSONResponse(
-            status_code=500,
-            content={"message": f"Metadata yüklenirken hata oluştu: {str(e)}"}
-        )
+    return Response(content=nft_metadata.store.serialized_all(), media_type="application/json")
 
 @app.get("/api/nft-metadata/{nft_id}")
 async def get_nft_metadata(nft_id: int):
     """Belirli bir NFT'nin metadata bilgilerini döndürür"""
-    try:
-        metadata_path = os.path.join("data", "nft_metadata", f"nft_{nft_id}.json")
-        if not os.path.exists(metadata_path):
-            return JSONResponse(
-                status_code=404,
-                content={"message": f"NFT ID {nft_id} için metadata bulunamadı"}
-            )
-            
-        with open(metadata_path, "r") as f:
-            metadata = json.load(f)
-        return metadata
-    except Exception as e:
+    metadata = nft_metadata.store.get(nft_id)
+    if metadata is None:
         return JSONResponse(
-            status_code=500,
-            content={"message": f"Metadata yüklenirken hata oluştu: {str(e)}"}
+            status_code=404,
+            content={"message": f"NFT ID {nft_id} için metadata bulunamadı"}
         )
+    return FastJSONResponse(metadata)
 
 # Leaderboard API endpoint - frontend ile uyumlu
 @app.get("/api/leaderboard", tags=["Leaderboard"])
@@ -343,11 +362,11 @@ async def api_get_leaderboard(
             "prize_pool": "5000 TON"
         }
         
-        return {
+        return FastJSONResponse({
             "category": category,
             "entries": entries,
             "stats": stats
-        }
+        })
     except Exception as e:
         logger.error(f"Leaderboard error: {str(e)}")
         # Hata durumunda örnek veri döndür
@@ -366,7 +385,7 @@ if __name__ == "__main__":
     PORT = int(os.getenv("PORT", 8000))
     HOST = os.getenv("HOST", "0.0.0.0")
     
-    print(f"Uygulama {HOST}:{PORT} adresinde başlatılıyor...")
+    logger.info(f"Uygulama {HOST}:{PORT} adresinde başlatılıyor...")
     uvicorn.run("main:app", host=HOST, port=PORT, reload=True)
 
 logger.info("🚀 Backend API ready")
@@ -0,0 +1,393 @@
+# metrics.py - Prometheus metin formatında uygulama metrikleri
+#
+# Toplayıcılar sıcak yolda kilit almaz: her thread kendi sayaç parçasına (shard)
+# yazar, parçalar yalnızca /metrics okunurken toplanır. Event loop'ta çalışan
+# async endpoint'ler tek parçaya, threadpool'daki senkron kod kendi parçasına yazar.
+#
+# - MetricsMiddleware: route başına gecikme histogramı ve eşzamanlı istek sayısı
+# - instrument_sessions(): commit edilen görev tamamlama ve Stars işlemlerini sayar
+# - render(): /metrics yanıt gövdesi
+#
+# Kapatmak için METRICS_ENABLED=0.
+
+import abc
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+ENABLED = os.getenv("METRICS_ENABLED", "1") not in ("0", "false", "False")
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Gecikme histogramı kova sınırları (saniye)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _Shards:
+    """Thread başına bir sözlük; okuma sırasında tüm parçalar birleştirilir"""
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._all: List[dict] = []
+
+    def local(self) -> dict:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._lock:
+                self._all.append(shard)
+        return shard
+
+    def shards(self) -> List[dict]:
+        with self._lock:
+            return list(self._all)
+
+
+class Metric(abc.ABC):
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._shards = _Shards()
+
+    def _format_labels(self, values: Tuple, extra: Optional[Tuple[str, str]] = None) -> str:
+        pairs = list(zip(self.labelnames, values))
+        if extra:
+            pairs.append(extra)
+        if not pairs:
+            return ""
+        escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+        return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+    @abc.abstractmethod
+    def samples(self) -> Iterable[str]:
+        """Metriğin Prometheus metin biçimindeki örnek satırları"""
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, amount: float = 1, labels: Tuple = ()) -> None:
+        shard = self._shards.local()
+        shard[labels] = shard.get(labels, 0) + amount
+
+    def values(self) -> Dict[Tuple, float]:
+        totals: Dict[Tuple, float] = {}
+        for shard in self._shards.shards():
+            for labels, value in list(shard.items()):
+                totals[labels] = totals.get(labels, 0) + value
+        return totals
+
+    def samples(self) -> Iterable[str]:
+        for labels, value in sorted(self.values().items()):
+            yield f"{self.name}{self._format_labels(labels)} {value}"
+
+
+class Gauge(Counter):
+    """Artırılıp azaltılan değer; parçaların toplamı güncel değerdir"""
+    type = "gauge"
+
+    def dec(self, amount: float = 1, labels: Tuple = ()) -> None:
+        self.inc(-amount, labels)
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, labels: Tuple = ()) -> None:
+        shard = self._shards.local()
+        state = shard.get(labels)
+        if state is None:
+            # [kova sayıları..., +Inf sayısı, toplam]
+            state = shard[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        state[bisect_left(self.buckets, value)] += 1
+        state[-1] += value
+
+    def samples(self) -> Iterable[str]:
+        merged: Dict[Tuple, list] = {}
+        for shard in self._shards.shards():
+            for labels, state in list(shard.items()):
+                total = merged.setdefault(labels, [0] * len(state))
+                for i, value in enumerate(state):
+                    total[i] += value
+        for labels, state in sorted(merged.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), state[:-1]):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                yield f"{self.name}_bucket{self._format_labels(labels, ('le', le))} {cumulative}"
+            yield f"{self.name}_count{self._format_labels(labels)} {cumulative}"
+            yield f"{self.name}_sum{self._format_labels(labels)} {state[-1]}"
+
+
+class CallbackMetric(Metric):
+    """Değeri /metrics okunurken fonksiyondan alınan metrik (havuz, önbellek vb.)"""
+
+    def __init__(self, name: str, documentation: str, callback: Callable[[], Dict[Tuple, float]],
+                 labelnames: Sequence[str] = (), type: str = "gauge"):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+        self.type = type
+
+    def samples(self) -> Iterable[str]:
+        for labels, value in sorted(self.callback().items()):
+            yield f"{self.name}{self._format_labels(labels)} {value}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        parts = []
+        for metric in self._metrics:
+            try:
+                parts.append(metric.render())
+            except Exception:
+                # Tek bir callback hatası tüm çıktıyı bozmasın
+                continue
+        return "\n".join(parts) + "\n"
+
+
+registry = Registry()
+
+HTTP_REQUEST_DURATION = registry.register(Histogram(
+    "http_request_duration_seconds", "İstek süresi (route şablonuna göre)", ("method", "route", "status")
+))
+HTTP_REQUESTS_IN_FLIGHT = registry.register(Gauge(
+    "http_requests_in_flight", "Şu anda işlenmekte olan istek sayısı"
+))
+AUTH_LOGINS = registry.register(Counter(
+    "auth_logins_total", "Başarılı girişler (yeni/mevcut kullanıcı)", ("user",)
+))
+AUTH_INIT_DATA_VALIDATIONS = registry.register(Counter(
+    "auth_init_data_validations_total", "Telegram initData doğrulamaları (sonuca göre)", ("result",)
+))
+AUTH_TOKEN_VALIDATIONS = registry.register(Counter(
+    "auth_token_validations_total", "JWT doğrulamaları (sonuca göre)", ("result",)
+))
+MISSIONS_COMPLETED = registry.register(Counter(
+    "missions_completed_total", "Commit edilen görev tamamlama sayısı"
+))
+STARS = registry.register(Counter(
+    "stars_total", "Commit edilen Stars işlemlerinin toplam miktarı (credit/debit)", ("type",)
+))
+TASKS_ENQUEUED = registry.register(Counter(
+    "tasks_enqueued_total", "Commit edilen arka plan görevleri", ("task",)
+))
+TASKS_PROCESSED = registry.register(Counter(
+    "tasks_processed_total", "Çalıştırılan arka plan görevleri (ok/retry/failed)", ("task", "result")
+))
+TASK_LAG = registry.register(Histogram(
+    "task_lag_seconds", "Görevin kuyruğa girmesinden ilk çalışmasına kadar geçen süre", ("task",),
+    buckets=(0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0, 60.0, 300.0, 900.0)
+))
+TASK_DURATION = registry.register(Histogram(
+    "task_duration_seconds", "Görev çalışma süresi", ("task",)
+))
+CREDITS_FLUSHED = registry.register(Counter(
+    "credits_flushed_total", "Kullanıcılara toplu uygulanan bekleyen XP/Stars kazanımları"
+))
+CREDIT_FLUSH_DURATION = registry.register(Histogram(
+    "credit_flush_duration_seconds", "Bekleyen kazanımları uygulayan tek flush işleminin süresi"
+))
+RATE_LIMITED = registry.register(Counter(
+    "rate_limited_total", "İstek sınırı aşıldığı için 429 ile reddedilen istekler", ("route",)
+))
+INVITE_REWARDS_PAID = registry.register(Counter(
+    "invite_rewards_paid_total", "Davet edenlere ödenen davet ödülleri (davetli başına)"
+))
+ANTICHEAT_FLAGS = registry.register(Counter(
+    "anticheat_flags_total", "Hız kurallarına göre işaretlenen görev/Stars olayları (kurala göre)", ("reason",)
+))
+BROADCAST_MESSAGES = registry.register(Counter(
+    "broadcast_messages_total", "Toplu bildirimlerde gönderilen/başarısız Telegram mesajları", ("result",)
+))
+
+
+def _pool_stats() -> Dict[Tuple, float]:
+    from database import engine
+    pool = engine.pool
+    stats = {}
+    for state, method in (("checked_out", "checkedout"), ("idle", "checkedin"),
+                          ("size", "size"), ("overflow", "overflow")):
+        if hasattr(pool, method):
+            stats[(state,)] = getattr(pool, method)()
+    return stats
+
+
+def _cache_requests() -> Dict[Tuple, float]:
+    from cache import cache
+    snapshot = cache.stats.snapshot()
+    return {("hit",): snapshot["hits"], ("miss",): snapshot["misses"]}
+
+
+def _cache_hit_ratio() -> Dict[Tuple, float]:
+    from cache import cache
+    return {(): cache.stats.snapshot()["hit_ratio"]}
+
+
+def _cache_latency() -> Dict[Tuple, float]:
+    from cache import cache
+    snapshot = cache.stats.snapshot()
+    return {(op,): snapshot[f"avg_{op}_ms"] for op in ("get", "set", "load")}
+
+
+registry.register(CallbackMetric(
+    "db_pool_connections", "Veritabanı bağlantı havuzu durumu", _pool_stats, ("state",)
+))
+registry.register(CallbackMetric(
+    "cache_requests_total", "Önbellek okumaları (isabet/ıska)", _cache_requests, ("result",), type="counter"
+))
+registry.register(CallbackMetric("cache_hit_ratio", "Önbellek isabet oranı", _cache_hit_ratio))
+registry.register(CallbackMetric(
+    "cache_latency_ms", "Ortalama önbellek işlem süresi (ms)", _cache_latency, ("operation",)
+))
+
+
+def _task_queue_depth() -> Dict[Tuple, float]:
+    import tasks
+    return {(status,): count for status, count in tasks.queue_depth().items()}
+
+
+def _task_queue_lag() -> Dict[Tuple, float]:
+    import tasks
+    return {(): tasks.oldest_pending_age()}
+
+
+def _task_queue_in_flight() -> Dict[Tuple, float]:
+    import tasks
+    return {(): tasks.queue.in_flight}
+
+
+registry.register(CallbackMetric(
+    "task_queue_depth", "Outbox'taki görev sayısı (duruma göre)", _task_queue_depth, ("status",)
+))
+registry.register(CallbackMetric(
+    "task_queue_lag_seconds", "Vadesi gelmiş en eski bekleyen görevin bekleme süresi", _task_queue_lag
+))
+registry.register(CallbackMetric(
+    "task_queue_in_flight", "Bu süreçte çalışmakta olan görev sayısı", _task_queue_in_flight
+))
+
+
+def _pending_credits() -> Dict[Tuple, float]:
+    import xp_buffer
+    # Katman kapalıyken her scrape'te sorgu atılmaz
+    return {(): xp_buffer.pending_count()} if xp_buffer.ENABLED else {}
+
+
+registry.register(CallbackMetric(
+    "pending_credits", "Henüz kullanıcıya uygulanmamış XP/Stars kazanımları", _pending_credits
+))
+
+
+def render() -> str:
+    return registry.render()
+
+
+def route_label(scope: Scope) -> str:
+    """
+    Eşleşen route'un şablon yolu (örn. /users/profile/{uid}). Router'a dahil edilen
+    route'lar öneksiz tutulduğu için önek istek yolundan tamamlanır. Eşleşmeyen
+    yollar tek etikette toplanır; böylece etiket sayısı sınırsız büyümez.
+    """
+    route = scope.get("route")
+    template = getattr(route, "path", None)
+    if not template:
+        return "<unmatched>"
+    path = scope.get("path", "")
+    if path == template or ":path}" in template:
+        return template
+    prefix_depth = path.rstrip("/").count("/") - template.rstrip("/").count("/")
+    if prefix_depth <= 0:
+        return template
+    prefix = "/".join(path.split("/")[:prefix_depth + 1])
+    return prefix + template if template != "/" else prefix + "/"
+
+
+class MetricsMiddleware:
+    """Route şablonu başına istek süresi ve eşzamanlı istek sayısı"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            HTTP_REQUEST_DURATION.observe(
+                time.perf_counter() - started, (scope["method"], route_label(scope), str(status_code))
+            )
+
+
+_PENDING_KEY = "metrics_pending"
+
+
+def instrument_sessions() -> None:
+    """
+    Görev tamamlama ve Stars işlemlerini commit anında sayar. Flush'ta eklenen
+    satırlar oturumda bekletilir; rollback olursa sayılmaz.
+    """
+    import models
+
+    @event.listens_for(Session, "after_flush")
+    def _collect(session, flush_context):
+        if not ENABLED:
+            return
+        for obj in session.new:
+            if isinstance(obj, models.UserMission):
+                session.info.setdefault(_PENDING_KEY, []).append((MISSIONS_COMPLETED, 1, ()))
+            elif isinstance(obj, models.StarTransaction):
+                kind = getattr(obj.transaction_type, "value", obj.transaction_type)
+                session.info.setdefault(_PENDING_KEY, []).append((STARS, abs(obj.amount or 0), (kind,)))
+
+    @event.listens_for(Session, "after_commit")
+    def _publish(session):
+        for metric, amount, labels in session.info.pop(_PENDING_KEY, ()):
+            metric.inc(amount, labels)
+
+    @event.listens_for(Session, "after_rollback")
+    def _discard(session):
+        session.info.pop(_PENDING_KEY, None)
+
+
+instrument_sessions()
@@ -1,5 +1,5 @@
 from sqlalchemy import (
-    Boolean, Column, ForeignKey, Integer, String, DateTime, Enum as SQLEnum, Float
+    Boolean, Column, ForeignKey, Integer, String, DateTime, Enum as SQLEnum, Float, Index
 )
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -27,11 +27,18 @@ class User(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     # Yeni Alanlar (Login, Streak, Invite)
-    last_login_date = Column(DateTime(timezone=True), nullable=True)
+    last_login_date = Column(DateTime(timezone=True), nullable=True, index=True)
     consecutive_login_days = Column(Integer, default=0)
     mission_streak = Column(Integer, default=0)
-    inviter_id = Column(Integer, ForeignKey("users.id"), nullable=True)
-    invited_users_count = Column(Integer, default=0)
+    last_mission_at = Column(DateTime(timezone=True), nullable=True, index=True) # Görev serisinin son etkinliği
+    inviter_id = Column(Integer, ForeignKey("users.id"), nullable=True, index=True)
+    invited_users_count = Column(Integer, default=0, index=True)
+    # Tüm davet alt ağacındaki kullanıcı sayısı (invite_closure ile artımlı güncellenir)
+    invite_subtree_size = Column(Integer, default=0, nullable=False, server_default="0", index=True)
+
+    # Günlük bonus durumu (daily_bonus_claims taranmadan okunur, talep anında güncellenir)
+    last_daily_bonus_at = Column(DateTime(timezone=True), nullable=True, index=True)
+    daily_bonus_streak = Column(Integer, default=0, nullable=False, server_default="0")
 
     completed_missions = relationship("UserMission", back_populates="user")
     mission_logs = relationship("UserMissionLog", back_populates="user")
@@ -80,6 +87,43 @@ class UserMission(Base):
     user = relationship("User", back_populates="completed_missions")
     mission = relationship("Mission", back_populates="completions")
 
+# Kullanıcı-görev başına özet durum: son tamamlama ve tamamlama sayısı. Görev
+# tamamlanırken güncellenir; cooldown ve "daha önce/bugün tamamlandı mı"
+# kontrolleri user_missions geçmişini taramadan birincil anahtardan okunur.
+class UserMissionState(Base):
+    __tablename__ = "user_mission_state"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    mission_id = Column(Integer, ForeignKey("missions.id"), primary_key=True)
+    last_completed_at = Column(DateTime(timezone=True), nullable=False)
+    completion_count = Column(Integer, nullable=False, default=1)
+
+# Davet ağacının kapanış tablosu: her kullanıcı için tüm ataları ve uzaklıkları
+# (depth=1 doğrudan davet eden). Kayıtta davet edenin ata satırlarından tek
+# INSERT ... SELECT ile eklenir; "k. derecedeki davetliler" ve alt ağaç boyutu
+# ağaç dolaşılmadan indeksli sorgularla okunur.
+class InviteClosure(Base):
+    __tablename__ = "invite_closure"
+
+    ancestor_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    descendant_id = Column(Integer, ForeignKey("users.id"), primary_key=True, index=True)
+    depth = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        Index("ix_invite_closure_ancestor_depth", "ancestor_id", "depth"),
+    )
+
+# Ödenen davet ödülleri; (davet eden, davetli) çifti başına tek satır. Ödeme
+# işi satırı INSERT ... ON CONFLICT DO NOTHING ile ekler ve yalnızca eklenen
+# çiftlere Stars verir, bu yüzden her davet en fazla bir kez ödenir.
+class InviteReward(Base):
+    __tablename__ = "invite_rewards"
+
+    inviter_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    invitee_id = Column(Integer, ForeignKey("users.id"), primary_key=True, index=True)
+    stars = Column(Integer, nullable=False)
+    paid_at = Column(DateTime(timezone=True), nullable=False)
+
 class Badge(Base):
     __tablename__ = "badges"
 
@@ -134,9 +178,17 @@ class NFT(Base):
     mintable = Column(Boolean, default=False) # TON Wallet ile mint edilebilir mi? (ileride)
     is_active = Column(Boolean, default=True) # Satışta mı?
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now()) # Metadata üretimi için değişiklik izi
 
     owners = relationship("UserNFT", back_populates="nft")
 
+    # Katalog keyset sayfalaması için (filtre, sıralama sütunu, id) indeksleri
+    __table_args__ = (
+        Index("ix_nfts_catalog_price", "is_active", "price_stars", "id"),
+        Index("ix_nfts_catalog_newest", "is_active", "created_at", "id"),
+        Index("ix_nfts_catalog_category_price", "category", "price_stars", "id"),
+    )
+
 class UserNFT(Base):
     __tablename__ = "user_nfts"
 
@@ -165,6 +217,8 @@ class DAOProposal(Base):
     status = Column(SQLEnum(ProposalStatus), default=ProposalStatus.ACTIVE)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     end_date = Column(DateTime(timezone=True), nullable=False) # Oylama bitiş tarihi
+    total_yes_power = Column(Integer, default=0, server_default="0") # Oy verilirken artırılır
+    total_no_power = Column(Integer, default=0, server_default="0")
 
     votes = relationship("DAOVote", back_populates="proposal")
     creator = relationship("User")
@@ -232,4 +286,68 @@ class StarTransaction(Base):
     description = Column(String, nullable=True)  # İlave açıklama
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
-    user = relationship("User", backref="star_transactions")
\ No newline at end of file
+    user = relationship("User", backref="star_transactions")
+class TaskStatus(str, enum.Enum):
+    PENDING = "pending"    # Çalışmayı bekliyor (ilk deneme veya yeniden deneme)
+    RUNNING = "running"    # Bir worker tarafından alındı; kira süresi dolarsa yeniden alınabilir
+    FAILED = "failed"      # Deneme hakkı bitti, elle incelenmeli
+
+# Arka plan görev kuyruğunun kalıcı outbox'ı (bkz. tasks.py)
+class OutboxTask(Base):
+    __tablename__ = "task_outbox"
+
+    id = Column(Integer, primary_key=True, index=True)
+    task = Column(String, nullable=False)  # Kayıtlı görev adı (örn: award_mission_badges)
+    payload = Column(String, nullable=False, default="{}")  # JSON argümanlar
+    status = Column(SQLEnum(TaskStatus), nullable=False, default=TaskStatus.PENDING)
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=5)
+    # Bekleyen görev için en erken çalışma zamanı, çalışan görev için kiranın bitişi
+    available_at = Column(DateTime(timezone=True), nullable=False)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    last_error = Column(String, nullable=True)
+
+    __table_args__ = (
+        Index("ix_task_outbox_status_available_at", "status", "available_at"),
+    )
+
+# XP/Stars birleştirme katmanının kalıcı günlüğü (bkz. xp_buffer.py). Satırlar
+# kullanıcıya uygulanınca aynı işlemde silinir.
+class PendingCredit(Base):
+    __tablename__ = "pending_credits"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    xp = Column(Integer, nullable=False, default=0)
+    stars = Column(Integer, nullable=False, default=0)
+    reason = Column(String, nullable=False)  # Stars defter kaydına yazılacak neden (örn: mission_completion)
+    description = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+
+class BroadcastStatus(str, enum.Enum):
+    PENDING = "pending"      # Gönderimi bekliyor
+    RUNNING = "running"      # Bir worker gönderiyor; kira süresi dolarsa kaldığı yerden devralınır
+    DONE = "done"
+    CANCELLED = "cancelled"
+
+# Toplu Telegram bildirimleri (bkz. broadcast.py). Alıcılar users.id sırasıyla
+# parça parça gönderilir; cursor_user_id gönderimi tamamlanan son kullanıcıdır
+# ve yeniden başlatmada gönderim buradan devam eder.
+class Broadcast(Base):
+    __tablename__ = "broadcasts"
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String, nullable=False)      # proposal_opened, daily_bonus, nft_drop, custom
+    audience = Column(String, nullable=False)  # all, vip, active, daily_bonus_ready
+    text = Column(String, nullable=False)
+    status = Column(SQLEnum(BroadcastStatus), nullable=False, default=BroadcastStatus.PENDING)
+    cursor_user_id = Column(Integer, nullable=False, default=0)
+    sent_count = Column(Integer, nullable=False, default=0)
+    failed_count = Column(Integer, nullable=False, default=0)
+    lease_until = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index("ix_broadcasts_status_id", "status", "id"),
+    )
@@ -0,0 +1,301 @@
+# nft_metadata.py - NFT metadata üretimi ve indekslenmiş metadata deposu
+#
+# Tek doğruluk kaynağı `nfts` tablosudur. `generate_nft_metadata.py` bu tablodan
+# metadata dosyalarını (data/nft_metadata/nft_<id>.json ve data/nfts.json) üretir,
+# API ise aynı kataloğu bellekteki indekslenmiş depodan (NFTMetadataStore) sunar.
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+METADATA_DIR = os.path.join(DATA_DIR, "nft_metadata")
+CATALOG_PATH = os.path.join(DATA_DIR, "nfts.json")
+MANIFEST_PATH = os.path.join(METADATA_DIR, "manifest.json")
+
+# Göreli asset yolları (/assets/nft/...) bu adrese göre mutlak URL'ye çevrilir
+NFT_ASSET_BASE_URL = os.getenv("NFT_ASSET_BASE_URL", "https://arayis-evreni.siyahkare.com")
+
+# NFT ID'sine göre nadirlik dereceleri
+RARITIES = {
+    1: "common",      # Gözcü
+    2: "common",      # Savaşçı
+    3: "uncommon",    # Kahin
+    4: "uncommon",    # Hacker
+    5: "rare",        # Koruyucu
+    6: "rare",        # Flörtör
+    7: "epic",        # Şehir
+    8: "legendary"    # DAO Üyesi
+}
+
+# NFT ID'sine göre sağlanan faydalar
+BENEFITS = {
+    1: ["Görevleri görebilir ve izleyebilir", "Günlük %5 daha fazla yıldız"],
+    2: ["Zorlu görevlerin kilidini açar", "Günlük %10 daha fazla yıldız"],
+    3: ["Gelecekteki görevleri önceden görebilir", "DAO oylamalarında %5 daha fazla oy gücü"],
+    4: ["Sistem etkileşiminiz %20 daha güçlü", "Her gün ekstra XP kazanımı"],
+    5: ["Diğer kullanıcıları koruyabilir", "Özel alan görevlerine erişim"],
+    6: ["Flört yetenekleriniz %30 daha etkili", "Özel eşleşme görünürlüğü"],
+    7: ["Sanal şehirde mülk sahibi olun", "Bölgesel etkinliklerde ayrıcalıklar"],
+    8: ["DAO'da premium oy hakkı", "Özel içeriklere erişim", "Topluluğu yönetme yetkisi"]
+}
+
+
+def get_rarity_for_nft(nft_id: int) -> str:
+    """NFT'nin nadirlik derecesini belirler"""
+    return RARITIES.get(nft_id, "common")
+
+
+def get_benefits_for_nft(nft_id: int) -> List[str]:
+    """NFT'nin sağladığı faydaları belirler"""
+    return BENEFITS.get(nft_id, ["Temel NFT faydaları"])
+
+
+def absolute_asset_url(path: Optional[str]) -> Optional[str]:
+    """Göreli asset yolunu mutlak URL'ye çevirir, mutlak URL'lere dokunmaz"""
+    if not path or path.startswith(("http://", "https://")):
+        return path
+    return f"{NFT_ASSET_BASE_URL.rstrip('/')}/{path.lstrip('/')}"
+
+
+def build_metadata(row: Dict) -> Dict:
+    """
+    `nfts` tablosundaki bir satırdan (sütun adı -> değer) metadata sözlüğü üretir.
+    Saf fonksiyondur; process pool içinde de çalıştırılabilir.
+    """
+    category = row["category"]
+    return {
+        "id": row["id"],
+        "name": row["name"],
+        "category": getattr(category, "value", category),
+        "level": 1,  # Başlangıç seviyesi
+        "video": absolute_asset_url(row.get("video_url")),
+        "image": absolute_asset_url(row.get("image_url")),
+        "description": row["description"],
+        "price": row["price_stars"],
+        "rarity": get_rarity_for_nft(row["id"]),
+        "benefits": get_benefits_for_nft(row["id"])
+    }
+
+
+def content_hash(metadata: Dict) -> str:
+    """Metadata içeriğinin kanonik JSON karşılığının SHA-256 özeti"""
+    canonical = json.dumps(metadata, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def write_json_atomic(path: str, data) -> None:
+    """
+    JSON dosyasını atomik olarak yazar: önce aynı dizinde geçici dosyaya yazılır,
+    ardından os.replace ile yerine taşınır. Okuyucular yarım dosya görmez.
+    """
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".json")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def metadata_file_path(nft_id: int, metadata_dir: str = METADATA_DIR) -> str:
+    return os.path.join(metadata_dir, f"nft_{nft_id}.json")
+
+
+def _dumps(data) -> bytes:
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def load_manifest(path: str = MANIFEST_PATH) -> Dict[str, str]:
+    """Son üretimde yazılan içerik özetlerini ({nft_id: hash}) okur"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def load_catalog(path: str = CATALOG_PATH) -> List[Dict]:
+    """Üretilmiş katalog dosyasını okur, dosya yoksa boş liste döner"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return []
+
+
+def existing_metadata_ids(metadata_dir: str = METADATA_DIR) -> Set[int]:
+    """Dizinde metadata dosyası bulunan NFT ID'leri"""
+    if not os.path.isdir(metadata_dir):
+        return set()
+    ids = set()
+    for name in os.listdir(metadata_dir):
+        if name.startswith("nft_") and name.endswith(".json"):
+            try:
+                ids.add(int(name[len("nft_"):-len(".json")]))
+            except ValueError:
+                continue
+    return ids
+
+
+class NFTMetadataStore:
+    """
+    Üretilmiş NFT kataloğunu (data/nfts.json) bellekte tutan indekslenmiş depo.
+
+    Yükleme sırasında her kayıt `schemas.NFTMetadata` ile bir kez doğrulanır
+    (doğrulamadan geçemeyen kayıt loglanıp atlanır, kataloğun geri kalanı sunulur) ve
+    - ID'ye göre birincil indeks,
+    - kategori / seviye / nadirlik ikincil indeksleri,
+    - kayıt başına ve filtre kombinasyonu başına önceden serileştirilmiş JSON
+    hazırlanır. Böylece istek yolunda doğrulama ve serileştirme yapılmaz.
+    Dosya yeniden üretildiğinde (mtime değişince) depo kendini yeniler.
+    """
+
+    # Dosya değişikliği en fazla bu sıklıkta (saniye) kontrol edilir
+    RELOAD_CHECK_INTERVAL = 1.0
+
+    def __init__(self, catalog_path: str = CATALOG_PATH):
+        self.catalog_path = catalog_path
+        self._lock = threading.Lock()
+        self._mtime: Optional[float] = None
+        self._checked_at = 0.0
+        self._loaded = False
+        self._items: List[Dict] = []
+        self._by_id: Dict[int, Dict] = {}
+        self._public: Dict[int, Dict] = {}
+        self._serialized: Dict[int, bytes] = {}
+        self._by_category: Dict[str, Tuple[int, ...]] = {}
+        self._by_level: Dict[int, Tuple[int, ...]] = {}
+        self._by_rarity: Dict[str, Tuple[int, ...]] = {}
+        self._list_cache: Dict[Tuple, bytes] = {}
+        self._serialized_items = b"[]"
+
+    def _current_mtime(self) -> Optional[float]:
+        try:
+            return os.stat(self.catalog_path).st_mtime
+        except FileNotFoundError:
+            return None
+
+    def _ensure_loaded(self) -> None:
+        now = time.monotonic()
+        if self._loaded and now - self._checked_at < self.RELOAD_CHECK_INTERVAL:
+            return
+        self._checked_at = now
+        mtime = self._current_mtime()
+        if self._loaded and mtime == self._mtime:
+            return
+        with self._lock:
+            if self._loaded and mtime == self._mtime:
+                return
+            self._build(load_catalog(self.catalog_path) if mtime is not None else [])
+            self._mtime = mtime
+            self._loaded = True
+
+    def _build(self, items: List[Dict]) -> None:
+        import schemas  # models/database zincirini sadece depo kullanıldığında yükle
+        from pydantic import ValidationError
+
+        valid, public = [], {}
+        for item in sorted(items, key=lambda item: item.get("id", 0)):
+            try:
+                public[item["id"]] = schemas.NFTMetadata.model_validate(item).model_dump(mode="json")
+            except (KeyError, ValidationError) as e:
+                logger.error("Geçersiz NFT metadata kaydı atlandı (id=%s): %s", item.get("id"), e)
+                continue
+            valid.append(item)
+        items = valid
+        by_category: Dict[str, List[int]] = {}
+        by_level: Dict[int, List[int]] = {}
+        by_rarity: Dict[str, List[int]] = {}
+        for nft_id, entry in public.items():
+            by_category.setdefault(entry["category"].lower(), []).append(nft_id)
+            by_level.setdefault(entry["level"], []).append(nft_id)
+            by_rarity.setdefault(entry["rarity"], []).append(nft_id)
+
+        # Referanslar tek seferde değiştirilir; okuyucular kilitsiz okumaya devam eder
+        self._items = items
+        self._by_id = {item["id"]: item for item in items}
+        self._public = public
+        self._serialized = {nft_id: _dumps(entry) for nft_id, entry in public.items()}
+        self._by_category = {k: tuple(v) for k, v in by_category.items()}
+        self._by_level = {k: tuple(v) for k, v in by_level.items()}
+        self._by_rarity = {k: tuple(v) for k, v in by_rarity.items()}
+        self._list_cache = {(None, None, None): _dumps(list(public.values()))}
+        self._serialized_items = _dumps(items)
+
+    def all(self) -> List[Dict]:
+        """Tüm metadata kayıtları (ID sırasına göre)"""
+        self._ensure_loaded()
+        return self._items
+
+    def serialized_all(self) -> bytes:
+        """Tüm kayıtların (tam alanlarla) serileştirilmiş listesi"""
+        self._ensure_loaded()
+        return self._serialized_items
+
+    def public_list(self) -> List[Dict]:
+        """Doğrulanmış public metadata kayıtları (ID sırasına göre)"""
+        self._ensure_loaded()
+        return list(self._public.values())
+
+    def get(self, nft_id: int) -> Optional[Dict]:
+        """ID'ye göre O(1) metadata araması"""
+        self._ensure_loaded()
+        return self._by_id.get(nft_id)
+
+    def serialized(self, nft_id: int) -> Optional[bytes]:
+        """Tek bir NFT'nin doğrulanmış ve serileştirilmiş public metadata'sı"""
+        self._ensure_loaded()
+        return self._serialized.get(nft_id)
+
+    def filter_ids(self, category: Optional[str] = None, level: Optional[int] = None,
+                   rarity: Optional[str] = None) -> Tuple[int, ...]:
+        """İkincil indekslerin kesişimiyle filtreye uyan NFT ID'leri (ID sırasına göre)"""
+        self._ensure_loaded()
+        candidates = []
+        if category is not None:
+            candidates.append(self._by_category.get(category.lower(), ()))
+        if level is not None:
+            candidates.append(self._by_level.get(level, ()))
+        if rarity is not None:
+            candidates.append(self._by_rarity.get(getattr(rarity, "value", rarity), ()))
+        if not candidates:
+            return tuple(self._public)
+        candidates.sort(key=len)
+        result = candidates[0]
+        for other in candidates[1:]:
+            other_set = set(other)
+            result = tuple(nft_id for nft_id in result if nft_id in other_set)
+        return result
+
+    def serialized_list(self, category: Optional[str] = None, level: Optional[int] = None,
+                        rarity: Optional[str] = None) -> bytes:
+        """Filtreye uyan public metadata listesinin serileştirilmiş hali (önbellekli)"""
+        self._ensure_loaded()
+        key = (category.lower() if category else None, level, getattr(rarity, "value", rarity))
+        cached = self._list_cache.get(key)
+        if cached is not None:
+            return cached
+        ids = self.filter_ids(category=category, level=level, rarity=rarity)
+        content = _dumps([self._public[nft_id] for nft_id in ids])
+        # Sadece gerçekten var olan değerler önbelleğe alınır (keyfi girdilerle büyümesin)
+        if ids:
+            self._list_cache[key] = content
+        return content
+
+
+# Uygulama genelinde paylaşılan depo
+store = NFTMetadataStore()
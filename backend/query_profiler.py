@@ -0,0 +1,196 @@
+# query_profiler.py - İstek başına SQL sorgu sayacı ve N+1 dedektörü
+#
+# SQLAlchemy cursor olaylarına bağlanarak her isteğin çalıştırdığı sorgu sayısını
+# ve veritabanında geçen süreyi toplar. Aynı sorgu şekli (parametreler hariç SQL
+# metni) bir istekte eşik değerinden fazla tekrarlanırsa N+1 şüphesi olarak işaretlenir.
+#
+# - QueryCounterMiddleware: Server-Timing başlığı ve istek başına bir log satırı üretir
+# - assert_max_queries: testlerde endpoint başına sorgu bütçesi kontrolü
+#
+# Sayaçlar contextvar ile isteğe bağlanır; threadpool'da çalışan senkron
+# endpoint'ler ve dependency'ler de aynı isteğe sayılır.
+
+import logging
+import os
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from metrics import route_label
+
+logger = logging.getLogger("query_profiler")
+
+# Aynı sorgu şekli bir istekte bu kadar (veya daha fazla) çalışırsa N+1 sayılır
+N_PLUS_ONE_THRESHOLD = int(os.getenv("QUERY_N_PLUS_ONE_THRESHOLD", "5"))
+
+_WHITESPACE = re.compile(r"\s+")
+# IN listeleri eleman sayısına göre farklı SQL üretir: "IN (?, ?, ?)" -> "IN (?)"
+_IN_LIST = re.compile(r"\((?:\s*(?:\?|%s|:\w+)\s*,)+\s*(?:\?|%s|:\w+)\s*\)")
+
+
+def statement_shape(statement: str) -> str:
+    """Parametre sayısından ve boşluklardan bağımsız sorgu şekli"""
+    return _IN_LIST.sub("(?)", _WHITESPACE.sub(" ", statement).strip())
+
+
+class QueryStats:
+    """Bir isteğin (veya test bloğunun) sorgu istatistikleri"""
+
+    def __init__(self):
+        self.count = 0
+        self.db_seconds = 0.0
+        self.shapes: Counter = Counter()
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def record(self, statement: str, elapsed: float) -> None:
+        shape = statement_shape(statement)
+        with self._lock:
+            self.count += 1
+            self.db_seconds += elapsed
+            self.shapes[shape] += 1
+
+    def merge(self, other: "QueryStats") -> None:
+        with self._lock:
+            self.count += other.count
+            self.db_seconds += other.db_seconds
+            self.shapes.update(other.shapes)
+
+    def repeated(self, threshold: int = N_PLUS_ONE_THRESHOLD) -> List[tuple]:
+        """Eşiği aşan (sorgu şekli, tekrar sayısı) ikilileri, en çok tekrarlanan önce"""
+        return [(shape, n) for shape, n in self.shapes.most_common() if n >= threshold]
+
+    @property
+    def db_ms(self) -> float:
+        return self.db_seconds * 1000
+
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+# Biten her isteğin istatistiğini alan dinleyiciler (assert_max_queries kullanır)
+_request_observers: List[Callable[[QueryStats], None]] = []
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_stats.get() is not None:
+        conn.info.setdefault("query_profiler_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats.get()
+    if stats is None:
+        return
+    starts = conn.info.get("query_profiler_start")
+    elapsed = time.perf_counter() - starts.pop() if starts else 0.0
+    stats.record(statement, elapsed)
+
+
+def current_stats() -> Optional[QueryStats]:
+    """Aktif isteğin sorgu istatistikleri (istek dışında None)"""
+    return _current_stats.get()
+
+
+class QueryCounterMiddleware:
+    """
+    İstek başına sorgu sayısını ve veritabanı süresini ölçer. Yanıta
+    Server-Timing başlığı ekler, istek bitince tek bir log satırı yazar;
+    N+1 şüphesi varsa log seviyesi WARNING olur.
+    """
+
+    def __init__(self, app: ASGIApp, server_timing: bool = True,
+                 n_plus_one_threshold: int = N_PLUS_ONE_THRESHOLD):
+        self.app = app
+        self.server_timing = server_timing
+        self.n_plus_one_threshold = n_plus_one_threshold
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = _current_stats.set(stats)
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if self.server_timing:
+                    headers = MutableHeaders(scope=message)
+                    app_ms = (time.perf_counter() - stats.started) * 1000
+                    headers.append(
+                        "Server-Timing",
+                        f'db;dur={stats.db_ms:.2f};desc="{stats.count} queries", app;dur={app_ms:.2f}'
+                    )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_stats.reset(token)
+            self._report(scope, status_code, stats)
+
+    def _report(self, scope: Scope, status_code: int, stats: QueryStats) -> None:
+        path = route_label(scope)
+        repeated = stats.repeated(self.n_plus_one_threshold)
+        fields = {
+            "method": scope.get("method"),
+            "route": path,
+            "status": status_code,
+            "queries": stats.count,
+            "db_ms": round(stats.db_ms, 2),
+            "duration_ms": round((time.perf_counter() - stats.started) * 1000, 2),
+            "repeated_queries": [{"count": n, "statement": shape[:200]} for shape, n in repeated],
+        }
+        if repeated:
+            logger.warning("N+1 şüphesi: %s %s", fields["method"], path, extra={"query_stats": fields})
+        else:
+            logger.info("%s %s %d sorgu", fields["method"], path, stats.count, extra={"query_stats": fields})
+        for observer in list(_request_observers):
+            observer(stats)
+
+
+@contextmanager
+def capture_queries() -> Iterator[QueryStats]:
+    """
+    Blok içinde çalışan sorguları toplar: doğrudan çalışan sorgular ve blok
+    içinde tamamlanan isteklerin (TestClient dahil) sorguları.
+    """
+    captured = QueryStats()
+    token = _current_stats.set(captured)
+    _request_observers.append(captured.merge)
+    try:
+        yield captured
+    finally:
+        _request_observers.remove(captured.merge)
+        _current_stats.reset(token)
+
+
+@contextmanager
+def assert_max_queries(max_queries: int, allow_repeated: bool = False) -> Iterator[QueryStats]:
+    """
+    Blok içindeki sorgu sayısı max_queries'i aşarsa (veya allow_repeated False iken
+    N+1 şüphesi varsa) AssertionError fırlatır. Test kullanımı:
+
+        with assert_max_queries(5):
+            client.get("/wallet/1")
+    """
+    with capture_queries() as stats:
+        yield stats
+    details = "\n".join(f"  {n}x {shape}" for shape, n in stats.shapes.most_common())
+    if stats.count > max_queries:
+        raise AssertionError(f"{stats.count} sorgu çalıştı, en fazla {max_queries} bekleniyordu:\n{details}")
+    if not allow_repeated and stats.repeated():
+        raise AssertionError(f"Tekrarlanan sorgu şekilleri (N+1):\n{details}")
@@ -0,0 +1,273 @@
+# ratelimit.py - Kötüye kullanıma açık endpoint'ler için istek sınırlama
+#
+# Token bucket: her (route, anahtar) çifti için bir kova tutulur; kova `limit`
+# jetonla dolu başlar ve `period` saniyede tamamen dolacak hızda yenilenir. Her
+# istek bir jeton harcar, jeton yoksa 429 + Retry-After döner. Kontrol O(1)'dir
+# (kova başına iki sayı) ve veritabanına dokunmadan, router'lardan önce yapılır.
+#
+# Anahtar türleri:
+#   user  JWT'deki kullanıcı (imza doğrulanır, DB okunmaz); token yoksa/geçersizse IP
+#   ip    istemci IP'si (RATE_LIMIT_TRUST_PROXY=1 ise X-Forwarded-For'un ilk değeri)
+#
+# Ortam değişkenleri:
+#   RATE_LIMIT_ENABLED=1      0 ise middleware hiçbir isteği sınırlamaz
+#   RATE_LIMIT_URL=memory://  kova deposu: memory://?maxsize=100000 (süreç içi) ya da
+#                             redis://localhost:6379/0 (worker'lar arasında paylaşılan)
+#   RATE_LIMITS=...           varsayılan politikaları değiştirir/ekler, virgülle ayrılmış
+#                             "METHOD /yol=LIMIT/SANİYE[:user|ip]" ya da "METHOD /yol=off"
+#                             ör. RATE_LIMITS="POST /users/login=20/60:ip,POST /dao/vote=off"
+#   RATE_LIMIT_TRUST_PROXY=0  1 ise istemci IP'si X-Forwarded-For başlığından okunur
+
+import abc
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from jose import JWTError, jwt
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+import metrics
+# auth .env dosyasını (load_dotenv) okuduktan sonra ayarları belirler; aynı anahtarı kullan
+from auth import ALGORITHM, SECRET_KEY
+
+try:
+    import redis
+except ImportError:  # redis opsiyonel; sadece RedisStore için gerekir
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+ENABLED = os.getenv("RATE_LIMIT_ENABLED", "1") not in ("0", "false", "False")
+TRUST_PROXY = os.getenv("RATE_LIMIT_TRUST_PROXY", "0") not in ("0", "false", "False")
+
+
+@dataclass(frozen=True)
+class Policy:
+    limit: int
+    period: float
+    key: str = "user"
+
+    @property
+    def rate(self) -> float:
+        """Saniyede yenilenen jeton sayısı"""
+        return self.limit / self.period
+
+
+DEFAULT_POLICIES: Dict[Tuple[str, str], Policy] = {
+    ("POST", "/users/login"): Policy(10, 60, "ip"),
+    ("POST", "/users/gorev-tamamla"): Policy(30, 60),
+    ("POST", "/missions/gorev-tamamla"): Policy(30, 60),
+    ("POST", "/missions/gorev-tamamla/toplu"): Policy(5, 60),
+    ("POST", "/users/mint-nft"): Policy(10, 60),
+    ("POST", "/users/use-stars"): Policy(30, 60),
+    ("POST", "/users/me/stars/use"): Policy(30, 60),
+    ("POST", "/dao/vote"): Policy(20, 60),
+    ("GET", "/search"): Policy(60, 60),  # Yazarken arama: saniyede ~1, kısa patlamalara izin
+}
+
+
+def parse_policies(spec: str, base: Optional[Dict[Tuple[str, str], Policy]] = None) -> Dict[Tuple[str, str], Policy]:
+    """RATE_LIMITS değerini `base` üzerine uygular"""
+    policies = dict(DEFAULT_POLICIES if base is None else base)
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        try:
+            route, rule = entry.rsplit("=", 1)
+            method, path = route.split()
+            route_key = (method.upper(), path.rstrip("/") or "/")
+            if rule.strip().lower() == "off":
+                policies.pop(route_key, None)
+                continue
+            rule, _, key = rule.partition(":")
+            limit, period = rule.split("/")
+            key = key.strip() or "user"
+            if key not in ("user", "ip"):
+                raise ValueError(key)
+            policies[route_key] = Policy(int(limit), float(period), key)
+        except ValueError:
+            raise ValueError(f"Geçersiz RATE_LIMITS girdisi: {entry!r}")
+    return policies
+
+
+class RateLimitStore(abc.ABC):
+    """Kova deposu arayüzü"""
+
+    # hit ağ gidiş-dönüşü yapıyorsa True; middleware bu depoları olay döngüsü dışında çağırır
+    blocking = True
+
+    @abc.abstractmethod
+    def hit(self, key: str, policy: Policy) -> float:
+        """Bir jeton harcar; izin verilirse 0, verilmezse tekrar denemeden önce beklenecek saniye"""
+
+    @abc.abstractmethod
+    def clear(self) -> None:
+        ...
+
+
+class MemoryStore(RateLimitStore):
+    """Süreç içi, boyut sınırlı (LRU) kova deposu"""
+
+    blocking = False
+
+    def __init__(self, maxsize: int = 100_000):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._buckets: "OrderedDict[str, list]" = OrderedDict()
+
+    def hit(self, key: str, policy: Policy) -> float:
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [float(policy.limit), now]
+                if len(self._buckets) > self.maxsize:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(policy.limit, bucket[0] + (now - bucket[1]) * policy.rate)
+                bucket[1] = now
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                return 0.0
+            return (1 - bucket[0]) / policy.rate
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+
+# Kova okuma-yenileme-harcama adımı sunucuda atomik çalışır; saat Redis'ten alınır
+# ki farklı makinelerdeki worker'lar aynı zamanı görsün.
+_REDIS_TOKEN_BUCKET = """
+local limit = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or limit
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(limit, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(limit / rate * 1000) + 1000)
+return tostring(wait)
+"""
+
+
+class RedisStore(RateLimitStore):
+    """Redis üzerinde worker'lar arasında paylaşılan kova deposu"""
+
+    def __init__(self, url: str, prefix: str = "arayis:rl:"):
+        if redis is None:
+            raise RuntimeError("RedisStore için 'redis' paketi kurulu olmalı (pip install redis)")
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self._script = self.client.register_script(_REDIS_TOKEN_BUCKET)
+
+    def hit(self, key: str, policy: Policy) -> float:
+        return float(self._script(keys=[f"{self.prefix}{key}"], args=[policy.limit, policy.rate]))
+
+    def clear(self) -> None:
+        keys = list(self.client.scan_iter(f"{self.prefix}*"))
+        if keys:
+            self.client.delete(*keys)
+
+
+def store_from_url(url: str) -> RateLimitStore:
+    """RATE_LIMIT_URL değerinden depo oluşturur"""
+    parsed = urlparse(url)
+    if parsed.scheme in ("", "memory"):
+        maxsize = int(parse_qs(parsed.query).get("maxsize", ["100000"])[0])
+        return MemoryStore(maxsize=maxsize)
+    if parsed.scheme in ("redis", "rediss", "unix"):
+        return RedisStore(url)
+    raise ValueError(f"Desteklenmeyen RATE_LIMIT_URL: {url}")
+
+
+def _client_ip(scope: Scope, headers: Headers) -> str:
+    if TRUST_PROXY:
+        forwarded = headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+def _token_subject(headers: Headers) -> Optional[str]:
+    """Bearer token'daki kullanıcı; imza geçersizse None (sahte token'lar kova üretemesin)"""
+    authorization = headers.get("authorization", "")
+    if not SECRET_KEY or not authorization.lower().startswith("bearer "):
+        return None
+    try:
+        subject = jwt.decode(authorization[7:], SECRET_KEY, algorithms=[ALGORITHM]).get("sub")
+    except JWTError:
+        return None
+    return str(subject) if subject is not None else None
+
+
+class RateLimitMiddleware:
+    """Politikası olan route'larda kova kontrolü yapar; sınır aşılırsa 429 döner"""
+
+    def __init__(self, app: ASGIApp, policies: Optional[Dict[Tuple[str, str], Policy]] = None,
+                 store: Optional[RateLimitStore] = None, enabled: Optional[bool] = None):
+        self.app = app
+        self.policies = policies if policies is not None else parse_policies(os.getenv("RATE_LIMITS", ""))
+        self.store = store or store_from_url(os.getenv("RATE_LIMIT_URL", "memory://"))
+        self.enabled = ENABLED if enabled is None else enabled
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if not self.enabled or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        route_key = (scope["method"], scope["path"].rstrip("/") or "/")
+        policy = self.policies.get(route_key)
+        if policy is None:
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        subject = _token_subject(headers) if policy.key == "user" else None
+        key = f"u:{subject}" if subject else f"ip:{_client_ip(scope, headers)}"
+        try:
+            bucket = f"{route_key[0]} {route_key[1]}|{key}"
+            if self.store.blocking:
+                # Redis gidiş-dönüşü diğer isteklerin sürdüğü olay döngüsünü bekletmesin
+                wait = await asyncio.to_thread(self.store.hit, bucket, policy)
+            else:
+                wait = self.store.hit(bucket, policy)
+        except Exception:
+            # Paylaşılan depo erişilemezse istekler engellenmez
+            logger.warning("Rate limit store unavailable", exc_info=True)
+            wait = 0.0
+        if not wait:
+            await self.app(scope, receive, send)
+            return
+
+        metrics.RATE_LIMITED.inc(labels=(route_key[1],))
+        retry_after = max(1, int(wait + 0.999))
+        body = json.dumps(
+            {"detail": f"Çok fazla istek. Lütfen {retry_after} saniye sonra tekrar deneyin."},
+            ensure_ascii=False,
+        ).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(retry_after).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
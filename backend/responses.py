@@ -0,0 +1,61 @@
+# responses.py - Hızlı JSON yanıt sınıfı
+#
+# FastAPI, response_model tanımlı endpoint'leri pydantic-core ile doğrudan JSON
+# byte'larına serileştirir (en hızlı yol). response_model olmayan endpoint'lerde ise
+# dönüş değeri önce jsonable_encoder ile gezilir, sonra json.dumps ile yazılır.
+# Bu endpoint'ler FastJSONResponse döndürerek her iki adımı da orjson ile atlar.
+
+import dataclasses
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+from enum import Enum
+from typing import Any
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # orjson opsiyonel; yoksa standart json kullanılır
+    orjson = None
+
+
+def _default(obj: Any) -> Any:
+    """orjson/json'un doğrudan tanımadığı tipler için dönüşüm"""
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, Enum):
+        return obj.value
+    if isinstance(obj, (datetime, date, time)):
+        return obj.isoformat()
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    # Bilinmeyen tipler için FastAPI'nin kurallarına geri dön
+    return jsonable_encoder(obj)
+
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+    def dumps(content: Any) -> bytes:
+        """İçeriği kompakt UTF-8 JSON byte'larına serileştirir"""
+        return orjson.dumps(content, default=_default, option=_ORJSON_OPTIONS)
+else:
+    def dumps(content: Any) -> bytes:
+        """İçeriği kompakt UTF-8 JSON byte'larına serileştirir"""
+        return json.dumps(
+            content, default=_default, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+        ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """orjson (varsa) ile serileştiren JSONResponse"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
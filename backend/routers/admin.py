@@ -1,9 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException, Body, Path
+from fastapi import APIRouter, Depends, HTTPException, Body, Path, Query
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
+from dataclasses import asdict
+from datetime import datetime, timezone
 
 # crud, models, schemas importları
 import schemas, crud, models, auth
+import xp_buffer
+import anticheat
+import broadcast
+import search
 from database import get_db
 # TODO: Admin yetkilendirmesi eklenmeli (örneğin API key veya özel token ile)
 
@@ -34,10 +40,11 @@ async def admin_add_stars(request: schemas.AdminAddStarsRequest, db: Session = D
     # Negatif değer eklemeyi engelle (opsiyonel)
     if request.amount <= 0:
          raise HTTPException(status_code=400, detail="Eklenecek miktar pozitif olmalı.")
-    user.stars += request.amount
+    xp_buffer.credit(db, user, stars=request.amount, reason="admin_grant",
+                     description=f"Admin tarafından {request.amount} Stars eklendi")
     db.commit()
     db.refresh(user)
-    return user
+    return xp_buffer.overlay(db, user)
 
 @router.post("/users/toggle-stars", response_model=schemas.User, summary="Toggle User Stars Usage")
 async def admin_toggle_stars_usage(request: schemas.AdminToggleStarsRequest, db: Session = Depends(get_db)):
@@ -106,6 +113,73 @@ async def admin_read_all_missions(skip: int = 0, limit: int = 100, db: Session =
     missions = db.query(models.Mission).order_by(models.Mission.id).offset(skip).limit(limit).all()
     return missions
 
+# Arama
+@router.get("/search", response_model=schemas.SearchResponse, summary="Search All Records")
+async def admin_search(
+    q: str = Query(..., min_length=2, max_length=100),
+    kind: Optional[str] = Query(None, pattern="^(mission|nft|badge)$"),
+    limit: int = Query(50, ge=1, le=200),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_db)
+):
+    """(Admin Only) Pasif ve VIP kayıtlar dahil tüm görev, NFT ve rozetlerde arama."""
+    items, has_more = search.search_documents(db, q, kind=kind, audiences=None, limit=limit, offset=offset)
+    return {"query": q, "items": items, "limit": limit, "offset": offset, "has_more": has_more}
+
+# Hile tespiti
+@router.get("/anticheat/flags", response_model=List[dict], summary="List Velocity Flags")
+async def admin_list_anticheat_flags(limit: int = 100):
+    """(Admin Only) Bu worker'da hız kurallarıyla işaretlenen kullanıcılar (en yeni önce)."""
+    flags = sorted(anticheat.detector.flags.values(), key=lambda flag: flag.flagged_at, reverse=True)
+    return [
+        {
+            "user_id": flag.user_id,
+            "reasons": flag.reasons,
+            "count": flag.count,
+            "flagged_at": datetime.fromtimestamp(flag.flagged_at, timezone.utc).isoformat(),
+            "blocked_for_seconds": round(anticheat.detector.retry_after(flag.user_id)),
+            **asdict(flag.features),
+        }
+        for flag in flags[:limit]
+    ]
+
+# Toplu bildirimler
+@router.post("/broadcasts", response_model=schemas.BroadcastResponse, status_code=201, summary="Queue Broadcast")
+async def admin_create_broadcast(request: schemas.AdminCreateBroadcastRequest, db: Session = Depends(get_db)):
+    """(Admin Only) Telegram yayınını kuyruğa ekler; gönderimi arka plandaki worker yapar."""
+    text = request.text
+    if text is None:
+        if request.kind == "proposal_opened":
+            proposal = db.get(models.DAOProposal, request.target_id) if request.target_id else None
+            if not proposal:
+                raise HTTPException(status_code=404, detail="Öneri bulunamadı.")
+            text = broadcast.proposal_opened_text(proposal.id, proposal.title)
+        elif request.kind == "nft_drop":
+            nft = crud.get_nft(db, request.target_id) if request.target_id else None
+            if not nft:
+                raise HTTPException(status_code=404, detail="NFT bulunamadı.")
+            text = broadcast.nft_drop_text(nft.id, nft.name)
+        elif request.kind == "daily_bonus":
+            text = broadcast.DAILY_BONUS_TEXT
+        else:
+            raise HTTPException(status_code=400, detail="Mesaj metni gerekli.")
+    return broadcast.create_broadcast(db, request.kind, text, request.audience)
+
+@router.get("/broadcasts/{broadcast_id}", response_model=schemas.BroadcastResponse, summary="Broadcast Progress")
+async def admin_get_broadcast(broadcast_id: int = Path(..., gt=0), db: Session = Depends(get_db)):
+    """(Admin Only) Yayının durumu ve ilerlemesi (imleç, gönderilen/başarısız sayıları)."""
+    item = db.get(models.Broadcast, broadcast_id)
+    if not item:
+        raise HTTPException(status_code=404, detail="Yayın bulunamadı.")
+    return item
+
+@router.post("/broadcasts/{broadcast_id}/cancel", response_model=schemas.BroadcastResponse, summary="Cancel Broadcast")
+async def admin_cancel_broadcast(broadcast_id: int = Path(..., gt=0), db: Session = Depends(get_db)):
+    """(Admin Only) Bitmemiş yayını durdurur; çalışan worker bir sonraki parçada bırakır."""
+    if not broadcast.cancel_broadcast(db, broadcast_id):
+        raise HTTPException(status_code=409, detail="Yayın bulunamadı ya da zaten bitmiş.")
+    return db.get(models.Broadcast, broadcast_id)
+
 # Rozet İşlemleri
 @router.post("/badges", response_model=schemas.Badge, status_code=201, summary="Create Badge")
 async def admin_create_badge(
@@ -0,0 +1,119 @@
+# backend/routers/bootstrap.py
+# Mini App açılışında ayrı ayrı çağrılan /profile, /wallet, /missions, /nfts/list,
+# /api/badges ve /vip/vip-benefits isteklerinin yerine geçen tek endpoint.
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+import schemas, crud, models, auth
+import catalog
+from database import get_db
+
+router = APIRouter()
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite zaman damgalarını saat dilimi olmadan (UTC) döndürür
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+def _build_profile(user: models.User) -> Dict[str, Any]:
+    stories = sorted(user.mission_stories, key=lambda s: s.timestamp or datetime.min, reverse=True)
+    return {
+        **schemas.User.model_validate(user).model_dump(),
+        "badges": [
+            {
+                "badge_id": ub.badge_id,
+                "badge_name": ub.badge.name,
+                "badge_image_url": ub.badge.image_url,
+                "earned_at": ub.earned_at
+            }
+            for ub in user.badges if ub.badge
+        ],
+        "completed_missions": [
+            {"mission_id": um.mission_id, "completed_at": um.completed_at}
+            for um in user.completed_missions
+        ],
+        "mission_stories": stories,
+        "nft_count": len(user.nfts)
+    }
+
+def _build_wallet(user: models.User) -> schemas.UserWallet:
+    return schemas.UserWallet(
+        user_id=user.id,
+        telegram_id=user.telegram_id,
+        username=user.username,
+        stars=user.stars,
+        stars_enabled=user.stars_enabled,
+        nfts=[
+            schemas.UserNFTSchema(
+                nft_id=user_nft.nft_id,
+                nft_name=user_nft.nft.name,
+                nft_image_url=user_nft.nft.image_url,
+                purchase_date=user_nft.purchase_date,
+                purchase_price_stars=user_nft.purchase_price_stars or 0
+            )
+            for user_nft in user.nfts if user_nft.nft
+        ]
+    )
+
+def _build_missions(user: models.User, missions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Ortak görev kataloğunu kullanıcıya göre süzer; kurallar /users/missions/{uid}
+    ile aynıdır, ancak tamamlama ve NFT bilgisi önceden yüklenmiş ilişkilerden okunur.
+    """
+    user_level = user.level
+    user_nft_ids = {user_nft.nft_id for user_nft in user.nfts}
+    one_day_ago = datetime.now(timezone.utc) - timedelta(days=1)
+
+    last_completed: Dict[int, datetime] = {}
+    for um in user.completed_missions:
+        if um.completed_at is None:
+            continue
+        completed_at = _as_utc(um.completed_at)
+        if um.mission_id not in last_completed or completed_at > last_completed[um.mission_id]:
+            last_completed[um.mission_id] = completed_at
+
+    result = []
+    for mission in missions:
+        if mission["required_level"] > user_level:
+            continue
+        if mission["is_vip"] and not user.has_vip_access:
+            continue
+        completed_at = last_completed.get(mission["id"])
+        if completed_at and completed_at > one_day_ago and mission["cooldown_hours"] > 0:
+            continue
+        result.append({
+            **mission,
+            "unlocked": mission["required_nft_id"] is None or mission["required_nft_id"] in user_nft_ids,
+            "last_completed": completed_at.isoformat() if completed_at else None,
+        })
+    return result
+
+@router.get("/bootstrap", response_model=schemas.BootstrapResponse)
+async def get_bootstrap(
+    current_user: models.User = Depends(auth.get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Uygulama açılışı için gereken tüm verileri tek yanıtta döndürür.
+    Ortak katalog önbellekten, kullanıcıya özel veriler tek oturumda toplu
+    yüklemeyle alınır; iki kısım eşzamanlı hazırlanır.
+    """
+    shared, user = await asyncio.gather(
+        run_in_threadpool(catalog.get_shared_snapshot),
+        run_in_threadpool(crud.get_user_for_bootstrap, db, current_user.id)
+    )
+    if user is None:
+        raise HTTPException(status_code=404, detail="Kullanıcı bulunamadı")
+
+    return {
+        "profile": _build_profile(user),
+        "wallet": _build_wallet(user),
+        "missions": _build_missions(user, shared["missions"]),
+        "nfts": shared["nfts"],
+        "badges": shared["badges"],
+        "vip_benefits": shared["vip_benefits"],
+    }
@@ -1,12 +1,15 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
+import logging
 from typing import List, Optional
-from datetime import datetime
+from datetime import datetime, timezone
 
 # crud, models, schemas importları
 import schemas, crud, models, auth
 from database import get_db
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
 # TODO: /dao/proposals endpoint'i (Aktif oylamaları listele)
@@ -67,7 +70,9 @@ async def vote_on_proposal(
         raise HTTPException(status_code=400, detail="Bu teklif artık oylamaya açık değil.")
     
     # Oylama süresi geçti mi?
-    if datetime.now() > proposal.end_date:
+    # SQLite tarihleri saat dilimi bilgisi olmadan döndürür; UTC kabul edilir
+    end_date = proposal.end_date if proposal.end_date.tzinfo else proposal.end_date.replace(tzinfo=timezone.utc)
+    if datetime.now(timezone.utc) > end_date:
         raise HTTPException(status_code=400, detail="Bu teklifin oylama süresi sona erdi.")
     
     # Kullanıcı daha önce oy kullandı mı?
@@ -78,14 +83,13 @@ async def vote_on_proposal(
     # Oy gücünü hesapla - sahip olunan NFT'lere göre
     vote_power = 1  # Temel oy gücü
     
-    # DAO oylama NFT'leri için ek güç
-    for user_nft in current_user.nfts:
-        nft = user_nft.nft
-        if nft.category == models.NFTCategory.VOTE_BASIC:
+    # DAO oylama NFT'leri için ek güç (kategoriler tek sorguda okunur)
+    for category in crud.get_user_nft_categories(db, current_user.id):
+        if category == models.NFTCategory.VOTE_BASIC:
             vote_power += 1
-        elif nft.category == models.NFTCategory.VOTE_PREMIUM:
+        elif category == models.NFTCategory.VOTE_PREMIUM:
             vote_power += 5
-        elif nft.category == models.NFTCategory.VOTE_SORA:
+        elif category == models.NFTCategory.VOTE_SORA:
             vote_power += 10
     
     try:
@@ -111,5 +115,5 @@ async def vote_on_proposal(
         )
     except Exception as e:
         db.rollback()
-        print(f"Error voting on proposal {request.proposal_id} for user {current_user.id}: {e}")
+        logger.exception(f"Error voting on proposal {request.proposal_id} for user {current_user.id}")
         raise HTTPException(status_code=500, detail="Oy kullanılırken bir hata oluştu.") 
\ No newline at end of file
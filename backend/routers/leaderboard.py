@@ -8,6 +8,8 @@ from database import get_db
 
 router = APIRouter()
 
+VALID_CATEGORIES = ["xp", "missions_completed", "stars_spent", "invites", "invite_network"]
+
 @router.get("/leaderboard/{category}", response_model=schemas.LeaderboardResponse)
 async def get_leaderboard(
     category: str,
@@ -17,9 +19,10 @@ async def get_leaderboard(
 ):
     """
     Belirli bir kategori için liderlik tablosunu getirir.
-    Kategoriler: xp, missions_completed, stars_spent
+    Kategoriler: xp, missions_completed, stars_spent, invites (doğrudan davet),
+    invite_network (tüm davet ağacı)
     """
-    valid_categories = ["xp", "missions_completed", "stars_spent"]
+    valid_categories = VALID_CATEGORIES
     if category not in valid_categories:
         raise HTTPException(
             status_code=400, 
@@ -37,13 +40,14 @@ async def get_leaderboard(
     
     # Eğer kullanıcı ilk N'de değilse, kendi konumunu ekle
     if user_rank is None:
-        user_rank = crud.get_user_leaderboard_rank(db=db, user_id=current_user.id, category=category)
-        if user_rank:
+        own = crud.get_user_leaderboard_rank(db=db, user_id=current_user.id, category=category)
+        if own:
+            user_rank, value = own
             user_entry = schemas.LeaderboardEntry(
                 rank=user_rank,
                 user_id=current_user.id,
                 username=current_user.username,
-                value=getattr(current_user, category if category != "missions_completed" else "xp")
+                value=value
             )
             entries.append(user_entry)
     
@@ -61,15 +65,15 @@ async def get_user_rank(
     """
     Kullanıcının belirli bir kategorideki sıralamasını getirir.
     """
-    valid_categories = ["xp", "missions_completed", "stars_spent"]
+    valid_categories = VALID_CATEGORIES
     if category not in valid_categories:
         raise HTTPException(
             status_code=400, 
             detail=f"Geçersiz kategori. Geçerli değerler: {valid_categories}"
         )
     
-    rank = crud.get_user_leaderboard_rank(db=db, user_id=current_user.id, category=category)
-    if not rank:
+    own = crud.get_user_leaderboard_rank(db=db, user_id=current_user.id, category=category)
+    if not own:
         return 0
     
-    return rank 
\ No newline at end of file
+    return own[0] 
\ No newline at end of file
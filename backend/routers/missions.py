@@ -1,12 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
+import logging
 from typing import List, Optional
-from datetime import datetime, timedelta
+from datetime import datetime, timezone
 
 # crud, models, schemas importları eklenecek
 import crud, models, schemas, auth
+import anticheat
 from database import get_db
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
 # TODO: /missions endpoint'i (Aktif görevleri listele)
@@ -55,6 +59,7 @@ async def complete_mission_endpoint(
     """
     Bir görevi tamamlar ve kullanıcıya ödülleri verir.
     """
+    anticheat.enforce(current_user.id)
     mission = crud.get_mission(db, mission_id=request.mission_id)
     if not mission:
         raise HTTPException(status_code=404, detail="Görev bulunamadı.")
@@ -69,13 +74,14 @@ async def complete_mission_endpoint(
          if mission.required_nft_id not in user_nft_ids:
              raise HTTPException(status_code=403, detail="Bu görevi yapmak için gerekli NFT'ye sahip değilsiniz.")
 
-    # Cooldown kontrolü
-    last_completion = crud.get_user_last_mission_completion(db, user_id=current_user.id, mission_id=mission.id)
-    if last_completion and mission.cooldown_hours > 0:
-        cooldown_end = last_completion.completed_at + timedelta(hours=mission.cooldown_hours)
-        if datetime.now() < cooldown_end:
-            remaining_time = cooldown_end - datetime.now()
-            hours, remainder = divmod(remaining_time.seconds, 3600)
+    # Cooldown kontrolü (görev durum satırından tek birincil anahtar okuması)
+    state = crud.get_mission_state(db, user_id=current_user.id, mission_id=mission.id)
+    if state and mission.cooldown_hours > 0:
+        cooldown_end = crud.mission_available_at(state, mission.cooldown_hours)
+        now = datetime.now(timezone.utc)
+        if now < cooldown_end:
+            remaining_time = cooldown_end - now
+            hours, remainder = divmod(int(remaining_time.total_seconds()), 3600)
             minutes, _ = divmod(remainder, 60)
             time_str = f"{hours} saat {minutes} dakika"
             raise HTTPException(
@@ -89,9 +95,28 @@ async def complete_mission_endpoint(
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        print(f"Error completing mission {request.mission_id} for user {current_user.id}: {e}")
+        logger.exception(f"Error completing mission {request.mission_id} for user {current_user.id}")
         raise HTTPException(status_code=500, detail="Görev tamamlanırken bir hata oluştu.")
 
+@router.post("/gorev-tamamla/toplu", response_model=schemas.BatchCompleteMissionResponse)
+async def complete_missions_batch_endpoint(
+    request: schemas.BatchCompleteMissionRequest,
+    current_user: models.User = Depends(auth.get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Birden çok görevi tek istekte tamamlar (ör. çevrimdışı biriken tamamlamalar).
+    Her öğe ayrı ayrı doğrulanır; sonuçlar istek sırasıyla döner ve reddedilen
+    öğeler nedenleriyle birlikte raporlanır.
+    """
+    anticheat.enforce(current_user.id)
+    try:
+        return crud.complete_missions_batch(db=db, user=current_user, items=request.items)
+    except Exception:
+        db.rollback()
+        logger.exception(f"Error completing mission batch for user {current_user.id}")
+        raise HTTPException(status_code=500, detail="Görevler tamamlanırken bir hata oluştu.")
+
 @router.get("/user-missions", response_model=List[schemas.UserMissionSchema])
 async def read_user_completed_missions(
     current_user: models.User = Depends(auth.get_current_active_user),
@@ -111,21 +136,11 @@ async def get_mission_cooldowns(
     """
     Kullanıcı için görevlerin cooldown durumlarını getirir.
     Dönen format: {mission_id: cooldown_end_timestamp, ...}
+    Yalnızca kullanıcının görebildiği görevler döner; görev durum tablosundan tek
+    sorguyla hesaplanır (görev başına sorgu yok).
     """
-    missions = crud.get_missions_for_user(db=db, user=current_user)
-    result = {}
-    
-    for mission in missions:
-        if mission.cooldown_hours > 0:
-            last_completion = crud.get_user_last_mission_completion(
-                db, user_id=current_user.id, mission_id=mission.id
-            )
-            if last_completion:
-                cooldown_end = last_completion.completed_at + timedelta(hours=mission.cooldown_hours)
-                if datetime.now() < cooldown_end:
-                    result[mission.id] = cooldown_end.isoformat()
-                
-    return result
+    cooldowns = crud.get_mission_cooldowns(db, user=current_user)
+    return {mission_id: ends_at.isoformat() for mission_id, ends_at in cooldowns.items()}
 
 # Açık görev listesi endpoint'i (demo veya test için)
 @router.get("/missions/{uid}", response_model=List[schemas.Mission])
@@ -1,11 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime
 import random
 import logging
-from pydantic import BaseModel
-from enum import Enum
 
 # Logger tanımlama
 logger = logging.getLogger(__name__)
@@ -14,173 +12,135 @@ logger = logging.getLogger(__name__)
 import schemas
 from database import get_db
 import crud, models, auth
+import nft_metadata
 
 router = APIRouter()
 
-# NFT rarity enum türünü tanımlama
-class NFTRarity(str, Enum):
-    common = "common"
-    uncommon = "uncommon"
-    rare = "rare"
-    epic = "epic"
-    legendary = "legendary"
-
-# NFT metadata modeli
-class NFTMetadata(BaseModel):
-    id: int
-    category: str
-    level: int
-    name: str
-    video: str
-    rarity: NFTRarity
-
-# Örnek NFT metadata verileri
-nft_metadata = [
-    {
-        "id": 1,
-        "category": "Watcher",
-        "level": 1,
-        "name": "Watcher Seviye 1",
-        "video": "https://arayis-evreni.siyahkare.com/assets/nft/NFT-watcher-1.mp4",
-        "rarity": "common"
-    },
-    {
-        "id": 2,
-        "category": "Watcher",
-        "level": 2,
-        "name": "Watcher Seviye 2",
-        "video": "https://arayis-evreni.siyahkare.com/assets/nft/NFT-watcher-2.mp4",
-        "rarity": "uncommon"
-    },
-    {
-        "id": 3,
-        "category": "Warrior",
-        "level": 1,
-        "name": "Warrior Seviye 1",
-        "video": "https://arayis-evreni.siyahkare.com/assets/nft/NFT-warrior-1.mp4",
-        "rarity": "common"
-    },
-    {
-        "id": 4,
-        "category": "Warrior",
-        "level": 2,
-        "name": "Warrior Seviye 2",
-        "video": "https://arayis-evreni.siyahkare.com/assets/nft/NFT-warrior-2.mp4",
-        "rarity": "uncommon"
-    },
-    {
-        "id": 5,
-        "category": "Oracle",
-        "level": 1,
-        "name": "Oracle Seviye 1",
-        "video": "https://arayis-evreni.siyahkare.com/assets/nft/NFT-oracle-1.mp4",
-        "rarity": "rare"
-    },
-    {
-        "id": 6,
-        "category": "Guardian",
-        "level": 1,
-        "name": "Guardian Seviye 1",
-        "video": "https://arayis-evreni.siyahkare.com/assets/nft/NFT-guardian-1.mp4",
-        "rarity": "epic"
-    },
-    {
-        "id": 7,
-        "category": "Flirt",
-        "level": 1,
-        "name": "Flirt Seviye 1", 
-        "video": "https://arayis-evreni.siyahkare.com/assets/nft/NFT-flirt-1.mp4",
-        "rarity": "rare"
-    },
-    {
-        "id": 8,
-        "category": "Hacker",
-        "level": 1,
-        "name": "Hacker Seviye 1",
-        "video": "https://arayis-evreni.siyahkare.com/assets/nft/NFT-hacker-1.mp4",
-        "rarity": "uncommon"
-    },
-    {
-        "id": 9,
-        "category": "City",
-        "level": 1,
-        "name": "City Seviye 1",
-        "video": "https://arayis-evreni.siyahkare.com/assets/nft/NFT-city-1.mp4",
-        "rarity": "legendary"
-    },
-    {
-        "id": 10,
-        "category": "DAO",
-        "level": 1,
-        "name": "DAO Seviye 1",
-        "video": "https://arayis-evreni.siyahkare.com/assets/nft/NFT-DAO-1.mp4",
-        "rarity": "epic"
-    }
-]
-
 # TODO: /nft/buy endpoint'i
 # TODO: /gallery/{uid} endpoint'i (Kullanıcının NFT'lerini listele)
-# TODO: Satıştaki NFT'leri listeleme endpoint'i
 
 # --- Metadata API Endpoints (eski /nft endpoint'leri) ---
+# Metadata, `generate_nft_metadata.py` tarafından veritabanından üretilen katalogdan
+# (nft_metadata.store) sunulur. Aynı endpoint'ler geriye dönük uyumluluk için
+# `metadata_router` üzerinden /nft önekiyle de yayınlanır.
 
-# Tüm NFT metadatalarını listeleyen endpoint (eski nft.py'den gelen)
-@router.get("/list", response_model=List[NFTMetadata], tags=["NFT Metadata"])
-async def list_nfts():
-    """
-    Tüm NFT'lerin metadata'larını listeler.
-    """
-    return nft_metadata
+metadata_router = APIRouter()
 
-# ID'ye göre NFT metadata getiren endpoint (eski nft.py'den gelen)
-@router.get("/{id}", response_model=NFTMetadata, tags=["NFT Metadata"])
-async def get_nft_metadata_by_id(id: int):
+def _json(content: bytes) -> Response:
+    return Response(content=content, media_type="application/json")
+
+def _metadata_response(id: int) -> Response:
+    content = nft_metadata.store.serialized(id)
+    if content is None:
+        # NFT bulunamadığında 404 hatası dön
+        raise HTTPException(status_code=404, detail="NFT not found")
+    return _json(content)
+
+# Tüm NFT metadatalarını listeleyen endpoint (eski nft.py'den gelen)
+# Yanıt, depoda önceden doğrulanmış ve serileştirilmiş olarak tutulur.
+@router.get("/list", response_model=List[schemas.NFTMetadata], tags=["NFT Metadata"])
+@metadata_router.get("/list", response_model=List[schemas.NFTMetadata])
+async def list_nfts(
+    category: Optional[str] = Query(None, description="Kategori filtresi (örn: Watcher)"),
+    level: Optional[int] = Query(None, description="Seviye filtresi"),
+    rarity: Optional[schemas.NFTRarity] = Query(None, description="Nadirlik filtresi")
+):
     """
-    Belirli bir NFT'nin metadata'sını ID parametresiyle döndürür.
+    Tüm NFT'lerin metadata'larını listeler. Kategori, seviye ve nadirlik ile filtrelenebilir.
     """
-    for nft in nft_metadata:
-        if nft["id"] == id:
-            return nft
-    
-    # NFT bulunamadığında 404 hatası dön
-    raise HTTPException(status_code=404, detail="NFT not found")
+    return _json(nft_metadata.store.serialized_list(category=category, level=level, rarity=rarity))
 
 # Tüm NFT metadatalarını listeleyen endpoint (eski nfts.py'deki aynı endpoint)
-@router.get("/metadata/list", response_model=List[NFTMetadata], tags=["NFT Metadata"])
-async def list_nft_metadata():
+@router.get("/metadata/list", response_model=List[schemas.NFTMetadata], tags=["NFT Metadata"])
+async def list_nft_metadata(
+    category: Optional[str] = Query(None, description="Kategori filtresi (örn: Watcher)"),
+    level: Optional[int] = Query(None, description="Seviye filtresi"),
+    rarity: Optional[schemas.NFTRarity] = Query(None, description="Nadirlik filtresi")
+):
     """
     Tüm NFT'lerin metadata'larını listeler.
     """
-    return nft_metadata
+    return _json(nft_metadata.store.serialized_list(category=category, level=level, rarity=rarity))
 
 # ID'ye göre NFT metadata getiren endpoint (eski nfts.py'deki aynı endpoint)
-@router.get("/metadata/{id}", response_model=NFTMetadata, tags=["NFT Metadata"])
+@router.get("/metadata/{id}", response_model=schemas.NFTMetadata, tags=["NFT Metadata"])
 async def get_nft_metadata(id: int):
     """
     Belirli bir NFT'nin metadata'sını ID parametresiyle döndürür.
     """
-    for nft in nft_metadata:
-        if nft["id"] == id:
-            return nft
-    
-    # NFT bulunamadığında 404 hatası dön
-    raise HTTPException(status_code=404, detail="NFT not found")
+    return _metadata_response(id)
 
 # --- Veritabanı NFT Endpoints (eski /nfts endpoint'leri) ---
 
+def _parse_category(category: Optional[str]) -> Optional[models.NFTCategory]:
+    if category is None:
+        return None
+    # Enum değerleri karışık büyük/küçük harfli olduğundan eşleştirme harf duyarsızdır
+    for member in models.NFTCategory:
+        if member.value.lower() == category.lower():
+            return member
+    raise HTTPException(
+        status_code=400,
+        detail=f"Geçersiz kategori. Geçerli değerler: {[c.value for c in models.NFTCategory]}"
+    )
+
+def _catalog_page(
+    db: Session,
+    response: Response,
+    category: Optional[str],
+    min_price: Optional[int],
+    max_price: Optional[int],
+    sort: str,
+    cursor: Optional[str],
+    limit: int,
+    skip: int = 0,
+    active_only: bool = True
+):
+    """
+    Katalog sayfasını döndürür. Sonraki sayfanın imleci `X-Next-Cursor`, filtreye
+    uyan toplam NFT sayısı `X-Total-Count` başlığında iletilir; gövde liste olarak kalır.
+    """
+    category_enum = _parse_category(category)
+    try:
+        if skip and not cursor:
+            # Geriye dönük uyumluluk: skip verilmişse eski OFFSET davranışı
+            nfts = crud.get_all_nfts(db, category=category_enum, skip=skip, limit=limit, active_only=active_only)
+            next_cursor = None
+        else:
+            nfts, next_cursor = crud.get_nft_catalog(
+                db, category=category_enum, min_price=min_price, max_price=max_price,
+                active_only=active_only, sort=sort, cursor=cursor, limit=limit
+            )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    total = crud.count_nfts(db, category=category_enum, min_price=min_price, max_price=max_price, active_only=active_only)
+    response.headers["X-Total-Count"] = str(total)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return nfts
+
 @router.get("/all", response_model=List[schemas.NFT])
 async def read_all_nfts(
+    response: Response,
     category: Optional[str] = None,
-    skip: int = 0, 
-    limit: int = 100,
+    min_price: Optional[int] = Query(None, ge=0, description="En düşük fiyat (Stars)"),
+    max_price: Optional[int] = Query(None, ge=0, description="En yüksek fiyat (Stars)"),
+    active_only: bool = True,
+    sort: str = Query("price", description="Sıralama: price veya newest"),
+    cursor: Optional[str] = Query(None, description="Önceki yanıttaki X-Next-Cursor değeri"),
+    skip: int = 0,
+    limit: int = Query(100, ge=1, le=100),
     current_user: models.User = Depends(auth.get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """
-    Tüm NFT'leri listeler. İsteğe bağlı olarak kategori filtresi uygulanabilir.
+    Tüm NFT'leri listeler. Kategori, fiyat aralığı ve aktiflik filtresi uygulanabilir.
     """
-    nfts = crud.get_all_nfts(db=db, category=category, skip=skip, limit=limit)
-    return nfts
+    return _catalog_page(
+        db, response, category, min_price, max_price, sort, cursor, limit,
+        skip=skip, active_only=active_only
+    )
 
 @router.get("/details/{nft_id}", response_model=schemas.NFT)
 async def read_nft_details(
@@ -244,7 +204,7 @@ async def buy_nft(
             remaining_stars=result.stars
         )
     except Exception as e:
-        print(f"Error buying NFT {request.nft_id} for user {current_user.id}: {e}")
+        logger.exception(f"Error buying NFT {request.nft_id} for user {current_user.id}")
         raise HTTPException(status_code=500, detail="NFT satın alınırken bir hata oluştu.")
 
 @router.post("/mint", response_model=schemas.BuyNFTResponse)
@@ -278,58 +238,26 @@ async def mint_nft(
             remaining_stars=current_user.stars
         )
     except Exception as e:
-        print(f"Error minting NFT {request.nft_id} for user {current_user.id}: {e}")
+        logger.exception(f"Error minting NFT {request.nft_id} for user {current_user.id}")
         raise HTTPException(status_code=500, detail="NFT mint edilirken bir hata oluştu.")
 
 # Ana NFT listesi endpoint'i
 @router.get("/", response_model=List[schemas.NFT])
 def read_nfts(
-    db: Session = Depends(get_db),
+    response: Response,
+    category: Optional[str] = None,
+    min_price: Optional[int] = Query(None, ge=0, description="En düşük fiyat (Stars)"),
+    max_price: Optional[int] = Query(None, ge=0, description="En yüksek fiyat (Stars)"),
+    sort: str = Query("price", description="Sıralama: price veya newest"),
+    cursor: Optional[str] = Query(None, description="Önceki yanıttaki X-Next-Cursor değeri"),
     skip: int = 0,
-    limit: int = 100
+    limit: int = Query(100, ge=1, le=100),
+    db: Session = Depends(get_db)
 ):
     """
-    Tüm NFT'leri listeler.
+    Satıştaki NFT'leri keyset sayfalama ile listeler.
     """
-    # models.NFTCategory enum'undan kategoriler alınıyor
-    categories = [
-        models.NFTCategory.WATCHER, 
-        models.NFTCategory.WARRIOR, 
-        models.NFTCategory.ORACLE, 
-        models.NFTCategory.GUARDIAN, 
-        models.NFTCategory.FLIRT, 
-        models.NFTCategory.HACKER,
-        models.NFTCategory.CITY,
-        models.NFTCategory.DAO
-    ]
-    
-    nfts = []
-    for i in range(10):
-        category_index = i % len(categories)
-        level = (i % 3) + 1  # 1, 2, veya 3
-        category = categories[category_index]
-        
-        # Video URL'si
-        video_path = f"https://arayis-evreni.siyahkare.com/assets/nft/NFT-{category.lower()}-{level}.mp4"
-        # Aynı URL'yi resim için de kullan (uzantı olmadan)
-        image_path = f"https://arayis-evreni.siyahkare.com/assets/nft/NFT-{category.lower()}-{level}"
-        
-        nft = schemas.NFT(
-            id=i+1,
-            name=f"{category} Level {level}",
-            description=f"A {category} NFT at level {level}",
-            video_url=video_path,
-            image_url=image_path,
-            category=category,
-            price_stars=(i+1) * 100,
-            total_supply=50 - (i * 3),
-            mintable=i < 5,  # İlk 5 mint edilebilir
-            is_active=True,
-            created_at=datetime.now()
-        )
-        nfts.append(nft)
-    
-    return nfts
+    return _catalog_page(db, response, category, min_price, max_price, sort, cursor, limit, skip=skip)
 
 # Placeholder endpoint için de aynı düzeltmeyi yapalım
 @router.get("/placeholder", response_model=List[schemas.NFT])
@@ -376,5 +304,15 @@ def read_nfts_placeholder(skip: int = 0, limit: int = 10, db: Session = Depends(
     
     return nfts
 
+# Tek parçalı /{id} yolu /all, /user-nfts gibi statik yolları gölgelememesi için en sonda tanımlanır
+# ID'ye göre NFT metadata getiren endpoint (eski nft.py'den gelen)
+@router.get("/{id}", response_model=schemas.NFTMetadata, tags=["NFT Metadata"])
+@metadata_router.get("/{id}", response_model=schemas.NFTMetadata)
+async def get_nft_metadata_by_id(id: int):
+    """
+    Belirli bir NFT'nin metadata'sını ID parametresiyle döndürür.
+    """
+    return _metadata_response(id)
+
 # Logger mesajı
 logger.info("⚙️ NFT API endpoints ready") 
\ No newline at end of file
@@ -0,0 +1,29 @@
+# backend/routers/search.py
+# Görev, NFT ve rozetlerde tam metin arama. Dizin ve sorgular search.py'de.
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+import schemas, models, auth
+import search
+from database import get_db
+
+router = APIRouter()
+
+@router.get("/search", response_model=schemas.SearchResponse, summary="Search Missions, NFTs and Badges")
+async def search_catalog(
+    q: str = Query(..., min_length=2, max_length=100, description="Aranacak metin (Türkçe harf farkları yok sayılır)"),
+    kind: Optional[str] = Query(None, pattern="^(mission|nft|badge)$", description="Yalnızca bu türde ara"),
+    limit: int = Query(20, ge=1, le=50),
+    offset: int = Query(0, ge=0, le=1000),
+    current_user: models.User = Depends(auth.get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Aktif görev, NFT ve rozetleri alaka sırasıyla döndürür. VIP görevler yalnızca
+    VIP erişimi olan kullanıcılara görünür. Son kelime önek olarak aranır.
+    """
+    audiences = ("public", "vip") if current_user.has_vip_access else ("public",)
+    items, has_more = search.search_documents(db, q, kind=kind, audiences=audiences, limit=limit, offset=offset)
+    return {"query": q, "items": items, "limit": limit, "offset": offset, "has_more": has_more}
@@ -1,134 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException, Body, status
+from fastapi import APIRouter, Depends, HTTPException, Body, Query, status
 from sqlalchemy.orm import Session
+import logging
 from typing import List, Annotated, Dict, Any
-from datetime import timedelta, datetime # datetime import eklendi
+from datetime import timedelta, datetime, timezone # datetime import eklendi
 from sqlalchemy.sql import func
 
 # crud, models, schemas importları eklenecek
-import schemas, auth, crud, models 
+import schemas, auth, crud, models, metrics, tasks, xp_buffer
+import anticheat
 from database import get_db
 
-router = APIRouter()
-
-# XP eşikleri
-XP_THRESHOLDS = {
-    1: 0,    # 0-100
-    2: 101,  # 101-250
-    3: 251,  # 251-500
-}
-
-def calculate_level_from_xp(xp: int) -> int:
-    """
-    XP değerine göre seviye hesaplar
-    - Level 1: 0-100
-    - Level 2: 101-250
-    - Level 3: 251-500
-    - Level 4+: XP / 100 (yuvarlanmış)
-    """
-    if xp <= 100:
-        return 1
-    elif xp <= 250:
-        return 2
-    elif xp <= 500:
-        return 3
-    else:
-        # Level 4+ için XP / 100 yuvarlanmış değeri
-        return max(4, round(xp / 100))
-
-# TODO: /profil/{uid} endpoint'i - EKLENDI
-@router.get("/{uid}", response_model=schemas.UserProfile)
-async def get_user_profile(uid: str, db: Session = Depends(get_db)):
-    """
-    Kullanıcı profil bilgilerini getirir
-    """
-    try:
-        # Demo mod için kullanıcı oluştur
-        if uid == "demo123" or uid == "123456":
-            return {
-                "id": 12345,
-                "telegram_id": 0,
-                "username": "demo123",
-                "first_name": "Demo",
-                "xp": 750,
-                "level": 3,
-                "stars": 500,
-                "stars_enabled": True,
-                "has_vip_access": False,
-                "created_at": datetime.now().isoformat(),
-                "consecutive_login_days": 5,
-                "mission_streak": 3,
-                "invited_users_count": 2,
-                "badges": [
-                    {
-                        "badge_id": 1,
-                        "badge_name": "Yeni Üye",
-                        "badge_image_url": "/badges/welcome-badge.png", 
-                        "earned_at": datetime.now().isoformat()
-                    },
-                    {
-                        "badge_id": 2,
-                        "badge_name": "İlk Görev",
-                        "badge_image_url": "/badges/mission-badge.png",
-                        "earned_at": datetime.now().isoformat()
-                    },
-                    {
-                        "badge_id": 3,
-                        "badge_name": "Flört Ustası",
-                        "badge_image_url": "/badges/flirt-badge.png",
-                        "earned_at": datetime.now().isoformat()
-                    },
-                    {
-                        "badge_id": 4,
-                        "badge_name": "Analist",
-                        "badge_image_url": "/badges/analyst-badge.png",
-                        "earned_at": datetime.now().isoformat()
-                    }
-                ],
-                "completed_missions": [
-                    {
-                        "mission_id": 1,
-                        "completed_at": datetime.now().isoformat()
-                    }
-                ],
-                "mission_stories": [
-                    {
-                        "id": 1,
-                        "mission_id": 1,
-                        "story_text": "Demo kullanıcısı ilk görevini tamamladı!",
-                        "timestamp": datetime.now().isoformat()
-                    }
-                ],
-                "nft_count": 2
-            }
-        
-        # Sayısal ID mi kontrol et
-        if uid.isdigit():
-            user = crud.get_user_by_telegram_id(db, int(uid))
-        else:
-            # Username ile bulma
-            user = crud.get_user_by_username(db, uid)
+logger = logging.getLogger(__name__)
 
-        if not user:
-            raise HTTPException(status_code=404, detail="Kullanıcı bulunamadı")
+def _as_utc(value: datetime) -> datetime:
+    # SQLite zaman damgalarını saat dilimi olmadan (UTC) döndürür
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
 
-        # Profil bilgileri
-        user_badges = crud.get_user_badges(db, user.id)
-        completed_missions = crud.get_user_missions(db, user.id)
-        mission_stories = crud.get_user_mission_stories(db, user.id)
-        nft_count = crud.get_user_nft_count(db, user.id)
-
-        # Profil döndür
-        return {
-            **user.__dict__,
-            "badges": user_badges,
-            "completed_missions": completed_missions,
-            "mission_stories": mission_stories,
-            "nft_count": nft_count
-        }
-    except Exception as e:
-        # Hata durumunda
-        print(f"Profil yüklenirken hata: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+router = APIRouter()
 
 # TODO: /wallet/{uid} endpoint'i
 # TODO: /stars/use endpoint'i
@@ -175,16 +63,17 @@ async def login_for_access_token(
             inviter_id=inviter_id
         )
         user = crud.create_user(db=db, user_data=user_create_data)
-        print(f"New user created: {user.telegram_id} (Invited by: {inviter_id})")
+        logger.info("New user created", extra={"telegram_id": user.telegram_id, "inviter_id": inviter_id})
+        metrics.AUTH_LOGINS.inc(labels=("new",))
     else:
         user.username = user_info.username
         user.first_name = user_info.first_name
-        db.commit()
-        db.refresh(user)
-        print(f"User login: {user.telegram_id}")
+        logger.info("User login", extra={"telegram_id": user.telegram_id})
+        metrics.AUTH_LOGINS.inc(labels=("existing",))
 
-    # Günlük giriş istatistiklerini güncelle
-    crud.update_user_login_stats(db=db, user=user)
+    # Günlük giriş istatistikleri arka planda güncellenir; ad değişikliğiyle aynı commit'te kuyruğa girer
+    tasks.enqueue(db, "record_login", user_id=user.id, at=datetime.now(timezone.utc).isoformat())
+    db.commit()
 
     # JWT Token oluştur
     access_token_expires = timedelta(minutes=auth.ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -201,11 +90,12 @@ async def read_users_me(
     db: Session = Depends(get_db)
 ):
     """Gets profile information for the currently authenticated user."""
+    xp_buffer.overlay(db, current_user)
     stories = crud.get_mission_stories_for_user(db, user_id=current_user.id)
-    user_profile = schemas.UserProfile.from_orm(current_user)
+    user_profile = schemas.UserProfile.model_validate(current_user)
     # badge ve completed_missions ilişkileri zaten user objesinde olmalı (lazy/eager loading)
     # Story'leri ekle
-    user_profile.mission_stories = [schemas.MissionStorySchema.from_orm(s) for s in stories]
+    user_profile.mission_stories = [schemas.MissionStorySchema.model_validate(s) for s in stories]
     return user_profile
 
 
@@ -215,6 +105,7 @@ async def read_my_wallet(
     db: Session = Depends(get_db)
 ):
     """Gets wallet information (Stars, NFTs) for the currently authenticated user."""
+    xp_buffer.overlay(db, current_user)
     # Wallet şemasını direkt user ve ilişkili nfts ile doldur
     # UserNFT ilişkisinden UserNFTSchema'ya dönüşüm
     user_nfts_schema = []
@@ -265,6 +156,25 @@ async def get_my_invite_info(
     """Gets the invite link and info for the current user."""
     return crud.get_invite_info(user=current_user)
 
+@router.get("/me/invites", response_model=schemas.InviteNetworkResponse)
+async def get_my_invites(
+    depth: int = Query(1, ge=1, le=crud.MAX_INVITE_DEPTH, description="1 = doğrudan davet edilenler"),
+    limit: int = Query(50, ge=1, le=200),
+    offset: int = Query(0, ge=0),
+    current_user: models.User = Depends(auth.get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Kullanıcının davet ağacı: istenen derecedeki davetliler ve derece başına
+    davetli sayıları (davet kapanış tablosundan, ağaç dolaşılmadan).
+    """
+    return schemas.InviteNetworkResponse(
+        depth=depth,
+        invitees=crud.get_invitees_at_depth(db, user_id=current_user.id, depth=depth, limit=limit, offset=offset),
+        depth_counts=crud.get_invite_depth_counts(db, user_id=current_user.id),
+        network_size=current_user.invite_subtree_size or 0,
+    )
+
 
 # Kullanıcının cüzdan bilgilerini kullanıcı adına göre döndüren endpoint
 @router.get("/wallet/{uid}", response_model=schemas.UserWallet)
@@ -345,7 +255,8 @@ async def mint_nft(
     if existing_nft:
         raise HTTPException(status_code=400, detail=f"Kullanıcı bu NFT'ye zaten sahip: {nft.name}")
     
-    # Yeterli Stars bakiyesini kontrol et
+    # Yeterli Stars bakiyesini kontrol et (bekleyen kazanımlar önce uygulanır)
+    xp_buffer.settle(db, user)
     if user.stars < nft.price_stars:
         return {
             "success": False,
@@ -414,6 +325,9 @@ async def complete_mission(
         user = crud.get_user_by_username(db, username=uid)
         if not user:
             raise HTTPException(status_code=404, detail=f"Kullanıcı bulunamadı: {uid}")
+
+    # Hız kuralıyla engellenen kullanıcı (throttle modu; bellekte, DB okumadan)
+    anticheat.enforce(user.id)
     
     # Görevi bul
     mission = db.query(models.Mission).filter(models.Mission.id == gorev_id).first()
@@ -421,7 +335,7 @@ async def complete_mission(
         raise HTTPException(status_code=404, detail=f"Görev bulunamadı: {gorev_id}")
     
     # Görevin kullanıcı seviyesine uygun olup olmadığını kontrol et
-    user_level = calculate_level_from_xp(user.xp)
+    user_level = user.level
     if user_level < mission.required_level:
         raise HTTPException(
             status_code=400, 
@@ -447,15 +361,12 @@ async def complete_mission(
                 detail=f"Bu görev için {nft_name} NFT'sine sahip olmanız gerekiyor"
             )
     
+    # Bugün ve daha önce tamamlanma kontrolleri görev durum satırından (birincil anahtar) okunur
+    now = datetime.now(timezone.utc)
+    state = crud.get_mission_state(db, user_id=user.id, mission_id=gorev_id)
+    
     # Görevin bugün zaten tamamlanıp tamamlanmadığını kontrol et
-    today = func.date(func.now())
-    mission_completed_today = db.query(models.UserMissionLog).filter(
-        models.UserMissionLog.user_id == user.id,
-        models.UserMissionLog.mission_id == gorev_id,
-        func.date(models.UserMissionLog.completion_time) == today
-    ).first() is not None
-    
-    if mission_completed_today:
+    if state and _as_utc(state.last_completed_at).date() == now.date():
         raise HTTPException(
             status_code=400, 
             detail="Bu görev bugün zaten tamamlandı"
@@ -463,12 +374,7 @@ async def complete_mission(
     
     # Görevin yeniden tamamlanabilir olup olmadığını kontrol et
     if mission.cooldown_hours == 0:  # 0 = tekrar edilemez
-        mission_ever_completed = db.query(models.UserMission).filter(
-            models.UserMission.user_id == user.id,
-            models.UserMission.mission_id == gorev_id
-        ).first() is not None
-        
-        if mission_ever_completed:
+        if state is not None:
             raise HTTPException(
                 status_code=400, 
                 detail="Bu görev daha önce tamamlandı ve tekrar edilemez"
@@ -476,13 +382,13 @@ async def complete_mission(
     
     # Önceki tüm kontroller geçildi, görevi tamamla
     
-    # XP ekle
+    # XP ekle (birleştirme açıksa arka planda toplu yazılır)
     xp_gained = mission.xp_reward
-    old_level = user_level
-    user.xp += xp_gained
+    old_level = xp_buffer.overlay(db, user).level
+    xp_buffer.credit(db, user, xp=xp_gained, reason="mission_completion")
     
-    # Streak güncelle
-    user.mission_streak += 1
+    # Streak güncelle (kopmuş seriler gece sıfırlama işinde sıfırlanır)
+    crud.record_mission_activity(user)
     
     # Görev tamamlama kaydı ekle
     user_mission = models.UserMission(
@@ -499,19 +405,17 @@ async def complete_mission(
     # Değişiklikleri kaydet
     db.add(user_mission)
     db.add(mission_log)
+    crud.record_mission_completion(db, user_id=user.id, mission_id=gorev_id, now=now)
     db.commit()
     db.refresh(user)
-    
-    # Yeni seviyeyi hesapla
-    new_level = calculate_level_from_xp(user.xp)
-    level_up = new_level > old_level
+    xp_buffer.overlay(db, user)
     
     return {
         "xp_gained": xp_gained,
         "streak": user.mission_streak,
-        "level_up": level_up,
+        "level_up": user.level > old_level,
         "current_xp": user.xp,
-        "current_level": new_level
+        "current_level": user.level
     }
 
 
@@ -541,19 +445,16 @@ async def get_user_missions(
     # Tüm aktif görevleri al
     missions = db.query(models.Mission).filter(models.Mission.is_active == True).all()
     
-    # Kullanıcının seviyesini hesapla
-    user_level = calculate_level_from_xp(user.xp)
+    user_level = user.level
     
-    # Kullanıcının tamamlamış olduğu görevleri al - son 24 saat içinde
-    completed_mission_ids = set()
-    one_day_ago = func.now() - timedelta(days=1)
-    completed_missions = db.query(models.UserMission).filter(
-        models.UserMission.user_id == user.id,
-        models.UserMission.completed_at > one_day_ago
-    ).all()
-    
-    for cm in completed_missions:
-        completed_mission_ids.add(cm.mission_id)
+    # Görev başına son tamamlanma zamanı durum tablosundan tek sorguda alınır
+    last_completed_at = {
+        mission_id: _as_utc(state.last_completed_at)
+        for mission_id, state in crud.get_mission_states(db, user_id=user.id).items()
+    }
+    # Kullanıcının son 24 saat içinde tamamladığı görevler
+    one_day_ago = datetime.now(timezone.utc) - timedelta(days=1)
+    completed_mission_ids = {mission_id for mission_id, at in last_completed_at.items() if at > one_day_ago}
     
     # Kullanıcının NFT'lerini al
     user_nft_ids = set()
@@ -561,6 +462,12 @@ async def get_user_missions(
     for un in user_nfts:
         user_nft_ids.add(un.nft_id)
     
+    # Gerekli NFT adları döngüden önce tek sorguda alınır
+    required_nft_ids = {m.required_nft_id for m in missions if m.required_nft_id}
+    nft_names = dict(
+        db.query(models.NFT.id, models.NFT.name).filter(models.NFT.id.in_(required_nft_ids)).all()
+    ) if required_nft_ids else {}
+
     # Kullanıcının erişebileceği görevleri filtrele ve cevap formatına dönüştür
     result = []
     for mission in missions:
@@ -586,21 +493,12 @@ async def get_user_missions(
                 unlocked = False
         
         # Görev için gerekli NFT varsa ismini al
-        required_nft_name = None
-        if mission.required_nft_id:
-            nft = db.query(models.NFT).filter(models.NFT.id == mission.required_nft_id).first()
-            if nft:
-                required_nft_name = nft.name
+        required_nft_name = nft_names.get(mission.required_nft_id) if mission.required_nft_id else None
         
         # Son tamamlanma zamanını al (eğer varsa)
         last_completed = None
-        last_completed_mission = db.query(models.UserMission).filter(
-            models.UserMission.user_id == user.id,
-            models.UserMission.mission_id == mission.id
-        ).order_by(models.UserMission.completed_at.desc()).first()
-        
-        if last_completed_mission:
-            last_completed = last_completed_mission.completed_at.isoformat()
+        if last_completed_at.get(mission.id):
+            last_completed = last_completed_at[mission.id].isoformat()
         
         # Görev detayları
         mission_details = {
@@ -629,11 +527,12 @@ async def get_user_missions(
 @router.get("/me", response_model=schemas.User)
 async def read_user_me(
     current_user: models.User = Depends(auth.get_current_active_user),
+    db: Session = Depends(get_db)
 ):
     """
     Giriş yapmış kullanıcının temel bilgilerini getirir.
     """
-    return current_user
+    return xp_buffer.overlay(db, current_user)
 
 @router.get("/profile", response_model=schemas.UserProfile)
 async def read_user_profile(
@@ -665,53 +564,7 @@ async def check_daily_bonus_status(
     """
     Kullanıcının günlük bonus durumunu kontrol eder.
     """
-    last_claim = crud.get_last_daily_bonus_claim(db=db, user_id=current_user.id)
-    
-    # 24 saatlik hesaplama
-    now = datetime.now()
-    can_claim = True
-    seconds_until_next = 0
-    
-    if last_claim:
-        next_claim_time = last_claim.claim_date + timedelta(days=1)
-        if now < next_claim_time:
-            can_claim = False
-            seconds_until_next = int((next_claim_time - now).total_seconds())
-    
-    # Ödül miktarları hesaplanır (streak'e göre artar)
-    current_streak = 0 if not last_claim else last_claim.day_streak
-    
-    if last_claim:
-        # Eğer son claim'den bu yana 48 saatten fazla geçtiyse streak sıfırlanır
-        streak_reset_time = last_claim.claim_date + timedelta(days=2)
-        if now > streak_reset_time and not can_claim:
-            current_streak = 0
-    
-    # Günlük ödüller (streak'e göre artar)
-    base_xp = 50
-    base_stars = 10
-    
-    # Her 5 günde bir artan ödüller
-    streak_multiplier = 1 + (current_streak // 5) * 0.2  # Her 5 günde %20 artış
-    
-    xp_reward = int(base_xp * streak_multiplier)
-    stars_reward = int(base_stars * streak_multiplier)
-    
-    # Uzun streak bonusu - NFT
-    streak_reward_nft = None
-    if current_streak + 1 in [7, 14, 30, 60, 90]:  # 7, 14, 30, 60, 90 günlük özel ödüller
-        special_nft = crud.get_streak_reward_nft(db=db, streak_day=current_streak + 1)
-        if special_nft:
-            streak_reward_nft = special_nft
-    
-    return schemas.DailyBonusStatus(
-        can_claim=can_claim,
-        current_streak=current_streak,
-        time_until_next_claim_seconds=seconds_until_next if not can_claim else None,
-        today_reward_xp=xp_reward if can_claim else None,
-        today_reward_stars=stars_reward if can_claim else None,
-        streak_reward_nft=streak_reward_nft if can_claim else None
-    )
+    return crud.get_daily_bonus_status(db, user=current_user)
 
 @router.post("/claim-daily-bonus", response_model=schemas.ClaimDailyBonusResponse)
 async def claim_daily_bonus(
@@ -721,77 +574,10 @@ async def claim_daily_bonus(
     """
     Günlük bonusu talep eder.
     """
-    # Önce durumu kontrol et
-    last_claim = crud.get_last_daily_bonus_claim(db=db, user_id=current_user.id)
-    
-    now = datetime.now()
-    can_claim = True
-    current_streak = 0
-    
-    if last_claim:
-        next_claim_time = last_claim.claim_date + timedelta(days=1)
-        if now < next_claim_time:
-            raise HTTPException(
-                status_code=400, 
-                detail="Günlük bonusu henüz talep edemezsiniz. Lütfen daha sonra tekrar deneyin."
-            )
-        
-        # Streak hesaplama - eğer son claim'den bu yana 48 saatten fazla geçtiyse sıfırlanır
-        streak_reset_time = last_claim.claim_date + timedelta(days=2)
-        if now > streak_reset_time:
-            current_streak = 0
-        else:
-            current_streak = last_claim.day_streak
-    
-    # Yeni streak değeri
-    new_streak = current_streak + 1
-    
-    # Ödül hesaplama
-    base_xp = 50
-    base_stars = 10
-    streak_multiplier = 1 + (current_streak // 5) * 0.2
-    
-    xp_reward = int(base_xp * streak_multiplier)
-    stars_reward = int(base_stars * streak_multiplier)
-    
-    # Kullanıcıya XP ve Stars ekle
-    user_updated = crud.add_user_xp_and_stars(
-        db=db, 
-        user_id=current_user.id, 
-        xp_amount=xp_reward, 
-        stars_amount=stars_reward,
-        reason="daily_bonus"
-    )
-    
-    # Talep kaydı oluştur
-    claim = models.DailyBonusClaim(
-        user_id=current_user.id,
-        day_streak=new_streak
-    )
-    db.add(claim)
-    
-    # Özel gün NFT ödülü
-    claimed_nft = None
-    if new_streak in [7, 14, 30, 60, 90]:
-        special_nft = crud.get_streak_reward_nft(db=db, streak_day=new_streak)
-        if special_nft:
-            user_nft = crud.add_nft_to_user(
-                db=db, 
-                user_id=current_user.id, 
-                nft_id=special_nft.id, 
-                price=0
-            )
-            claimed_nft = special_nft
-    
-    db.commit()
-    
-    return schemas.ClaimDailyBonusResponse(
-        message=f"Günlük bonus başarıyla alındı! {new_streak} günlük seri devam ediyor.",
-        claimed_xp=xp_reward,
-        claimed_stars=stars_reward,
-        claimed_nft=claimed_nft,
-        new_streak=new_streak
-    )
+    try:
+        return crud.claim_daily_bonus(db, user=current_user)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/invite-info", response_model=schemas.InviteInfoResponse)
 async def get_invite_info(
@@ -801,15 +587,7 @@ async def get_invite_info(
     """
     Kullanıcının davet bilgilerini getirir.
     """
-    successful_invites = current_user.invited_users_count
-    invite_link = f"https://t.me/ArayisBot?start={current_user.telegram_id}"
-    reward_per_invite = 25  # Her davet için sabit ödül
-    
-    return schemas.InviteInfoResponse(
-        invite_link=invite_link,
-        successful_invites=successful_invites,
-        reward_per_invite_stars=reward_per_invite
-    )
+    return crud.get_invite_info(user=current_user)
 
 @router.post("/use-stars", response_model=schemas.UseStarsResponse)
 async def use_stars(
@@ -823,6 +601,7 @@ async def use_stars(
     if not current_user.stars_enabled:
         raise HTTPException(status_code=400, detail="Stars özelliği hesabınızda aktif değil.")
     
+    xp_buffer.settle(db, current_user)
     if current_user.stars < request.amount:
         raise HTTPException(
             status_code=400, 
@@ -851,5 +630,101 @@ async def use_stars(
         )
     except Exception as e:
         db.rollback()
-        print(f"Error using stars for user {current_user.id}: {e}")
-        raise HTTPException(status_code=500, detail="Stars kullanılırken bir hata oluştu.") 
\ No newline at end of file
+        logger.exception(f"Error using stars for user {current_user.id}")
+        raise HTTPException(status_code=500, detail="Stars kullanılırken bir hata oluştu.") 
+
+# Tek parçalı /{uid} yolu /daily-bonus, /me gibi statik yolları gölgelememesi için en sonda tanımlanır
+# TODO: /profil/{uid} endpoint'i - EKLENDI
+@router.get("/{uid}", response_model=schemas.UserProfile)
+async def get_user_profile(uid: str, db: Session = Depends(get_db)):
+    """
+    Kullanıcı profil bilgilerini getirir
+    """
+    try:
+        # Demo mod için kullanıcı oluştur
+        if uid == "demo123" or uid == "123456":
+            return {
+                "id": 12345,
+                "telegram_id": 0,
+                "username": "demo123",
+                "first_name": "Demo",
+                "xp": 750,
+                "level": 3,
+                "stars": 500,
+                "stars_enabled": True,
+                "has_vip_access": False,
+                "created_at": datetime.now().isoformat(),
+                "consecutive_login_days": 5,
+                "mission_streak": 3,
+                "invited_users_count": 2,
+                "badges": [
+                    {
+                        "badge_id": 1,
+                        "badge_name": "Yeni Üye",
+                        "badge_image_url": "/badges/welcome-badge.png", 
+                        "earned_at": datetime.now().isoformat()
+                    },
+                    {
+                        "badge_id": 2,
+                        "badge_name": "İlk Görev",
+                        "badge_image_url": "/badges/mission-badge.png",
+                        "earned_at": datetime.now().isoformat()
+                    },
+                    {
+                        "badge_id": 3,
+                        "badge_name": "Flört Ustası",
+                        "badge_image_url": "/badges/flirt-badge.png",
+                        "earned_at": datetime.now().isoformat()
+                    },
+                    {
+                        "badge_id": 4,
+                        "badge_name": "Analist",
+                        "badge_image_url": "/badges/analyst-badge.png",
+                        "earned_at": datetime.now().isoformat()
+                    }
+                ],
+                "completed_missions": [
+                    {
+                        "mission_id": 1,
+                        "completed_at": datetime.now().isoformat()
+                    }
+                ],
+                "mission_stories": [
+                    {
+                        "id": 1,
+                        "mission_id": 1,
+                        "story_text": "Demo kullanıcısı ilk görevini tamamladı!",
+                        "timestamp": datetime.now().isoformat()
+                    }
+                ],
+                "nft_count": 2
+            }
+        
+        # Sayısal ID mi kontrol et
+        if uid.isdigit():
+            user = crud.get_user_by_telegram_id(db, int(uid))
+        else:
+            # Username ile bulma
+            user = crud.get_user_by_username(db, uid)
+
+        if not user:
+            raise HTTPException(status_code=404, detail="Kullanıcı bulunamadı")
+
+        # Profil bilgileri
+        user_badges = crud.get_user_badges(db, user.id)
+        completed_missions = crud.get_user_missions(db, user.id)
+        mission_stories = crud.get_user_mission_stories(db, user.id)
+        nft_count = crud.get_user_nft_count(db, user.id)
+
+        # Profil döndür
+        return {
+            **user.__dict__,
+            "badges": user_badges,
+            "completed_missions": completed_missions,
+            "mission_stories": mission_stories,
+            "nft_count": nft_count
+        }
+    except Exception as e:
+        # Hata durumunda
+        logger.exception("Profil yüklenirken hata")
+        raise HTTPException(status_code=500, detail=str(e))
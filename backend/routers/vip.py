@@ -1,12 +1,18 @@
 # backend/routers/vip.py
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
+import logging
 from typing import List
 
 # crud, models, schemas importları
 import schemas, crud, models, auth
+import catalog
+import tasks
+import xp_buffer
 from database import get_db
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(
     prefix="/vip", # Bu router altındaki tüm endpointler /api/v1/vip ile başlar
     tags=["VIP"],
@@ -63,7 +69,7 @@ async def unlock_vip_access_endpoint(
     except ValueError as e: # use_stars_for_action'dan gelebilir
          raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        print(f"Error unlocking VIP for user {current_user.id}: {e}")
+        logger.exception(f"Error unlocking VIP for user {current_user.id}")
         # Hata durumunda transaction yönetimi önemli.
         # Eğer use_stars commit yaptıysa ama grant_vip yapamadıysa sorun olabilir.
         # db.rollback() gerekebilir. crud fonksiyonları içinde transaction yönetimi daha iyi olabilir.
@@ -105,7 +111,8 @@ async def unlock_vip_access(
     # Sabit VIP fiyatı
     vip_price = 500
     
-    # Yeterli Stars var mı?
+    # Yeterli Stars var mı? (bekleyen kazanımlar önce uygulanır)
+    xp_buffer.settle(db, current_user)
     if current_user.stars < vip_price:
         raise HTTPException(
             status_code=400, 
@@ -129,17 +136,10 @@ async def unlock_vip_access(
             description=f"VIP erişimi için {vip_price} Stars harcandı"
         )
         
-        db.commit()
+        # VIP hediye NFT'si arka planda verilir; ödeme ile aynı commit'te kuyruğa girer
+        tasks.enqueue(db, "grant_vip_nft", user_id=current_user.id)
         
-        # VIP olduğunda özel NFT verme
-        try:
-            vip_nft = crud.get_vip_nft(db=db)
-            if vip_nft:
-                crud.add_nft_to_user(db=db, user_id=current_user.id, nft_id=vip_nft.id, price=0)
-                db.commit()
-        except Exception as e:
-            print(f"VIP NFT verme hatası: {e}")
-            # Ana işlemi etkilememesi için bu hatayı yutuyoruz
+        db.commit()
         
         return schemas.UnlockVipResponse(
             message="VIP erişim başarıyla açıldı!",
@@ -148,7 +148,7 @@ async def unlock_vip_access(
         )
     except Exception as e:
         db.rollback()
-        print(f"Error unlocking VIP for user {current_user.id}: {e}")
+        logger.exception(f"Error unlocking VIP for user {current_user.id}")
         raise HTTPException(status_code=500, detail="VIP erişimi açılırken bir hata oluştu.")
 
 @router.get("/vip-benefits", response_model=List[dict])
@@ -158,37 +158,4 @@ async def get_vip_benefits(
     """
     VIP avantajlarını listeler.
     """
-    benefits = [
-        {
-            "id": 1,
-            "title": "Özel Görevler",
-            "description": "Sadece VIP kullanıcılara özel görevlere erişim",
-            "icon": "crown"
-        },
-        {
-            "id": 2,
-            "title": "Premium NFT'ler",
-            "description": "Özel NFT koleksiyonlarına erişim",
-            "icon": "gem"
-        },
-        {
-            "id": 3,
-            "title": "Artırılmış Ödüller",
-            "description": "Tüm görevlerden %20 daha fazla XP ve Stars",
-            "icon": "trending-up"
-        },
-        {
-            "id": 4,
-            "title": "DAO Premium Oy",
-            "description": "Topluluk oylamalarında 5x oy gücü",
-            "icon": "vote"
-        },
-        {
-            "id": 5,
-            "title": "Öncelikli Destek",
-            "description": "Sorularınız için öncelikli destek hattı",
-            "icon": "headset"
-        }
-    ]
-    
-    return benefits 
\ No newline at end of file
+    return catalog.VIP_BENEFITS
@@ -1,9 +1,14 @@
-from pydantic import BaseModel, Field, ConfigDict
+import json
+
+from pydantic import BaseModel, Field, ConfigDict, field_validator
 from typing import List, Optional, Dict, Any
 from datetime import datetime
-from models import MissionType, NFTCategory, ProposalStatus, Badge as BadgeModel
+from models import MissionType, NFTCategory, ProposalStatus, BroadcastStatus, Badge as BadgeModel
 from enum import Enum
 
+# ORM nesnelerinden oluşturulan şemalar için ortak yapılandırma
+ORM_CONFIG = ConfigDict(from_attributes=True)
+
 # Base Schemas (Temel alanlar)
 class MissionBase(BaseModel):
     title: str
@@ -16,8 +21,6 @@ class MissionBase(BaseModel):
     is_vip: bool = False
     required_nft_id: Optional[int] = None
 
-    model_config = ConfigDict(from_attributes=True)
-
 class BadgeBase(BaseModel):
     name: str
     description: str
@@ -29,8 +32,6 @@ class BadgeBase(BaseModel):
     required_mission_id: Optional[int] = None
     is_active: bool = True
 
-    model_config = ConfigDict(from_attributes=True)
-
 class NFTBase(BaseModel):
     name: str
     description: str
@@ -42,22 +43,16 @@ class NFTBase(BaseModel):
     mintable: bool = False
     is_active: bool = True
 
-    model_config = ConfigDict(from_attributes=True)
-
 class DAOProposalBase(BaseModel):
     title: str
     description: str
     end_date: datetime
 
-    model_config = ConfigDict(from_attributes=True)
-
 class UserBase(BaseModel):
     telegram_id: int
     username: Optional[str] = None
     first_name: Optional[str] = None
 
-    model_config = ConfigDict(from_attributes=True)
-
 # Create Schemas (Oluşturma için)
 class MissionCreate(MissionBase):
     pass
@@ -82,7 +77,7 @@ class UserBadgeSchema(BaseModel):
     badge_image_url: str
     earned_at: datetime
 
-    model_config = ConfigDict(from_attributes=True)
+    model_config = ORM_CONFIG
 
 class UserNFTSchema(BaseModel):
     nft_id: int
@@ -91,13 +86,13 @@ class UserNFTSchema(BaseModel):
     purchase_date: datetime
     purchase_price_stars: int
 
-    model_config = ConfigDict(from_attributes=True)
+    model_config = ORM_CONFIG
 
 class UserMissionSchema(BaseModel):
     mission_id: int
     completed_at: datetime
 
-    model_config = ConfigDict(from_attributes=True)
+    model_config = ORM_CONFIG
 
 
 # Ana Okuma Şemaları
@@ -106,18 +101,18 @@ class Mission(MissionBase):
     created_at: datetime
     required_nft_name: Optional[str] = None
 
-    model_config = ConfigDict(from_attributes=True)
+    model_config = ORM_CONFIG
 
 class Badge(BadgeBase):
     id: int
 
-    model_config = ConfigDict(from_attributes=True)
+    model_config = ORM_CONFIG
 
 class NFT(NFTBase):
     id: int
     created_at: datetime
 
-    model_config = ConfigDict(from_attributes=True)
+    model_config = ORM_CONFIG
 
 class MissionStorySchema(BaseModel):
     id: int
@@ -125,7 +120,7 @@ class MissionStorySchema(BaseModel):
     story_text: str
     timestamp: datetime
 
-    model_config = ConfigDict(from_attributes=True)
+    model_config = ORM_CONFIG
 
 class User(UserBase):
     id: int
@@ -141,7 +136,7 @@ class User(UserBase):
     mission_streak: int = 0
     invited_users_count: int = 0
 
-    model_config = ConfigDict(from_attributes=True)
+    model_config = ORM_CONFIG
 
 # Detaylı profil ve cüzdan şemaları
 class UserProfile(User):
@@ -149,7 +144,7 @@ class UserProfile(User):
     completed_missions: List[UserMissionSchema] = []
     mission_stories: List[MissionStorySchema] = []
 
-    model_config = ConfigDict(from_attributes=True)
+    model_config = ORM_CONFIG
 
 
 class UserWallet(BaseModel):
@@ -160,8 +155,6 @@ class UserWallet(BaseModel):
     stars_enabled: bool
     nfts: List[UserNFTSchema] = []
 
-    model_config = ConfigDict(from_attributes=True)
-
 
 class DAOVoteSchema(BaseModel):
     id: int
@@ -171,7 +164,7 @@ class DAOVoteSchema(BaseModel):
     choice: bool
     voted_at: datetime
 
-    model_config = ConfigDict(from_attributes=True)
+    model_config = ORM_CONFIG
 
 class DAOProposal(DAOProposalBase):
     id: int
@@ -181,7 +174,7 @@ class DAOProposal(DAOProposalBase):
     total_yes_power: int = 0
     total_no_power: int = 0
 
-    model_config = ConfigDict(from_attributes=True)
+    model_config = ORM_CONFIG
 
 
 # Diğer Yardımcı Şemalar
@@ -196,6 +189,30 @@ class CompleteMissionResponse(BaseModel):
     streak_bonus_xp: Optional[int] = None
     story_generated: Optional[str] = None
 
+class BatchCompleteMissionItem(BaseModel):
+    mission_id: int
+    # İstemcinin görevi yaptığı an (çevrimdışı tekrar oynatma). Yalnızca sıralama ve
+    # eskilik kontrolü için kullanılır; cooldown ve kayıtlar sunucu zamanıyla
+    client_timestamp: Optional[datetime] = None
+
+class BatchCompleteMissionRequest(BaseModel):
+    items: List[BatchCompleteMissionItem] = Field(..., min_length=1, max_length=50)
+
+class BatchCompleteMissionItemResult(BaseModel):
+    mission_id: int
+    completed: bool
+    xp_gained: int = 0
+    streak_bonus_xp: int = 0
+    completed_at: Optional[datetime] = None
+    detail: Optional[str] = None  # Reddedilen öğe için neden
+
+class BatchCompleteMissionResponse(BaseModel):
+    results: List[BatchCompleteMissionItemResult]
+    completed_count: int
+    new_xp: int
+    new_level: int
+    streak: int
+
 class BuyNFTRequest(BaseModel):
     nft_id: int
 
@@ -227,8 +244,6 @@ class UserLoginData(BaseModel):
     is_premium: Optional[bool] = None
     photo_url: Optional[str] = None
 
-    model_config = ConfigDict(from_attributes=True)
-
 class InitData(BaseModel):
     query_id: Optional[str] = None
     user: Optional[UserLoginData] = None
@@ -241,7 +256,13 @@ class InitData(BaseModel):
     auth_date: int
     hash: str
 
-    model_config = ConfigDict(from_attributes=True)
+    # Telegram user/receiver/chat alanlarını URL-encoded JSON metni olarak gönderir
+    @field_validator("user", "receiver", "chat", mode="before")
+    @classmethod
+    def parse_json_fields(cls, value):
+        if isinstance(value, str):
+            return json.loads(value)
+        return value
 
 class Token(BaseModel):
     access_token: str
@@ -250,8 +271,6 @@ class Token(BaseModel):
 class TokenData(BaseModel):
     telegram_id: Optional[int] = None
 
-    model_config = ConfigDict(from_attributes=True)
-
 class DailyBonusStatus(BaseModel):
     can_claim: bool
     current_streak: int
@@ -260,22 +279,16 @@ class DailyBonusStatus(BaseModel):
     today_reward_stars: Optional[int] = None
     streak_reward_nft: Optional[NFT] = None
 
-    model_config = ConfigDict(from_attributes=True)
-
 class LeaderboardEntry(BaseModel):
     rank: int
     user_id: int
     username: Optional[str] = None
     value: int
 
-    model_config = ConfigDict(from_attributes=True)
-
 class LeaderboardResponse(BaseModel):
     category: str
     entries: List[LeaderboardEntry]
 
-    model_config = ConfigDict(from_attributes=True)
-
 class ClaimDailyBonusResponse(BaseModel):
     message: str
     claimed_xp: int
@@ -283,14 +296,26 @@ class ClaimDailyBonusResponse(BaseModel):
     claimed_nft: Optional[NFT] = None
     new_streak: int
 
-    model_config = ConfigDict(from_attributes=True)
-
 class InviteInfoResponse(BaseModel):
     invite_link: str
     successful_invites: int
     reward_per_invite_stars: int
+    network_size: int = 0  # Tüm alt ağaçtaki davetli sayısı (dolaylı davetler dahil)
+
+class Invitee(BaseModel):
+    id: int
+    username: Optional[str] = None
+    first_name: Optional[str] = None
+    level: int = 1
+    created_at: Optional[datetime] = None
+
+    model_config = ORM_CONFIG
 
-    model_config = ConfigDict(from_attributes=True)
+class InviteNetworkResponse(BaseModel):
+    depth: int
+    invitees: List[Invitee]
+    depth_counts: Dict[int, int]  # {derece: davetli sayısı}
+    network_size: int
 
 class UnlockVipRequest(BaseModel):
     pass
@@ -300,25 +325,46 @@ class UnlockVipResponse(BaseModel):
     remaining_stars: int
     vip_access_granted: bool
 
-    model_config = ConfigDict(from_attributes=True)
-
 class AdminAddStarsRequest(BaseModel):
     telegram_id: int
     amount: int
 
-    model_config = ConfigDict(from_attributes=True)
-
 class AdminToggleStarsRequest(BaseModel):
     telegram_id: int
     enable: bool
 
-    model_config = ConfigDict(from_attributes=True)
-
 class AdminToggleVipRequest(BaseModel):
     telegram_id: int
     enable: bool
 
-    model_config = ConfigDict(from_attributes=True)
+# NFT metadata şemaları (generate_nft_metadata.py tarafından üretilen katalog)
+class NFTRarity(str, Enum):
+    common = "common"
+    uncommon = "uncommon"
+    rare = "rare"
+    epic = "epic"
+    legendary = "legendary"
+
+class NFTMetadata(BaseModel):
+    id: int
+    category: str
+    level: int
+    name: str
+    video: Optional[str] = None
+    rarity: NFTRarity
+
+# /profile/{uid} yanıtı: profil + sahip olunan NFT sayısı
+class UserProfileDetail(UserProfile):
+    nft_count: int = 0
+
+# /bootstrap: uygulama açılışında gereken kullanıcı ve katalog verileri tek yanıtta
+class BootstrapResponse(BaseModel):
+    profile: UserProfileDetail
+    wallet: UserWallet
+    missions: List[Dict[str, Any]] = []
+    nfts: List[NFTMetadata] = []
+    badges: List[Badge] = []
+    vip_benefits: List[Dict[str, Any]] = []
 
 class AdminUpdateMissionRequest(BaseModel):
     title: Optional[str] = None
@@ -331,8 +377,6 @@ class AdminUpdateMissionRequest(BaseModel):
     is_vip: Optional[bool] = None
     required_nft_id: Optional[int] = None
 
-    model_config = ConfigDict(from_attributes=True)
-
 class AdminUpdateUserRequest(BaseModel):
     xp: Optional[int] = None
     level: Optional[int] = None
@@ -340,13 +384,9 @@ class AdminUpdateUserRequest(BaseModel):
     has_vip_access: Optional[bool] = None
     stars_enabled: Optional[bool] = None
 
-    model_config = ConfigDict(from_attributes=True)
-
 class AdminUserActionRequest(BaseModel):
     telegram_id: int
 
-    model_config = ConfigDict(from_attributes=True)
-
 class AdminCreateMissionRequest(MissionCreate):
     pass
 
@@ -359,6 +399,41 @@ class AdminCreateNFTRequest(NFTCreate):
 class AdminCreateProposalRequest(DAOProposalCreate):
     pass
 
+# Toplu Telegram bildirimleri (broadcast.py). Metin verilmezse kind ve target_id'den üretilir.
+class AdminCreateBroadcastRequest(BaseModel):
+    kind: str = Field("custom", pattern="^(custom|proposal_opened|nft_drop|daily_bonus)$")
+    audience: str = Field("all", pattern="^(all|vip|active|daily_bonus_ready)$")
+    text: Optional[str] = Field(None, max_length=4096)
+    target_id: Optional[int] = None  # proposal_opened: öneri ID, nft_drop: NFT ID
+
+# /search: görev, NFT ve rozetlerde tam metin arama (search.py)
+class SearchResult(BaseModel):
+    kind: str  # mission, nft, badge
+    id: int
+    title: str
+    score: float  # büyük olan daha alakalı
+
+class SearchResponse(BaseModel):
+    query: str
+    items: List[SearchResult] = []
+    limit: int
+    offset: int
+    has_more: bool = False
+
+class BroadcastResponse(BaseModel):
+    id: int
+    kind: str
+    audience: str
+    text: str
+    status: BroadcastStatus
+    cursor_user_id: int
+    sent_count: int
+    failed_count: int
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+
+    model_config = ORM_CONFIG
+
 class NFTCategory(str, Enum):
     GENERAL = "general"
     SORA_VIDEO = "sora_video"
@@ -0,0 +1,299 @@
+# search.py - Görev, NFT ve rozetlerde tam metin arama
+#
+# Üç kaynak tablo (missions, nfts, badges) tek bir arama dizininde toplanır:
+#
+# - SQLite: FTS5 sanal tablosu (unicode61 tokenizer, remove_diacritics 2 ile
+#   ğ/ş/ç/ö/ü/İ harflerini katlar; tokenizer'ın katlamadığı ı trigger'da i yapılır).
+#   Sıralama bm25 ile, başlık eşleşmeleri açıklamadan TITLE_WEIGHT kat ağır.
+# - PostgreSQL: tsvector sütunu + GIN indeks ('simple' yapılandırma; Türkçe
+#   harfler search_fold() SQL fonksiyonuyla katlanır). Sıralama ts_rank_cd ile,
+#   başlık A, açıklama B ağırlığında.
+#
+# Dizin kaynak tablolardaki trigger'larla eşzamanlı tutulur; uygulama kodu dizine
+# yazmaz. Belge kimliği ref_id * 4 + tür kodudur, böylece trigger'lar dizin
+# satırını birincil anahtarla bulur. Aranan metin de aynı katlamadan geçer;
+# son kelime önek olarak aranır ("isikli gor" -> "Işıklı Görev").
+#
+# Her belgenin bir görünürlüğü (audience) vardır: public, vip (yalnızca VIP
+# kullanıcılar) ya da hidden (pasif kayıtlar; yalnızca admin araması görür).
+#
+# Dizin create_all ile (bu modül içe aktarıldıysa) ya da Alembic geçişiyle
+# kurulur; ilk kurulumda mevcut kayıtlar dizine doldurulur. Onarım için:
+#   python search.py --rebuild
+
+import argparse
+import logging
+import re
+import sys
+import unicodedata
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from database import Base
+
+logger = logging.getLogger(__name__)
+
+KIND_CODES = {"mission": 1, "nft": 2, "badge": 3}
+DOC_ID_STRIDE = 4
+TITLE_WEIGHT = 10.0
+MIN_TERM_LENGTH = 2
+# Sıralama eşleşme başına maliyetlidir (~1 µs); çok genel sorgularda yalnızca en
+# yeni (belge kimliği en büyük) bu kadar eşleşme sıralanır, gecikme sınırlı kalır.
+# Tür ve görünürlük filtreleri aday seçiminden önce uygulanır; aksi halde yeni
+# ama filtrelenen belgeler sınırı doldurup uygun eşleşmeleri dışarıda bırakır
+RANK_CANDIDATES = 1000
+MAX_TERMS = 8
+# Neredeyse her belgede geçen bağlaçlar aranmaz (katlanmış biçimleriyle)
+STOPWORDS = frozenset({"ve", "veya", "ile", "bir", "bu", "su", "o", "icin", "da", "de", "mi", "mu", "ki",
+                       "gibi", "daha", "cok", "en", "ya"})
+
+# (tablo, tür, başlık sütunu, açıklama sütunu, görünürlük ifadesi, trigger'ı tetikleyen sütunlar)
+# Görünürlük ifadesindeki {row} NEW/OLD ya da tablo adı, {true} lehçenin doğru değeridir.
+SOURCES = (
+    ("missions", "mission", "title", "description",
+     "CASE WHEN NOT COALESCE({row}.is_active, {true}) THEN 'hidden' "
+     "WHEN COALESCE({row}.is_vip, {false}) THEN 'vip' ELSE 'public' END",
+     ("title", "description", "is_active", "is_vip")),
+    ("nfts", "nft", "name", "description",
+     "CASE WHEN COALESCE({row}.is_active, {true}) THEN 'public' ELSE 'hidden' END",
+     ("name", "description", "is_active")),
+    ("badges", "badge", "name", "description",
+     "CASE WHEN COALESCE({row}.is_active, {true}) THEN 'public' ELSE 'hidden' END",
+     ("name", "description", "is_active")),
+)
+
+# Aranan metin için Türkçe katlama: büyük/küçük harf ve noktalı/noktasız i farkı
+# ile şapka ve çengeller yok sayılır ("İŞLEM", "islem", "işlem" aynı)
+_FOLD_TABLE = str.maketrans({"ı": "i", "İ": "i", "I": "i"})
+_TERM = re.compile(r"\w+")
+
+
+def fold(value: str) -> str:
+    """Metni dizindeki biçime katlar (küçük harf, aksansız, ı/İ -> i)"""
+    decomposed = unicodedata.normalize("NFKD", value.translate(_FOLD_TABLE).lower())
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def terms(query: str) -> List[str]:
+    """Arama metnindeki kelimeler (katlanmış; çok kısa olanlar ve bağlaçlar atılır)"""
+    return [
+        term for term in _TERM.findall(fold(query)) if len(term) >= MIN_TERM_LENGTH and term not in STOPWORDS
+    ][:MAX_TERMS]
+
+
+def _doc_id(row: str, kind: str) -> str:
+    return f"{row}.id * {DOC_ID_STRIDE} + {KIND_CODES[kind]}"
+
+
+# --- SQLite (FTS5) ---
+
+_SQLITE_TABLE = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5("
+    "title, body, kind UNINDEXED, ref_id UNINDEXED, label UNINDEXED, audience UNINDEXED, "
+    "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3 4')"
+)
+
+
+def _sqlite_values(row: str, kind: str, title: str, body: str, audience: str) -> str:
+    return (
+        f"{_doc_id(row, kind)}, replace({row}.{title}, 'ı', 'i'), replace(COALESCE({row}.{body}, ''), 'ı', 'i'), "
+        f"'{kind}', {row}.id, {row}.{title}, {audience.format(row=row, true='1', false='0')}"
+    )
+
+
+def _sqlite_ddl() -> List[str]:
+    # Varsayılan sıralama (ORDER BY rank) başlığı ağırlıklı bm25 olur; yapılandırma tabloda saklanır
+    statements = [_SQLITE_TABLE, f"INSERT INTO search_index (search_index, rank) VALUES ('rank', 'bm25({TITLE_WEIGHT}, 1.0)')"]
+    columns = "rowid, title, body, kind, ref_id, label, audience"
+    for table, kind, title, body, audience, watched in SOURCES:
+        statements += [
+            f"CREATE TRIGGER IF NOT EXISTS search_{table}_ai AFTER INSERT ON {table} BEGIN "
+            f"INSERT INTO search_index ({columns}) VALUES ({_sqlite_values('NEW', kind, title, body, audience)}); END",
+            f"CREATE TRIGGER IF NOT EXISTS search_{table}_au AFTER UPDATE OF {', '.join(watched)} ON {table} BEGIN "
+            f"DELETE FROM search_index WHERE rowid = {_doc_id('OLD', kind)}; "
+            f"INSERT INTO search_index ({columns}) VALUES ({_sqlite_values('NEW', kind, title, body, audience)}); END",
+            f"CREATE TRIGGER IF NOT EXISTS search_{table}_ad AFTER DELETE ON {table} BEGIN "
+            f"DELETE FROM search_index WHERE rowid = {_doc_id('OLD', kind)}; END",
+        ]
+    return statements
+
+
+def _sqlite_rebuild() -> List[str]:
+    columns = "rowid, title, body, kind, ref_id, label, audience"
+    return ["DELETE FROM search_index"] + [
+        f"INSERT INTO search_index ({columns}) SELECT {_sqlite_values(table, kind, title, body, audience)} FROM {table}"
+        for table, kind, title, body, audience, _ in SOURCES
+    ] + ["INSERT INTO search_index (search_index) VALUES ('optimize')"]
+
+
+# --- PostgreSQL (tsvector + GIN) ---
+
+_POSTGRES_FOLD = (
+    "CREATE OR REPLACE FUNCTION search_fold(value text) RETURNS text LANGUAGE sql IMMUTABLE AS $$ "
+    "SELECT lower(translate(COALESCE(value, ''), 'ıİIğĞşŞçÇöÖüÜâÂîÎûÛ', 'iiiggssccoouuaaiiuu')) $$"
+)
+
+
+def _postgres_values(row: str, kind: str, title: str, body: str, audience: str) -> str:
+    return (
+        f"{_doc_id(row, kind)}, '{kind}', {row}.id, {row}.{title}, "
+        f"{audience.format(row=row, true='TRUE', false='FALSE')}, "
+        f"setweight(to_tsvector('simple', search_fold({row}.{title})), 'A') || "
+        f"setweight(to_tsvector('simple', search_fold({row}.{body})), 'B')"
+    )
+
+
+def _postgres_ddl() -> List[str]:
+    statements = [
+        "CREATE TABLE IF NOT EXISTS search_index ("
+        "doc_id BIGINT PRIMARY KEY, kind VARCHAR NOT NULL, ref_id INTEGER NOT NULL, label VARCHAR NOT NULL, "
+        "audience VARCHAR NOT NULL, document TSVECTOR NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS ix_search_index_document ON search_index USING GIN (document)",
+        _POSTGRES_FOLD,
+    ]
+    for table, kind, title, body, audience, watched in SOURCES:
+        statements += [
+            f"CREATE OR REPLACE FUNCTION search_index_{table}() RETURNS trigger LANGUAGE plpgsql AS $$ BEGIN "
+            f"IF TG_OP = 'DELETE' THEN DELETE FROM search_index WHERE doc_id = {_doc_id('OLD', kind)}; RETURN OLD; END IF; "
+            f"INSERT INTO search_index (doc_id, kind, ref_id, label, audience, document) "
+            f"VALUES ({_postgres_values('NEW', kind, title, body, audience)}) "
+            f"ON CONFLICT (doc_id) DO UPDATE SET label = EXCLUDED.label, audience = EXCLUDED.audience, "
+            f"document = EXCLUDED.document; RETURN NEW; END $$",
+            f"DROP TRIGGER IF EXISTS search_{table} ON {table}",
+            f"CREATE TRIGGER search_{table} AFTER INSERT OR DELETE OR UPDATE OF {', '.join(watched)} ON {table} "
+            f"FOR EACH ROW EXECUTE FUNCTION search_index_{table}()",
+        ]
+    return statements
+
+
+def _postgres_rebuild() -> List[str]:
+    return ["DELETE FROM search_index"] + [
+        f"INSERT INTO search_index (doc_id, kind, ref_id, label, audience, document) "
+        f"SELECT {_postgres_values(table, kind, title, body, audience)} FROM {table}"
+        for table, kind, title, body, audience, _ in SOURCES
+    ]
+
+
+def _dialect(bind) -> str:
+    name = bind.dialect.name
+    if name not in ("sqlite", "postgresql"):
+        raise RuntimeError(f"Tam metin arama bu veritabanında desteklenmiyor: {name}")
+    return name
+
+
+def ddl(dialect: str) -> List[str]:
+    """Dizin tablosu, katlama fonksiyonu ve trigger'lar (tekrar çalıştırılabilir)"""
+    return _sqlite_ddl() if dialect == "sqlite" else _postgres_ddl()
+
+
+def rebuild_statements(dialect: str) -> List[str]:
+    """Dizini kaynak tablolardan baştan dolduran ifadeler"""
+    return _sqlite_rebuild() if dialect == "sqlite" else _postgres_rebuild()
+
+
+def install(connection: Connection) -> bool:
+    """Dizini ve trigger'ları kurar; dizin yeni oluşturulduysa mevcut kayıtları doldurur"""
+    dialect = _dialect(connection)
+    exists = connection.execute(text(
+        "SELECT 1 FROM sqlite_master WHERE name = 'search_index'" if dialect == "sqlite"
+        else "SELECT to_regclass('search_index') IS NOT NULL"
+    )).scalar()
+    for statement in ddl(dialect):
+        connection.exec_driver_sql(statement)
+    if not exists:
+        for statement in rebuild_statements(dialect):
+            connection.exec_driver_sql(statement)
+    return not exists
+
+
+def rebuild(db: Session) -> None:
+    """Dizini baştan doldurur (commit etmez)"""
+    connection = db.connection()
+    for statement in rebuild_statements(_dialect(connection)):
+        connection.exec_driver_sql(statement)
+
+
+@event.listens_for(Base.metadata, "after_create")
+def _install_after_create(target, connection, **kwargs) -> None:
+    if connection.dialect.name in ("sqlite", "postgresql"):
+        install(connection)
+
+
+def search_documents(db: Session, query: str, kind: Optional[str] = None,
+                     audiences: Optional[Sequence[str]] = ("public",), limit: int = 20,
+                     offset: int = 0) -> Tuple[List[Dict], bool]:
+    """
+    Sıralı arama sonuçları ve sonraki sayfanın olup olmadığı. audiences None ise
+    görünürlük filtresi uygulanmaz (admin araması).
+    """
+    words = terms(query)
+    if not words:
+        return [], False
+    dialect = _dialect(db.get_bind())
+    params = {"limit": limit + 1, "offset": offset}
+    filters = []
+    if kind:
+        filters.append("kind = :kind")
+        params["kind"] = kind
+    if audiences is not None:
+        filters.append(f"audience IN ({', '.join(f':audience_{i}' for i in range(len(audiences)))})")
+        params.update({f"audience_{i}": audience for i, audience in enumerate(audiences)})
+    where = "".join(f" AND {condition}" for condition in filters)
+
+    if dialect == "sqlite":
+        # Kelimeler \w+ olduğundan tırnak içinde güvenle yazılır; son kelime önek (yazarken arama)
+        params["match"] = " ".join(f'"{word}"' for word in words[:-1]) + f' "{words[-1]}"*'
+        params["candidates"] = RANK_CANDIDATES - 1
+        sql = (
+            f"SELECT kind, ref_id, label, -rank AS score FROM search_index "
+            f"WHERE search_index MATCH :match AND rowid >= COALESCE(("
+            f"SELECT rowid FROM search_index WHERE search_index MATCH :match{where} "
+            f"ORDER BY rowid DESC LIMIT 1 OFFSET :candidates), 0){where} "
+            f"ORDER BY rank LIMIT :limit OFFSET :offset"
+        )
+    else:
+        params["tsquery"] = " & ".join(words[:-1] + [f"{words[-1]}:*"])
+        params["candidates"] = RANK_CANDIDATES
+        sql = (
+            f"WITH query AS (SELECT to_tsquery('simple', :tsquery) AS value), candidates AS ("
+            f"SELECT search_index.*, query.value AS query FROM search_index, query "
+            f"WHERE document @@ query.value{where} ORDER BY doc_id DESC LIMIT :candidates) "
+            f"SELECT kind, ref_id, label, ts_rank_cd(document, query) AS score FROM candidates "
+            f"ORDER BY score DESC, doc_id LIMIT :limit OFFSET :offset"
+        )
+    rows = db.execute(text(sql), params).all()
+    items = [
+        {"kind": row.kind, "id": row.ref_id, "title": row.label, "score": float(row.score)}
+        for row in rows[:limit]
+    ]
+    return items, len(rows) > limit
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Tam metin arama dizini")
+    parser.add_argument("--rebuild", action="store_true", help="dizini ve trigger'ları kurar, baştan doldurur")
+    parser.add_argument("query", nargs="?", help="denemek için arama metni")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    from database import SessionLocal, engine
+
+    if args.rebuild:
+        with engine.begin() as connection:
+            install(connection)
+            for statement in rebuild_statements(_dialect(connection)):
+                connection.exec_driver_sql(statement)
+        logger.info("Arama dizini yeniden kuruldu")
+    if args.query:
+        with SessionLocal() as db:
+            items, _ = search_documents(db, args.query, audiences=None)
+        for item in items:
+            print(f"{item['kind']:<8} #{item['id']:<6} {item['score']:>8} {item['title']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
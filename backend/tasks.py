@@ -0,0 +1,345 @@
+# tasks.py - Kalıcı outbox tablosuna dayanan süreç içi arka plan görev kuyruğu
+#
+# İstek işleyicileri ana değişikliği yapar, yan etkileri (rozet verme, VIP NFT,
+# giriş istatistikleri) enqueue() ile aynı oturuma task_outbox satırı olarak
+# ekler ve tek commit ile ikisini birlikte yazar. Commit başarılıysa
+# kuyruk uyandırılır; rollback olursa görev de hiç oluşmamış olur.
+#
+# - TaskQueue uygulama olay döngüsünde çalışır: vadesi gelen satırları atomik
+#   UPDATE ile "alır" (kira), en fazla `concurrency` görevi thread havuzunda
+#   çalıştırır. Birden çok uvicorn worker'ı aynı tabloyu güvenle paylaşır.
+# - Görevin etkileri ve outbox satırının silinmesi aynı işlemde commit edilir.
+#   Süreç çökerse kira dolunca görev yeniden alınır (en az bir kez çalışma);
+#   bu yüzden görevler idempotent yazılmalıdır.
+# - Hata olursa üstel geri çekilmeyle yeniden denenir; max_attempts dolunca
+#   satır FAILED olarak kalır.
+#
+# Ortam değişkenleri:
+#   TASKS_ENABLED=1       0 ise uygulama içinde worker başlamaz (python tasks.py ile boşaltılır)
+#   TASKS_CONCURRENCY=4   aynı anda çalışan görev sayısı
+#   TASKS_POLL_INTERVAL=1 uyandırılmadığında tabloya bakma aralığı (saniye)
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from sqlalchemy import event, func, select, update
+from sqlalchemy.orm import Session
+
+import crud
+import metrics
+import models
+from database import SessionLocal
+from models import OutboxTask, TaskStatus
+
+logger = logging.getLogger(__name__)
+
+ENABLED = os.getenv("TASKS_ENABLED", "1") not in ("0", "false", "False")
+CONCURRENCY = int(os.getenv("TASKS_CONCURRENCY", "4"))
+POLL_INTERVAL = float(os.getenv("TASKS_POLL_INTERVAL", "1"))
+
+# Alınan görevin bu süre içinde bitmezse başka bir worker'a geçebileceği kira süresi
+LEASE_SECONDS = 60
+DEFAULT_MAX_ATTEMPTS = 5
+MAX_BACKOFF_SECONDS = 300
+
+# Kayıtlı görevler ve deneme hakları (ada göre)
+_handlers: Dict[str, Callable[..., Any]] = {}
+_max_attempts: Dict[str, int] = {}
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite tarihleri saat dilimi bilgisi olmadan döndürür; UTC kabul edilir
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def task(name: str, max_attempts: int = DEFAULT_MAX_ATTEMPTS):
+    """Görev kaydı. Fonksiyon `(db, **payload)` alır; commit'i çalıştırıcı yapar."""
+    def register(func: Callable[..., Any]) -> Callable[..., Any]:
+        _handlers[name] = func
+        _max_attempts[name] = max_attempts
+        return func
+    return register
+
+
+def enqueue(db: Session, name: str, delay: float = 0, **payload) -> OutboxTask:
+    """
+    Görevi çağıranın oturumuna ekler; çağıranın commit'iyle birlikte kalıcı olur.
+    Payload JSON'a çevrilebilir olmalıdır.
+    """
+    if name not in _handlers:
+        raise ValueError(f"Bilinmeyen görev: {name}")
+    now = _utcnow()
+    row = OutboxTask(
+        task=name,
+        payload=json.dumps(payload, default=str),
+        status=TaskStatus.PENDING,
+        attempts=0,
+        max_attempts=_max_attempts[name],
+        available_at=now + timedelta(seconds=delay),
+        created_at=now,
+    )
+    db.add(row)
+    db.info.setdefault("enqueued_tasks", []).append(name)
+    return row
+
+
+@event.listens_for(Session, "after_commit")
+def _notify_after_commit(session):
+    names = session.info.pop("enqueued_tasks", None)
+    if names:
+        for name in names:
+            metrics.TASKS_ENQUEUED.inc(labels=(name,))
+        queue.notify()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session):
+    session.info.pop("enqueued_tasks", None)
+
+
+def claim_due(session_factory, limit: int, now: Optional[datetime] = None) -> List[int]:
+    """
+    Vadesi gelmiş en fazla `limit` görevi alır. Her satır koşullu UPDATE ile
+    alındığı için aynı görevi iki worker birden alamaz.
+    """
+    now = now or _utcnow()
+    due = (OutboxTask.status.in_((TaskStatus.PENDING, TaskStatus.RUNNING)), OutboxTask.available_at <= now)
+    with session_factory() as db:
+        candidates = db.execute(
+            select(OutboxTask.id).where(*due).order_by(OutboxTask.available_at).limit(limit)
+        ).scalars().all()
+        claimed = []
+        for task_id in candidates:
+            result = db.execute(
+                update(OutboxTask)
+                .where(OutboxTask.id == task_id, *due)
+                .values(status=TaskStatus.RUNNING, attempts=OutboxTask.attempts + 1,
+                        available_at=now + timedelta(seconds=LEASE_SECONDS))
+                .execution_options(synchronize_session=False)
+            )
+            if result.rowcount:
+                claimed.append(task_id)
+        db.commit()
+    return claimed
+
+
+def execute(session_factory, task_id: int) -> str:
+    """
+    Alınmış bir görevi çalıştırır. Başarıda satır görevin etkileriyle aynı
+    işlemde silinir. Sonucu ("ok", "retry", "failed") döndürür.
+    """
+    with session_factory() as db:
+        row = db.get(OutboxTask, task_id)
+        if row is None or row.status != TaskStatus.RUNNING:
+            return "skipped"
+        name, attempts, max_attempts = row.task, row.attempts, row.max_attempts
+        if attempts == 1:
+            metrics.TASK_LAG.observe((_utcnow() - _as_utc(row.created_at)).total_seconds(), (name,))
+
+        started = time.perf_counter()
+        try:
+            handler = _handlers.get(name)
+            if handler is None:
+                raise LookupError(f"Kayıtlı olmayan görev: {name}")
+            handler(db, **json.loads(row.payload))
+            db.delete(row)
+            db.commit()
+            result = "ok"
+        except Exception as e:
+            db.rollback()
+            if attempts >= max_attempts:
+                result, status, available_at = "failed", TaskStatus.FAILED, _utcnow()
+                logger.exception("Task failed permanently", extra={"task": name, "task_id": task_id})
+            else:
+                backoff = min(2 ** attempts, MAX_BACKOFF_SECONDS) * (0.5 + random.random())
+                result, status, available_at = "retry", TaskStatus.PENDING, _utcnow() + timedelta(seconds=backoff)
+                logger.warning("Task failed, will retry", extra={"task": name, "task_id": task_id,
+                                                                 "attempt": attempts, "error": str(e)})
+            db.execute(
+                update(OutboxTask).where(OutboxTask.id == task_id)
+                .values(status=status, available_at=available_at, last_error=f"{type(e).__name__}: {e}"[:1000])
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+        metrics.TASK_DURATION.observe(time.perf_counter() - started, (name,))
+        metrics.TASKS_PROCESSED.inc(labels=(name, result))
+        return result
+
+
+def drain(session_factory=None, max_tasks: Optional[int] = None) -> Dict[str, int]:
+    """Vadesi gelmiş görevleri bu thread'de sırayla çalıştırır (CLI ve testler için)"""
+    session_factory = session_factory or queue.session_factory
+    results: Dict[str, int] = {}
+    processed = 0
+    while max_tasks is None or processed < max_tasks:
+        claimed = claim_due(session_factory, min(10, max_tasks - processed) if max_tasks else 10)
+        if not claimed:
+            break
+        for task_id in claimed:
+            result = execute(session_factory, task_id)
+            results[result] = results.get(result, 0) + 1
+            processed += 1
+    return results
+
+
+def queue_depth(session_factory=None) -> Dict[str, int]:
+    """Duruma göre outbox satır sayısı"""
+    session_factory = session_factory or queue.session_factory
+    with session_factory() as db:
+        rows = db.execute(select(OutboxTask.status, func.count()).group_by(OutboxTask.status)).all()
+    depth = {status.value: 0 for status in TaskStatus}
+    depth.update({status.value: count for status, count in rows})
+    return depth
+
+
+def oldest_pending_age(session_factory=None) -> float:
+    """Vadesi gelmiş en eski bekleyen görevin beklediği süre (saniye): kuyruk gecikmesi"""
+    session_factory = session_factory or queue.session_factory
+    now = _utcnow()
+    with session_factory() as db:
+        oldest = db.execute(
+            select(func.min(OutboxTask.available_at))
+            .where(OutboxTask.status == TaskStatus.PENDING, OutboxTask.available_at <= now)
+        ).scalar()
+    return max((now - _as_utc(oldest)).total_seconds(), 0.0) if oldest else 0.0
+
+
+class TaskQueue:
+    """Olay döngüsünde çalışan, eşzamanlılığı sınırlı outbox tüketicisi"""
+
+    def __init__(self, concurrency: int = CONCURRENCY, poll_interval: float = POLL_INTERVAL):
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.session_factory = SessionLocal
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._poller: Optional[asyncio.Task] = None
+        self._running: Set[asyncio.Task] = set()
+        self._stopping = False
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._running)
+
+    async def start(self, session_factory=None) -> None:
+        if self._poller is not None:
+            return
+        if session_factory is not None:
+            self.session_factory = session_factory
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._stopping = False
+        self._poller = asyncio.create_task(self._poll())
+        logger.info("Task queue started", extra={"concurrency": self.concurrency})
+
+    def notify(self) -> None:
+        """Yeni görev commit edildi; herhangi bir thread'den çağrılabilir"""
+        if self._loop is None or self._wake is None or self._loop.is_closed():
+            return
+        try:
+            self._loop.call_soon_threadsafe(self._wake.set)
+        except RuntimeError:  # Döngü kapanıyor
+            pass
+
+    async def _poll(self) -> None:
+        while not self._stopping:
+            free = self.concurrency - len(self._running)
+            if free > 0:
+                try:
+                    claimed = await asyncio.to_thread(claim_due, self.session_factory, free)
+                except Exception:
+                    logger.exception("Task claim failed")
+                    claimed = []
+                for task_id in claimed:
+                    running = asyncio.create_task(asyncio.to_thread(execute, self.session_factory, task_id))
+                    self._running.add(running)
+                    running.add_done_callback(self._finished)
+                # Tüm boş yerler dolduysa bekleyen başka görev olabilir; yer açılınca tekrar bak
+                if claimed and len(claimed) == free:
+                    self._wake.clear()
+                    await self._wake.wait()
+                    continue
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    def _finished(self, running: asyncio.Task) -> None:
+        self._running.discard(running)
+        if not running.cancelled() and running.exception() is not None:
+            logger.error("Task runner crashed", exc_info=running.exception())
+        self._wake.set()
+
+    async def stop(self, timeout: float = 10) -> None:
+        """Yeni görev almayı bırakır, çalışanların bitmesini en fazla `timeout` saniye bekler"""
+        if self._poller is None:
+            return
+        self._stopping = True
+        self._wake.set()
+        await asyncio.gather(self._poller, return_exceptions=True)
+        if self._running:
+            # Bitmeyenler kira süresi dolunca başka bir süreçte yeniden alınır
+            await asyncio.wait(set(self._running), timeout=timeout)
+        self._poller = None
+        self._loop = None
+        logger.info("Task queue stopped")
+
+
+queue = TaskQueue()
+
+
+# --- Görevler --------------------------------------------------------------
+
+@task("award_mission_badges")
+def award_mission_badges(db: Session, user_id: int, mission_id: int) -> None:
+    crud.award_mission_badges(db, user_id=user_id, mission_id=mission_id)
+
+
+@task("record_login")
+def record_login(db: Session, user_id: int, at: str) -> None:
+    user = db.get(models.User, user_id)
+    if user is not None:
+        # Commit'i çalıştırıcı yapar; etkiler outbox satırının silinmesiyle birlikte yazılır
+        crud.record_login_activity(user, now=datetime.fromisoformat(at))
+
+
+@task("grant_vip_nft")
+def grant_vip_nft(db: Session, user_id: int) -> None:
+    crud.grant_vip_nft(db, user_id=user_id)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Outbox'taki vadesi gelmiş görevleri çalıştırır")
+    parser.add_argument("--max-tasks", type=int, help="En fazla kaç görev çalıştırılacağı")
+    parser.add_argument("--retry-failed", action="store_true", help="FAILED görevleri yeniden kuyruğa al")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    if args.retry_failed:
+        with SessionLocal() as db:
+            result = db.execute(
+                update(OutboxTask).where(OutboxTask.status == TaskStatus.FAILED)
+                .values(status=TaskStatus.PENDING, attempts=0, available_at=_utcnow())
+            )
+            db.commit()
+        logger.info(f"{result.rowcount} başarısız görev yeniden kuyruğa alındı")
+
+    results = drain(SessionLocal, max_tasks=args.max_tasks)
+    logger.info(f"Çalıştırılan görevler: {results}, kalan: {queue_depth(SessionLocal)}")
+
+
+if __name__ == "__main__":
+    main()
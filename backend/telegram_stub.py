@@ -0,0 +1,75 @@
+# telegram_stub.py - Testler ve yerel deneme için sahte Telegram Bot API sunucusu
+#
+# Yalnızca broadcast.py'nin kullandığı sendMessage uç noktasını taklit eder ve
+# gelen mesajları bellekte tutar. Hata durumları da denenebilir:
+#   blocked       bu chat_id'lere 403 (kullanıcı botu engellemiş) döner
+#   rate_limit_every=N  her N. istekte 429 + retry_after döner
+#   fail_every=N        her N. istekte 500 döner
+#
+# Süreç içi kullanım (ağsız):
+#   stub = TelegramStub()
+#   sender = TelegramSender("TOKEN", transport=httpx.ASGITransport(app=stub.app))
+# Ayrı sunucu olarak:
+#   python telegram_stub.py --port 8081
+#   TELEGRAM_API_URL=http://127.0.0.1:8081 python broadcast.py run
+
+import argparse
+import sys
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+
+class TelegramStub:
+    def __init__(self, blocked: Iterable[int] = (), rate_limit_every: int = 0, fail_every: int = 0,
+                 retry_after: int = 1):
+        self.blocked = set(blocked)
+        self.rate_limit_every = rate_limit_every
+        self.fail_every = fail_every
+        self.retry_after = retry_after
+        self.requests = 0
+        self.messages: List[Dict] = []
+        self.app = FastAPI(title="Telegram Bot API stub")
+        self.app.post("/bot{token}/sendMessage")(self._send_message)
+
+    def received(self, chat_id: int) -> List[str]:
+        return [message["text"] for message in self.messages if message["chat_id"] == chat_id]
+
+    async def _send_message(self, token: str, request: Request):
+        self.requests += 1
+        payload = await request.json()
+        chat_id = int(payload["chat_id"])
+        if self.rate_limit_every and self.requests % self.rate_limit_every == 0:
+            return JSONResponse({
+                "ok": False, "error_code": 429,
+                "description": f"Too Many Requests: retry after {self.retry_after}",
+                "parameters": {"retry_after": self.retry_after},
+            }, status_code=429)
+        if self.fail_every and self.requests % self.fail_every == 0:
+            return JSONResponse({"ok": False, "error_code": 500, "description": "Internal Server Error"},
+                                status_code=500)
+        if chat_id in self.blocked:
+            return JSONResponse({"ok": False, "error_code": 403,
+                                 "description": "Forbidden: bot was blocked by the user"}, status_code=403)
+        self.messages.append({"chat_id": chat_id, "text": payload.get("text", "")})
+        return {"ok": True, "result": {"message_id": len(self.messages), "chat": {"id": chat_id},
+                                       "text": payload.get("text", "")}}
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Sahte Telegram Bot API sunucusu")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--rate-limit-every", type=int, default=0)
+    parser.add_argument("--fail-every", type=int, default=0)
+    args = parser.parse_args(argv)
+    stub = TelegramStub(rate_limit_every=args.rate_limit_every, fail_every=args.fail_every)
+    uvicorn.run(stub.app, host=args.host, port=args.port, log_level="warning")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,68 @@
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import HTTPException
+
+import anticheat
+import models
+
+NOW = datetime(2026, 5, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def test_detector_flags_bursts_and_robotic_intervals(monkeypatch):
+    detector = anticheat.Detector(mode="throttle", throttle_seconds=60)
+    now = time.time()
+    # Kullanıcı 1: bir dakikada 7 tamamlama; kullanıcı 2: tam 30 sn arayla; kullanıcı 3: düzensiz
+    detector.record(completions=[(1, now - i) for i in range(6)], now=now)
+    assert detector.flags == {}
+    flagged = detector.record(completions=[(1, now)], now=now)
+    assert [(flag.user_id, flag.reasons) for flag in flagged] == [(1, ["burst_minute"])]
+    flagged = detector.record(completions=[(2, now - 30 * i) for i in range(9)], now=now)
+    assert flagged[0].reasons == ["robotic_interval"]
+    assert detector.record(completions=[(3, now - gap) for gap in (0, 45, 200, 230, 600, 640, 1500, 1600, 2400)],
+                           stars=[(3, now, 200)], now=now) == []
+
+    assert detector.retry_after(1, now=now + 10) == 50
+    monkeypatch.setattr(anticheat, "detector", detector)
+    with pytest.raises(HTTPException) as excinfo:
+        anticheat.enforce(1)
+    assert excinfo.value.status_code == 429
+    anticheat.enforce(3)
+
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_history_scoring_matches_realtime_rules(db, monkeypatch, use_numpy):
+    if use_numpy and anticheat.np is None:
+        pytest.skip("numpy kurulu değil")
+    if not use_numpy:
+        monkeypatch.setattr(anticheat, "np", None)
+    logs = [(1, NOW - timedelta(seconds=5 * i)) for i in range(8)]            # dakikada 8
+    logs += [(2, NOW - timedelta(seconds=60 * i)) for i in range(10)]         # dakikada bir, robotik
+    logs += [(3, NOW - timedelta(minutes=m)) for m in (0, 7, 9, 30, 31, 55)]  # normal
+    db.add_all(models.UserMissionLog(user_id=u, mission_id=1, completion_time=at) for u, at in logs)
+    db.commit()
+
+    flags = anticheat.score_history(db, NOW - timedelta(days=1), chunk_users=2)
+
+    assert [(flag.user_id, flag.reasons) for flag in flags] == [(1, ["burst_minute"]), (2, ["robotic_interval"])]
+    assert flags[0].features.per_minute == 8
+    assert flags[1].features.gap_count == 9
+
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_simultaneous_completions_are_not_robotic(db, monkeypatch, use_numpy):
+    if use_numpy and anticheat.np is None:
+        pytest.skip("numpy kurulu değil")
+    if not use_numpy:
+        monkeypatch.setattr(anticheat, "np", None)
+    detector = anticheat.Detector()
+    now = time.time()
+    flagged = detector.record(completions=[(1, now)] * 9, now=now)
+    assert flagged[0].reasons == ["burst_minute"]
+    assert flagged[0].features.gap_count == 0
+
+    db.add_all(models.UserMissionLog(user_id=1, mission_id=1, completion_time=NOW) for _ in range(9))
+    db.commit()
+    flags = anticheat.score_history(db, NOW - timedelta(days=1))
+    assert [(flag.user_id, flag.reasons, flag.features.gap_count) for flag in flags] == [(1, ["burst_minute"], 0)]
@@ -0,0 +1,16 @@
+import time
+
+import auth
+from bench.load import sign_init_data
+
+
+def test_validate_init_data_parses_user_json():
+    init_data = sign_init_data(424242, "test-bot-token")
+    validated = auth.validate_init_data(init_data, "test-bot-token")
+    assert validated is not None
+    assert validated.user.id == 424242
+    assert validated.auth_date <= int(time.time())
+
+
+def test_validate_init_data_rejects_wrong_token():
+    assert auth.validate_init_data(sign_init_data(424242, "test-bot-token"), "other-token") is None
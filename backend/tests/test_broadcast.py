@@ -0,0 +1,94 @@
+import asyncio
+import threading
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+
+import broadcast
+import models
+from ratelimit import MemoryStore
+from telegram_stub import TelegramStub
+
+
+class CrashingSender:
+    """Belirli bir sohbete ilk gönderimde süreç çöküyormuş gibi beklenmedik hata fırlatır"""
+
+    def __init__(self, inner, crash_chat_id):
+        self.inner = inner
+        self.crash_chat_id = crash_chat_id
+
+    async def send(self, chat_id, text):
+        if chat_id == self.crash_chat_id:
+            self.crash_chat_id = None
+            raise RuntimeError("worker öldü")
+        await self.inner.send(chat_id, text)
+
+
+@pytest.fixture
+def session_factory(session_factory):
+    with session_factory() as db:
+        db.add_all(models.User(id=uid, telegram_id=1000 + uid, has_vip_access=uid % 3 == 0) for uid in range(1, 13))
+        db.commit()
+    return session_factory
+
+
+def test_broadcast_resumes_without_resending(session_factory):
+    # 5 botu engellemiş (403), her 7. istek 429 alır
+    stub = TelegramStub(blocked={1005}, rate_limit_every=7, retry_after=0)
+    sender = broadcast.TelegramSender("TOKEN", base_url="http://stub", transport=httpx.ASGITransport(app=stub.app))
+    limiter = broadcast.Limiter(rate=1000, store=MemoryStore())
+    with session_factory() as db:
+        broadcast_id = broadcast.create_broadcast(db, "custom", "Merhaba").id
+        assert broadcast.fetch_recipients(db, "vip", 0, 100) == [(3, 1003), (6, 1006), (9, 1009), (12, 1012)]
+
+    async def scenario():
+        assert broadcast.claim(session_factory) == broadcast_id
+        # İkinci parçanın ortasında çöker: 1-4 ve sırayla tamamlanan 5 kaydedilir
+        with pytest.raises(RuntimeError):
+            await broadcast.run_broadcast(broadcast_id, CrashingSender(sender, 1006), session_factory, limiter,
+                                          chunk_size=4, concurrency=1)
+        # Kira dolmadan başka worker alamaz; dolunca kaldığı yerden devralınır
+        assert broadcast.claim(session_factory) is None
+        later = datetime.now(timezone.utc) + timedelta(seconds=broadcast.LEASE_SECONDS + 1)
+        assert broadcast.claim(session_factory, now=later) == broadcast_id
+        totals = await broadcast.run_broadcast(broadcast_id, sender, session_factory, limiter,
+                                               chunk_size=4, concurrency=3)
+        await sender.aclose()
+        return totals
+
+    assert asyncio.run(scenario()) == {"sent": 7, "failed": 0}
+
+    for uid in range(1, 13):
+        assert stub.received(1000 + uid) == ([] if uid == 5 else ["Merhaba"]), uid
+    assert stub.requests > len(stub.messages) + 1  # 429'lar yeniden denendi
+    with session_factory() as db:
+        item = db.get(models.Broadcast, broadcast_id)
+        assert (item.status, item.cursor_user_id, item.sent_count, item.failed_count) == (
+            models.BroadcastStatus.DONE, 12, 11, 1
+        )
+
+
+class BrokenStore:
+    """Erişilemeyen paylaşılan depo; çağrıldığı iş parçacığını kaydeder"""
+
+    def __init__(self):
+        self.threads = []
+
+    def hit(self, key, policy):
+        self.threads.append(threading.get_ident())
+        raise ConnectionError("redis yok")
+
+
+def test_limiter_calls_store_off_loop_and_survives_store_errors():
+    store = BrokenStore()
+    limiter = broadcast.Limiter(rate=1000, store=store)
+
+    async def scenario():
+        for _ in range(3):
+            await asyncio.wait_for(limiter.acquire(), 1)
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(scenario())
+    assert len(store.threads) == 3
+    assert loop_thread not in store.threads
@@ -0,0 +1,111 @@
+import threading
+import time
+
+import pytest
+
+from cache import Cache, CacheBackend, LocalLRUBackend, SQLiteBackend, backend_from_url
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        return LocalLRUBackend(maxsize=16)
+    return SQLiteBackend(str(tmp_path / "cache.db"))
+
+
+def test_get_set_delete_and_ttl(backend):
+    cache = Cache(backend)
+    assert cache.get("a") is None
+    cache.set("a", {"x": 1})
+    cache.set("b", None)
+    assert cache.get("a") == {"x": 1}
+    # None da geçerli bir değerdir
+    assert cache.get("b", "default") is None
+    assert cache.delete("a") is True
+    assert cache.get("a") is None
+
+    cache.set("short", 1, ttl=0.05)
+    time.sleep(0.1)
+    assert cache.get("short") is None
+
+
+def test_tag_invalidation(backend):
+    cache = Cache(backend)
+    cache.set("nfts", 1, tags=("nft_catalog",))
+    cache.set("snapshot", 2, tags=("nft_catalog", "missions"))
+    cache.set("missions", 3, tags=("missions",))
+
+    assert cache.invalidate_tags("nft_catalog") == 2
+    assert cache.get("nfts") is None
+    assert cache.get("snapshot") is None
+    assert cache.get("missions") == 3
+
+
+def test_single_flight_runs_loader_once(backend):
+    cache = Cache(backend)
+    calls = []
+
+    def loader():
+        calls.append(1)
+        time.sleep(0.1)
+        return "value"
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get_or_set("hot", loader, ttl=5)))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == ["value"] * 8
+    assert len(calls) == 1
+    stats = cache.stats.snapshot()
+    assert stats["loads"] == 1
+    assert stats["load_waits"] == 7
+
+
+def test_lru_eviction_and_stats():
+    cache = Cache(LocalLRUBackend(maxsize=2))
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")          # a en son kullanılan olur
+    cache.set("c", 3)       # b çıkarılır
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+    stats = cache.stats.snapshot()
+    assert stats["hits"] == 3
+    assert stats["misses"] == 1
+    assert stats["hit_ratio"] == 0.75
+
+
+def test_local_add_is_atomic(monkeypatch):
+    backend = LocalLRUBackend()
+    real_set = backend.set
+
+    def slow_set(*args, **kwargs):
+        # Kontrol ile yazma arasına başka iş parçacığı girebilsin
+        time.sleep(0.05)
+        real_set(*args, **kwargs)
+
+    monkeypatch.setattr(backend, "set", slow_set)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(backend.add("lock", 1, ttl=5))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(results) == [False, False, False, True]
+    with pytest.raises(TypeError):
+        CacheBackend()
+
+
+def test_backend_from_url(tmp_path):
+    assert isinstance(backend_from_url("memory://?maxsize=10"), LocalLRUBackend)
+    assert isinstance(backend_from_url(f"sqlite:///{tmp_path / 'c.db'}"), SQLiteBackend)
+    with pytest.raises(ValueError):
+        backend_from_url("ftp://example")
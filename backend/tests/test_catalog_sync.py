@@ -0,0 +1,76 @@
+import json
+from datetime import datetime
+
+import pytest
+
+import catalog_sync
+import models
+from query_profiler import capture_queries
+
+
+def _spec(tmp_path, rows, name="nfts.json"):
+    path = tmp_path / name
+    path.write_text(json.dumps({"table": "nfts", "key": "id", "rows": rows}), encoding="utf-8")
+    return catalog_sync.load_spec(str(path))
+
+
+NFTS = [
+    {"id": 1, "name": "Gözcü", "description": "a", "category": "general", "price_stars": 1000},
+    {"id": 2, "name": "DAO Üyesi", "description": "b", "category": "VOTE_PREMIUM", "price_stars": 20000,
+     "total_supply": 5},
+]
+
+
+def test_sync_is_idempotent_and_uses_one_upsert_per_table(db, tmp_path):
+    spec = _spec(tmp_path, NFTS)
+    assert spec.rows[1]["category"] == models.NFTCategory.VOTE_PREMIUM
+    # Bazı satırlarda olmayan sütun varsayılanla doldurulur
+    assert spec.rows[0]["total_supply"] is None
+
+    with capture_queries() as stats:
+        [diff] = catalog_sync.sync_catalog(db, [spec])
+    assert len(diff.inserts) == 2
+    assert stats.count == 2  # bir SELECT + bir upsert
+
+    [again] = catalog_sync.sync_catalog(db, [spec])
+    assert (again.inserts, again.updates, again.unchanged) == ([], [], 2)
+
+
+def test_dry_run_reports_updates_and_extra_rows_without_writing(db, tmp_path):
+    catalog_sync.sync_catalog(db, [_spec(tmp_path, NFTS)])
+    changed = [dict(NFTS[0], price_stars=1500)]
+    [diff] = catalog_sync.sync_catalog(db, [_spec(tmp_path, changed)], dry_run=True)
+    assert diff.updates[0][1] == {"price_stars": (1000, 1500)}
+    assert diff.extra == [(2,)]
+    assert "      price_stars: 1000 -> 1500" in diff.lines()
+    assert db.get(models.NFT, 1).price_stars == 1000
+
+    catalog_sync.sync_catalog(db, [_spec(tmp_path, changed)])
+    db.expire_all()
+    assert db.get(models.NFT, 1).price_stars == 1500
+    assert db.get(models.NFT, 2) is not None
+
+
+def test_load_spec_rejects_unknown_columns(tmp_path):
+    with pytest.raises(ValueError, match="olmayan sütunlar"):
+        _spec(tmp_path, [dict(NFTS[0], rarity="common")])
+
+
+def test_updates_refresh_updated_at_and_partial_specs_update_in_place(db, tmp_path):
+    catalog_sync.sync_catalog(db, [_spec(tmp_path, NFTS)])
+    db.query(models.NFT).update({models.NFT.updated_at: datetime(2020, 1, 1)})
+    db.commit()
+
+    catalog_sync.sync_catalog(db, [_spec(tmp_path, [dict(NFTS[0], name="Baş Gözcü")])])
+    db.expire_all()
+    assert db.get(models.NFT, 1).updated_at.year > 2020
+    assert db.get(models.NFT, 2).updated_at.year == 2020
+
+    # Zorunlu sütunları (name, description) içermeyen spec mevcut satırları günceller, yeni satır ekleyemez
+    [diff] = catalog_sync.sync_catalog(db, [_spec(tmp_path, [{"id": 2, "price_stars": 25000}])])
+    assert len(diff.updates) == 1
+    db.expire_all()
+    assert (db.get(models.NFT, 2).price_stars, db.get(models.NFT, 2).name) == (25000, "DAO Üyesi")
+    assert db.get(models.NFT, 2).updated_at.year > 2020
+    with pytest.raises(ValueError, match="zorunlu sütunlar"):
+        catalog_sync.sync_catalog(db, [_spec(tmp_path, [{"id": 3, "price_stars": 10}])])
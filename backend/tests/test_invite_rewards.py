@@ -0,0 +1,62 @@
+import pytest
+
+import anticheat
+import invite_rewards
+import models
+from query_profiler import capture_queries
+
+
+@pytest.fixture
+def session_factory(session_factory, monkeypatch):
+    monkeypatch.setattr(invite_rewards, "PAYOUT_BATCH", 2)
+    with session_factory() as db:
+        db.add_all([models.User(id=1, telegram_id=1, stars=0), models.User(id=2, telegram_id=2, stars=0)])
+        # 1'in dört davetlisi seviye 2'de, biri seviye 1'de; 2'nin bir davetlisi seviye 3'te
+        levels = {10: 2, 11: 2, 12: 2, 13: 1, 14: 2, 20: 3}
+        db.add_all(models.User(id=uid, telegram_id=uid, level=level, inviter_id=1 if uid < 20 else 2)
+                   for uid, level in levels.items())
+        db.commit()
+    return session_factory
+
+
+def test_payout_is_batched_idempotent_and_throttled(session_factory):
+    # Parti başına: aday sorgusu + INSERT ... RETURNING + toplu UPDATE + defter
+    # INSERT'leri (ORM satırları; SQLite'ta RETURNING sırası garanti olmadığından satır başına)
+    with capture_queries() as stats:
+        assert invite_rewards.pay_batch(session_factory, limit=2) == 2
+    assert stats.count == 5
+
+    # Tek çalışmadaki parti sınırı kalan davetleri sonraki çalışmaya bırakır
+    assert invite_rewards.run_once(session_factory, max_batches=1, pause=0) == 2
+    assert invite_rewards.run_once(session_factory, pause=0) == 1
+    assert invite_rewards.run_once(session_factory, pause=0) == 0
+
+    with session_factory() as db:
+        db.get(models.User, 13).level = 2
+        db.commit()
+    assert invite_rewards.run_once(session_factory, pause=0) == 1
+
+    with session_factory() as db:
+        assert (db.get(models.User, 1).stars, db.get(models.User, 2).stars) == (125, 25)
+        assert db.query(models.InviteReward).count() == 6
+        assert sorted(t.description for t in db.query(models.StarTransaction) if t.user_id == 2) == [
+            "Davet ödülü (kullanıcı #20)"
+        ]
+        # Aynı çift yeniden talep edilirse ödenmez
+        assert invite_rewards._claim(db, [(1, 10)], invite_rewards.datetime.now(invite_rewards.timezone.utc)) == []
+
+
+def test_batch_payout_does_not_trip_stars_velocity(session_factory, monkeypatch):
+    detector = anticheat.Detector(mode="throttle")
+    monkeypatch.setattr(anticheat, "detector", detector)
+    monkeypatch.setattr(invite_rewards, "PAYOUT_BATCH", 200)
+    monkeypatch.setattr(invite_rewards, "INVITE_REWARD_STARS", 50)
+    # Viral artış: 1'in 45 yeni davetlisi aynı partide ödenir (saatlik Stars sınırından fazla)
+    with session_factory() as db:
+        db.add_all(models.User(id=uid, telegram_id=uid, level=2, inviter_id=1) for uid in range(100, 145))
+        db.commit()
+
+    assert invite_rewards.pay_batch(session_factory, limit=200) == 50
+    with session_factory() as db:
+        assert db.get(models.User, 1).stars > anticheat.MAX_STARS_PER_HOUR
+    assert detector.flags == {}
@@ -0,0 +1,33 @@
+import crud
+import models
+import schemas
+
+
+def signup(db, telegram_id, inviter=None):
+    return crud.create_user(db, schemas.UserCreate(telegram_id=telegram_id, username=f"u{telegram_id}",
+                                                   inviter_id=inviter.id if inviter else None))
+
+
+def test_signup_maintains_closure_and_counts(db):
+    # root -> a -> (b, c); b -> d
+    root = signup(db, 1)
+    a = signup(db, 2, root)
+    b, c = signup(db, 3, a), signup(db, 4, a)
+    d = signup(db, 5, b)
+    db.expire_all()
+
+    counts = {u.id: (u.invited_users_count, u.invite_subtree_size) for u in db.query(models.User)}
+    assert counts == {root.id: (1, 4), a.id: (2, 3), b.id: (1, 1), c.id: (0, 0), d.id: (0, 0)}
+    assert [u.id for u in crud.get_invitees_at_depth(db, root.id, depth=2)] == [b.id, c.id]
+    assert crud.get_invite_depth_counts(db, root.id) == {1: 1, 2: 2, 3: 1}
+    assert [e.user_id for e in crud.get_leaderboard(db, "invite_network", limit=3)] == [root.id, a.id, b.id]
+
+    # CTE ile baştan kurulum artımlı sonuçla aynı
+    before = sorted(db.query(models.InviteClosure.ancestor_id, models.InviteClosure.descendant_id,
+                             models.InviteClosure.depth).all())
+    assert crud.rebuild_invite_closure(db) == len(before) == 8
+    assert sorted(db.query(models.InviteClosure.ancestor_id, models.InviteClosure.descendant_id,
+                           models.InviteClosure.depth).all()) == before
+    db.expire_all()
+    assert db.get(models.User, root.id).invite_subtree_size == 4
+    assert crud.get_invite_info(db.get(models.User, a.id)).invite_link.endswith(f"start=invite_{a.id}")
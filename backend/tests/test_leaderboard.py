@@ -0,0 +1,46 @@
+import pytest
+
+import auth
+import models
+from cache import cache
+from main import app
+
+# Kullanıcı 1 her kategoride önde; 2'nin değerleri kategoriye göre farklı
+SCORES = {
+    "xp": (500, 50),
+    "missions_completed": (3, 2),
+    "stars_spent": (40, 15),
+    "invites": (6, 4),
+    "invite_network": (9, 7),
+}
+
+
+@pytest.fixture
+def caller(session_factory):
+    with session_factory() as db:
+        mission = models.Mission(id=1, title="görev", description="d", xp_reward=10)
+        db.add(mission)
+        for user_id, index in ((1, 0), (2, 1)):
+            db.add(models.User(id=user_id, telegram_id=user_id, username=f"u{user_id}",
+                               xp=SCORES["xp"][index], invited_users_count=SCORES["invites"][index],
+                               invite_subtree_size=SCORES["invite_network"][index]))
+            db.add_all(models.UserMission(user_id=user_id, mission_id=1)
+                       for _ in range(SCORES["missions_completed"][index]))
+            db.add(models.StarTransaction(user_id=user_id, amount=-SCORES["stars_spent"][index],
+                                          transaction_type=models.TransactionType.DEBIT, reason="test"))
+        db.commit()
+        user = db.get(models.User, 2)
+    cache.clear()
+    app.dependency_overrides[auth.get_current_active_user] = lambda: user
+    yield user
+    app.dependency_overrides.pop(auth.get_current_active_user, None)
+    cache.clear()
+
+
+@pytest.mark.parametrize("category", list(SCORES))
+def test_caller_outside_top_n_gets_own_value(client, caller, category):
+    response = client.get(f"/leaderboard/leaderboard/{category}", params={"limit": 1})
+    assert response.status_code == 200
+    entries = [(entry["rank"], entry["user_id"], entry["value"]) for entry in response.json()["entries"]]
+    assert entries == [(1, 1, SCORES[category][0]), (2, 2, SCORES[category][1])]
+    assert client.get(f"/leaderboard/user-rank/{category}").json() == 2
@@ -0,0 +1,31 @@
+import pytest
+from sqlalchemy import literal, select
+
+import levels
+import models
+
+SAMPLE_XP = [-5, 0, 99, 100, 299, 300, 599, 600, 999, 1000, 1499, 1500, 2499, 2500, 3999, 4000,
+             5999, 6000, 8999, 9000, 13999, 14000, 19000, 1_000_000]
+
+
+def test_level_table_boundaries():
+    assert [levels.level_for_xp(xp) for xp in (0, 99, 100, 8999, 9000, 13999, 14000)] == [1, 1, 2, 9, 10, 10, 11]
+    for level in range(1, 20):
+        assert levels.level_for_xp(levels.xp_for_level(level)) == level
+        assert levels.level_for_xp(levels.xp_for_level(level) - 1) == max(level - 1, 1)
+    assert levels.levels_for_xp_array(SAMPLE_XP) == [levels.level_for_xp(xp) for xp in SAMPLE_XP]
+
+
+def test_sql_expression_matches_python(db):
+    for xp in SAMPLE_XP:
+        assert db.execute(select(levels.level_expression(literal(xp)))).scalar() == levels.level_for_xp(xp)
+
+
+def test_recompute_updates_only_stale_rows(db):
+    db.add_all([models.User(telegram_id=i, xp=xp, level=1) for i, xp in enumerate((0, 150, 9000, 20000), start=1)])
+    db.commit()
+
+    assert levels.recompute_levels(db, chunk_size=3, dry_run=True) == {"scanned": 4, "changed": 3}
+    assert levels.recompute_levels(db, chunk_size=3) == {"scanned": 4, "changed": 3}
+    assert [u.level for u in db.query(models.User).order_by(models.User.id)] == [1, 2, 10, 12]
+    assert levels.recompute_levels(db)["changed"] == 0
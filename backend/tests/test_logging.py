@@ -0,0 +1,33 @@
+import json
+import logging
+
+from logging_config import JsonFormatter, RequestIdFilter, SamplingFilter, request_id_var
+
+
+def _record(name="test", level=logging.INFO, msg="mesaj %s", args=("x",), **extra):
+    record = logging.LogRecord(name, level, __file__, 1, msg, args, None)
+    for key, value in extra.items():
+        setattr(record, key, value)
+    return record
+
+
+def test_json_formatter_includes_request_id_and_extra():
+    token = request_id_var.set("req-1")
+    try:
+        record = _record(user_id=5)
+        RequestIdFilter().filter(record)
+    finally:
+        request_id_var.reset(token)
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry["msg"] == "mesaj x"
+    assert entry["request_id"] == "req-1"
+    assert entry["user_id"] == 5
+    assert entry["level"] == "INFO"
+
+
+def test_sampling_filter_passes_every_nth_and_never_drops_warnings():
+    sampler = SamplingFilter({"query_profiler": 0.25})
+    passed = [sampler.filter(_record(name="query_profiler")) for _ in range(8)]
+    assert passed == [True, False, False, False, True, False, False, False]
+    assert all(sampler.filter(_record(name="query_profiler", level=logging.WARNING)) for _ in range(3))
+    assert all(sampler.filter(_record(name="auth")) for _ in range(3))
@@ -0,0 +1,68 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+import metrics
+import models
+import tasks
+from main import app
+
+client = TestClient(app)
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = metrics.Histogram("test_seconds", "test", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 5.0):
+        histogram.observe(value, ("/x",))
+    lines = list(histogram.samples())
+    assert 'test_seconds_bucket{route="/x",le="0.1"} 1' in lines
+    assert 'test_seconds_bucket{route="/x",le="1.0"} 3' in lines
+    assert 'test_seconds_bucket{route="/x",le="+Inf"} 4' in lines
+    assert 'test_seconds_count{route="/x"} 4' in lines
+
+
+def test_star_transactions_counted_only_on_commit(db):
+    before = metrics.STARS.values().get(("debit",), 0)
+    user = models.User(telegram_id=1)
+    db.add(user)
+    db.flush()
+    db.add(models.StarTransaction(user_id=user.id, amount=-30, transaction_type=models.TransactionType.DEBIT,
+                                  reason="test"))
+    db.flush()
+    db.rollback()
+    assert metrics.STARS.values().get(("debit",), 0) == before
+
+    db.add(models.StarTransaction(user_id=user.id, amount=-30, transaction_type=models.TransactionType.DEBIT,
+                                  reason="test"))
+    db.commit()
+    assert metrics.STARS.values()[("debit",)] == before + 30
+
+
+def test_metrics_endpoint_uses_route_templates(monkeypatch, session_factory):
+    # Kuyruk göstergeleri outbox'u okur; varsayılan veritabanı dosyası yerine bellekte
+    monkeypatch.setattr(tasks.queue, "session_factory", session_factory)
+    client.get("/health")
+    client.get("/nft/list")
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'http_request_duration_seconds_count{method="GET",route="/nft/list",status="200"}' in response.text
+    assert "# TYPE missions_completed_total counter" in response.text
+    assert 'task_queue_depth{status="pending"} 0' in response.text
+
+
+def test_metrics_render_runs_off_the_event_loop(monkeypatch):
+    # Göstergeler senkron veritabanı sorgusu yapar; olay döngüsünü bekletmemeli
+    calls = []
+
+    def render():
+        try:
+            asyncio.get_running_loop()
+            calls.append("loop")
+        except RuntimeError:
+            calls.append("thread")
+        return ""
+
+    monkeypatch.setattr(metrics, "render", render)
+    assert client.get("/metrics").status_code == 200
+    assert calls == ["thread"]
@@ -0,0 +1,94 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import event
+
+import anticheat
+import crud
+import models
+import schemas
+
+NOW = datetime(2026, 5, 1, 12, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def db(db):
+    db.add(models.User(id=1, telegram_id=1, xp=0, level=1))
+    db.add_all([
+        models.Mission(id=1, title="saatlik", description="d", xp_reward=100, cooldown_hours=1),
+        models.Mission(id=2, title="tek sefer", description="d", xp_reward=50, cooldown_hours=0),
+        models.Mission(id=3, title="seviye 3", description="d", xp_reward=10, required_level=3),
+        models.Mission(id=4, title="pasif", description="d", xp_reward=10, is_active=False),
+    ])
+    db.commit()
+    return db
+
+
+def item(mission_id, minutes_ago=0):
+    return schemas.BatchCompleteMissionItem(mission_id=mission_id, client_timestamp=NOW - timedelta(minutes=minutes_ago))
+
+
+def test_batch_validates_each_item_in_time_order(db):
+    commits = []
+    event.listen(db, "after_commit", lambda session: commits.append(session))
+    items = [
+        item(1, 150), item(1, 90), item(1, 40),  # cooldown sunucu zamanına göre: partide bir kez
+        item(2, 30), item(2, 20),                # tek seferlik görev
+        item(3, 10),                             # önceki XP ile seviye 2, yetersiz
+        item(4), item(99), item(1, 60 * 25),     # pasif, yok, pencere dışı
+    ]
+    response = crud.complete_missions_batch(db, db.get(models.User, 1), items, now=NOW)
+
+    assert [r.completed for r in response.results] == [True, False, False, True, False, False, False, False, False]
+    assert response.results[1].detail == "Bu görevi henüz tekrar yapamazsınız."
+    assert response.results[5].detail == "Bu görevi yapmak için yeterli seviyede değilsiniz."
+    assert response.results[8].detail == "Tamamlama zamanı çok eski."
+    assert response.completed_count == 2
+    assert (response.new_xp, response.new_level, response.streak) == (152, 2, 2)
+    assert len(commits) == 1
+
+    # Kayıtlar istemcinin bildirdiği değil sunucunun zamanını taşır
+    state = crud.get_mission_state(db, user_id=1, mission_id=1)
+    assert state.completion_count == 1
+    assert state.last_completed_at.replace(tzinfo=timezone.utc) == NOW
+    assert {m.completed_at.replace(tzinfo=timezone.utc) for m in db.query(models.UserMission)} == {NOW}
+
+    # Kaydedilen durum sonraki partide de geçerli
+    again = crud.complete_missions_batch(db, db.get(models.User, 1), [item(2), item(1)],
+                                         now=NOW + timedelta(minutes=30))
+    assert [r.completed for r in again.results] == [False, False]
+    again = crud.complete_missions_batch(db, db.get(models.User, 1), [item(2), item(1)],
+                                         now=NOW + timedelta(hours=1))
+    assert [r.completed for r in again.results] == [False, True]
+
+
+def test_backdated_timestamps_cannot_skip_cooldowns(db):
+    # Son 24 saate saatlik yayılmış zamanlar tek istekte tek tamamlama verir
+    items = [item(1, 60 * hours) for hours in range(23, -1, -1)]
+    response = crud.complete_missions_batch(db, db.get(models.User, 1), items, now=NOW)
+    assert response.completed_count == 1
+    assert response.new_xp == 100
+
+    user = db.get(models.User, 1)
+    assert user.last_mission_at.replace(tzinfo=timezone.utc) == NOW
+    # Geriye tarihli zaman durum satırına yazılmadığı için anlık tamamlama da cooldown'a takılır
+    later = crud.complete_missions_batch(db, user, [item(1)], now=NOW + timedelta(minutes=10))
+    assert later.results[0].detail == "Bu görevi henüz tekrar yapamazsınız."
+
+
+def test_replayed_batch_is_one_event_for_anticheat(db, monkeypatch):
+    detector = anticheat.Detector(mode="throttle")
+    monkeypatch.setattr(anticheat, "detector", detector)
+    db.add_all(models.Mission(id=mission_id, title=f"günlük {mission_id}", description="d", xp_reward=1,
+                              cooldown_hours=24) for mission_id in range(10, 22))
+    db.commit()
+    now = datetime.now(timezone.utc)
+    items = [schemas.BatchCompleteMissionItem(mission_id=mission_id, client_timestamp=now - timedelta(minutes=i))
+             for i, mission_id in enumerate(range(10, 22))]
+
+    response = crud.complete_missions_batch(db, db.get(models.User, 1), items, now=now)
+
+    # 12 tamamlama aynı anda yazılır; dakika ve aralık kuralları tek olay görür
+    assert response.completed_count == 12
+    assert detector.flags == {}
+    assert detector.retry_after(1) == 0
@@ -0,0 +1,55 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import crud
+import models
+from query_profiler import capture_queries
+
+NOW = datetime(2026, 5, 1, 12, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def db(db):
+    db.add(models.User(id=1, telegram_id=1))
+    db.add_all([
+        models.Mission(id=1, title="günlük", description="d", xp_reward=10, cooldown_hours=24),
+        models.Mission(id=2, title="tek sefer", description="d", xp_reward=10, cooldown_hours=0),
+        models.Mission(id=3, title="saatlik", description="d", xp_reward=10, cooldown_hours=1),
+        models.Mission(id=4, title="vip", description="d", xp_reward=10, cooldown_hours=24, is_vip=True),
+        models.Mission(id=5, title="seviye 3", description="d", xp_reward=10, cooldown_hours=24, required_level=3),
+    ])
+    db.commit()
+    return db
+
+
+def test_completion_upserts_state(db):
+    crud.record_mission_completion(db, user_id=1, mission_id=1, now=NOW - timedelta(days=2))
+    crud.record_mission_completion(db, user_id=1, mission_id=1, now=NOW - timedelta(hours=3))
+    crud.record_mission_completion(db, user_id=1, mission_id=2, now=NOW - timedelta(hours=3))
+    db.commit()
+
+    state = crud.get_mission_state(db, user_id=1, mission_id=1)
+    assert state.completion_count == 2
+    assert state.last_completed_at.replace(tzinfo=timezone.utc) == NOW - timedelta(hours=3)
+    assert crud.get_mission_state(db, user_id=1, mission_id=3) is None
+    assert crud.mission_available_at(state, 24) == NOW + timedelta(hours=21)
+    # cooldown 0 = tekrar edilemez
+    assert crud.mission_available_at(crud.get_mission_state(db, 1, 2), 0).year == 9999
+
+
+def test_cooldowns_come_from_one_query(db):
+    for mission_id in (1, 2, 3, 4, 5):
+        crud.record_mission_completion(db, user_id=1, mission_id=mission_id, now=NOW - timedelta(hours=3))
+    db.commit()
+    user = db.get(models.User, 1)
+
+    with capture_queries() as stats:
+        cooldowns = crud.get_mission_cooldowns(db, user=user, now=NOW)
+    assert stats.count == 1
+    # Saatlik görevin süresi dolmuş, tek seferlik görevin cooldown'u yok; VIP ve
+    # seviye kilitli görevler kullanıcıya görünmediği için dönmez
+    assert cooldowns == {1: NOW + timedelta(hours=21)}
+
+    user.has_vip_access, user.level = True, 3
+    assert set(crud.get_mission_cooldowns(db, user=user, now=NOW)) == {1, 4, 5}
@@ -68,6 +68,93 @@ def test_nft_metadata_consistency():
         # Video URL'sinin doğru formatta olup olmadığını kontrol et
         assert nft["video"].startswith("https://") and nft["video"].endswith(".mp4")
 
+def test_nft_list_filters():
+    """
+    /nft/list filtrelerinin ikincil indekslerden doğru sonuç döndürüp döndürmediğini test eder.
+    """
+    all_nfts = client.get("/nft/list").json()
+
+    response = client.get("/nft/list", params={"rarity": "common"})
+    assert response.status_code == 200
+    data = response.json()
+    assert [nft["id"] for nft in data] == [nft["id"] for nft in all_nfts if nft["rarity"] == "common"]
+
+    category = all_nfts[0]["category"]
+    data = client.get("/nfts/list", params={"category": category.upper(), "level": 1}).json()
+    assert len(data) > 0
+    assert all(nft["category"] == category and nft["level"] == 1 for nft in data)
+
+    # Eşleşmeyen filtre boş liste döndürmeli
+    assert client.get("/nft/list", params={"category": "olmayan-kategori"}).json() == []
+
+def test_nft_catalog_keyset_pagination(session_factory, client):
+    """
+    /nfts/ kataloğunun imleçle tüm NFT'leri tekrarsız ve sıralı döndürdüğünü test eder.
+    """
+    import crud, models
+
+    with session_factory() as db:
+        for i in range(25):
+            db.add(models.NFT(
+                name=f"NFT {i}", description="test", image_url="x",
+                category=models.NFTCategory.WATCHER if i % 2 else models.NFTCategory.WARRIOR,
+                price_stars=(i % 5) * 10, total_supply=1, is_active=True
+            ))
+        db.commit()
+
+    crud.invalidate_catalog_counts()
+    try:
+        seen, cursor = [], None
+        while True:
+            params = {"limit": 7, **({"cursor": cursor} if cursor else {})}
+            response = client.get("/nfts/", params=params)
+            assert response.status_code == 200
+            assert response.headers["X-Total-Count"] == "25"
+            seen += [(nft["price_stars"], nft["id"]) for nft in response.json()]
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+        assert seen == sorted(seen) and len(set(seen)) == 25
+
+        response = client.get("/nfts/", params={"category": "watcher"})
+        assert response.headers["X-Total-Count"] == "12"
+        assert client.get("/nfts/", params={"cursor": "bozuk"}).status_code == 400
+        assert client.get("/nfts/", params={"category": "olmayan"}).status_code == 400
+    finally:
+        crud.invalidate_catalog_counts()
+
+def test_nft_catalog_newest_sort_pages_forward(session_factory, client):
+    """
+    En yeni sıralamasında imleç, saniye hassasiyetinde saklanan zamanlarda da sonraki sayfaya ilerlemeli.
+    """
+    from sqlalchemy import text, update
+    import crud, models
+
+    with session_factory() as db:
+        for i in range(25):
+            db.add(models.NFT(name=f"NFT {i}", description="test", price_stars=10, is_active=True))
+        db.flush()
+        # func.now() gibi saniye hassasiyetinde metin; aynı saniyede üçer NFT
+        for nft_id in range(1, 26):
+            db.execute(update(models.NFT).where(models.NFT.id == nft_id)
+                       .values(created_at=text(f"'2026-05-01 12:00:{nft_id // 3:02d}'")))
+        db.commit()
+
+    crud.invalidate_catalog_counts()
+    try:
+        seen, cursor = [], None
+        for _ in range(10):
+            params = {"sort": "newest", "limit": 7, **({"cursor": cursor} if cursor else {})}
+            response = client.get("/nfts/", params=params)
+            assert response.status_code == 200
+            seen += [nft["id"] for nft in response.json()]
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+        assert seen == sorted(range(1, 26), key=lambda nft_id: (nft_id // 3, nft_id), reverse=True)
+    finally:
+        crud.invalidate_catalog_counts()
+
 if __name__ == "__main__":
     # Testleri manuel olarak çalıştırmak için
     pytest.main(["-xvs", __file__]) 
\ No newline at end of file
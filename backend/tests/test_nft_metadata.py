@@ -0,0 +1,46 @@
+from sqlalchemy import text, update
+
+import generate_nft_metadata
+import models
+import nft_metadata
+
+# SQLite'ta func.now() zamanı saniye hassasiyetinde metin olarak yazar
+SECOND = text("'2026-05-01 12:00:00'")
+
+
+def generate(db, tmp_path, **kwargs):
+    return generate_nft_metadata.generate(
+        db, workers=1, metadata_dir=str(tmp_path / "metadata"), catalog_path=str(tmp_path / "catalog.json"),
+        manifest_path=str(tmp_path / "manifest.json"), **kwargs
+    )
+
+
+def test_incremental_run_picks_up_rows_updated_in_watermark_second(db, tmp_path):
+    db.add_all([
+        models.NFT(id=1, name="Gözcü", description="a", price_stars=10),
+        models.NFT(id=2, name="Savaşçı", description="b", price_stars=20),
+    ])
+    db.execute(update(models.NFT).values(updated_at=SECOND))
+    db.commit()
+    assert generate(db, tmp_path)["written"] == 2
+
+    # Filigranla aynı saniyede güncellenen satır yakalanır; değişmeyen tekrar yazılmaz
+    db.execute(update(models.NFT).where(models.NFT.id == 2).values(name="Usta Savaşçı", updated_at=SECOND))
+    db.commit()
+    assert generate(db, tmp_path) == {"scanned": 2, "written": 1, "removed": 0, "total": 2}
+    catalog = nft_metadata.load_catalog(str(tmp_path / "catalog.json"))
+    assert [item["name"] for item in catalog] == ["Gözcü", "Usta Savaşçı"]
+
+
+def test_store_serves_nft_without_video_and_skips_invalid_entries(tmp_path):
+    catalog = [
+        nft_metadata.build_metadata({"id": 1, "name": "Gözcü", "category": "general", "video_url": None,
+                                     "image_url": None, "description": "a", "price_stars": 10}),
+        {"id": 2, "name": "Bozuk", "category": "general", "level": 1, "rarity": "efsane"},
+    ]
+    nft_metadata.write_json_atomic(str(tmp_path / "nfts.json"), catalog)
+
+    store = nft_metadata.NFTMetadataStore(str(tmp_path / "nfts.json"))
+    assert [item["id"] for item in store.public_list()] == [1]
+    assert store.public_list()[0]["video"] is None
+    assert store.get(2) is None
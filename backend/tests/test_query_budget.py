@@ -0,0 +1,59 @@
+import pytest
+
+import models
+from query_profiler import assert_max_queries, capture_queries, statement_shape
+
+TELEGRAM_ID = 555000111
+
+
+@pytest.fixture
+def seeded_user(session_factory):
+    """10'ar rozet, NFT, görev ve tamamlama kaydı olan bir kullanıcı"""
+    with session_factory() as db:
+        user = models.User(telegram_id=TELEGRAM_ID, username="sorgu", xp=5000)
+        db.add(user)
+        db.flush()
+        for i in range(10):
+            nft = models.NFT(name=f"NFT {i}", description="test", image_url="x",
+                             category=models.NFTCategory.VOTE_BASIC, price_stars=10, is_active=True)
+            badge = models.Badge(name=f"Rozet {i}", description="test", image_url="x")
+            db.add_all([nft, badge])
+            db.flush()
+            mission = models.Mission(title=f"Görev {i}", description="test", xp_reward=10,
+                                     mission_type=models.MissionType.MESSAGE, required_nft_id=nft.id, is_active=True)
+            db.add(mission)
+            db.flush()
+            db.add_all([
+                models.UserNFT(user_id=user.id, nft_id=nft.id),
+                models.UserBadge(user_id=user.id, badge_id=badge.id),
+                models.UserMission(user_id=user.id, mission_id=mission.id),
+            ])
+        db.commit()
+        return user.id
+
+
+@pytest.mark.parametrize("path, budget", [
+    ("/wallet/{user_id}", 3),
+    ("/users/missions/{telegram_id}", 5),
+    ("/profile/{telegram_id}", 6),
+])
+def test_endpoint_query_budget(client, seeded_user, path, budget):
+    """Sorgu sayısı sahip olunan kayıt sayısıyla artmamalı (N+1 yok)"""
+    with assert_max_queries(budget):
+        response = client.get(path.format(user_id=seeded_user, telegram_id=TELEGRAM_ID))
+    assert response.status_code == 200
+    assert response.headers["Server-Timing"].startswith("db;dur=")
+
+
+def test_repeated_statements_are_flagged(db, seeded_user):
+    with pytest.raises(AssertionError, match="N\\+1"):
+        with assert_max_queries(100):
+            for nft_id in range(1, 8):
+                db.query(models.NFT).filter(models.NFT.id == nft_id).first()
+
+
+def test_statement_shape_collapses_in_lists():
+    assert statement_shape("SELECT *\n FROM t WHERE id IN (?, ?, ?)") == "SELECT * FROM t WHERE id IN (?)"
+    with capture_queries() as stats:
+        pass
+    assert stats.count == 0
@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from jose import jwt
+
+import ratelimit
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(ratelimit, "SECRET_KEY", "test-secret")
+    app = FastAPI()
+
+    @app.post("/dao/vote")
+    def vote():
+        return {"ok": True}
+
+    @app.get("/health")
+    def health():
+        return {"ok": True}
+
+    policies = ratelimit.parse_policies("POST /dao/vote=2/60,POST /users/login=off")
+    app.add_middleware(ratelimit.RateLimitMiddleware, policies=policies, store=ratelimit.MemoryStore(),
+                       enabled=True)
+    return TestClient(app)
+
+
+def bearer(sub):
+    return {"Authorization": f"Bearer {jwt.encode({'sub': sub}, 'test-secret', algorithm='HS256')}"}
+
+
+def test_limits_are_per_user_with_ip_fallback(client):
+    assert [client.post("/dao/vote", headers=bearer("1")).status_code for _ in range(3)] == [200, 200, 429]
+    limited = client.post("/dao/vote", headers=bearer("1"))
+    assert limited.headers["retry-after"] == "30"
+    assert limited.json()["detail"].startswith("Çok fazla istek")
+
+    # Başka kullanıcının kovası ayrı; imzası geçersiz token IP kovasına düşer
+    assert client.post("/dao/vote", headers=bearer("2")).status_code == 200
+    forged = {"Authorization": "Bearer " + jwt.encode({"sub": "3"}, "wrong", algorithm="HS256")}
+    assert [client.post("/dao/vote", headers=forged).status_code for _ in range(2)] == [200, 200]
+    assert client.post("/dao/vote").status_code == 429
+    assert all(client.get("/health").status_code == 200 for _ in range(5))
+
+
+def test_bucket_refills_and_policy_parsing(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr(ratelimit.time, "monotonic", lambda: clock[0])
+    store, policy = ratelimit.MemoryStore(maxsize=2), ratelimit.Policy(2, 10)
+    assert [store.hit("a", policy) for _ in range(3)] == [0, 0, 5.0]
+    clock[0] += 5
+    assert store.hit("a", policy) == 0
+
+    policies = ratelimit.parse_policies("post /users/login=20/60:ip")
+    assert policies[("POST", "/users/login")] == ratelimit.Policy(20, 60, "ip")
+    with pytest.raises(ValueError):
+        ratelimit.parse_policies("POST /dao/vote=20/60:device")
+    # Stars harcayan iki endpoint de aynı sınırı paylaşır
+    assert policies[("POST", "/users/me/stars/use")] == policies[("POST", "/users/use-stars")]
+
+
+class RemoteStore(ratelimit.MemoryStore):
+    """Ağ üzerinden çalışıyormuş gibi davranan depo; olay döngüsünde çağrılıp çağrılmadığını kaydeder"""
+
+    blocking = True
+
+    def __init__(self):
+        super().__init__()
+        self.on_loop = []
+
+    def hit(self, key, policy):
+        try:
+            asyncio.get_running_loop()
+            self.on_loop.append(True)
+        except RuntimeError:
+            self.on_loop.append(False)
+        return super().hit(key, policy)
+
+
+def test_blocking_store_is_called_off_the_event_loop(monkeypatch):
+    monkeypatch.setattr(ratelimit, "SECRET_KEY", "test-secret")
+    app = FastAPI()
+
+    @app.post("/dao/vote")
+    async def vote():
+        return {"ok": True}
+
+    store = RemoteStore()
+    app.add_middleware(ratelimit.RateLimitMiddleware, policies=ratelimit.parse_policies("POST /dao/vote=1/60"),
+                       store=store, enabled=True)
+    client = TestClient(app)
+    assert [client.post("/dao/vote", headers=bearer("1")).status_code for _ in range(2)] == [200, 429]
+    assert store.on_loop == [False, False]
@@ -0,0 +1,79 @@
+import pytest
+
+import crud
+import models
+import search
+
+
+@pytest.fixture
+def db(db):
+    db.add_all([
+        models.Mission(id=1, title="Işıklı Şehir Görevi", description="Gece yürüyüşü", xp_reward=10),
+        models.Mission(id=2, title="Gizli İstanbul Turu", description="Şehir rehberi", xp_reward=10, is_vip=True),
+        models.Mission(id=3, title="Eski Şehir", description="Kapalı", xp_reward=10, is_active=False),
+        models.Mission(id=4, title="Sabah Koşusu", description="Şehir parkında koş", xp_reward=10),
+        models.NFT(id=1, name="ŞEHİR IŞIKLARI", description="Koleksiyon", price_stars=10),
+        models.Badge(id=1, name="Ağaç Dostu", description="Fidan dik", image_url="/a.png"),
+    ])
+    db.commit()
+    return db
+
+
+def hits(db, query, **kwargs):
+    return [(item["kind"], item["id"]) for item in search.search_documents(db, query, **kwargs)[0]]
+
+
+def test_turkish_folding_ranking_and_visibility(db):
+    # ı/İ/ğ/ş farkı ve büyük/küçük harf yok sayılır; son kelime önek olarak aranır
+    assert hits(db, "ISIKLI sehir") == [("mission", 1)]
+    assert hits(db, "ağac") == hits(db, "AGAC") == [("badge", 1)]
+    assert hits(db, "istanbul", audiences=("public",)) == []
+    assert hits(db, "istanbul", audiences=("public", "vip")) == [("mission", 2)]
+    # Başlık eşleşmeleri açıklamadakilerden önce; pasif kayıt yalnızca admin aramasında
+    public = hits(db, "şehir")
+    assert set(public[:2]) == {("mission", 1), ("nft", 1)} and public[2:] == [("mission", 4)]
+    assert ("mission", 3) in hits(db, "şehir", audiences=None)
+    assert hits(db, "şehir", kind="nft") == [("nft", 1)]
+
+    items, has_more = search.search_documents(db, "şehir", limit=2)
+    assert len(items) == 2 and has_more
+    items, has_more = search.search_documents(db, "şehir", limit=2, offset=2)
+    assert [(item["id"], item["title"]) for item in items] == [(4, "Sabah Koşusu")] and not has_more
+    assert search.search_documents(db, "ve") == ([], False)
+
+
+def test_triggers_keep_index_in_sync(db):
+    mission = db.get(models.Mission, 4)
+    mission.title = "Akşam Yüzmesi"
+    db.get(models.Mission, 1).is_active = False
+    db.delete(db.get(models.NFT, 1))
+    db.commit()
+    assert hits(db, "koşusu") == []
+    assert hits(db, "yuzme") == [("mission", 4)]
+    assert hits(db, "şehir") == [("mission", 4)]
+
+    # Dizin sonradan kurulursa mevcut kayıtlar doldurulur
+    connection = db.connection()
+    connection.exec_driver_sql("DROP TABLE search_index")
+    assert search.install(connection) is True
+    assert hits(db, "dostu") == [("badge", 1)]
+
+
+def test_mission_category_matches_name_or_turkish_value():
+    assert crud.resolve_mission_type("FLÖRT") == crud.resolve_mission_type("flirt") == models.MissionType.FLIRT
+    assert crud.resolve_mission_type("DİĞER") == models.MissionType.OTHER
+    assert crud.resolve_mission_type("yok") is None
+
+
+def test_filters_apply_before_candidate_cap(db, monkeypatch):
+    monkeypatch.setattr(search, "RANK_CANDIDATES", 50)
+    db.add(models.NFT(id=2, name="Yıldız Kartı", description="Koleksiyon", price_stars=10))
+    db.add(models.Mission(id=5, title="Yıldız Avı", description="Açık", xp_reward=10))
+    # Daha yeni 60 eşleşmenin hepsi görev; yarısı VIP, yarısı pasif
+    db.add_all(models.Mission(id=100 + i, title=f"Yıldız Görevi {i}", description="d", xp_reward=10,
+                              is_vip=i % 2 == 0, is_active=i % 2 == 0) for i in range(60))
+    db.commit()
+
+    assert hits(db, "yildiz", kind="nft") == [("nft", 2)]
+    assert set(hits(db, "yildiz")) == {("mission", 5), ("nft", 2)}
+    assert len(hits(db, "yildiz", audiences=("public", "vip"), limit=50)) == 32
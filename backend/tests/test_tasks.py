@@ -0,0 +1,162 @@
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy.orm import Session
+
+import crud
+import models
+import tasks
+from models import OutboxTask, TaskStatus
+
+
+@pytest.fixture
+def user_with_badge(session_factory):
+    with session_factory() as db:
+        user = models.User(telegram_id=1, username="u1")
+        mission = models.Mission(title="m", description="d", xp_reward=10)
+        db.add_all([user, mission])
+        db.flush()
+        db.add(models.Badge(name="b", description="d", image_url="x", required_mission_id=mission.id))
+        db.commit()
+        return user.id, mission.id
+
+
+def test_enqueue_is_part_of_callers_transaction(session_factory, user_with_badge):
+    user_id, mission_id = user_with_badge
+    with session_factory() as db:
+        tasks.enqueue(db, "award_mission_badges", user_id=user_id, mission_id=mission_id)
+        db.rollback()
+        assert db.query(OutboxTask).count() == 0
+
+        tasks.enqueue(db, "award_mission_badges", user_id=user_id, mission_id=mission_id)
+        db.commit()
+        assert db.query(OutboxTask).count() == 1
+
+    with pytest.raises(ValueError):
+        tasks.enqueue(session_factory(), "no_such_task")
+
+
+def test_drain_runs_task_and_deletes_row(session_factory, user_with_badge):
+    user_id, mission_id = user_with_badge
+    with session_factory() as db:
+        # Aynı görev iki kez kuyruğa girse de rozet bir kez verilir
+        tasks.enqueue(db, "award_mission_badges", user_id=user_id, mission_id=mission_id)
+        tasks.enqueue(db, "award_mission_badges", user_id=user_id, mission_id=mission_id)
+        db.commit()
+
+    assert tasks.drain(session_factory) == {"ok": 2}
+    with session_factory() as db:
+        assert db.query(OutboxTask).count() == 0
+        assert db.query(models.UserBadge).filter_by(user_id=user_id).count() == 1
+
+
+def test_failing_task_retries_then_fails(session_factory):
+    calls = []
+
+    @tasks.task("test_always_fails", max_attempts=2)
+    def always_fails(db, **payload):
+        calls.append(payload)
+        raise RuntimeError("boom")
+
+    with session_factory() as db:
+        tasks.enqueue(db, "test_always_fails", n=1)
+        db.commit()
+
+    assert tasks.drain(session_factory) == {"retry": 1}
+    # Geri çekilme süresini beklemeden tekrar vadesi gelmiş say
+    with session_factory() as db:
+        row = db.query(OutboxTask).one()
+        assert row.status == TaskStatus.PENDING and "boom" in row.last_error
+        row.available_at = tasks._utcnow()
+        db.commit()
+
+    assert tasks.drain(session_factory) == {"failed": 1}
+    with session_factory() as db:
+        row = db.query(OutboxTask).one()
+        assert (row.status, row.attempts) == (TaskStatus.FAILED, 2)
+    assert calls == [{"n": 1}, {"n": 1}]
+    assert tasks.queue_depth(session_factory)["failed"] == 1
+
+
+def test_queue_runs_task_after_commit(session_factory, user_with_badge):
+    user_id, mission_id = user_with_badge
+    queue = tasks.TaskQueue(concurrency=2, poll_interval=30)
+
+    async def scenario():
+        await queue.start(session_factory)
+        previous, tasks.queue = tasks.queue, queue
+        try:
+            with session_factory() as db:
+                tasks.enqueue(db, "award_mission_badges", user_id=user_id, mission_id=mission_id)
+                db.commit()
+            # Uzun yoklama aralığına rağmen commit kuyruğu hemen uyandırır
+            for _ in range(100):
+                if not any(tasks.queue_depth(session_factory).values()):
+                    break
+                await asyncio.sleep(0.02)
+        finally:
+            tasks.queue = previous
+            await queue.stop()
+
+    asyncio.run(scenario())
+    with session_factory() as db:
+        assert db.query(OutboxTask).count() == 0
+        assert db.query(models.UserBadge).count() == 1
+
+
+def test_vip_gift_nft_is_granted_once(session_factory, monkeypatch):
+    monkeypatch.setattr(crud.nfts, "VIP_NFT_ID", 7)
+    with session_factory() as db:
+        db.add_all([models.User(id=1, telegram_id=1), models.NFT(id=7, name="VIP", description="d", price_stars=0)])
+        db.flush()
+        tasks.enqueue(db, "grant_vip_nft", user_id=1)
+        tasks.enqueue(db, "grant_vip_nft", user_id=1)
+        db.commit()
+
+    claimed = tasks.claim_due(session_factory, 10)
+    assert [tasks.execute(session_factory, task_id) for task_id in claimed] == ["ok", "ok"]
+    with session_factory() as db:
+        assert [(n.user_id, n.nft_id, n.purchase_price_stars) for n in db.query(models.UserNFT)] == [(1, 7, 0)]
+
+
+def test_task_effects_commit_together_with_row_deletion(session_factory, monkeypatch):
+    with session_factory() as db:
+        db.add(models.User(id=1, telegram_id=1, consecutive_login_days=3))
+        db.flush()
+        tasks.enqueue(db, "record_login", user_id=1, at="2026-05-01T12:00:00+00:00")
+        db.commit()
+
+    # Satır silinemezse girişin etkisi de yazılmamalı
+    def fail_delete(self, instance):
+        raise RuntimeError("silme başarısız")
+
+    [task_id] = tasks.claim_due(session_factory, 10)
+    with monkeypatch.context() as patch:
+        patch.setattr(Session, "delete", fail_delete)
+        assert tasks.execute(session_factory, task_id) == "retry"
+    with session_factory() as db:
+        assert db.get(models.User, 1).consecutive_login_days == 3
+        db.query(OutboxTask).update({OutboxTask.available_at: tasks._utcnow()})
+        db.commit()
+
+    assert tasks.drain(session_factory) == {"ok": 1}
+    with session_factory() as db:
+        assert db.get(models.User, 1).consecutive_login_days == 4
+
+
+def test_login_tasks_applied_out_of_order_only_move_forward(session_factory):
+    with session_factory() as db:
+        db.add(models.User(id=1, telegram_id=1, consecutive_login_days=1,
+                           last_login_date=datetime(2026, 4, 30, 9, 0, tzinfo=timezone.utc)))
+        db.flush()
+        # Dünkü ve bugünkü girişlerin görevleri ters sırada çalışır
+        tasks.enqueue(db, "record_login", user_id=1, at="2026-05-02T08:00:00+00:00")
+        tasks.enqueue(db, "record_login", user_id=1, at="2026-05-01T20:00:00+00:00")
+        db.commit()
+
+    assert tasks.drain(session_factory) == {"ok": 2}
+    with session_factory() as db:
+        user = db.get(models.User, 1)
+        assert user.last_login_date.replace(tzinfo=timezone.utc) == datetime(2026, 5, 2, 8, 0, tzinfo=timezone.utc)
+        assert user.consecutive_login_days == 2
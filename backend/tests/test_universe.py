@@ -0,0 +1,32 @@
+from sqlalchemy import create_engine, func, inspect, select
+from sqlalchemy.orm import Session
+
+import models
+from bench.universe import seed_universe
+
+
+def _seed(users=300):
+    engine = create_engine("sqlite://")
+    models.Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        universe = seed_universe(db, users=users, missions=10, nfts=5, proposals=4, seed=7)
+        totals = db.execute(select(func.sum(models.User.xp), func.sum(models.User.stars), func.count())).one()
+        star_sum = db.execute(select(func.sum(models.StarTransaction.amount))).scalar()
+        vote_power = db.execute(select(func.sum(models.DAOProposal.total_yes_power + models.DAOProposal.total_no_power))).scalar()
+        vote_count = db.execute(select(func.count(models.DAOVote.id))).scalar()
+    return engine, universe, tuple(totals), star_sum, vote_power, vote_count
+
+
+def test_seed_is_deterministic_and_consistent():
+    engine, universe, totals, star_sum, vote_power, vote_count = _seed()
+    assert _seed()[2:] == (totals, star_sum, vote_power, vote_count)
+    assert totals[2] == 300
+    # Bakiye işlemlerin toplamına, teklif toplamları oylara eşittir
+    assert totals[1] == star_sum
+    assert vote_power == vote_count
+    assert universe["rows"]["user_missions"] == universe["rows"]["user_mission_logs"]
+    with Session(engine) as db:
+        completions = db.execute(select(func.sum(models.UserMissionState.completion_count))).scalar()
+    assert completions == universe["rows"]["user_missions"]
+    # Ertelenen indeksler yeniden oluşturulmuştur
+    assert "ix_star_transactions_user_id" in {ix["name"] for ix in inspect(engine).get_indexes("star_transactions")}
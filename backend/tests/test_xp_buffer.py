@@ -0,0 +1,85 @@
+import time
+
+import pytest
+
+import anticheat
+import metrics
+import models
+import xp_buffer
+from query_profiler import capture_queries
+
+
+@pytest.fixture
+def users(session_factory):
+    with session_factory() as db:
+        db.add_all([models.User(id=i, telegram_id=i, xp=90, level=1, stars=0) for i in (1, 2, 3)])
+        db.commit()
+
+
+@pytest.fixture
+def enabled(monkeypatch):
+    monkeypatch.setattr(xp_buffer, "ENABLED", True)
+
+
+def test_disabled_credit_writes_user_directly(session_factory, users):
+    with session_factory() as db:
+        user = db.get(models.User, 1)
+        xp_buffer.credit(db, user, xp=20, stars=5, reason="test")
+        db.commit()
+        assert (user.xp, user.level, user.stars) == (110, 2, 5)
+        assert db.query(models.PendingCredit).count() == 0
+        assert db.query(models.StarTransaction).one().amount == 5
+
+
+def test_credits_are_coalesced_into_one_update(session_factory, users, enabled, monkeypatch):
+    with session_factory() as db:
+        for user_id, xp, stars in [(1, 10, 0), (1, 5, 3), (2, 300, 0), (3, 1, 0)]:
+            xp_buffer.credit(db, db.get(models.User, user_id), xp=xp, stars=stars, reason="test")
+        db.commit()
+        # Kullanıcı satırı henüz değişmedi, ama okuma bekleyen farkı görür
+        user = db.get(models.User, 1)
+        assert user.xp == 90
+        assert (xp_buffer.overlay(db, user).xp, user.level, user.stars) == (105, 2, 3)
+        db.commit()
+        db.expire_all()
+        assert db.get(models.User, 1).xp == 90
+
+    # DELETE ... RETURNING + tek UPDATE + defter INSERT'i; defter satırı ORM ile
+    # yazıldığı için Stars metriği ve hız dedektörü de bu kazanımı görür
+    detector = anticheat.Detector()
+    monkeypatch.setattr(anticheat, "detector", detector)
+    before = metrics.STARS.values().get(("credit",), 0)
+    with capture_queries() as stats:
+        assert xp_buffer.flush(session_factory) == 4
+    assert stats.count == 3
+    assert metrics.STARS.values()[("credit",)] == before + 3
+    assert detector._windows[1].features(time.time()).stars_per_hour == 3
+    with session_factory() as db:
+        rows = {u.id: (u.xp, u.level, u.stars) for u in db.query(models.User)}
+        assert rows == {1: (105, 2, 3), 2: (390, 3, 0), 3: (91, 1, 0)}
+        assert db.query(models.PendingCredit).count() == 0
+        assert [t.amount for t in db.query(models.StarTransaction)] == [3]
+    assert xp_buffer.flush(session_factory) == 0
+
+
+def test_settle_and_rollback(session_factory, users, enabled):
+    with session_factory() as db:
+        xp_buffer.credit(db, db.get(models.User, 1), stars=50, reason="test")
+        db.rollback()
+        assert db.query(models.PendingCredit).count() == 0
+
+        xp_buffer.credit(db, db.get(models.User, 1), stars=50, reason="test")
+        xp_buffer.credit(db, db.get(models.User, 2), stars=7, reason="test")
+        db.commit()
+
+        # Harcamadan önce yalnızca bu kullanıcının bekleyen kazanımları uygulanır
+        user = db.get(models.User, 1)
+        xp_buffer.settle(db, user)
+        assert user.stars == 50
+        user.stars -= 30
+        db.commit()
+
+    assert xp_buffer.flush(session_factory) == 1
+    with session_factory() as db:
+        assert db.get(models.User, 1).stars == 20
+        assert db.get(models.User, 2).stars == 7
@@ -0,0 +1,259 @@
+# xp_buffer.py - Sık XP/Stars kazanımlarını birleştirerek yazan opsiyonel katman
+#
+# Varsayılan olarak kapalıdır (XP_COALESCE_ENABLED=0); o durumda credit() değeri
+# doğrudan kullanıcı satırına yazar ve davranış eskisiyle aynıdır.
+#
+# Açıkken:
+# - credit() kullanıcı satırını güncellemek yerine çağıranın oturumuna bir
+#   pending_credits satırı ekler. Bu satır isteğin kendi commit'iyle kalıcı olur
+#   (write-ahead günlük); süreç çökse de kazanım kaybolmaz.
+# - Flusher her XP_FLUSH_INTERVAL saniyede bekleyen satırları DELETE ... RETURNING
+#   ile "alır", kullanıcı başına toplar ve tek bir `UPDATE users SET xp = xp + CASE
+#   id ... END, stars = ..., level = ...` ile yazar; Stars için defter kayıtları
+#   (star_transactions) aynı işlemde eklenir. Satırların silinmesi ile kullanıcıya
+#   uygulanması tek işlemde olduğundan her kazanım tam bir kez uygulanır; birden
+#   çok worker aynı tabloyu güvenle boşaltabilir.
+# - Okuma yolları overlay() ile bekleyen farkları kullanıcı nesnesine yansıtır;
+#   kullanıcı kazandığı XP'yi hemen görür.
+# - Stars harcayan yollar bakiye kontrolünden önce settle() çağırır; kullanıcının
+#   bekleyen kazanımları harcamayla aynı işlemde uygulanır.
+#
+# Ortam değişkenleri:
+#   XP_COALESCE_ENABLED=0   1 ise kazanımlar birleştirilir
+#   XP_FLUSH_INTERVAL=0.5   flush aralığı (saniye)
+#   XP_FLUSH_MAX_ROWS=5000  tek flush işleminde uygulanan en fazla satır
+#
+# Çökme sonrası (veya katman kapatıldıktan sonra) kalan satırlar
+# `python xp_buffer.py` ile uygulanır.
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import case, delete, func, select, update
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+
+import levels
+import metrics
+from database import SessionLocal
+from models import PendingCredit, StarTransaction, TransactionType, User
+
+logger = logging.getLogger(__name__)
+
+ENABLED = os.getenv("XP_COALESCE_ENABLED", "0") not in ("0", "false", "False")
+FLUSH_INTERVAL = float(os.getenv("XP_FLUSH_INTERVAL", "0.5"))
+FLUSH_MAX_ROWS = int(os.getenv("XP_FLUSH_MAX_ROWS", "5000"))
+
+# Tek UPDATE'teki kullanıcı sayısı (bağlama parametresi sınırları için)
+UPDATE_BATCH_USERS = 500
+
+
+def credit(db: Session, user: User, xp: int = 0, stars: int = 0, reason: str = "credit",
+           description: Optional[str] = None) -> None:
+    """
+    Kullanıcıya XP ve/veya Stars kazandırır. Commit etmez; kazanım çağıranın
+    commit'iyle kalıcı olur. Katman açıksa kullanıcı nesnesi değişmez.
+    """
+    if not xp and not stars:
+        return
+    if not ENABLED:
+        if xp:
+            levels.apply_xp(user, xp)
+        if stars:
+            user.stars = (user.stars or 0) + stars
+            db.add(_ledger_row(user.id, stars, reason, description))
+        return
+    db.add(PendingCredit(user_id=user.id, xp=xp, stars=stars, reason=reason, description=description,
+                         created_at=datetime.now(timezone.utc)))
+
+
+def _ledger_row(user_id: int, stars: int, reason: str, description: Optional[str]) -> StarTransaction:
+    return StarTransaction(
+        user_id=user_id,
+        amount=stars,
+        transaction_type=TransactionType.CREDIT if stars > 0 else TransactionType.DEBIT,
+        reason=reason,
+        description=description,
+    )
+
+
+def _claim(db: Session, *criteria, limit: Optional[int] = None) -> List[Tuple]:
+    """Bekleyen satırları siler ve içeriklerini döndürür; çağıranın işleminde kalır"""
+    ids = select(PendingCredit.id).where(*criteria).order_by(PendingCredit.id)
+    if limit:
+        ids = ids.limit(limit)
+    return db.execute(
+        delete(PendingCredit)
+        .where(PendingCredit.id.in_(ids))
+        .returning(PendingCredit.user_id, PendingCredit.xp, PendingCredit.stars,
+                   PendingCredit.reason, PendingCredit.description)
+        .execution_options(synchronize_session=False)
+    ).all()
+
+
+def apply_credits(db: Session, rows: Iterable[Tuple]) -> Dict[int, Tuple[int, int]]:
+    """
+    (user_id, xp, stars, reason, description) satırlarını kullanıcı başına toplayıp
+    toplu UPDATE ve defter kayıtlarıyla yazar (commit etmez). Kullanıcı nesneleri
+    güncellenmez; aynı oturumdaki nesneler gerekiyorsa tazelenmelidir.
+    """
+    totals: Dict[int, Tuple[int, int]] = {}
+    ledger = []
+    for user_id, xp, stars, reason, description in rows:
+        total_xp, total_stars = totals.get(user_id, (0, 0))
+        totals[user_id] = (total_xp + xp, total_stars + stars)
+        if stars:
+            ledger.append(_ledger_row(user_id, stars, reason, description))
+
+    items = list(totals.items())
+    for start in range(0, len(items), UPDATE_BATCH_USERS):
+        batch = dict(items[start:start + UPDATE_BATCH_USERS])
+        xp_delta = case({user_id: xp for user_id, (xp, _) in batch.items()}, value=User.id, else_=0)
+        stars_delta = case({user_id: stars for user_id, (_, stars) in batch.items()}, value=User.id, else_=0)
+        new_xp = func.coalesce(User.xp, 0) + xp_delta
+        db.execute(
+            update(User)
+            .where(User.id.in_(batch))
+            .values(xp=new_xp, stars=func.coalesce(User.stars, 0) + stars_delta, level=levels.level_expression(new_xp))
+            .execution_options(synchronize_session=False)
+        )
+    # Defter satırları ORM ile eklenir: flush'ta toplu INSERT olarak yazılır ve
+    # session.new'i izleyen Stars metrikleri ile hız dedektörü bu kazanımları da görür
+    db.add_all(ledger)
+    return totals
+
+
+def flush(session_factory=None, limit: int = FLUSH_MAX_ROWS) -> int:
+    """En fazla `limit` bekleyen kazanımı tek işlemde uygular; uygulanan satır sayısını döndürür"""
+    session_factory = session_factory or flusher.session_factory
+    started = time.perf_counter()
+    with session_factory() as db:
+        rows = _claim(db, limit=limit)
+        if not rows:
+            db.rollback()
+            return 0
+        apply_credits(db, rows)
+        db.commit()
+    metrics.CREDITS_FLUSHED.inc(len(rows))
+    metrics.CREDIT_FLUSH_DURATION.observe(time.perf_counter() - started)
+    return len(rows)
+
+
+def flush_all(session_factory=None) -> int:
+    """Bekleyen tüm kazanımları partiler halinde uygular"""
+    total = 0
+    while True:
+        applied = flush(session_factory)
+        total += applied
+        if applied < FLUSH_MAX_ROWS:
+            return total
+
+
+def settle(db: Session, user: User) -> None:
+    """
+    Kullanıcının bekleyen kazanımlarını çağıranın işleminde hemen uygular ve
+    nesneyi tazeler. Stars harcamadan (bakiye kontrolünden) ya da mutlak değer
+    yazmadan önce çağrılır. Satır kilitlenir (destekleyen veritabanlarında);
+    flush işlemi çağıranın commit'ine kadar bu kullanıcıyı güncelleyemez.
+    """
+    if not ENABLED:
+        return
+    rows = _claim(db, PendingCredit.user_id == user.id)
+    if rows:
+        apply_credits(db, rows)
+    db.refresh(user, ["xp", "stars", "level"], with_for_update=True)
+
+
+def pending_totals(db: Session, user_ids: Sequence[int]) -> Dict[int, Tuple[int, int]]:
+    """Kullanıcı başına henüz uygulanmamış (xp, stars) toplamları"""
+    if not ENABLED or not user_ids:
+        return {}
+    rows = db.execute(
+        select(PendingCredit.user_id, func.sum(PendingCredit.xp), func.sum(PendingCredit.stars))
+        .where(PendingCredit.user_id.in_(user_ids))
+        .group_by(PendingCredit.user_id)
+    ).all()
+    return {user_id: (xp or 0, stars or 0) for user_id, xp, stars in rows}
+
+
+def overlay(db: Session, user: User) -> User:
+    """
+    Bekleyen kazanımları kullanıcı nesnesine yansıtır (okuma yolları için).
+    Değerler "kirli" işaretlenmez, yani commit'te yazılmaz; bu nesne üzerinden
+    XP/Stars değiştirilecekse önce settle() kullanılmalıdır.
+    """
+    pending = pending_totals(db, [user.id]).get(user.id)
+    if pending:
+        xp = (user.xp or 0) + pending[0]
+        set_committed_value(user, "xp", xp)
+        set_committed_value(user, "stars", (user.stars or 0) + pending[1])
+        set_committed_value(user, "level", levels.level_for_xp(xp))
+    return user
+
+
+def pending_count(session_factory=None) -> int:
+    session_factory = session_factory or flusher.session_factory
+    with session_factory() as db:
+        return db.execute(select(func.count()).select_from(PendingCredit)).scalar() or 0
+
+
+class Flusher:
+    """Bekleyen kazanımları düzenli aralıklarla uygulayan olay döngüsü işi"""
+
+    def __init__(self, interval: float = FLUSH_INTERVAL):
+        self.interval = interval
+        self.session_factory = SessionLocal
+        self._stop: Optional[asyncio.Event] = None
+        self._runner: Optional[asyncio.Task] = None
+
+    async def start(self, session_factory=None) -> None:
+        if self._runner is not None:
+            return
+        if session_factory is not None:
+            self.session_factory = session_factory
+        self._stop = asyncio.Event()
+        self._runner = asyncio.create_task(self._run())
+        logger.info("XP flusher started", extra={"interval": self.interval})
+
+    async def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                await asyncio.wait_for(self._stop.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await asyncio.to_thread(flush_all, self.session_factory)
+            except Exception:
+                logger.exception("XP flush failed")
+
+    async def stop(self) -> None:
+        """Döngüyü durdurur; kapanmadan önce bekleyenler son kez uygulanır"""
+        if self._runner is None:
+            return
+        self._stop.set()
+        await asyncio.gather(self._runner, return_exceptions=True)
+        self._runner = None
+        logger.info("XP flusher stopped")
+
+
+flusher = Flusher()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Bekleyen XP/Stars kazanımlarını kullanıcılara uygular")
+    parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    started = time.perf_counter()
+    applied = flush_all()
+    logger.info(f"{applied} bekleyen kazanım uygulandı ({time.perf_counter() - started:.2f} sn)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())